@@ -0,0 +1,117 @@
+#!/bin/bash
+# 文件：geo_db/index_advisor.sh
+# 用途：根据真实负载检查索引覆盖情况
+#   1. pg_stat_statements 中涉及监控表的查询（按总耗时排序）
+#   2. 各表（分区表按父表汇总）的顺序扫描 / 索引扫描次数
+#   3. 从未被使用的索引
+#
+# 用法：
+#   bash index_advisor.sh --reset          # 清空统计，然后对 API 跑一段真实或压测流量
+#   bash index_advisor.sh [--top N]        # 输出报告
+#
+# 依赖 pg_stat_statements（docker-compose.yml 中已通过 shared_preload_libraries 加载，
+# 旧容器需要重建：make down && make up）
+
+set -e
+
+TOP_N=20
+RESET=0
+
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --top) TOP_N="$2"; shift 2 ;;
+        --reset) RESET=1; shift ;;
+        *) echo "❌ 未知参数: $1"; exit 1 ;;
+    esac
+done
+
+# 进入数据库目录
+cd "$(dirname "$0")"
+
+# 检查 PostgreSQL 是否运行
+if ! docker ps | grep -q geo_db; then
+    echo "❌ 数据库容器未运行，请先执行: make db-up"
+    exit 1
+fi
+
+CONTAINER_NAME=$(docker ps --filter "name=geo_db" --format "{{.Names}}" | head -1)
+
+if [ -z "$CONTAINER_NAME" ]; then
+    echo "❌ 找不到数据库容器"
+    exit 1
+fi
+
+PSQL="docker exec -i $CONTAINER_NAME psql -U geo_admin -d geo_monitor -v ON_ERROR_STOP=1"
+
+if ! $PSQL -At -c "SHOW shared_preload_libraries;" | grep -q pg_stat_statements; then
+    echo "❌ 未加载 pg_stat_statements，请确认 docker-compose.yml 的 command 配置并重建容器"
+    exit 1
+fi
+$PSQL -c "CREATE EXTENSION IF NOT EXISTS pg_stat_statements;" > /dev/null
+
+if [ "$RESET" = "1" ]; then
+    $PSQL -c "SELECT pg_stat_statements_reset(); SELECT pg_stat_reset();" > /dev/null
+    echo "✅ 统计已清空，请对 API 产生一段负载后再运行: bash index_advisor.sh"
+    exit 0
+fi
+
+TABLES="'search_records', 'search_queries', 'citations', 'executor_sub_query_log', 'task_jobs', 'task_query'"
+
+echo "📊 1. 涉及监控表的查询 Top ${TOP_N}（按总耗时）"
+$PSQL <<SQL
+SELECT
+    calls,
+    ROUND(total_exec_time::numeric, 1) AS total_ms,
+    ROUND(mean_exec_time::numeric, 2) AS mean_ms,
+    rows,
+    shared_blks_read AS blks_read,
+    LEFT(regexp_replace(query, '\s+', ' ', 'g'), 160) AS query
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+  AND query ~* '(search_records|search_queries|citations|executor_sub_query_log|task_query|task_jobs)'
+  AND query !~* '^\s*(CREATE|ALTER|DROP|ANALYZE|VACUUM|COPY)'
+ORDER BY total_exec_time DESC
+LIMIT ${TOP_N};
+SQL
+
+echo ""
+echo "📊 2. 顺序扫描统计（分区表按父表汇总，seq_tup_read 高说明缺少索引）"
+$PSQL <<SQL
+SELECT
+    COALESCE(parent.relname, t.relname) AS table_name,
+    SUM(t.seq_scan) AS seq_scan,
+    SUM(t.seq_tup_read) AS seq_tup_read,
+    SUM(COALESCE(t.idx_scan, 0)) AS idx_scan,
+    SUM(t.n_live_tup) AS live_rows,
+    ROUND(100.0 * SUM(t.seq_scan) / NULLIF(SUM(t.seq_scan) + SUM(COALESCE(t.idx_scan, 0)), 0), 1) AS seq_scan_pct
+FROM pg_stat_user_tables t
+LEFT JOIN pg_inherits i ON i.inhrelid = t.relid
+LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+WHERE COALESCE(parent.relname, t.relname) IN (${TABLES})
+GROUP BY COALESCE(parent.relname, t.relname)
+ORDER BY seq_tup_read DESC;
+SQL
+
+echo ""
+echo "📊 3. 未被使用的索引（自上次 --reset 以来 idx_scan = 0，主键和唯一约束除外）"
+$PSQL <<SQL
+SELECT
+    COALESCE(parent.relname, s.relname) AS table_name,
+    COALESCE(parent_idx.relname, s.indexrelname) AS index_name,
+    SUM(s.idx_scan) AS idx_scan,
+    pg_size_pretty(SUM(pg_relation_size(s.indexrelid))::bigint) AS size
+FROM pg_stat_user_indexes s
+JOIN pg_index ix ON ix.indexrelid = s.indexrelid
+LEFT JOIN pg_inherits i ON i.inhrelid = s.relid
+LEFT JOIN pg_class parent ON parent.oid = i.inhparent
+LEFT JOIN pg_inherits ii ON ii.inhrelid = s.indexrelid
+LEFT JOIN pg_class parent_idx ON parent_idx.oid = ii.inhparent
+WHERE COALESCE(parent.relname, s.relname) IN (${TABLES})
+  AND NOT ix.indisunique
+GROUP BY COALESCE(parent.relname, s.relname), COALESCE(parent_idx.relname, s.indexrelname)
+HAVING SUM(s.idx_scan) = 0
+ORDER BY table_name, index_name;
+SQL
+
+echo ""
+echo "💡 提示: 对 Top 查询可执行 EXPLAIN (ANALYZE, BUFFERS) 确认是否走索引、是否只扫描了近期分区"
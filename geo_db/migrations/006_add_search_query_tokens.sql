@@ -0,0 +1,29 @@
+-- ============================================
+-- 数据库升级脚本：添加拓展词分词缓存表 v3.2
+-- 统计报告按查询词缓存 jieba 分词结果，只对新出现的查询词重新分词
+-- ============================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS search_query_tokens (
+    query_hash TEXT PRIMARY KEY,                -- md5(query)，与 search_queries.query 对应
+    query TEXT NOT NULL,                        -- 原始查询词
+    tokens JSONB NOT NULL DEFAULT '[]',         -- 分词结果（未过滤停用词）
+    tokenizer_version TEXT NOT NULL,            -- 分词版本 + 自定义词典摘要，变化后自动重新分词
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_query_tokens_version ON search_query_tokens(tokenizer_version);
+
+-- 版本记录
+INSERT INTO schema_version (version, description) 
+VALUES ('3.2', '添加拓展词分词缓存表 search_query_tokens')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 006 completed successfully!' as status;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
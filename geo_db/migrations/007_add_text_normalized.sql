@@ -0,0 +1,30 @@
+-- ============================================
+-- 数据库升级脚本：添加写入时编码规范化标记 v3.3
+-- text_normalized 记录该行文本在写入时使用的规范化版本（core/encoding.py 中的 TEXT_NORMALIZATION_VERSION）
+-- NULL 表示旧数据，读取时仍需逐字段修复；可用 scripts/fix_encoding.py --backfill 回填
+-- ============================================
+
+BEGIN;
+
+ALTER TABLE search_records ADD COLUMN IF NOT EXISTS text_normalized SMALLINT;
+ALTER TABLE search_queries ADD COLUMN IF NOT EXISTS text_normalized SMALLINT;
+ALTER TABLE citations ADD COLUMN IF NOT EXISTS text_normalized SMALLINT;
+ALTER TABLE executor_sub_query_log ADD COLUMN IF NOT EXISTS text_normalized SMALLINT;
+
+COMMENT ON COLUMN search_records.text_normalized IS '写入时编码规范化版本，NULL 表示未规范化';
+COMMENT ON COLUMN search_queries.text_normalized IS '写入时编码规范化版本，NULL 表示未规范化';
+COMMENT ON COLUMN citations.text_normalized IS '写入时编码规范化版本，NULL 表示未规范化';
+COMMENT ON COLUMN executor_sub_query_log.text_normalized IS '写入时编码规范化版本，NULL 表示未规范化';
+
+-- 版本记录
+INSERT INTO schema_version (version, description) 
+VALUES ('3.3', '添加 text_normalized 编码规范化标记列')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 007 completed successfully!' as status;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
@@ -0,0 +1,348 @@
+-- ============================================
+-- 数据库升级脚本：按月分区 search_records / citations / executor_sub_query_log v3.4
+--
+-- 1. 三张表改为按 created_at 按月 RANGE 分区（分区命名：<表名>_pYYYYMM，另有 <表名>_default 兜底）
+-- 2. 分区表的主键 / 唯一约束必须包含分区键：
+--    - 主键改为 (id, created_at)，id 继续使用原序列
+--    - citations 唯一约束改为 (record_id, url, created_at)；同一次 save_to_db 在一个事务内写入，
+--      created_at（CURRENT_TIMESTAMP 为事务开始时间）相同，去重语义不变
+-- 3. 外键无法引用分区表的 id（唯一约束必须包含分区键），以下外键被移除，
+--    原有的级联删除改由分区表上的语句级 AFTER DELETE 触发器实现（见第 5 节）：
+--    - search_queries.record_id -> search_records（ON DELETE CASCADE）
+--    - citations.record_id -> search_records（ON DELETE CASCADE）
+--    - executor_sub_query_log.record_id -> search_records（ON DELETE CASCADE）
+--    - executor_sub_query_log.citation_id -> citations（ON DELETE SET NULL）
+--    不再校验插入时引用的记录是否存在（由应用保证）
+-- 4. 提供分区维护函数：
+--    - geo_ensure_partitions(months_ahead)：预建当前月起 N 个月的分区
+--    - geo_detach_partitions_before(cutoff)：只分离 cutoff 之前的整月分区（不移动、不删除其他表的数据），返回被分离的表名
+--    由 geo_db/partition_maintenance.sh 调用；search_queries 不分区，对应的行留在原表，
+--    归档后删除分区（--drop）时由脚本导出并删除
+--
+-- 已执行过本迁移的库可以重新执行本文件：表结构部分会跳过，函数和级联触发器会被更新
+--
+-- 注意：数据量大时迁移会持有表锁并复制全部数据，请在维护窗口执行，执行前先备份
+-- ============================================
+
+BEGIN;
+
+-- ============================================
+-- 1. 分区维护函数
+-- ============================================
+CREATE OR REPLACE FUNCTION geo_create_monthly_partition(parent TEXT, month_start DATE)
+RETURNS TEXT AS $$
+DECLARE
+    part_name TEXT := parent || '_p' || to_char(month_start, 'YYYYMM');
+BEGIN
+    IF to_regclass(part_name) IS NULL THEN
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+            part_name, parent, month_start, (month_start + INTERVAL '1 month')::date
+        );
+    END IF;
+    RETURN part_name;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION geo_ensure_partitions(months_ahead INTEGER DEFAULT 3, from_month DATE DEFAULT NULL)
+RETURNS VOID AS $$
+DECLARE
+    parent TEXT;
+    month_start DATE;
+    start_month DATE := date_trunc('month', COALESCE(from_month, CURRENT_DATE))::date;
+    end_month DATE := (date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead))::date;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['search_records', 'citations', 'executor_sub_query_log'] LOOP
+        month_start := start_month;
+        WHILE month_start <= end_month LOOP
+            PERFORM geo_create_monthly_partition(parent, month_start);
+            month_start := (month_start + INTERVAL '1 month')::date;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION geo_detach_partitions_before(cutoff DATE)
+RETURNS SETOF TEXT AS $$
+DECLARE
+    parent TEXT;
+    part RECORD;
+    month_start DATE;
+BEGIN
+    FOREACH parent IN ARRAY ARRAY['executor_sub_query_log', 'citations', 'search_records'] LOOP
+        FOR part IN
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = parent::regclass
+              AND c.relname ~ ('^' || parent || '_p[0-9]{6}$')
+            ORDER BY c.relname
+        LOOP
+            month_start := to_date(right(part.relname, 6), 'YYYYMM');
+            CONTINUE WHEN (month_start + INTERVAL '1 month')::date > cutoff;
+
+            EXECUTE format('ALTER TABLE %I DETACH PARTITION %I', parent, part.relname);
+            RETURN NEXT part.relname;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- 2. search_records
+-- ============================================
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'search_records'::regclass) = 'p' THEN
+        RAISE NOTICE 'search_records 已是分区表，跳过';
+        RETURN;
+    END IF;
+
+    ALTER SEQUENCE search_records_id_seq OWNED BY NONE;
+    ALTER TABLE search_records RENAME TO search_records_legacy;
+
+    CREATE TABLE search_records (
+        id INTEGER NOT NULL DEFAULT nextval('search_records_id_seq'),
+        keyword TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        prompt_type TEXT DEFAULT 'default',
+        prompt TEXT,
+        full_answer TEXT,
+        response_time_ms INTEGER,
+        search_status TEXT DEFAULT 'completed',
+        error_message TEXT,
+        task_id INTEGER,
+        task_query_id INTEGER,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        text_normalized SMALLINT
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE TABLE search_records_default PARTITION OF search_records DEFAULT;
+
+    month_start := date_trunc('month', COALESCE((SELECT MIN(created_at) FROM search_records_legacy), CURRENT_DATE))::date;
+    WHILE month_start <= (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date LOOP
+        PERFORM geo_create_monthly_partition('search_records', month_start);
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+
+    INSERT INTO search_records
+        (id, keyword, platform, prompt_type, prompt, full_answer, response_time_ms, search_status,
+         error_message, task_id, task_query_id, created_at, updated_at, text_normalized)
+    SELECT
+        id, keyword, platform, prompt_type, prompt, full_answer, response_time_ms, search_status,
+        error_message, task_id, task_query_id, COALESCE(created_at, CURRENT_TIMESTAMP), updated_at, text_normalized
+    FROM search_records_legacy;
+
+    -- 同时移除引用旧表的外键（search_queries / citations / executor_sub_query_log），级联删除见第 5 节的触发器
+    DROP TABLE search_records_legacy CASCADE;
+    ALTER SEQUENCE search_records_id_seq OWNED BY search_records.id;
+
+    ALTER TABLE search_records ADD CONSTRAINT search_records_pkey PRIMARY KEY (id, created_at);
+    ALTER TABLE search_records ADD CONSTRAINT search_records_task_id_fkey
+        FOREIGN KEY (task_id) REFERENCES task_jobs(id) ON DELETE SET NULL;
+    ALTER TABLE search_records ADD CONSTRAINT search_records_task_query_id_fkey
+        FOREIGN KEY (task_query_id) REFERENCES task_query(id) ON DELETE SET NULL;
+
+    CREATE INDEX idx_search_records_keyword ON search_records(keyword);
+    CREATE INDEX idx_search_records_platform ON search_records(platform);
+    CREATE INDEX idx_search_records_created_at ON search_records(created_at DESC);
+    CREATE INDEX idx_search_records_status ON search_records(search_status);
+    CREATE INDEX idx_search_records_task_id ON search_records(task_id) WHERE task_id IS NOT NULL;
+    CREATE INDEX idx_search_records_task_query_id ON search_records(task_query_id) WHERE task_query_id IS NOT NULL;
+    -- 按 id 单行查找（分区表主键以 id 开头，但跨分区仍需逐个分区探测）
+    CREATE INDEX idx_search_records_id ON search_records(id);
+
+    CREATE TRIGGER update_search_records_updated_at
+        BEFORE UPDATE ON search_records
+        FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+END $$;
+
+-- ============================================
+-- 3. citations
+-- ============================================
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'citations'::regclass) = 'p' THEN
+        RAISE NOTICE 'citations 已是分区表，跳过';
+        RETURN;
+    END IF;
+
+    ALTER SEQUENCE citations_id_seq OWNED BY NONE;
+    ALTER TABLE citations RENAME TO citations_legacy;
+
+    CREATE TABLE citations (
+        id INTEGER NOT NULL DEFAULT nextval('citations_id_seq'),
+        record_id INTEGER NOT NULL,
+        cite_index INTEGER,
+        url TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        title TEXT,
+        snippet TEXT,
+        site_name TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        text_normalized SMALLINT
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE TABLE citations_default PARTITION OF citations DEFAULT;
+
+    month_start := date_trunc('month', COALESCE((SELECT MIN(created_at) FROM citations_legacy), CURRENT_DATE))::date;
+    WHILE month_start <= (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date LOOP
+        PERFORM geo_create_monthly_partition('citations', month_start);
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+
+    INSERT INTO citations
+        (id, record_id, cite_index, url, domain, title, snippet, site_name, created_at, text_normalized)
+    SELECT
+        id, record_id, cite_index, url, domain, title, snippet, site_name, COALESCE(created_at, CURRENT_TIMESTAMP), text_normalized
+    FROM citations_legacy;
+
+    -- 同时移除 executor_sub_query_log.citation_id 外键，ON DELETE SET NULL 见第 5 节的触发器
+    DROP TABLE citations_legacy CASCADE;
+    ALTER SEQUENCE citations_id_seq OWNED BY citations.id;
+
+    ALTER TABLE citations ADD CONSTRAINT citations_pkey PRIMARY KEY (id, created_at);
+    ALTER TABLE citations ADD CONSTRAINT unique_citation UNIQUE (record_id, url, created_at);
+
+    CREATE INDEX idx_citations_record ON citations(record_id);
+    CREATE INDEX idx_citations_domain ON citations(domain);
+    CREATE INDEX idx_citations_domain_created ON citations(domain, created_at DESC);
+    CREATE INDEX idx_citations_url ON citations(url);
+    CREATE INDEX idx_citations_id ON citations(id);
+END $$;
+
+-- ============================================
+-- 4. executor_sub_query_log
+-- ============================================
+DO $$
+DECLARE
+    month_start DATE;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'executor_sub_query_log'::regclass) = 'p' THEN
+        RAISE NOTICE 'executor_sub_query_log 已是分区表，跳过';
+        RETURN;
+    END IF;
+
+    ALTER SEQUENCE executor_sub_query_log_id_seq OWNED BY NONE;
+    ALTER TABLE executor_sub_query_log RENAME TO executor_sub_query_log_legacy;
+
+    CREATE TABLE executor_sub_query_log (
+        id INTEGER NOT NULL DEFAULT nextval('executor_sub_query_log_id_seq'),
+        task_query_id INTEGER NOT NULL,
+        sub_query TEXT,
+        url TEXT,
+        domain TEXT,
+        title TEXT,
+        snippet TEXT,
+        site_name TEXT,
+        cite_index INTEGER,
+        record_id INTEGER,
+        citation_id INTEGER,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        text_normalized SMALLINT,
+        CONSTRAINT check_sub_query_or_url CHECK (sub_query IS NOT NULL OR url IS NOT NULL)
+    ) PARTITION BY RANGE (created_at);
+
+    CREATE TABLE executor_sub_query_log_default PARTITION OF executor_sub_query_log DEFAULT;
+
+    month_start := date_trunc('month', COALESCE((SELECT MIN(created_at) FROM executor_sub_query_log_legacy), CURRENT_DATE))::date;
+    WHILE month_start <= (date_trunc('month', CURRENT_DATE) + INTERVAL '3 months')::date LOOP
+        PERFORM geo_create_monthly_partition('executor_sub_query_log', month_start);
+        month_start := (month_start + INTERVAL '1 month')::date;
+    END LOOP;
+
+    INSERT INTO executor_sub_query_log
+        (id, task_query_id, sub_query, url, domain, title, snippet, site_name, cite_index,
+         record_id, citation_id, created_at, text_normalized)
+    SELECT
+        id, task_query_id, sub_query, url, domain, title, snippet, site_name, cite_index,
+        record_id, citation_id, COALESCE(created_at, CURRENT_TIMESTAMP), text_normalized
+    FROM executor_sub_query_log_legacy;
+
+    DROP TABLE executor_sub_query_log_legacy CASCADE;
+    ALTER SEQUENCE executor_sub_query_log_id_seq OWNED BY executor_sub_query_log.id;
+
+    ALTER TABLE executor_sub_query_log ADD CONSTRAINT executor_sub_query_log_pkey PRIMARY KEY (id, created_at);
+    ALTER TABLE executor_sub_query_log ADD CONSTRAINT executor_sub_query_log_task_query_id_fkey
+        FOREIGN KEY (task_query_id) REFERENCES task_query(id) ON DELETE CASCADE;
+
+    CREATE INDEX idx_executor_sub_query_log_task_query_id ON executor_sub_query_log(task_query_id);
+    CREATE INDEX idx_executor_sub_query_log_url ON executor_sub_query_log(url) WHERE url IS NOT NULL;
+    CREATE INDEX idx_executor_sub_query_log_domain ON executor_sub_query_log(domain) WHERE domain IS NOT NULL;
+    CREATE INDEX idx_executor_sub_query_log_created_at ON executor_sub_query_log(created_at DESC);
+    CREATE INDEX idx_executor_sub_query_log_sub_query ON executor_sub_query_log(sub_query) WHERE sub_query IS NOT NULL;
+    CREATE INDEX idx_executor_sub_query_log_record_id ON executor_sub_query_log(record_id) WHERE record_id IS NOT NULL;
+    CREATE INDEX idx_executor_sub_query_log_citation_id ON executor_sub_query_log(citation_id) WHERE citation_id IS NOT NULL;
+END $$;
+
+-- ============================================
+-- 5. 级联删除（代替被移除的外键）
+-- ============================================
+-- 分区表支持带转换表的语句级触发器：一条 DELETE 无论涉及多少分区只触发一次。
+-- 分离（DETACH）分区不是 DELETE，不会触发
+CREATE OR REPLACE FUNCTION geo_cascade_delete_search_records()
+RETURNS trigger AS $$
+BEGIN
+    DELETE FROM search_queries WHERE record_id IN (SELECT id FROM deleted_rows);
+    DELETE FROM citations WHERE record_id IN (SELECT id FROM deleted_rows);
+    DELETE FROM executor_sub_query_log WHERE record_id IN (SELECT id FROM deleted_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION geo_cascade_delete_citations()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE executor_sub_query_log SET citation_id = NULL
+    WHERE citation_id IN (SELECT id FROM deleted_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_search_records_cascade_delete ON search_records;
+CREATE TRIGGER trg_search_records_cascade_delete
+    AFTER DELETE ON search_records
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION geo_cascade_delete_search_records();
+
+DROP TRIGGER IF EXISTS trg_citations_cascade_delete ON citations;
+CREATE TRIGGER trg_citations_cascade_delete
+    AFTER DELETE ON citations
+    REFERENCING OLD TABLE AS deleted_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION geo_cascade_delete_citations();
+
+-- ============================================
+-- 6. 权限（新表和分区）
+-- ============================================
+-- geo_sentry 用户由 fix_permissions.sql 创建，不存在时跳过
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'geo_sentry') THEN
+        GRANT ALL PRIVILEGES ON ALL TABLES IN SCHEMA public TO geo_sentry;
+        GRANT ALL PRIVILEGES ON ALL SEQUENCES IN SCHEMA public TO geo_sentry;
+        GRANT EXECUTE ON FUNCTION geo_ensure_partitions(INTEGER, DATE) TO geo_sentry;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('3.4', 'search_records / citations / executor_sub_query_log 按 created_at 按月分区')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 008 completed successfully!' as status;
+SELECT parent.relname AS parent, COUNT(*) AS partitions
+FROM pg_inherits i
+JOIN pg_class parent ON parent.oid = i.inhparent
+WHERE parent.relname IN ('search_records', 'citations', 'executor_sub_query_log')
+GROUP BY parent.relname;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
@@ -0,0 +1,65 @@
+-- ============================================
+-- 数据库升级脚本：为 API 热点查询添加复合索引 v3.5
+--
+-- 对应 /status 的访问路径：
+-- 1. search_records：按 (task_id, task_query_id, platform) 过滤、按 created_at 排序（轮次推断），
+--    以及按 prompt_type / search_status 统计进度 —— 复合索引 + INCLUDE，统计查询可走 index-only scan
+-- 2. search_queries：按 record_id 关联、按 (query_order, id) 排序
+-- 3. citations：按 record_id 读取、按 (cite_index, id) 排序
+-- 4. executor_sub_query_log：按 task_query_id 读取、按 created_at 排序
+--
+-- 新索引的前导列覆盖了原有的单列索引，原索引一并删除以降低写入开销
+-- 分区表（v3.4）上不支持 CREATE INDEX CONCURRENTLY，数据量大时请在低峰期执行
+-- 索引使用情况可用 geo_db/index_advisor.sh 检查
+-- ============================================
+
+BEGIN;
+
+-- 1. search_records
+CREATE INDEX IF NOT EXISTS idx_search_records_task_lookup
+    ON search_records(task_id, task_query_id, platform, created_at)
+    INCLUDE (id, prompt_type, search_status)
+    WHERE task_id IS NOT NULL;
+DROP INDEX IF EXISTS idx_search_records_task_id;
+
+-- 2. search_queries
+CREATE INDEX IF NOT EXISTS idx_search_queries_record_order
+    ON search_queries(record_id, query_order, id);
+DROP INDEX IF EXISTS idx_search_queries_record;
+
+-- 3. citations
+CREATE INDEX IF NOT EXISTS idx_citations_record_order
+    ON citations(record_id, cite_index, id);
+DROP INDEX IF EXISTS idx_citations_record;
+
+-- 4. executor_sub_query_log
+CREATE INDEX IF NOT EXISTS idx_executor_sub_query_log_task_query_created
+    ON executor_sub_query_log(task_query_id, created_at);
+DROP INDEX IF EXISTS idx_executor_sub_query_log_task_query_id;
+
+-- 更新统计信息，让规划器尽快使用新索引
+ANALYZE search_records;
+ANALYZE search_queries;
+ANALYZE citations;
+ANALYZE executor_sub_query_log;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('3.5', '为 /status 热点查询添加复合索引')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 009 completed successfully!' as status;
+SELECT tablename, indexname, indexdef
+FROM pg_indexes
+WHERE indexname IN (
+    'idx_search_records_task_lookup',
+    'idx_search_queries_record_order',
+    'idx_citations_record_order',
+    'idx_executor_sub_query_log_task_query_created'
+);
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
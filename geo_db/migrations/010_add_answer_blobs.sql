@@ -0,0 +1,51 @@
+-- ============================================
+-- 数据库升级脚本：完整回答压缩存储 v3.6
+--
+-- 1. 创建 answer_blobs 表：按内容哈希去重，应用侧压缩（zstd，未安装 zstandard 时退化为 zlib）
+-- 2. search_records 添加 answer_hash 列，新记录不再写入 full_answer
+-- 3. 旧数据迁移：python scripts/migrate_answers.py（分批把 full_answer 移入 answer_blobs 并清空原列）
+--
+-- search_records 不再保存大文本，扫描和索引都更小；完整回答通过 core/answers.py 按需读取
+-- ============================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS answer_blobs (
+    content_hash TEXT PRIMARY KEY,                  -- 规范化后文本的 SHA-256（hex）
+    codec TEXT NOT NULL,                            -- zstd / zlib / none
+    raw_length INTEGER NOT NULL,                    -- 原文字符数
+    body BYTEA NOT NULL,                            -- 压缩后的 UTF-8 文本
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 内容已在应用侧压缩，关闭 TOAST 的二次压缩
+ALTER TABLE answer_blobs ALTER COLUMN body SET STORAGE EXTERNAL;
+
+ALTER TABLE search_records ADD COLUMN IF NOT EXISTS answer_hash TEXT;
+
+-- 清理无引用的 answer_blobs 时使用
+CREATE INDEX IF NOT EXISTS idx_search_records_answer_hash ON search_records(answer_hash) WHERE answer_hash IS NOT NULL;
+
+-- geo_sentry 用户由 fix_permissions.sql 创建，不存在时跳过
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'geo_sentry') THEN
+        GRANT ALL PRIVILEGES ON answer_blobs TO geo_sentry;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('3.6', '完整回答移入 answer_blobs（压缩 + 内容哈希去重）')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 010 completed successfully!' as status;
+SELECT COUNT(*) FILTER (WHERE full_answer IS NOT NULL AND full_answer <> '') AS pending_rows,
+       COUNT(*) FILTER (WHERE answer_hash IS NOT NULL) AS migrated_rows
+FROM search_records;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
@@ -0,0 +1,105 @@
+-- ============================================
+-- 数据库升级脚本：引用网页维度表 urls v3.7
+--
+-- 同一网页（url + title + snippet + site_name 相同）在每条记录、每一轮都会重复写入 citations
+-- 和 executor_sub_query_log。改为：
+-- 1. urls 表按内容哈希（url_hash）保存一份网页信息
+-- 2. citations / executor_sub_query_log 添加 url_id 引用 urls，新记录不再写入 title / snippet / site_name
+--    （url、domain 仍保留在事实表中：citations 唯一约束、域名统计和按域名的报告都依赖它们）
+-- 3. 读取时 LEFT JOIN urls，COALESCE 兼容未回填的旧行
+-- 4. 回填旧数据（第二个事务，数据量大时耗时较长）
+--
+-- url_hash = sha256(url || 0x1F || title || 0x1F || snippet || 0x1F || site_name)，NULL 视为空串，
+-- 与 core/urls.py 中的 url_hash() 一致
+-- ============================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS urls (
+    id SERIAL PRIMARY KEY,
+    url_hash TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    title TEXT,
+    snippet TEXT,
+    site_name TEXT,
+    text_normalized SMALLINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_urls_url ON urls(url);
+CREATE INDEX IF NOT EXISTS idx_urls_domain ON urls(domain);
+
+ALTER TABLE citations ADD COLUMN IF NOT EXISTS url_id INTEGER REFERENCES urls(id);
+ALTER TABLE executor_sub_query_log ADD COLUMN IF NOT EXISTS url_id INTEGER REFERENCES urls(id);
+
+CREATE INDEX IF NOT EXISTS idx_citations_url_id ON citations(url_id) WHERE url_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_executor_sub_query_log_url_id ON executor_sub_query_log(url_id) WHERE url_id IS NOT NULL;
+
+-- geo_sentry 用户由 fix_permissions.sql 创建，不存在时跳过
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'geo_sentry') THEN
+        GRANT ALL PRIVILEGES ON urls TO geo_sentry;
+        GRANT ALL PRIVILEGES ON SEQUENCE urls_id_seq TO geo_sentry;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('3.7', '引用网页维度表 urls（按内容哈希去重）')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 回填旧数据
+-- ============================================
+BEGIN;
+
+CREATE OR REPLACE FUNCTION geo_url_hash(url TEXT, title TEXT, snippet TEXT, site_name TEXT)
+RETURNS TEXT AS $$
+    SELECT encode(sha256(convert_to(
+        concat_ws(E'\x1f', COALESCE(url, ''), COALESCE(title, ''), COALESCE(snippet, ''), COALESCE(site_name, '')),
+        'UTF8'
+    )), 'hex');
+$$ LANGUAGE sql IMMUTABLE;
+
+INSERT INTO urls (url_hash, url, domain, title, snippet, site_name, text_normalized)
+SELECT DISTINCT ON (h) h, url, domain, title, snippet, site_name, text_normalized
+FROM (
+    SELECT geo_url_hash(url, title, snippet, site_name) AS h, url, domain, title, snippet, site_name, text_normalized
+    FROM citations
+    WHERE url_id IS NULL
+    UNION ALL
+    SELECT geo_url_hash(url, title, snippet, site_name), url, COALESCE(domain, ''), title, snippet, site_name, text_normalized
+    FROM executor_sub_query_log
+    WHERE url_id IS NULL AND url IS NOT NULL
+) s
+ORDER BY h, text_normalized DESC NULLS LAST
+ON CONFLICT (url_hash) DO NOTHING;
+
+UPDATE citations c
+SET url_id = u.id, title = NULL, snippet = NULL, site_name = NULL
+FROM urls u
+WHERE c.url_id IS NULL
+  AND u.url_hash = geo_url_hash(c.url, c.title, c.snippet, c.site_name);
+
+UPDATE executor_sub_query_log l
+SET url_id = u.id, title = NULL, snippet = NULL, site_name = NULL
+FROM urls u
+WHERE l.url_id IS NULL
+  AND l.url IS NOT NULL
+  AND u.url_hash = geo_url_hash(l.url, l.title, l.snippet, l.site_name);
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 011 completed successfully!' as status;
+SELECT
+    (SELECT COUNT(*) FROM urls) AS urls,
+    (SELECT COUNT(*) FROM citations WHERE url_id IS NOT NULL) AS citations_linked,
+    (SELECT COUNT(*) FROM executor_sub_query_log WHERE url_id IS NOT NULL) AS sub_query_log_linked;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
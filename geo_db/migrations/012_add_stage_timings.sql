@@ -0,0 +1,28 @@
+-- ============================================
+-- 数据库升级脚本：搜索分阶段耗时 v3.8
+--
+-- search_records 添加 stage_timings 列（JSONB，{阶段名: 毫秒}），由 provider 的 StageTimer 和
+-- save_to_db 写入，例如 {"browser_launch": 1830, "page_load": 2410, "generation": 41200, "db_save": 35}
+--
+-- 旧记录为 NULL；聚合报告见 GET /stats/stage-timings 或 stats_full.py
+-- ============================================
+
+BEGIN;
+
+-- search_records 已按月分区时，在父表上添加列会同步到所有分区
+ALTER TABLE search_records ADD COLUMN IF NOT EXISTS stage_timings JSONB;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('3.8', 'search_records 添加 stage_timings（搜索分阶段耗时）')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 012 completed successfully!' as status;
+SELECT column_name, data_type FROM information_schema.columns
+WHERE table_name = 'search_records' AND column_name = 'stage_timings';
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
@@ -0,0 +1,45 @@
+-- ============================================
+-- 数据库升级脚本：已完成任务的响应快照 v3.9
+--
+-- 创建 task_snapshots 表：task_jobs.status = 'done' 之后 /status 的完整响应不再变化，
+-- 第一次查询时渲染一次并 gzip 压缩保存，之后的查询只按主键读一行（见 llm_sentry_monitor/core/snapshots.py）
+--
+-- 快照在应用侧生成，迁移不回填旧任务；删除某行即可让对应任务在下次查询时重新渲染
+-- ============================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS task_snapshots (
+    task_id INTEGER PRIMARY KEY REFERENCES task_jobs(id) ON DELETE CASCADE,
+    codec TEXT NOT NULL,                            -- gzip（客户端接受 gzip 时原样返回）
+    raw_length INTEGER NOT NULL,                    -- 未压缩 JSON 的字节数
+    body BYTEA NOT NULL,                            -- 压缩后的 /status 响应 JSON
+    etag TEXT NOT NULL,                             -- 未压缩 JSON 的 SHA-256 前 32 位
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 内容已在应用侧压缩，关闭 TOAST 的二次压缩
+ALTER TABLE task_snapshots ALTER COLUMN body SET STORAGE EXTERNAL;
+
+-- geo_sentry 用户由 fix_permissions.sql 创建，不存在时跳过
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'geo_sentry') THEN
+        GRANT ALL PRIVILEGES ON task_snapshots TO geo_sentry;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('3.9', '创建 task_snapshots（已完成任务的 /status 响应快照）')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 013 completed successfully!' as status;
+SELECT column_name, data_type FROM information_schema.columns
+WHERE table_name = 'task_snapshots' ORDER BY ordinal_position;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
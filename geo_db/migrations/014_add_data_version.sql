@@ -0,0 +1,68 @@
+-- ============================================
+-- 数据库升级脚本：报告数据版本 v4.0
+--
+-- 创建单行表 data_version，search_records / citations / search_queries / urls 上的语句级触发器
+-- 在每条 INSERT / UPDATE / DELETE 语句后递增 version。
+-- 递增与数据写入在同一事务中提交，因此：
+-- - 并发事务先提交较大 id、后提交较小 id 时，版本仍会变化（MAX(id) 水位会漏掉这种情况）
+-- - UPDATE（stage_timings 写入、乱码修复、answer / urls 回填）同样会让版本变化
+-- /stats/* 的 ReportCache 以该版本作为失效依据（见 llm_sentry_monitor/core/reports.py）
+--
+-- 计数行在写事务提交前保持行锁，并发写入在提交时串行通过；save_to_db 的事务很短，影响可忽略
+-- ============================================
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- 只允许一行
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO data_version (id) VALUES (TRUE) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION geo_bump_data_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE data_version SET version = version + 1, updated_at = CURRENT_TIMESTAMP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 分区表上的语句级触发器对经由父表的写入生效（包括 COPY）
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['search_records', 'citations', 'search_queries', 'urls'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_data_version ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_data_version AFTER INSERT OR UPDATE OR DELETE ON %1$I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION geo_bump_data_version()',
+            tbl
+        );
+    END LOOP;
+END $$;
+
+-- geo_sentry 用户由 fix_permissions.sql 创建，不存在时跳过（触发器以写入者身份执行，需要 UPDATE 权限）
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'geo_sentry') THEN
+        GRANT ALL PRIVILEGES ON data_version TO geo_sentry;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('4.0', '创建 data_version（报告缓存的数据版本，语句级触发器递增）')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 014 completed successfully!' as status;
+SELECT version, updated_at FROM data_version;
+SELECT event_object_table, trigger_name FROM information_schema.triggers
+WHERE trigger_name LIKE 'trg_%_data_version' ORDER BY event_object_table;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
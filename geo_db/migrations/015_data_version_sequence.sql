@@ -0,0 +1,63 @@
+-- ============================================
+-- 数据库升级脚本：报告数据版本改用序列 v4.1
+--
+-- v4.0 的触发器在每条写入语句后 UPDATE 单行表 data_version，该行的行锁保持到事务提交，
+-- 所有并发写入（save_to_db、乱码修复、回答迁移、批量导入）都在这一行上排队。
+-- 改为在触发器中调用 nextval('data_version_seq')：序列不加行锁、不参与事务，写入之间互不阻塞。
+-- 触发器（trg_<表>_data_version）保持不变，只替换触发器函数，并删除 data_version 表。
+--
+-- 序列在语句执行时递增（早于提交）：报告在写事务提交前读取版本时可能缓存到不含该事务的结果，
+-- 直到下一次写入或缓存过期（STATS_CACHE_MAX_AGE，见 llm_sentry_monitor/core/reports.py）
+-- ============================================
+
+BEGIN;
+
+CREATE SEQUENCE IF NOT EXISTS data_version_seq;
+
+CREATE OR REPLACE FUNCTION geo_bump_data_version() RETURNS trigger AS $$
+BEGIN
+    PERFORM nextval('data_version_seq');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 014 之前未执行时补建触发器（与 014 相同，可重复执行）
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY['search_records', 'citations', 'search_queries', 'urls'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_data_version ON %I', tbl, tbl);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%1$s_data_version AFTER INSERT OR UPDATE OR DELETE ON %1$I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION geo_bump_data_version()',
+            tbl
+        );
+    END LOOP;
+END $$;
+
+DROP TABLE IF EXISTS data_version;
+
+-- geo_sentry 用户由 fix_permissions.sql 创建，不存在时跳过（触发器以写入者身份执行 nextval）
+DO $$
+BEGIN
+    IF EXISTS (SELECT FROM pg_catalog.pg_roles WHERE rolname = 'geo_sentry') THEN
+        GRANT USAGE, SELECT ON SEQUENCE data_version_seq TO geo_sentry;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('4.1', '报告数据版本改用序列 data_version_seq（不再行锁单行表 data_version）')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 015 completed successfully!' as status;
+SELECT last_value FROM data_version_seq;
+SELECT event_object_table, trigger_name FROM information_schema.triggers
+WHERE trigger_name LIKE 'trg_%_data_version' ORDER BY event_object_table;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
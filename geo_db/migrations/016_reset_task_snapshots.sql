@@ -0,0 +1,34 @@
+-- ============================================
+-- 数据库升级脚本：重新渲染已完成任务的响应快照 v4.2
+--
+-- 删除 task_snapshots 中已有的快照，已完成任务在下次查询 /status 时按当前代码重新渲染。
+-- 之前保存的快照可能与实时响应不一致：
+-- - 任务状态被平台执行状态覆盖（保存成 completed / failed 而不是 done）
+-- - 总是用 orjson 渲染，API_FAST_JSON 关闭时与实时响应的字节不同
+-- - 生成于 urls 回填 / 乱码修复之前（011 的回填不会删除快照）
+--
+-- 之后的维护操作（乱码修复、分区分离）会自行删除受影响的快照；可重复执行
+-- ============================================
+
+BEGIN;
+
+DO $$
+BEGIN
+    IF to_regclass('task_snapshots') IS NOT NULL THEN
+        DELETE FROM task_snapshots;
+    END IF;
+END $$;
+
+-- 版本记录
+INSERT INTO schema_version (version, description)
+VALUES ('4.2', '清空 task_snapshots，已完成任务的 /status 快照按当前代码重新渲染')
+ON CONFLICT (version) DO NOTHING;
+
+COMMIT;
+
+-- ============================================
+-- 完成后验证
+-- ============================================
+SELECT 'Migration 016 completed successfully!' as status;
+SELECT COUNT(*) AS snapshots FROM task_snapshots;
+SELECT version, applied_at, description FROM schema_version ORDER BY applied_at DESC LIMIT 5;
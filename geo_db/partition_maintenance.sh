@@ -0,0 +1,94 @@
+#!/bin/bash
+# 文件：geo_db/partition_maintenance.sh
+# 用途：按月分区维护（v3.4 起 search_records / citations / executor_sub_query_log 按月分区）
+#   1. 预建未来 N 个月的分区
+#   2. 分离超过保留期的整月分区（只分离分区，不移动其他表的数据）
+#   3. 用 pg_dump 归档分离出的表到 archive 目录，指定 --drop 时归档后删除；
+#      删除 search_records 分区前，先把 search_queries 中对应的行导出到 archive/search_queries_of_<分区>.csv 再删除
+#      （search_queries 不分区，没有外键可级联，删除分区也不会触发级联删除触发器）
+#
+# 用法：
+#   bash partition_maintenance.sh [--keep-months N] [--ahead N] [--archive-dir DIR] [--drop] [--ensure-only]
+#   默认保留 12 个月（PARTITION_KEEP_MONTHS），预建 3 个月（PARTITION_AHEAD_MONTHS）
+
+set -e
+
+KEEP_MONTHS="${PARTITION_KEEP_MONTHS:-12}"
+AHEAD_MONTHS="${PARTITION_AHEAD_MONTHS:-3}"
+ARCHIVE_DIR="archive"
+DROP_AFTER_ARCHIVE=0
+ENSURE_ONLY=0
+
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --keep-months) KEEP_MONTHS="$2"; shift 2 ;;
+        --ahead) AHEAD_MONTHS="$2"; shift 2 ;;
+        --archive-dir) ARCHIVE_DIR="$2"; shift 2 ;;
+        --drop) DROP_AFTER_ARCHIVE=1; shift ;;
+        --ensure-only) ENSURE_ONLY=1; shift ;;
+        *) echo "❌ 未知参数: $1"; exit 1 ;;
+    esac
+done
+
+# 进入数据库目录
+cd "$(dirname "$0")"
+
+# 检查 PostgreSQL 是否运行
+if ! docker ps | grep -q geo_db; then
+    echo "❌ 数据库容器未运行，请先执行: make db-up"
+    exit 1
+fi
+
+CONTAINER_NAME=$(docker ps --filter "name=geo_db" --format "{{.Names}}" | head -1)
+
+if [ -z "$CONTAINER_NAME" ]; then
+    echo "❌ 找不到数据库容器"
+    exit 1
+fi
+
+PSQL="docker exec -i $CONTAINER_NAME psql -U geo_admin -d geo_monitor -v ON_ERROR_STOP=1"
+
+echo "🔄 预建未来 ${AHEAD_MONTHS} 个月的分区..."
+$PSQL -c "SELECT geo_ensure_partitions(${AHEAD_MONTHS});" > /dev/null
+
+if [ "$ENSURE_ONLY" = "1" ]; then
+    echo "✅ 分区预建完成！"
+    exit 0
+fi
+
+echo "🔄 分离 ${KEEP_MONTHS} 个月之前的分区..."
+CUTOFF="(date_trunc('month', CURRENT_DATE) - INTERVAL '${KEEP_MONTHS} months')::date"
+DETACHED=$($PSQL -At -c "SELECT * FROM geo_detach_partitions_before(${CUTOFF});")
+
+if [ -z "$DETACHED" ]; then
+    echo "✅ 没有需要归档的分区"
+    exit 0
+fi
+
+# 分离分区不会触发写入触发器：手动递增报告缓存的数据版本（v4.1 迁移之前跳过）
+$PSQL -c "DO \$\$ BEGIN IF to_regclass('data_version_seq') IS NOT NULL THEN PERFORM nextval('data_version_seq'); END IF; END \$\$;" > /dev/null
+# 截止日期之前创建的任务有数据被分离，删除其 /status 快照，下次查询时重新渲染（v3.9 迁移之前跳过）
+$PSQL -c "DO \$\$ BEGIN IF to_regclass('task_snapshots') IS NOT NULL THEN DELETE FROM task_snapshots WHERE task_id IN (SELECT id FROM task_jobs WHERE created_at < ${CUTOFF}); END IF; END \$\$;" > /dev/null
+
+mkdir -p "$ARCHIVE_DIR"
+for table in $DETACHED; do
+    echo "  → 归档 ${table} 到 ${ARCHIVE_DIR}/${table}.dump"
+    docker exec "$CONTAINER_NAME" pg_dump -U geo_admin -d geo_monitor -Fc -t "$table" > "${ARCHIVE_DIR}/${table}.dump"
+    if [ "$DROP_AFTER_ARCHIVE" = "1" ]; then
+        case "$table" in
+            search_records_p*)
+                echo "  → 导出 search_queries 中 ${table} 的行到 ${ARCHIVE_DIR}/search_queries_of_${table}.csv"
+                $PSQL -c "COPY (SELECT sq.* FROM search_queries sq WHERE sq.record_id IN (SELECT id FROM ${table}) ORDER BY sq.id) TO STDOUT WITH CSV HEADER" \
+                    > "${ARCHIVE_DIR}/search_queries_of_${table}.csv"
+                $PSQL -c "DELETE FROM search_queries WHERE record_id IN (SELECT id FROM ${table});" > /dev/null
+                ;;
+        esac
+        $PSQL -c "DROP TABLE ${table};" > /dev/null
+        echo "    已删除 ${table}"
+    fi
+done
+
+echo "✅ 分区维护完成！"
+if [ "$DROP_AFTER_ARCHIVE" != "1" ]; then
+    echo "💡 提示: 分离出的表仍保留在数据库中，确认归档无误后手动 DROP TABLE（下次运行可加 --drop 自动删除）"
+fi
@@ -50,6 +50,72 @@ if [ -f "migrations/003_add_task_relations.sql" ]; then
     docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/003_add_task_relations.sql
 fi
 
+# 检查并执行 v3.2 迁移
+if [ -f "migrations/006_add_search_query_tokens.sql" ]; then
+    echo "  → 执行 v3.2 迁移（添加分词缓存表）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/006_add_search_query_tokens.sql
+fi
+
+# 检查并执行 v3.3 迁移
+if [ -f "migrations/007_add_text_normalized.sql" ]; then
+    echo "  → 执行 v3.3 迁移（添加编码规范化标记）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/007_add_text_normalized.sql
+fi
+
+# 检查并执行 v3.4 迁移
+if [ -f "migrations/008_partition_by_month.sql" ]; then
+    echo "  → 执行 v3.4 迁移（按月分区）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/008_partition_by_month.sql
+fi
+
+# 检查并执行 v3.5 迁移
+if [ -f "migrations/009_add_api_composite_indexes.sql" ]; then
+    echo "  → 执行 v3.5 迁移（API 复合索引）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/009_add_api_composite_indexes.sql
+fi
+
+# 检查并执行 v3.6 迁移
+if [ -f "migrations/010_add_answer_blobs.sql" ]; then
+    echo "  → 执行 v3.6 迁移（完整回答压缩存储）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/010_add_answer_blobs.sql
+fi
+
+# 检查并执行 v3.7 迁移
+if [ -f "migrations/011_add_urls_dimension.sql" ]; then
+    echo "  → 执行 v3.7 迁移（引用网页维度表）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/011_add_urls_dimension.sql
+fi
+
+# 检查并执行 v3.8 迁移
+if [ -f "migrations/012_add_stage_timings.sql" ]; then
+    echo "  → 执行 v3.8 迁移（搜索分阶段耗时）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/012_add_stage_timings.sql
+fi
+
+# 检查并执行 v3.9 迁移
+if [ -f "migrations/013_add_task_snapshots.sql" ]; then
+    echo "  → 执行 v3.9 迁移（已完成任务的响应快照）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/013_add_task_snapshots.sql
+fi
+
+# 检查并执行 v4.0 迁移
+if [ -f "migrations/014_add_data_version.sql" ]; then
+    echo "  → 执行 v4.0 迁移（报告数据版本）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/014_add_data_version.sql
+fi
+
+# 检查并执行 v4.1 迁移
+if [ -f "migrations/015_data_version_sequence.sql" ]; then
+    echo "  → 执行 v4.1 迁移（报告数据版本改用序列）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/015_data_version_sequence.sql
+fi
+
+# 检查并执行 v4.2 迁移
+if [ -f "migrations/016_reset_task_snapshots.sql" ]; then
+    echo "  → 执行 v4.2 迁移（重新渲染已完成任务的响应快照）..."
+    docker exec -i "$CONTAINER_NAME" psql -U geo_admin -d geo_monitor < migrations/016_reset_task_snapshots.sql
+fi
+
 echo "✅ 数据库升级完成！"
 echo ""
 echo "📊 当前数据库版本："
@@ -4,19 +4,33 @@ api.py - FastAPI 应用
 """
 import os
 import json
+import time
 import logging
+from datetime import datetime
 from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
+from starlette.routing import Match
 import csv
 import io
 import psycopg2.errors
 from core.db import get_db_connection
-from core.task_executor import execute_task_job
-from providers.bocha_api import BochaApiProvider
-from providers.doubao_web import ensure_utf8_string
+from core.report_filters import ReportFilters
+from core.reports import REPORTS, ReportCache
+from core.answers import fetch_answer
+from core.metrics import HTTP_REQUEST_SECONDS, current_endpoint, render_metrics
+from core.session import SESSIONS
+from core.responses import json_response, CompressionMiddleware, COMPRESSION_ENABLED
+from core.task_jobs import create_task_jobs, merge_settings
+from core.snapshots import snapshots_available, fetch_snapshot, store_snapshot, snapshot_response
+from core.task_status import (
+    MAX_PAGE_SIZE, PAGED_OMITTED_SECTIONS, parse_exclude, fetch_sub_query_logs,
+    fetch_citations, fetch_platform_progress, drop_fields
+)
+from providers.registry import get_provider
+from core.encoding import ensure_utf8_string, repair_text
 
 
 def get_doubao_query_tokens(results_by_platform):
@@ -49,6 +63,47 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.on_event("startup")
+def start_session_checks():
+    """后台定期检查 browser_data 中各平台的登录 cookie（SESSION_CHECK_INTERVAL=0 关闭）"""
+    SESSIONS.start_background_checks()
+
+def _route_template(scope):
+    """请求对应的路由模板（如 /records/{record_id}/answer），作为指标标签避免按具体路径膨胀"""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "unmatched")
+    return "unmatched"
+
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """记录请求耗时；请求内的数据库查询按路由模板打标签"""
+    route = _route_template(request.scope)
+    token = current_endpoint.set(route)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUEST_SECONDS.labels(request.method, route, status).observe(time.perf_counter() - start)
+        current_endpoint.reset(token)
+
+
+# 响应压缩（API_COMPRESSION=1 时启用，gzip / brotli，见 core/responses.py）
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+
+# 统计报告缓存（按报告名 + 过滤条件缓存，search_records 有新数据时失效）
+report_cache = ReportCache(
+    max_entries=int(os.getenv("STATS_CACHE_SIZE", "256")),
+    max_age=float(os.getenv("STATS_CACHE_MAX_AGE", "60"))
+)
+
 
 # 请求模型
 class MockRequest(BaseModel):
@@ -58,16 +113,36 @@ class MockRequest(BaseModel):
     settings: Optional[Dict[str, Any]] = None
 
 
+class MockBatchRequest(BaseModel):
+    jobs: List[MockRequest]
+
+
 # 响应模型
 class MockResponse(BaseModel):
     task_id: int
 
 
+class MockBatchResponse(BaseModel):
+    task_ids: List[int]
+
+
 class StatusResponse(BaseModel):
     status: str  # none, pending, done
     data: Optional[Dict[str, Any]] = None
 
 
+def validate_mock_request(request: MockRequest, prefix: str = ""):
+    """校验任务参数，不合法时抛出 400"""
+    if not request.keywords:
+        raise HTTPException(status_code=400, detail=f"{prefix}keywords 不能为空")
+    
+    if not request.platforms:
+        raise HTTPException(status_code=400, detail=f"{prefix}platforms 不能为空")
+    
+    if request.query_count < 1:
+        raise HTTPException(status_code=400, detail=f"{prefix}query_count 必须大于0")
+
+
 @app.post("/mock", response_model=MockResponse)
 async def create_task(request: MockRequest):
     """
@@ -76,57 +151,28 @@ async def create_task(request: MockRequest):
     - **keywords**: 搜索关键词列表
     - **platforms**: 平台列表 (deepseek, doubao)
     - **query_count**: 查询次数（执行轮数），默认1次
-    - **settings**: 可选设置 (headless, timeout, delay_between_tasks)
+    - **settings**: 可选设置 (headless, timeout, delay_between_tasks, block_resources, async_tabs, max_tabs)
     """
     try:
-        # 验证输入
-        if not request.keywords:
-            raise HTTPException(status_code=400, detail="keywords 不能为空")
-        
-        if not request.platforms:
-            raise HTTPException(status_code=400, detail="platforms 不能为空")
-        
-        if request.query_count < 1:
-            raise HTTPException(status_code=400, detail="query_count 必须大于0")
+        validate_mock_request(request)
+        settings = merge_settings(request.settings)
         
-        # 加载默认设置
-        default_settings = {
-            "headless": False,
-            "timeout": 60000,
-            "delay_between_tasks": 5
-        }
-        
-        # 合并用户设置
-        settings = {**default_settings, **(request.settings or {})}
-        
-        # 创建任务记录
+        # task_jobs 和所有 task_query 各一条 INSERT，RETURNING 得到关键词 → task_query_id
         with get_db_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                INSERT INTO task_jobs (keywords, platforms, query_count, status, settings)
-                VALUES (%s, %s, %s, 'pending', %s)
-                RETURNING id
-            """, (
-                json.dumps(request.keywords),
-                json.dumps(request.platforms),
-                request.query_count,
-                json.dumps(settings)
-            ))
-            task_id = cur.fetchone()[0]
-            
-            # 为每个查询条件创建 task_query 记录
-            for keyword in request.keywords:
-                cur.execute("""
-                    INSERT INTO task_query (task_id, query)
-                    VALUES (%s, %s)
-                """, (task_id, keyword))
-            
+            task_id, task_query_map = create_task_jobs(cur, [{
+                "keywords": request.keywords,
+                "platforms": request.platforms,
+                "query_count": request.query_count,
+                "settings": settings
+            }])[0]
             conn.commit()
         
         logger.info(f"创建任务 {task_id}: keywords={request.keywords}, platforms={request.platforms}, query_count={request.query_count}")
         
-        # 启动后台任务
-        execute_task_job(task_id, request.keywords, request.platforms, request.query_count, settings)
+        # 启动后台任务（执行器和 provider 在第一次创建任务时才导入，API 启动只加载数据库和路由）
+        from core.task_executor import execute_task_job
+        execute_task_job(task_id, request.keywords, request.platforms, request.query_count, settings, task_query_map=task_query_map)
         
         return MockResponse(task_id=task_id)
         
@@ -137,22 +183,91 @@ async def create_task(request: MockRequest):
         raise HTTPException(status_code=500, detail=f"创建任务失败: {str(e)}")
 
 
+@app.post("/mock/batch", response_model=MockBatchResponse)
+async def create_tasks_batch(request: MockBatchRequest):
+    """
+    在一个事务中批量创建任务（用于大批量导入）
+    
+    - **jobs**: 任务列表，每项参数与 POST /mock 相同
+    
+    所有任务的 task_jobs 和 task_query 各用一条多行 INSERT 写入，任一任务参数不合法时全部不创建；
+    任务在同一个后台线程中按顺序执行
+    """
+    try:
+        if not request.jobs:
+            raise HTTPException(status_code=400, detail="jobs 不能为空")
+        for index, job in enumerate(request.jobs):
+            validate_mock_request(job, prefix=f"jobs[{index}].")
+        
+        jobs = [
+            {
+                "keywords": job.keywords,
+                "platforms": job.platforms,
+                "query_count": job.query_count,
+                "settings": merge_settings(job.settings)
+            }
+            for job in request.jobs
+        ]
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            created = create_task_jobs(cur, jobs)
+            conn.commit()
+        
+        for job, (task_id, task_query_map) in zip(jobs, created):
+            job["task_id"] = task_id
+            job["task_query_map"] = task_query_map
+        task_ids = [task_id for task_id, _ in created]
+        logger.info(f"批量创建任务 {len(task_ids)} 个（{sum(len(job['keywords']) for job in jobs)} 个关键词）: {task_ids[0]}-{task_ids[-1]}")
+        
+        from core.task_executor import execute_task_jobs
+        execute_task_jobs(jobs)
+        
+        return MockBatchResponse(task_ids=task_ids)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"批量创建任务失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"批量创建任务失败: {str(e)}")
+
+
 @app.get("/status", response_model=StatusResponse)
 async def get_task_status(
     id: Optional[int] = Query(None, description="单个任务ID"),
-    ids: Optional[str] = Query(None, description="多个任务ID，逗号分隔")
+    ids: Optional[str] = Query(None, description="多个任务ID，逗号分隔"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="分页：每页日志条数（只支持单个任务）"),
+    after_id: Optional[int] = Query(None, description="分页：上一页返回的 page.next_after_id"),
+    exclude: Optional[str] = Query(None, description="不返回的字段或数据段，逗号分隔，如 snippet,title,sub_query_logs"),
+    summary_only: bool = Query(False, description="只返回 platform_progress"),
+    request: Request = None
 ):
     """
     查询任务状态
     
     - **id**: 单个任务ID
     - **ids**: 多个任务ID（逗号分隔），与 id 参数二选一
+    - **limit** / **after_id**: 按日志 id 分页返回 sub_query_logs 和 detail_logs（分页时不返回 summary_table、results_by_platform、query_tokens）
+    - **exclude**: 字段 title / snippet / site_name，或数据段 task_queries / sub_query_logs / detail_logs / summary_table / results_by_platform / query_tokens / results
+    - **summary_only**: 只统计轮次进度，不读取日志和引用（适合轮询）
+    
+    已完成任务的完整响应（不带 limit / exclude / summary_only）读写 task_snapshots 快照，带 ETag 和长期缓存头
     
     返回:
     - **status**: 任务状态 (none, pending, done)
     - **data**: 任务数据（当 status != none 时）
     """
     try:
+        try:
+            excluded_fields, excluded_sections = parse_exclude(exclude)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        paged = limit is not None
+        if not paged and after_id is not None:
+            raise HTTPException(status_code=400, detail="after_id 需要与 limit 一起使用")
+        if paged:
+            excluded_sections |= set(PAGED_OMITTED_SECTIONS)
+        full_view = not (paged or summary_only or excluded_fields or excluded_sections)
+        
         # 确定要查询的任务ID列表
         task_ids = []
         if ids:
@@ -166,6 +281,9 @@ async def get_task_status(
         if not task_ids:
             raise HTTPException(status_code=400, detail="任务ID列表不能为空")
         
+        if paged and len(task_ids) > 1:
+            raise HTTPException(status_code=400, detail="分页只支持单个任务（id）")
+        
         with get_db_connection() as conn:
             cur = conn.cursor()
             
@@ -185,6 +303,16 @@ async def get_task_status(
                 
                 task_id, keywords_json, platforms_json, query_count, status, result_data_json, created_at, updated_at = row
                 
+                # 已完成任务的完整响应不再变化，有快照时只读这一行
+                use_snapshot = full_view and status == "done" and snapshots_available(cur)
+                if use_snapshot:
+                    snapshot = fetch_snapshot(cur, task_id)
+                    if snapshot:
+                        return snapshot_response(*snapshot, request)
+                
+                # 任务的所有结果都在任务创建之后写入，按该时间过滤分区表，只扫描相关月份的分区
+                task_created_at = created_at
+                
                 # 解析 JSON 数据
                 if isinstance(keywords_json, (list, dict)):
                     keywords = keywords_json
@@ -215,19 +343,27 @@ async def get_task_status(
                     ORDER BY id
                 """, (task_id,))
                 task_queries = cur.fetchall()
+                task_query_ids = [tq[0] for tq in task_queries]
+                
+                platform_progress = fetch_platform_progress(
+                    cur, task_id, task_query_ids, keywords, platforms, query_count, task_created_at
+                )
+                
+                # 只轮询进度时不读取日志和引用
+                if summary_only:
+                    return json_response({"status": status, "data": {
+                        "task_id": task_id,
+                        "query_count": query_count,
+                        "created_at": created_at.isoformat() if created_at else None,
+                        "updated_at": updated_at.isoformat() if updated_at else None,
+                        "platform_progress": platform_progress
+                    }}, StatusResponse)
                 
                 # 查询 executor_sub_query_log 数据（包含 record_id 用于推断轮次）
-                task_query_ids = [tq[0] for tq in task_queries]
-                sub_query_logs = []
-                if task_query_ids:
-                    placeholders = ','.join(['%s'] * len(task_query_ids))
-                    cur.execute(f"""
-                        SELECT id, task_query_id, sub_query, url, domain, title, snippet, site_name, cite_index, created_at, record_id, citation_id
-                        FROM executor_sub_query_log
-                        WHERE task_query_id IN ({placeholders})
-                        ORDER BY task_query_id, created_at
-                    """, task_query_ids)
-                    sub_query_logs = cur.fetchall()
+                sub_query_logs, next_after_id = fetch_sub_query_logs(
+                    cur, task_query_ids, task_created_at, excluded_fields,
+                    after_id=after_id, limit=limit
+                )
                 
                 # 构建响应数据
                 response_data = {
@@ -246,21 +382,23 @@ async def get_task_status(
                         for tq in task_queries
                     ],
                     "sub_query_logs": [
-                        {
+                        drop_fields({
                             "id": sql[0],
                             "task_query_id": sql[1],
-                            "sub_query": ensure_utf8_string(sql[2]) if sql[2] and isinstance(sql[2], str) else sql[2],
-                            "url": ensure_utf8_string(sql[3]) if sql[3] and isinstance(sql[3], str) else sql[3],
-                            "domain": ensure_utf8_string(sql[4]) if sql[4] and isinstance(sql[4], str) else sql[4],
-                            "title": ensure_utf8_string(sql[5]) if sql[5] and isinstance(sql[5], str) else sql[5],
-                            "snippet": ensure_utf8_string(sql[6]) if sql[6] and isinstance(sql[6], str) else sql[6],
-                            "site_name": ensure_utf8_string(sql[7]) if sql[7] and isinstance(sql[7], str) else sql[7],
+                            "sub_query": repair_text(sql[2], sql[12]),
+                            "url": repair_text(sql[3], sql[12]),
+                            "domain": repair_text(sql[4], sql[12]),
+                            "title": repair_text(sql[5], sql[12]),
+                            "snippet": repair_text(sql[6], sql[12]),
+                            "site_name": repair_text(sql[7], sql[12]),
                             "cite_index": sql[8],
                             "created_at": sql[9].isoformat() if sql[9] else None
-                        }
+                        }, excluded_fields)
                         for sql in sub_query_logs
                     ]
                 }
+                if paged:
+                    response_data["page"] = {"limit": limit, "after_id": after_id, "next_after_id": next_after_id}
                 
                 # 构建 task_query_id 到 query 的映射（用于汇总表格和详细日志）
                 task_query_map = {}
@@ -279,8 +417,9 @@ async def get_task_status(
                                 WHERE task_id = %s 
                                   AND task_query_id = %s 
                                   AND platform = %s
+                                  AND created_at >= %s
                                 ORDER BY created_at ASC
-                            """, (task_id, task_query_id, platform_lower))
+                            """, (task_id, task_query_id, platform_lower, task_created_at))
                             record_rows = cur.fetchall()
                             
                             for round_num, record_row in enumerate(record_rows, start=1):
@@ -294,46 +433,7 @@ async def get_task_status(
                 # 查询内部查询的分词（保持向后兼容）
                 query_tokens = []
                 results_by_platform = {}
-                
-                # 计算总轮次数：关键词数 × 平台数 × 查询次数
-                num_keywords = len(task_query_ids) if task_query_ids else len(keywords) if keywords else 0
-                total_rounds = num_keywords * len(platforms) * query_count if num_keywords > 0 and platforms and query_count else 0
-                
-                # 统计实际轮次完成情况：通过查询 search_records 表
-                completed_rounds = 0
-                failed_rounds = 0
-                
-                if task_query_ids and platforms:
-                    # 查询所有 search_records，按 search_status 分组统计
-                    placeholders = ','.join(['%s'] * len(task_query_ids))
-                    cur.execute(f"""
-                        SELECT search_status, COUNT(*) as count
-                        FROM search_records
-                        WHERE task_id = %s 
-                          AND task_query_id IN ({placeholders})
-                          AND platform IN ({','.join(['%s'] * len(platforms))})
-                          AND prompt_type = 'api_task'
-                        GROUP BY search_status
-                    """, [task_id] + task_query_ids + [p.lower() for p in platforms])
-                    
-                    status_rows = cur.fetchall()
-                    for status_row in status_rows:
-                        search_status = status_row[0]
-                        count = status_row[1]
-                        if search_status == 'completed':
-                            completed_rounds = count
-                        elif search_status == 'failed':
-                            failed_rounds = count
-                
-                # 计算待处理轮次数
-                pending_rounds = max(0, total_rounds - completed_rounds - failed_rounds)
-                
-                platform_progress = {
-                    "completed": completed_rounds,
-                    "failed": failed_rounds,
-                    "pending": pending_rounds,
-                    "total": total_rounds
-                }
+                with_citations = not {"results_by_platform", "query_tokens"} <= excluded_sections
                 
                 # 从 result_data 中提取平台执行状态（用于 results_by_platform）
                 platform_status_map = {}
@@ -341,9 +441,9 @@ async def get_task_status(
                     for result_item in result_data:
                         if isinstance(result_item, dict):
                             platform = result_item.get("platform", "").lower()
-                            status = result_item.get("status", "pending")
+                            item_status = result_item.get("status", "pending")
                             platform_status_map[platform] = {
-                                "status": status,
+                                "status": item_status,
                                 "record_id": result_item.get("record_id"),
                                 "citations_count": result_item.get("citations_count", 0),
                                 "response_time_ms": result_item.get("response_time_ms"),
@@ -362,16 +462,17 @@ async def get_task_status(
                             placeholders = ','.join(['%s'] * len(task_query_ids_for_query))
                             # 使用新的关联字段查询，效率更高
                             query_sql = f"""
-                                SELECT DISTINCT sq.query, sq.record_id, sq.query_order, sq.id
+                                SELECT DISTINCT sq.query, sq.record_id, sq.query_order, sq.id, sq.text_normalized
                                 FROM search_queries sq
                                 INNER JOIN search_records sr ON sq.record_id = sr.id
                                 WHERE sr.task_id = %s 
                                   AND sr.task_query_id IN ({placeholders})
                                   AND sr.platform = %s
                                   AND sr.prompt_type = 'api_task'
+                                  AND sr.created_at >= %s
                                 ORDER BY sq.query_order, sq.id
                             """
-                            cur.execute(query_sql, [task_id] + task_query_ids_for_query + [platform_lower])
+                            cur.execute(query_sql, [task_id] + task_query_ids_for_query + [platform_lower, task_created_at])
                             query_rows = cur.fetchall()
                         
                         # 如果没有结果，回退到旧的查询方式（向后兼容）
@@ -384,7 +485,7 @@ async def get_task_status(
                             
                             if placeholders_old:
                                 query_sql_old = f"""
-                                    SELECT DISTINCT sq.query, sq.record_id, sq.query_order, sq.id
+                                    SELECT DISTINCT sq.query, sq.record_id, sq.query_order, sq.id, sq.text_normalized
                                     FROM search_queries sq
                                     INNER JOIN search_records sr ON sq.record_id = sr.id
                                     WHERE {' OR '.join(placeholders_old)}
@@ -398,29 +499,24 @@ async def get_task_status(
                             query = row[0]
                             record_id = row[1]
                             if query:
-                                query = ensure_utf8_string(query)
+                                query = repair_text(query, row[4])
                                 
-                                cur.execute("""
-                                    SELECT url, title, snippet, site_name, cite_index, domain
-                                    FROM citations
-                                    WHERE record_id = %s
-                                    ORDER BY cite_index, id
-                                """, (record_id,))
-                                citation_rows = cur.fetchall()
+                                # results_by_platform 和 query_tokens 都不返回时只需要分词（填充豆包的 sub_query），不读取引用
+                                citation_rows = fetch_citations(cur, record_id, task_created_at, excluded_fields) if with_citations else []
                                 
                                 citations = []
                                 for cite_row in citation_rows:
-                                    citations.append({
-                                        "url": ensure_utf8_string(cite_row[0] or ""),
-                                        "title": ensure_utf8_string(cite_row[1] or ""),
-                                        "snippet": ensure_utf8_string(cite_row[2] or ""),
-                                        "site_name": ensure_utf8_string(cite_row[3] or ""),
+                                    citations.append(drop_fields({
+                                        "url": repair_text(cite_row[0] or "", cite_row[6]),
+                                        "title": repair_text(cite_row[1] or "", cite_row[6]),
+                                        "snippet": repair_text(cite_row[2] or "", cite_row[6]),
+                                        "site_name": repair_text(cite_row[3] or "", cite_row[6]),
                                         "cite_index": cite_row[4] or 0,
-                                        "domain": ensure_utf8_string(cite_row[5] or "")
-                                    })
+                                        "domain": repair_text(cite_row[5] or "", cite_row[6])
+                                    }, excluded_fields))
                                 
                                 platform_query_tokens.append({
-                                    "query": ensure_utf8_string(query),
+                                    "query": query,
                                     "citations": citations
                                 })
                         
@@ -436,15 +532,19 @@ async def get_task_status(
                         
                         query_tokens.extend(platform_query_tokens)
                 
+                # 被排除（或分页时不返回）的数据段不构建：两段都要为每条日志查询平台
+                summary_source = [] if "summary_table" in excluded_sections else sub_query_logs
+                detail_source = [] if "detail_logs" in excluded_sections else sub_query_logs
+                
                 # 构建汇总表格数据
                 # 使用 citation_id 去重统计，确保每个 citation 对每个 sub_query 只计算一次
                 # 同时包含没有 URL 但有 sub_query 的记录（count 为 0）
                 summary_table = {}
-                for sql in sub_query_logs:
+                for sql in summary_source:
                     url = sql[3]  # url 字段
                     task_query_id = sql[1]
                     query = task_query_map.get(task_query_id, "")
-                    sub_query = ensure_utf8_string(sql[2]) if sql[2] and isinstance(sql[2], str) else (sql[2] or "")
+                    sub_query = repair_text(sql[2], sql[12]) or ""
                     
                     # 如果没有 sub_query，跳过（根据表约束，至少要有 sub_query 或 url 之一）
                     if not sub_query and not url:
@@ -456,8 +556,8 @@ async def get_task_status(
                     platform = ""
                     if record_id:
                         cur.execute("""
-                            SELECT platform FROM search_records WHERE id = %s LIMIT 1
-                        """, (record_id,))
+                            SELECT platform FROM search_records WHERE id = %s AND created_at >= %s LIMIT 1
+                        """, (record_id, task_created_at))
                         platform_row = cur.fetchone()
                         if platform_row:
                             platform = ensure_utf8_string(platform_row[0]) if isinstance(platform_row[0], str) else platform_row[0]
@@ -466,8 +566,8 @@ async def get_task_status(
                         # 尝试从 task_query_id 关联的 search_records 中获取平台
                         cur.execute("""
                             SELECT DISTINCT platform FROM search_records 
-                            WHERE task_id = %s AND task_query_id = %s LIMIT 1
-                        """, (task_id, task_query_id))
+                            WHERE task_id = %s AND task_query_id = %s AND created_at >= %s LIMIT 1
+                        """, (task_id, task_query_id, task_created_at))
                         platform_row = cur.fetchone()
                         if platform_row:
                             platform = ensure_utf8_string(platform_row[0]) if isinstance(platform_row[0], str) else platform_row[0]
@@ -477,9 +577,9 @@ async def get_task_status(
                     if not platform and not record_id and sub_query and task_query_id:
                         cur.execute("""
                             SELECT DISTINCT platform FROM search_records 
-                            WHERE task_id = %s AND task_query_id = %s
+                            WHERE task_id = %s AND task_query_id = %s AND created_at >= %s
                             ORDER BY platform
-                        """, (task_id, task_query_id))
+                        """, (task_id, task_query_id, task_created_at))
                         platform_rows = cur.fetchall()
                         if platform_rows:
                             # 如果找到了关联的平台，使用第一个（通常只有一个）
@@ -530,20 +630,20 @@ async def get_task_status(
                 # 构建详细日志数据
                 # 包含所有记录，包括没有 URL 但有 sub_query 的记录
                 detail_logs = []
-                for sql in sub_query_logs:
+                for sql in detail_source:
                     url = sql[3]  # url 字段
                     task_query_id = sql[1]
                     query = task_query_map.get(task_query_id, "")
-                    sub_query = ensure_utf8_string(sql[2]) if sql[2] and isinstance(sql[2], str) else (sql[2] or "")
+                    sub_query = repair_text(sql[2], sql[12]) or ""
                     
                     # 如果没有 sub_query 也没有 url，跳过（根据表约束，至少要有其中之一）
                     if not sub_query and not url:
                         continue
                     
-                    url = ensure_utf8_string(url) if url and isinstance(url, str) else (url or "")
-                    domain = ensure_utf8_string(sql[4]) if sql[4] and isinstance(sql[4], str) else (sql[4] or "")
-                    title = ensure_utf8_string(sql[5]) if sql[5] and isinstance(sql[5], str) else (sql[5] or "")
-                    snippet = ensure_utf8_string(sql[6]) if sql[6] and isinstance(sql[6], str) else (sql[6] or "")
+                    url = repair_text(url, sql[12]) or ""
+                    domain = repair_text(sql[4], sql[12]) or ""
+                    title = repair_text(sql[5], sql[12]) or ""
+                    snippet = repair_text(sql[6], sql[12]) or ""
                     created_at = sql[9]
                     record_id = sql[10]
                     
@@ -551,8 +651,8 @@ async def get_task_status(
                     round_num = None
                     if record_id:
                         cur.execute("""
-                            SELECT platform FROM search_records WHERE id = %s LIMIT 1
-                        """, (record_id,))
+                            SELECT platform FROM search_records WHERE id = %s AND created_at >= %s LIMIT 1
+                        """, (record_id, task_created_at))
                         platform_row = cur.fetchone()
                         if platform_row:
                             platform = ensure_utf8_string(platform_row[0]) if isinstance(platform_row[0], str) else platform_row[0]
@@ -568,7 +668,7 @@ async def get_task_status(
                         if doubao_queries:
                             sub_query = doubao_queries
                     
-                    detail_logs.append({
+                    detail_logs.append(drop_fields({
                         "task_id": task_id,
                         "query": query,
                         "round": round_num,
@@ -579,7 +679,7 @@ async def get_task_status(
                         "url": url,
                         "title": title,
                         "snippet": snippet
-                    })
+                    }, excluded_fields))
                 
                 response_data["detail_logs"] = detail_logs
                 
@@ -593,9 +693,17 @@ async def get_task_status(
                 
                 if results_by_platform:
                     response_data["results_by_platform"] = results_by_platform
-                    response_data["platform_progress"] = platform_progress
+                response_data["platform_progress"] = platform_progress
+                
+                for section in excluded_sections:
+                    response_data.pop(section, None)
                 
-                return StatusResponse(status=status, data=response_data)
+                if use_snapshot:
+                    # 连接退出时提交
+                    return snapshot_response(*store_snapshot(cur, task_id, {"status": status, "data": response_data}, StatusResponse), request)
+                
+                # 大任务的 data 嵌套很深，API_FAST_JSON=1 时直接用 orjson 输出，不再经过 StatusResponse 校验
+                return json_response({"status": status, "data": response_data}, StatusResponse)
             
             else:
                 # 多个任务ID，返回完整任务数据
@@ -615,6 +723,7 @@ async def get_task_status(
                 tasks_data = []
                 for row in rows:
                     task_id, keywords_json, platforms_json, query_count, status, result_data_json, created_at, updated_at = row
+                    task_created_at = created_at
                     
                     if isinstance(keywords_json, (list, dict)):
                         keywords = keywords_json
@@ -654,20 +763,24 @@ async def get_task_status(
                             "created_at": tq[2].isoformat() if tq[2] else None
                         })
                     
-                    # 查询 executor_sub_query_log 数据
                     task_query_ids = [tq[0] for tq in task_queries]
-                    sub_query_logs = []
-                    if task_query_ids:
-                        placeholders_sql = ','.join(['%s'] * len(task_query_ids))
-                        cur.execute(f"""
-                            SELECT esql.id, esql.task_query_id, esql.sub_query, esql.url, esql.domain, 
-                                   esql.title, esql.snippet, esql.site_name, esql.cite_index, esql.created_at,
-                                   esql.record_id, esql.citation_id
-                            FROM executor_sub_query_log esql
-                            WHERE esql.task_query_id IN ({placeholders_sql})
-                            ORDER BY esql.task_query_id, esql.created_at
-                        """, task_query_ids)
-                        sub_query_logs = cur.fetchall()
+                    
+                    # 只轮询进度时不读取日志
+                    if summary_only:
+                        tasks_data.append({
+                            "task_id": task_id,
+                            "query_count": query_count,
+                            "status": status,
+                            "created_at": task_created_at.isoformat() if task_created_at else None,
+                            "updated_at": updated_at.isoformat() if updated_at else None,
+                            "platform_progress": fetch_platform_progress(
+                                cur, task_id, task_query_ids, keywords, platforms, query_count, task_created_at
+                            )
+                        })
+                        continue
+                    
+                    # 查询 executor_sub_query_log 数据
+                    sub_query_logs, _ = fetch_sub_query_logs(cur, task_query_ids, task_created_at, excluded_fields)
                     
                     # 推断轮次信息：通过 search_records 的 created_at 和任务关联推断
                     # 对于同一个 task_id + task_query_id + platform，按 created_at 排序来确定轮次
@@ -684,8 +797,9 @@ async def get_task_status(
                                     WHERE task_id = %s 
                                       AND task_query_id = %s 
                                       AND platform = %s
+                                      AND created_at >= %s
                                     ORDER BY created_at ASC
-                                """, (task_id, task_query_id, platform_lower))
+                                """, (task_id, task_query_id, platform_lower, task_created_at))
                                 record_rows = cur.fetchall()
                                 
                                 # 根据排序位置推断轮次（第1个为轮次1，第2个为轮次2，以此类推）
@@ -707,21 +821,22 @@ async def get_task_status(
                             if task_query_ids:
                                 placeholders_query = ','.join(['%s'] * len(task_query_ids))
                                 cur.execute(f"""
-                                    SELECT DISTINCT sq.query, sq.record_id, sq.query_order, sq.id
+                                    SELECT DISTINCT sq.query, sq.record_id, sq.query_order, sq.id, sq.text_normalized
                                     FROM search_queries sq
                                     INNER JOIN search_records sr ON sq.record_id = sr.id
                                     WHERE sr.task_id = %s 
                                       AND sr.task_query_id IN ({placeholders_query})
                                       AND sr.platform = %s
                                       AND sr.prompt_type = 'api_task'
+                                      AND sr.created_at >= %s
                                     ORDER BY sq.query_order, sq.id
-                                """, [task_id] + task_query_ids + [platform_lower])
+                                """, [task_id] + task_query_ids + [platform_lower, task_created_at])
                                 query_rows = cur.fetchall()
                                 
                                 for row in query_rows:
                                     query = row[0]
                                     if query:
-                                        query = ensure_utf8_string(query)
+                                        query = repair_text(query, row[4])
                                         platform_query_tokens.append({
                                             "query": query,
                                             "citations": []  # 简化版本，不包含 citations
@@ -735,12 +850,12 @@ async def get_task_status(
                     # 使用 citation_id 去重统计，确保每个 citation 对每个 sub_query 只计算一次
                     # 同时包含没有 URL 但有 sub_query 的记录（count 为 0）
                     summary_table = {}
-                    # 使用 (query, platform, sub_query) 作为 key
-                    for sql in sub_query_logs:
+                    # 使用 (query, platform, sub_query) 作为 key，被排除时不构建
+                    for sql in ([] if "summary_table" in excluded_sections else sub_query_logs):
                         url = sql[3]  # url 字段
                         task_query_id = sql[1]
                         query = task_query_map.get(task_query_id, "")
-                        sub_query = ensure_utf8_string(sql[2]) if sql[2] and isinstance(sql[2], str) else (sql[2] or "")
+                        sub_query = repair_text(sql[2], sql[12]) or ""
                         
                         # 如果没有 sub_query，跳过（根据表约束，至少要有 sub_query 或 url 之一）
                         if not sub_query and not url:
@@ -753,8 +868,8 @@ async def get_task_status(
                         platform = ""
                         if record_id:
                             cur.execute("""
-                                SELECT platform FROM search_records WHERE id = %s LIMIT 1
-                            """, (record_id,))
+                                SELECT platform FROM search_records WHERE id = %s AND created_at >= %s LIMIT 1
+                            """, (record_id, task_created_at))
                             platform_row = cur.fetchone()
                             if platform_row:
                                 platform = ensure_utf8_string(platform_row[0]) if isinstance(platform_row[0], str) else platform_row[0]
@@ -765,8 +880,8 @@ async def get_task_status(
                             if task_query_id:
                                 cur.execute("""
                                     SELECT DISTINCT platform FROM search_records 
-                                    WHERE task_id = %s AND task_query_id = %s LIMIT 1
-                                """, (task_id, task_query_id))
+                                    WHERE task_id = %s AND task_query_id = %s AND created_at >= %s LIMIT 1
+                                """, (task_id, task_query_id, task_created_at))
                                 platform_row = cur.fetchone()
                                 if platform_row:
                                     platform = ensure_utf8_string(platform_row[0]) if isinstance(platform_row[0], str) else platform_row[0]
@@ -805,20 +920,20 @@ async def get_task_status(
                     # 构建详细日志数据：task_id、查询词、轮次、平台、sub_query、时间、域名、网址超链
                     # 包含所有记录，包括没有 URL 但有 sub_query 的记录
                     detail_logs = []
-                    for sql in sub_query_logs:
+                    for sql in ([] if "detail_logs" in excluded_sections else sub_query_logs):
                         url = sql[3]  # url 字段
                         task_query_id = sql[1]
                         query = task_query_map.get(task_query_id, "")
-                        sub_query = ensure_utf8_string(sql[2]) if sql[2] and isinstance(sql[2], str) else (sql[2] or "")
+                        sub_query = repair_text(sql[2], sql[12]) or ""
                         
                         # 如果没有 sub_query 也没有 url，跳过（根据表约束，至少要有其中之一）
                         if not sub_query and not url:
                             continue
                         
-                        url = ensure_utf8_string(url) if url and isinstance(url, str) else (url or "")
-                        domain = ensure_utf8_string(sql[4]) if sql[4] and isinstance(sql[4], str) else (sql[4] or "")
-                        title = ensure_utf8_string(sql[5]) if sql[5] and isinstance(sql[5], str) else (sql[5] or "")
-                        snippet = ensure_utf8_string(sql[6]) if sql[6] and isinstance(sql[6], str) else (sql[6] or "")
+                        url = repair_text(url, sql[12]) or ""
+                        domain = repair_text(sql[4], sql[12]) or ""
+                        title = repair_text(sql[5], sql[12]) or ""
+                        snippet = repair_text(sql[6], sql[12]) or ""
                         created_at = sql[9]
                         record_id = sql[10]
                         
@@ -827,8 +942,8 @@ async def get_task_status(
                         round_num = None
                         if record_id:
                             cur.execute("""
-                                SELECT platform FROM search_records WHERE id = %s LIMIT 1
-                            """, (record_id,))
+                                SELECT platform FROM search_records WHERE id = %s AND created_at >= %s LIMIT 1
+                            """, (record_id, task_created_at))
                             platform_row = cur.fetchone()
                             if platform_row:
                                 platform = ensure_utf8_string(platform_row[0]) if isinstance(platform_row[0], str) else platform_row[0]
@@ -845,7 +960,7 @@ async def get_task_status(
                             if doubao_queries:
                                 sub_query = doubao_queries
                         
-                        detail_logs.append({
+                        detail_logs.append(drop_fields({
                             "task_id": task_id,
                             "query": query,
                             "round": round_num,
@@ -856,23 +971,28 @@ async def get_task_status(
                             "url": url,
                             "title": title,
                             "snippet": snippet
-                        })
+                        }, excluded_fields))
                     
-                    tasks_data.append({
+                    task_data = {
                         "task_id": task_id,
                         "keywords": keywords,
                         "platforms": platforms,
                         "query_count": query_count,
                         "status": status,
-                        "created_at": created_at.isoformat() if created_at else None,
+                        "created_at": task_created_at.isoformat() if task_created_at else None,
                         "updated_at": updated_at.isoformat() if updated_at else None,
                         "task_queries": task_query_list,
                         "summary_table": summary_table_list,
                         "detail_logs": detail_logs
-                    })
+                    }
+                    for section in excluded_sections:
+                        task_data.pop(section, None)
+                    tasks_data.append(task_data)
                 
-                return StatusResponse(status="multiple", data={"tasks": tasks_data})
+                return json_response({"status": "multiple", "data": {"tasks": tasks_data}}, StatusResponse)
             
+    except HTTPException:
+        raise
     except psycopg2.errors.UndefinedTable as e:
         # 处理表不存在的情况，返回友好的错误信息
         error_msg = str(e)
@@ -903,6 +1023,77 @@ async def get_task_status(
         raise HTTPException(status_code=500, detail=f"查询任务状态失败: {str(e)}")
 
 
+@app.get("/stats")
+async def list_stats_reports():
+    """列出可用的统计报告"""
+    return {"reports": list(REPORTS.keys())}
+
+
+@app.get("/stats/{report_name}")
+def get_stats_report(
+    report_name: str,
+    days: Optional[int] = Query(None, description="最近 N 天"),
+    start: Optional[datetime] = Query(None, description="起始时间（含）"),
+    end: Optional[datetime] = Query(None, description="结束时间（不含）"),
+    platform: Optional[List[str]] = Query(None, description="平台，可重复指定"),
+    keyword: Optional[List[str]] = Query(None, description="关键词，可重复指定"),
+    prompt_type: Optional[str] = Query(None, description="prompt 类型")
+):
+    """
+    获取统计报告数据（JSON）
+
+    - **report_name**: 报告名，见 GET /stats
+    - 过滤参数与 stats.py / stats_full.py 的命令行参数一致
+
+    同步函数：缓存未命中时的分析查询较慢，由 FastAPI 放到线程池执行，不阻塞事件循环
+    """
+    if report_name not in REPORTS:
+        raise HTTPException(status_code=404, detail=f"未知报告: {report_name}")
+
+    filters = ReportFilters.build(
+        days=days,
+        start=start,
+        end=end,
+        platforms=platform,
+        keywords=keyword,
+        prompt_type=prompt_type
+    )
+
+    try:
+        with get_db_connection() as conn:
+            data, cached = report_cache.get_or_compute(conn, report_name, filters)
+        return json_response({
+            "report": report_name,
+            "filters": filters.describe(),
+            "cached": cached,
+            "data": data
+        })
+    except Exception as e:
+        logger.error(f"生成统计报告失败: {report_name}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"生成统计报告失败: {str(e)}")
+
+
+@app.get("/records/{record_id}/answer")
+def get_record_answer(record_id: int):
+    """
+    按需获取单条搜索记录的完整回答
+
+    /status 等接口不返回完整回答，需要时通过该接口单独读取（answer_blobs 中解压）
+    """
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            answer = fetch_answer(cur, record_id)
+        if answer is None:
+            raise HTTPException(status_code=404, detail=f"记录不存在: {record_id}")
+        return {"record_id": record_id, "full_answer": answer}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"读取完整回答失败: {record_id}: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"读取完整回答失败: {str(e)}")
+
+
 # 静态文件服务
 import os
 static_dir = os.path.join(os.path.dirname(__file__), "static")
@@ -922,12 +1113,22 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "POST /mock": "创建新的搜索任务",
+            "POST /mock/batch": "批量创建任务（一个事务）",
             "GET /status?id=<task_id>": "查询任务状态",
+            "GET /stats/<report>": "统计报告数据",
+            "GET /records/<record_id>/answer": "完整回答",
+            "GET /metrics": "Prometheus 指标",
             "POST /bocha/search?query=<query>": "博查实时搜索"
         }
     }
 
 
+@app.get("/metrics")
+def metrics():
+    """Prometheus 指标（请求耗时、数据库查询、执行器、平台搜索，见 core/metrics.py）"""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 async def health():
     """健康检查"""
@@ -937,7 +1138,7 @@ async def health():
             cur = conn.cursor()
             cur.execute("SELECT 1")
             cur.fetchone()
-        return {"status": "healthy", "database": "connected"}
+        return {"status": "healthy", "database": "connected", "sessions": SESSIONS.snapshot()}
     except Exception as e:
         logger.error(f"健康检查失败: {e}")
         return {"status": "unhealthy", "error": str(e)}
@@ -974,14 +1175,16 @@ async def export_task_data(ids: str = Query(..., description="任务ID列表，
                     esql.sub_query,
                     esql.url,
                     esql.domain,
-                    esql.title,
-                    esql.snippet,
-                    esql.site_name,
+                    COALESCE(u.title, esql.title),
+                    COALESCE(u.snippet, esql.snippet),
+                    COALESCE(u.site_name, esql.site_name),
                     esql.cite_index,
-                    esql.created_at
+                    esql.created_at,
+                    esql.text_normalized
                 FROM task_query tq
                 INNER JOIN task_jobs tj ON tq.task_id = tj.id
                 LEFT JOIN executor_sub_query_log esql ON tq.id = esql.task_query_id
+                LEFT JOIN urls u ON u.id = esql.url_id
                 WHERE tq.task_id IN ({placeholders})
                 ORDER BY tq.task_id, tq.id, esql.created_at
             """, task_ids)
@@ -1009,7 +1212,7 @@ async def export_task_data(ids: str = Query(..., description="任务ID列表，
         
         # 写入数据
         for row in rows:
-            task_query_id, query, task_id, platforms_json, sub_query, url, domain, title, snippet, site_name, cite_index, created_at = row
+            task_query_id, query, task_id, platforms_json, sub_query, url, domain, title, snippet, site_name, cite_index, created_at, text_normalized = row
             
             # 解析平台列表
             if isinstance(platforms_json, (list, dict)):
@@ -1019,14 +1222,14 @@ async def export_task_data(ids: str = Query(..., description="任务ID列表，
             
             platforms_str = ', '.join(platforms) if isinstance(platforms, list) else str(platforms)
             
-            # 修复编码
+            # 修复编码（task_query 来自 API 输入；日志字段在写入时已规范化的行直接跳过）
             query = ensure_utf8_string(query) if isinstance(query, str) else query
-            sub_query = ensure_utf8_string(sub_query) if sub_query and isinstance(sub_query, str) else sub_query
-            url = ensure_utf8_string(url) if url and isinstance(url, str) else url
-            domain = ensure_utf8_string(domain) if domain and isinstance(domain, str) else domain
-            title = ensure_utf8_string(title) if title and isinstance(title, str) else title
-            snippet = ensure_utf8_string(snippet) if snippet and isinstance(snippet, str) else snippet
-            site_name = ensure_utf8_string(site_name) if site_name and isinstance(site_name, str) else site_name
+            sub_query = repair_text(sub_query, text_normalized)
+            url = repair_text(url, text_normalized)
+            domain = repair_text(domain, text_normalized)
+            title = repair_text(title, text_normalized)
+            snippet = repair_text(snippet, text_normalized)
+            site_name = repair_text(site_name, text_normalized)
             
             writer.writerow([
                 task_id,
@@ -1077,8 +1280,8 @@ async def bocha_search(query: str = Query(..., description="查询词")):
         if not query or not query.strip():
             raise HTTPException(status_code=400, detail="query 不能为空")
         
-        # 创建博查Provider实例
-        provider = BochaApiProvider(headless=True, timeout=30000)
+        # 博查 Provider 单例（providers/registry.py）
+        provider = get_provider("bocha", headless=True, timeout=30000)
         
         # 调用搜索
         result = provider.search(query, query)
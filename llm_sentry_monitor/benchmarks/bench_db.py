@@ -0,0 +1,134 @@
+"""
+benchmarks/bench_db.py - save_to_db、/status、/export 基准
+
+需要一个独立的 PostgreSQL 库（默认 geo_monitor_bench，见 benchmarks/setup_bench_db.sh），
+基准会写入合成任务数据，不要指向生产库
+"""
+import json
+import time
+import asyncio
+from itertools import cycle
+from core.db import get_db_connection
+from core.task_executor import save_to_db
+from benchmarks.fixtures import SYNTHETIC_BUILDERS, SIZES, synthetic_answer
+from benchmarks.bench_parsers import SSE_TEXT_PLATFORMS, parse_fixture, check_parsed
+from benchmarks.harness import measure, summarize
+
+PLATFORMS = ["deepseek", "doubao"]
+
+
+def build_results(size="medium", variants=20, url_pool=500):
+    """每个平台预先生成若干份不同的解析结果，写入时轮流使用"""
+    n_queries, n_results, n_chunks = SIZES[size]
+    results = {}
+    for platform, builder in SYNTHETIC_BUILDERS.items():
+        platform_results = []
+        for seed in range(variants):
+            body = builder(n_queries, n_results, n_chunks, url_pool=url_pool, seed=seed)
+            queries, citations, text = parse_fixture(platform, body)
+            check_parsed(f"{platform}_{size}_{seed}", platform, text)
+            platform_results.append({
+                "full_text": text if platform in SSE_TEXT_PLATFORMS else synthetic_answer(body),
+                "queries": queries,
+                "citations": citations
+            })
+        results[platform] = cycle(platform_results)
+    return results
+
+
+def create_task(keywords, query_count):
+    """创建 task_jobs 和 task_query，返回 (task_id, {keyword: task_query_id})"""
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO task_jobs (keywords, platforms, query_count, status, settings)
+            VALUES (%s, %s, %s, 'pending', %s)
+            RETURNING id
+        """, (json.dumps(keywords, ensure_ascii=False), json.dumps(PLATFORMS), query_count, json.dumps({"benchmark": True})))
+        task_id = cur.fetchone()[0]
+        task_query_ids = {}
+        for keyword in keywords:
+            cur.execute("INSERT INTO task_query (task_id, query) VALUES (%s, %s) RETURNING id", (task_id, keyword))
+            task_query_ids[keyword] = cur.fetchone()[0]
+    return task_id, task_query_ids
+
+
+def seed_tasks(tasks, keywords_per_task, rounds, size="medium"):
+    """
+    写入合成任务数据，同时记录每次 save_to_db 的耗时
+
+    Returns:
+        (task_ids, save_to_db 耗时列表)
+    """
+    results = build_results(size)
+    task_ids = []
+    timings = []
+    for task_idx in range(tasks):
+        keywords = [f"基准关键词{task_idx}-{i}" for i in range(keywords_per_task)]
+        task_id, task_query_ids = create_task(keywords, rounds)
+        result_data = []
+        for _ in range(rounds):
+            for keyword in keywords:
+                for platform in PLATFORMS:
+                    result = next(results[platform])
+                    start = time.perf_counter()
+                    record_id, citations_count = save_to_db(
+                        keyword, platform, keyword, result,
+                        prompt_type="api_task",
+                        response_time_ms=1000,
+                        task_id=task_id,
+                        task_query_id=task_query_ids[keyword]
+                    )
+                    timings.append((time.perf_counter() - start) * 1000)
+                    result_data.append({
+                        "keyword": keyword,
+                        "platform": platform,
+                        "status": "completed",
+                        "record_id": record_id,
+                        "citations_count": citations_count,
+                        "response_time_ms": 1000
+                    })
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "UPDATE task_jobs SET status = 'done', result_data = %s WHERE id = %s",
+                (json.dumps(result_data, ensure_ascii=False), task_id)
+            )
+        task_ids.append(task_id)
+    return task_ids, timings
+
+
+def run(tasks=3, keywords_per_task=5, rounds=2, size="medium", repeat=10):
+    """
+    Returns:
+        {"save_to_db/<size>", "status/single", "status/snapshot", "status/multiple", "status/summary", "status/page", "export": 统计结果}
+    """
+    # api 依赖完整的 provider 环境，放到函数内导入，只跑解析基准时不需要
+    from api import get_task_status, export_task_data
+    from core import snapshots
+
+    task_ids, save_timings = seed_tasks(tasks, keywords_per_task, rounds, size)
+    results = {f"save_to_db/{size}": summarize(save_timings)}
+
+    def status(id=None, ids=None, limit=None, exclude=None, summary_only=False):
+        # 直接调用接口函数时 Query 默认值不会被解析，所有参数都显式传入
+        return asyncio.run(get_task_status(
+            id=id, ids=ids, limit=limit, after_id=None, exclude=exclude, summary_only=summary_only
+        ))
+
+    ids_param = ",".join(str(task_id) for task_id in task_ids)
+    # status/single 测量完整构建，status/snapshot 测量已完成任务读取快照（第一次调用时写入）
+    snapshots_enabled = snapshots.SNAPSHOTS_ENABLED
+    snapshots.SNAPSHOTS_ENABLED = False
+    results["status/single"] = measure(lambda: status(id=task_ids[0]), repeat=repeat)
+    snapshots.SNAPSHOTS_ENABLED = snapshots_enabled
+    results["status/snapshot"] = measure(lambda: status(id=task_ids[0]), repeat=repeat)
+    results["status/multiple"] = measure(lambda: status(ids=ids_param), repeat=repeat)
+    results["status/summary"] = measure(lambda: status(id=task_ids[0], summary_only=True), repeat=repeat)
+    results["status/page"] = measure(lambda: status(id=task_ids[0], limit=100, exclude="title,snippet"), repeat=repeat)
+    results["export"] = measure(lambda: asyncio.run(export_task_data(ids=ids_param)), repeat=repeat)
+
+    records = tasks * keywords_per_task * rounds * len(PLATFORMS)
+    for name in ("status/single", "status/snapshot", "status/multiple", "status/summary", "status/page", "export"):
+        results[name]["records"] = records
+    return results
@@ -0,0 +1,139 @@
+"""
+benchmarks/bench_import.py - 冷启动导入耗时（python -X importtime）
+
+在子进程中执行 `python -X importtime -c "import api"`，统计 api 模块的累计导入耗时，
+并检查启动时不应加载的模块（浏览器 provider、playwright、tldextract、jieba 等在第一次使用时才导入）。
+
+使用方法（在 llm_sentry_monitor 目录下）:
+    python -m benchmarks.bench_import                      # 默认预算 IMPORT_BUDGET_MS 或 1000ms
+    python -m benchmarks.bench_import --budget-ms 600 --top 20
+    python -m benchmarks.run --suite import                # 计入基准结果 JSON，可跨版本对比
+
+超出预算或加载了禁止的模块时退出码为 1，可放在 CI 中
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1000"))
+
+# API 启动时不应导入的模块（前缀匹配）
+FORBIDDEN_AT_BOOT = (
+    "playwright",
+    "tldextract",
+    "jieba",
+    "core.task_executor",
+    "providers.deepseek_web",
+    "providers.doubao_web",
+    "providers.deepseek_async",
+    "providers.doubao_async",
+    "providers.bocha_api",
+)
+
+
+def import_profile(module="api"):
+    """
+    在新进程中导入 module，解析 -X importtime 输出
+
+    Returns:
+        [{"module", "self_us", "cumulative_us", "depth"}]（按导入完成顺序）
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # import time:       self [us] |  cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": name.strip(),
+                "self_us": int(self_us),
+                "cumulative_us": int(cumulative_us),
+                "depth": (len(name) - len(name.lstrip())) // 2
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def total_ms(rows, module="api"):
+    """module 的累计导入耗时（毫秒）"""
+    for row in rows:
+        if row["module"] == module and row["depth"] == 0:
+            return row["cumulative_us"] / 1000
+    return sum(row["self_us"] for row in rows) / 1000
+
+
+def forbidden_modules(rows, forbidden=FORBIDDEN_AT_BOOT):
+    """启动时被导入的禁止模块"""
+    return sorted({
+        row["module"] for row in rows
+        if any(row["module"] == name or row["module"].startswith(name + ".") for name in forbidden)
+    })
+
+
+def run(repeat=5, module="api"):
+    """
+    Returns:
+        {"import/<module>": 统计结果 + 最慢的顶层依赖}
+    """
+    from benchmarks.harness import summarize
+
+    # 第一次导入会编译 .pyc，不计入
+    import_profile(module)
+    timings = []
+    rows = []
+    for _ in range(repeat):
+        rows = import_profile(module)
+        timings.append(total_ms(rows, module))
+    result = summarize(timings)
+    result["slowest"] = [
+        [row["module"], round(row["cumulative_us"] / 1000, 1)]
+        for row in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)
+        if row["depth"] == 1
+    ][:10]
+    result["forbidden"] = forbidden_modules(rows)
+    return {f"import/{module}": result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API 冷启动导入耗时')
+    parser.add_argument('--module', default='api', help='要导入的模块')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS, help='累计导入耗时预算（毫秒，取中位数）')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数')
+    parser.add_argument('--top', type=int, default=15, help='显示最慢的模块数')
+    args = parser.parse_args()
+
+    result = run(repeat=args.repeat, module=args.module)[f"import/{args.module}"]
+    rows = import_profile(args.module)
+    print(f"⏱️  import {args.module}: 中位数 {result['median_ms']}ms（P95 {result['p95_ms']}ms，预算 {args.budget_ms}ms）")
+    print(f"\n最慢的 {args.top} 个模块（累计耗时）:")
+    for row in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:args.top]:
+        print(f"  {row['cumulative_us'] / 1000:8.1f}ms  {'  ' * row['depth']}{row['module']}")
+
+    failed = False
+    if result["forbidden"]:
+        print(f"\n❌ 启动时导入了应延迟加载的模块: {', '.join(result['forbidden'])}")
+        failed = True
+    if result["median_ms"] > args.budget_ms:
+        print(f"\n❌ 导入耗时超出预算: {result['median_ms']}ms > {args.budget_ms}ms")
+        failed = True
+    if not failed:
+        print("\n✅ 导入耗时在预算内")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
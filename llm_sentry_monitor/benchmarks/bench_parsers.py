@@ -0,0 +1,54 @@
+"""
+benchmarks/bench_parsers.py - 离线回放 SSE 响应，测量 provider 解析耗时
+"""
+import logging
+from providers.deepseek_web import parse_deepseek_sse
+from providers.doubao_web import parse_doubao_sse
+from benchmarks.fixtures import synthetic_fixtures, recorded_fixtures
+from benchmarks.harness import measure
+
+PARSERS = {
+    "deepseek": parse_deepseek_sse,
+    "doubao": parse_doubao_sse,
+}
+
+# 解析函数逐条打 INFO 日志，基准中只保留 WARNING 以上，测量的是解析本身（日志参数的格式化开销仍计入）
+_logger = logging.getLogger("benchmarks.parsers")
+_logger.setLevel(logging.WARNING)
+
+
+def parse_fixture(platform, body):
+    """回放一次，返回 (拓展词, 引用, 回答文本)"""
+    queries, results = [], []
+    text = PARSERS[platform](body, queries, results, _logger)
+    return queries, results, text
+
+
+# 从 SSE 中解析回答文本的平台；DeepSeek 的回答在线上从页面 DOM 读取，解析器只提取拓展词和引用
+SSE_TEXT_PLATFORMS = {"doubao"}
+
+
+def check_parsed(name, platform, text):
+    """素材中一定有回答文本，解析为空说明解析器没有识别出回答事件"""
+    if platform in SSE_TEXT_PLATFORMS and not text:
+        raise AssertionError(f"{name}: 没有解析出回答文本")
+
+
+def run(repeat=20, sizes=None):
+    """
+    Returns:
+        {"parse/<素材名>": 统计结果 + 素材规模}
+    """
+    results = {}
+    for name, platform, body in synthetic_fixtures(sizes) + recorded_fixtures():
+        queries, citations, text = parse_fixture(platform, body)
+        check_parsed(name, platform, text)
+        stats = measure(lambda: parse_fixture(platform, body), repeat=repeat)
+        stats.update({
+            "body_bytes": len(body.encode("utf-8")),
+            "queries": len(queries),
+            "citations": len(citations),
+            "text_chars": len(text),
+        })
+        results[f"parse/{name}"] = stats
+    return results
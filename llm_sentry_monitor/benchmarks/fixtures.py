@@ -0,0 +1,124 @@
+"""
+benchmarks/fixtures.py - SSE 回放素材
+1. 录制素材：benchmarks/recordings/<platform>_*.sse（运行时设置 SSE_RECORD_DIR=benchmarks/recordings 采集）
+2. 合成素材：仿照 provider 解析器识别的事件结构生成，用于测量解析耗时，规模可调，同一 seed 结果固定。
+   合成素材不代表线上的真实格式，解析结果是否正确以录制素材为准
+"""
+import os
+import glob
+import json
+import random
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+_WORDS = ["装修", "瓷砖", "品牌", "推荐", "价格", "环保", "地板", "涂料", "十大", "排行榜",
+          "口碑", "性价比", "质量", "选购", "攻略", "2024", "家居", "卫浴", "橱柜", "门窗"]
+_SITES = [("zhihu.com", "知乎"), ("sohu.com", "搜狐"), ("163.com", "网易"), ("baidu.com", "百度"),
+          ("toutiao.com", "今日头条"), ("jd.com", "京东"), ("douban.com", "豆瓣"), ("qq.com", "腾讯网"),
+          ("smzdm.com", "什么值得买"), ("bilibili.com", "哔哩哔哩")]
+
+
+def _sentence(rng, words):
+    return "".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _result(rng, index, n_queries, url_pool):
+    domain, site_name = rng.choice(_SITES)
+    # 从有限的 URL 池中取，模拟同一网页在多次回答中重复出现
+    page = rng.randint(1, url_pool)
+    return {
+        "url": f"https://www.{domain}/article/{page}",
+        "title": _sentence(rng, 6),
+        "snippet": _sentence(rng, 40),
+        "site_name": site_name,
+        "cite_index": index,
+        "query_indexes": [rng.randrange(n_queries)]
+    }
+
+
+def _sse(events):
+    return "".join(f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events)
+
+
+def deepseek_sse_body(n_queries=3, n_results=20, n_chunks=300, url_pool=500, seed=0):
+    """合成 DeepSeek 响应：SEARCH fragment、增量 results、逐段回答"""
+    rng = random.Random(seed)
+    queries = [{"query": _sentence(rng, 3)} for _ in range(n_queries)]
+    results = [_result(rng, i + 1, n_queries, url_pool) for i in range(n_results)]
+    events = [{"v": {"response": {"message_id": 2, "fragments": [{"type": "SEARCH", "queries": queries, "results": []}]}}}]
+    for start in range(0, n_results, 5):
+        events.append({"p": "response/fragments/-1/results", "o": "APPEND", "v": results[start:start + 5]})
+    events.append({"p": "response/fragments", "o": "APPEND", "v": [{"type": "RESPONSE", "content": ""}]})
+    for _ in range(n_chunks):
+        events.append({"p": "response/fragments/-1/content", "o": "APPEND", "v": _sentence(rng, 4)})
+    return _sse(events) + "event: close\ndata: {\"click_behavior\": \"none\"}\n\n"
+
+
+def doubao_sse_body(n_queries=3, n_results=20, n_chunks=300, url_pool=500, seed=0):
+    """合成豆包响应：patch_op 中的搜索结果块（block_type=10025）和文本块（block_type=10000）"""
+    rng = random.Random(seed)
+    queries = [_sentence(rng, 3) for _ in range(n_queries)]
+    results = []
+    for i in range(n_results):
+        r = _result(rng, i + 1, n_queries, url_pool)
+        results.append({"text_card": {"url": r["url"], "title": r["title"], "summary": r["snippet"],
+                                      "sitename": r["site_name"], "index": r["cite_index"]}})
+    search_block = {"block_type": 10025, "content": {"search_query_result_block": {"queries": queries, "results": results}}}
+    events = [{"patch_op": [{"patch_object": 1, "patch_type": 1, "patch_value": {"content_block": [search_block]}}]}]
+    for _ in range(n_chunks):
+        text_block = {"block_type": 10000, "content": {"text_block": {"text": _sentence(rng, 4)}}}
+        events.append({"patch_op": [{"patch_object": 1, "patch_type": 1, "patch_value": {"content_block": [text_block]}}]})
+    return _sse(events) + "data: [DONE]\n\n"
+
+
+def synthetic_answer(body):
+    """
+    合成 DeepSeek 素材中的回答文本
+
+    DeepSeek 的回答文本在线上从页面 DOM 读取，parse_deepseek_sse 不返回回答增量；
+    入库基准用这段文本代替页面上的回答
+    """
+    parts = []
+    for line in body.split("\n"):
+        if line.startswith("data: "):
+            event = json.loads(line[6:])
+            if event.get("p", "").endswith("/content") and isinstance(event.get("v"), str):
+                parts.append(event["v"])
+    return "".join(parts)
+
+
+SYNTHETIC_BUILDERS = {
+    "deepseek": deepseek_sse_body,
+    "doubao": doubao_sse_body,
+}
+
+# 合成素材的规模档位：(拓展词数, 引用数, 回答分段数)
+SIZES = {
+    "small": (2, 10, 100),
+    "medium": (4, 30, 600),
+    "large": (8, 80, 3000),
+}
+
+
+def synthetic_fixtures(sizes=None, url_pool=500):
+    """返回 [(名称, 平台, 响应体)]"""
+    fixtures = []
+    for size in sizes or SIZES:
+        n_queries, n_results, n_chunks = SIZES[size]
+        for platform, builder in SYNTHETIC_BUILDERS.items():
+            body = builder(n_queries, n_results, n_chunks, url_pool=url_pool)
+            fixtures.append((f"{platform}_{size}", platform, body))
+    return fixtures
+
+
+def recorded_fixtures(directory=RECORDINGS_DIR):
+    """返回 [(名称, 平台, 响应体)]，平台取文件名前缀"""
+    fixtures = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.sse"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        platform = name.split("_", 1)[0]
+        if platform not in SYNTHETIC_BUILDERS:
+            continue
+        with open(path, encoding="utf-8") as f:
+            fixtures.append((f"recorded_{name}", platform, f.read()))
+    return fixtures
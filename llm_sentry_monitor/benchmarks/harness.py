@@ -0,0 +1,93 @@
+"""
+benchmarks/harness.py - 计时、结果写出与版本间对比
+"""
+import os
+import json
+import time
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def measure(fn, repeat=20, warmup=2):
+    """
+    多次执行 fn 并统计耗时（毫秒）
+
+    Returns:
+        {"runs", "mean_ms", "median_ms", "p95_ms", "min_ms", "max_ms"}
+    """
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def summarize(timings):
+    """汇总一组耗时（毫秒）"""
+    ordered = sorted(timings)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "min_ms": round(ordered[0], 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(results, params, output=None):
+    """写出 JSON 结果，返回文件路径"""
+    revision = _git_revision()
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench_{timestamp}_{revision}.json")
+    payload = {
+        "meta": {
+            "git_revision": revision,
+            "timestamp": timestamp,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "params": params,
+        },
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+    return output
+
+
+def compare(baseline_path, results):
+    """
+    与历史结果对比，返回 [[名称, 基线 mean_ms, 当前 mean_ms, 变化%]]
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    rows = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or not before.get("mean_ms"):
+            rows.append([name, None, current["mean_ms"], None])
+            continue
+        change = (current["mean_ms"] - before["mean_ms"]) / before["mean_ms"] * 100
+        rows.append([name, before["mean_ms"], current["mean_ms"], round(change, 1)])
+    return rows
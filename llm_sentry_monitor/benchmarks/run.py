@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+benchmarks/run.py - 基准测试入口
+
+使用方法（在 llm_sentry_monitor 目录下）:
+    python -m benchmarks.run --suite parsers
+    python -m benchmarks.run --suite import
+    python -m benchmarks.run --suite all --tasks 5 --keywords 10 --rounds 2 --compare benchmarks/results/<基线>.json
+
+选项:
+    --suite: parsers（离线解析，不需要数据库）/ db（save_to_db、/status、/export）/ import（API 冷启动导入耗时）/ all
+    --db-name: 基准库名（默认 geo_monitor_bench，先执行 benchmarks/setup_bench_db.sh 创建）
+    --tasks / --keywords / --rounds: 合成数据规模（记录数 = 任务数 × 关键词数 × 轮数 × 2 个平台）
+    --size: 每条结果的规模（small / medium / large）
+    --repeat: 每项重复次数
+    --output: 结果 JSON 路径（默认 benchmarks/results/bench_<时间>_<git 版本>.json）
+    --compare: 与历史结果 JSON 对比
+"""
+import os
+import sys
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='LLM Sentry 基准测试')
+    parser.add_argument('--suite', choices=['parsers', 'db', 'import', 'all'], default='parsers', help='要运行的基准')
+    parser.add_argument('--db-name', default=os.getenv('BENCH_DB_NAME', 'geo_monitor_bench'), help='基准库名')
+    parser.add_argument('--tasks', type=int, default=3, help='任务数')
+    parser.add_argument('--keywords', type=int, default=5, help='每个任务的关键词数')
+    parser.add_argument('--rounds', type=int, default=2, help='执行轮数')
+    parser.add_argument('--size', choices=['small', 'medium', 'large'], default='medium', help='每条结果的规模')
+    parser.add_argument('--repeat', type=int, default=20, help='每项重复次数')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径')
+    parser.add_argument('--compare', default=None, help='基线结果 JSON')
+
+    args = parser.parse_args()
+
+    if args.suite in ('db', 'all'):
+        if args.db_name == 'geo_monitor':
+            print("❌ 基准会写入合成数据，不能使用主库 geo_monitor", file=sys.stderr)
+            sys.exit(1)
+        # core.db 在导入时读取 DB_NAME，必须在导入基准模块之前设置
+        os.environ['DB_NAME'] = args.db_name
+
+    from tabulate import tabulate
+    from benchmarks import bench_parsers
+    from benchmarks.harness import write_results, compare
+
+    results = {}
+    if args.suite in ('parsers', 'all'):
+        print("⏱️  解析基准...")
+        results.update(bench_parsers.run(repeat=args.repeat))
+    if args.suite in ('import', 'all'):
+        from benchmarks import bench_import
+        print("⏱️  导入耗时基准（python -X importtime -c 'import api'）...")
+        results.update(bench_import.run(repeat=min(args.repeat, 5)))
+    if args.suite in ('db', 'all'):
+        from benchmarks import bench_db
+        print(f"⏱️  数据库基准（库: {args.db_name}）...")
+        results.update(bench_db.run(
+            tasks=args.tasks,
+            keywords_per_task=args.keywords,
+            rounds=args.rounds,
+            size=args.size,
+            repeat=args.repeat
+        ))
+
+    table = [[name, r["runs"], r["mean_ms"], r["median_ms"], r["p95_ms"]] for name, r in results.items()]
+    print(tabulate(table, headers=["基准", "次数", "平均(ms)", "中位数(ms)", "P95(ms)"], tablefmt="grid"))
+
+    params = {k: v for k, v in vars(args).items() if k not in ('output', 'compare')}
+    output = write_results(results, params, args.output)
+    print(f"\n✅ 结果已写入: {output}")
+
+    if args.compare:
+        rows = compare(args.compare, results)
+        print(tabulate(rows, headers=["基准", "基线(ms)", "当前(ms)", "变化(%)"], tablefmt="grid"))
+
+
+if __name__ == '__main__':
+    main()
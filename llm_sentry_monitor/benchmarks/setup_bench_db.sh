@@ -0,0 +1,42 @@
+#!/bin/bash
+# 文件：llm_sentry_monitor/benchmarks/setup_bench_db.sh
+# 用途：在本地数据库容器中（重新）创建基准库，执行 init_v3.1.sql 和之后的所有迁移
+# 用法：bash benchmarks/setup_bench_db.sh [库名，默认 geo_monitor_bench]
+
+set -e
+
+BENCH_DB="${1:-${BENCH_DB_NAME:-geo_monitor_bench}}"
+
+if [ "$BENCH_DB" = "geo_monitor" ]; then
+    echo "❌ 不能使用主库 geo_monitor"
+    exit 1
+fi
+
+# 进入 geo_db 目录
+cd "$(dirname "$0")/../../geo_db"
+
+if ! docker ps | grep -q geo_db; then
+    echo "❌ 数据库容器未运行，请先执行: make db-up"
+    exit 1
+fi
+
+CONTAINER_NAME=$(docker ps --filter "name=geo_db" --format "{{.Names}}" | head -1)
+PSQL="docker exec -i $CONTAINER_NAME psql -q -U geo_admin -v ON_ERROR_STOP=1"
+
+echo "🔄 重建基准库 ${BENCH_DB}..."
+$PSQL -d postgres -c "DROP DATABASE IF EXISTS ${BENCH_DB};"
+$PSQL -d postgres -c "CREATE DATABASE ${BENCH_DB} ENCODING 'UTF8';"
+
+echo "  → init_v3.1.sql"
+$PSQL -d "$BENCH_DB" < init_v3.1.sql > /dev/null
+
+# v3.1 之后的迁移（006 起，按编号顺序）
+for migration in migrations/0*.sql; do
+    number=$(basename "$migration" | cut -c1-3)
+    if [ "$((10#$number))" -ge 6 ]; then
+        echo "  → $(basename "$migration")"
+        $PSQL -d "$BENCH_DB" < "$migration" > /dev/null
+    fi
+done
+
+echo "✅ 基准库 ${BENCH_DB} 已就绪"
@@ -0,0 +1,130 @@
+"""
+core/answers.py - 完整回答的压缩存储与按需读取
+完整回答存放在 answer_blobs 表（按内容哈希去重），search_records 只保存 answer_hash：
+1. 写入：store_answer / store_answers 压缩后按哈希 upsert，返回哈希
+2. 读取：fetch_answer / fetch_answers 按记录 ID 按需取回并解压，未迁移的旧记录回退到 full_answer 列
+
+压缩默认使用 zstd（zstandard 包），未安装时退化为 zlib；过短的文本不压缩
+"""
+import os
+import zlib
+import hashlib
+from psycopg2.extras import execute_values
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 短于该字节数的回答不压缩（压缩头的开销大于收益）
+MIN_COMPRESS_BYTES = 256
+
+ZSTD_LEVEL = int(os.getenv("ANSWER_ZSTD_LEVEL", "9"))
+ZLIB_LEVEL = 6
+
+
+def default_codec():
+    """当前环境可用的压缩算法（ANSWER_CODEC 环境变量可强制指定 zstd / zlib / none）"""
+    codec = os.getenv("ANSWER_CODEC", "zstd" if zstandard else "zlib")
+    if codec == "zstd" and not zstandard:
+        return "zlib"
+    return codec
+
+
+def hash_answer(text):
+    """回答内容的 SHA-256（hex），相同回答只存一份"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def compress_answer(text, codec=None):
+    """
+    压缩回答文本
+
+    Returns:
+        (codec, body)，codec 为实际使用的压缩算法
+    """
+    raw = text.encode("utf-8")
+    codec = codec or default_codec()
+    if len(raw) < MIN_COMPRESS_BYTES or codec == "none":
+        return "none", raw
+    if codec == "zstd":
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+
+def decompress_answer(codec, body):
+    """解压 answer_blobs 中的内容"""
+    body = bytes(body)
+    if codec == "zstd":
+        if not zstandard:
+            raise RuntimeError("读取 zstd 压缩的回答需要安装 zstandard: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    if codec == "zlib":
+        return zlib.decompress(body).decode("utf-8")
+    return body.decode("utf-8")
+
+
+def store_answers(cur, texts):
+    """
+    批量写入回答，已存在的哈希跳过
+
+    Args:
+        cur: 数据库游标（由调用方提交事务）
+        texts: 回答文本列表
+
+    Returns:
+        与 texts 等长的哈希列表，空文本对应 None
+    """
+    hashes = []
+    rows = {}
+    for text in texts:
+        if not text:
+            hashes.append(None)
+            continue
+        content_hash = hash_answer(text)
+        hashes.append(content_hash)
+        if content_hash not in rows:
+            codec, body = compress_answer(text)
+            rows[content_hash] = (content_hash, codec, len(text), body)
+
+    if rows:
+        execute_values(cur, """
+            INSERT INTO answer_blobs (content_hash, codec, raw_length, body)
+            VALUES %s
+            ON CONFLICT (content_hash) DO NOTHING
+        """, list(rows.values()))
+    return hashes
+
+
+def store_answer(cur, text):
+    """写入单条回答，返回哈希（空文本返回 None）"""
+    return store_answers(cur, [text])[0]
+
+
+def fetch_answers(cur, record_ids):
+    """
+    按记录 ID 批量读取完整回答
+
+    Returns:
+        {record_id: 回答文本}，没有回答的记录对应空字符串
+    """
+    if not record_ids:
+        return {}
+    cur.execute("""
+        SELECT sr.id, sr.full_answer, b.codec, b.body
+        FROM search_records sr
+        LEFT JOIN answer_blobs b ON b.content_hash = sr.answer_hash
+        WHERE sr.id = ANY(%s)
+    """, (list(record_ids),))
+    answers = {}
+    for record_id, full_answer, codec, body in cur.fetchall():
+        if body is not None:
+            answers[record_id] = decompress_answer(codec, body)
+        else:
+            answers[record_id] = full_answer or ""
+    return answers
+
+
+def fetch_answer(cur, record_id):
+    """读取单条记录的完整回答，记录不存在时返回 None"""
+    return fetch_answers(cur, [record_id]).get(record_id)
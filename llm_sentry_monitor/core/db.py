@@ -2,11 +2,14 @@
 core/db.py - 统一数据库配置和连接管理
 """
 import os
+import time
 import psycopg2
+import psycopg2.extensions
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 from dotenv import load_dotenv
 import os
+from core.metrics import observe_db_query
 
 # 根据 ENV_FILE 环境变量加载不同的 .env 文件
 env_file = os.getenv("ENV_FILE", ".env")
@@ -20,12 +23,45 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD", "geo_password123")
 }
 
+class _TimedCursorMixin:
+    """每次 execute / executemany / copy_expert 的耗时计入 db_queries_total、db_query_duration_seconds"""
+
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            observe_db_query(time.perf_counter() - start)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            observe_db_query(time.perf_counter() - start)
+
+    def copy_expert(self, sql, file, size=8192):
+        start = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            observe_db_query(time.perf_counter() - start)
+
+
+class TimedCursor(_TimedCursorMixin, psycopg2.extensions.cursor):
+    pass
+
+
+class TimedRealDictCursor(_TimedCursorMixin, RealDictCursor):
+    pass
+
+
 @contextmanager
 def get_db_connection():
     """上下文管理器：自动管理数据库连接"""
     conn = None
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
+        conn = psycopg2.connect(**DB_CONFIG, cursor_factory=TimedCursor)
         # 设置客户端编码为 UTF-8，确保正确处理中文字符
         conn.set_client_encoding('UTF8')
         yield conn
@@ -40,11 +76,11 @@ def get_db_connection():
 
 def get_db_cursor(dict_cursor=False):
     """获取数据库游标"""
-    conn = psycopg2.connect(**DB_CONFIG)
+    conn = psycopg2.connect(**DB_CONFIG, cursor_factory=TimedCursor)
     # 设置客户端编码为 UTF-8，确保正确处理中文字符
     conn.set_client_encoding('UTF8')
     if dict_cursor:
-        return conn, conn.cursor(cursor_factory=RealDictCursor)
+        return conn, conn.cursor(cursor_factory=TimedRealDictCursor)
     return conn, conn.cursor()
 
 def update_domain_stats(conn, domain, platform):
@@ -0,0 +1,168 @@
+"""
+core/encoding.py - 文本编码规范化
+- ensure_utf8_string: 修复 UTF-8 被当作 Latin-1 读取等常见乱码
+- normalize_result: 入库前对 provider 返回的搜索结果统一规范化一次
+- repair_text: 读取路径使用，已在写入时规范化的行（text_normalized 非空）直接跳过
+"""
+
+# 写入时规范化逻辑的版本号，记录在各表的 text_normalized 列中
+# 规范化逻辑变化时递增，可用 scripts/fix_encoding.py --backfill 重新处理旧版本的行
+TEXT_NORMALIZATION_VERSION = 1
+
+
+def ensure_utf8_string(text, logger=None):
+    """
+    确保文本是 UTF-8 编码的字符串
+    处理可能的编码问题，防止乱码
+    特别处理 UTF-8 被当作 Latin-1 读取的情况（如：ä¸"ä¸š 应该是中文）
+    
+    Args:
+        text: 要处理的文本
+        logger: 可选的日志记录器，用于记录编码修复过程
+    """
+    if text is None:
+        return ""
+    
+    original_text = text
+    
+    if isinstance(text, bytes):
+        try:
+            return text.decode('utf-8')
+        except UnicodeDecodeError:
+            # 尝试其他常见编码
+            for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
+                try:
+                    decoded = text.decode(encoding)
+                    # 如果解码成功，尝试重新编码为 UTF-8 以确保一致性
+                    result = decoded.encode('utf-8').decode('utf-8')
+                    if logger and encoding != 'utf-8':
+                        logger.debug(f"编码修复: 从 {encoding} 解码字节数据 (长度: {len(text)})")
+                    return result
+                except (UnicodeDecodeError, UnicodeEncodeError):
+                    continue
+            # 如果所有编码都失败，使用 replace 模式
+            if logger:
+                logger.warning(f"编码修复失败: 无法解码字节数据 (长度: {len(text)})，使用 replace 模式")
+            return text.decode('utf-8', errors='replace')
+    elif not isinstance(text, str):
+        # 如果不是字符串也不是字节，转换为字符串
+        return str(text)
+    else:
+        # 已经是字符串，需要检测并修复编码问题
+        # 情况1: UTF-8 被当作 Latin-1 读取（常见乱码情况）
+        # 检测特征：包含 Latin-1 范围内的字节值（128-255），但实际应该是 UTF-8 多字节字符
+        if any(ord(c) > 127 for c in text):
+            try:
+                # 尝试将字符串重新编码为 Latin-1（无损），再解码为 UTF-8
+                # 这可以修复 UTF-8 被当作 Latin-1 读取的情况
+                fixed = text.encode('latin-1').decode('utf-8')
+                # 验证修复后的字符串是否包含有效的中文字符
+                # 如果修复成功，应该包含中文字符或至少不是乱码模式
+                if fixed and len(fixed) > 0:
+                    # 检查是否包含常见的中文字符范围
+                    has_chinese = any('\u4e00' <= c <= '\u9fff' for c in fixed)
+                    # 或者检查是否不再包含明显的乱码模式（连续的 Latin-1 高字节字符）
+                    has_garbled_pattern = any(
+                        ord(c) > 127 and ord(c) < 160 
+                        for c in text[:min(100, len(text))]
+                    )
+                    if has_chinese or not has_garbled_pattern:
+                        if logger:
+                            logger.info(f"编码修复: 修复 UTF-8 被当作 Latin-1 读取的乱码")
+                            logger.debug(f"  原始: {text[:100]}...")
+                            logger.debug(f"  修复: {fixed[:100]}...")
+                        return fixed
+            except (UnicodeEncodeError, UnicodeDecodeError) as e:
+                if logger:
+                    logger.debug(f"编码修复尝试失败: {e}")
+                pass
+        
+        # 情况2: 双重编码问题（UTF-8 被编码了两次）
+        try:
+            # 尝试检测双重编码：如果字符串可以编码为 Latin-1 再解码为 UTF-8，可能是双重编码
+            double_encoded = text.encode('latin-1', errors='ignore').decode('utf-8', errors='ignore')
+            if double_encoded and double_encoded != text:
+                # 检查修复后的结果是否更合理
+                if any('\u4e00' <= c <= '\u9fff' for c in double_encoded):
+                    if logger:
+                        logger.info(f"编码修复: 修复双重编码问题")
+                        logger.debug(f"  原始: {text[:100]}...")
+                        logger.debug(f"  修复: {double_encoded[:100]}...")
+                    return double_encoded
+        except Exception as e:
+            if logger:
+                logger.debug(f"双重编码检测失败: {e}")
+            pass
+        
+        # 情况3: 正常的 UTF-8 字符串，验证有效性
+        try:
+            # 尝试编码再解码，确保是有效的 UTF-8
+            text.encode('utf-8').decode('utf-8')
+            return text
+        except UnicodeEncodeError:
+            # 如果编码失败，说明字符串可能包含无效字符
+            fixed = text.encode('utf-8', errors='replace').decode('utf-8')
+            if logger and fixed != text:
+                logger.warning(f"编码修复: 使用 replace 模式处理无效字符")
+            return fixed
+        except UnicodeDecodeError:
+            # 如果解码失败，说明字符串可能已经是错误的编码
+            # 尝试其他修复方法
+            try:
+                fixed = text.encode('latin-1').decode('utf-8')
+                if logger:
+                    logger.info(f"编码修复: 通过 Latin-1 重新编码修复")
+                return fixed
+            except:
+                # 最后尝试：使用 replace 模式
+                try:
+                    fixed = text.encode('latin-1', errors='replace').decode('utf-8', errors='replace')
+                    if logger:
+                        logger.warning(f"编码修复: 使用 replace 模式作为最后手段")
+                    return fixed
+                except:
+                    return text
+
+
+def normalize_text(value):
+    """规范化单个字段：None 保持为 None，字符串修复编码，其它类型原样返回"""
+    if value is None or not isinstance(value, (str, bytes)):
+        return value
+    return ensure_utf8_string(value)
+
+
+def normalize_result(result):
+    """
+    规范化 provider 返回的搜索结果（full_text / queries / citations 中的文本字段）
+
+    Returns:
+        新的结果字典，原字典不修改
+    """
+    if not result:
+        return result
+    normalized = dict(result)
+    if "full_text" in normalized:
+        normalized["full_text"] = normalize_text(normalized["full_text"])
+    normalized["queries"] = [normalize_text(q) for q in result.get("queries", [])]
+    citations = []
+    for cite in result.get("citations", []):
+        cite = dict(cite)
+        for field in ("url", "title", "snippet", "site_name"):
+            if field in cite:
+                cite[field] = normalize_text(cite[field])
+        citations.append(cite)
+    normalized["citations"] = citations
+    return normalized
+
+
+def repair_text(value, normalized=False):
+    """
+    读取时修复编码
+
+    Args:
+        value: 数据库中读出的值
+        normalized: 该行的 text_normalized 标记，非空表示写入时已规范化，直接返回
+    """
+    if normalized or not value or not isinstance(value, str):
+        return value
+    return ensure_utf8_string(value)
@@ -0,0 +1,287 @@
+"""
+core/encoding_repair.py - 乱码数据批量修复引擎
+流程（每个表独立执行，可中断后续跑）：
+1. 按 id 做 keyset 分页，SQL 侧用正则预过滤，只取出包含 Latin-1 高位字符（U+0080-U+00FF）的行
+2. 乱码检测在进程池中并行执行
+3. 修复结果用 UPDATE ... FROM (VALUES ...) 批量写回；urls 同时重新计算 url_hash，
+   修复后与已有网页相同的行合并到已有行（见 core/urls.py 的 rewrite_urls）；有修复时删除已完成任务的 /status 快照
+4. 每批写回与检查点（encoding_repair_checkpoint）在同一事务中提交，崩溃后从最后提交的 id 继续；
+   已扫描到表尾的表（finished）重新运行时也从 last_id 继续，只检查之后新写入的行
+
+回填模式（mark_version）：扫描 text_normalized 为空的行，修复后统一打上规范化标记，
+之后读取路径不再对这些行逐字段修复
+"""
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from psycopg2.extras import execute_values
+from core.encoding import ensure_utf8_string
+from core.urls import rewrite_urls
+from core.snapshots import delete_snapshots
+
+logger = logging.getLogger(__name__)
+
+# 需要检查的表和字段，以及默认批大小（search_records 含 full_answer，批次调小）
+REPAIR_TABLES = {
+    "citations": {"columns": ["title", "snippet", "site_name"], "batch_size": 2000},
+    "search_queries": {"columns": ["query"], "batch_size": 5000},
+    "search_records": {"columns": ["keyword", "full_answer"], "batch_size": 200},
+    "executor_sub_query_log": {"columns": ["sub_query", "url", "domain", "title", "snippet", "site_name"], "batch_size": 2000},
+    "urls": {"columns": ["url", "domain", "title", "snippet", "site_name"], "batch_size": 2000},
+}
+
+# 乱码特征：UTF-8 字节被当作 Latin-1 读取后会出现 U+0080-U+00FF 范围的字符
+GARBLED_PATTERN = r"[\u0080-\u00ff]"
+
+# 单批待检测行数低于该值时直接在当前进程处理
+POOL_THRESHOLD = 200
+
+
+def detect_garbled_text(text):
+    """
+    检测文本是否是乱码（UTF-8 被当作 Latin-1 读取）
+
+    返回: (is_garbled, fixed_text)
+    """
+    if not text or not isinstance(text, str):
+        return False, text
+
+    # 检测乱码特征：包含 Latin-1 高字节字符（128-255），但实际应该是 UTF-8
+    has_high_bytes = any(ord(c) > 127 for c in text)
+    if not has_high_bytes:
+        return False, text
+
+    # 尝试修复
+    try:
+        fixed = text.encode('latin-1').decode('utf-8')
+        # 如果修复后的文本包含中文字符，说明修复成功
+        has_chinese = any('\u4e00' <= c <= '\u9fff' for c in fixed)
+        if has_chinese or len(fixed) > 0:
+            return True, fixed
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        pass
+
+    # 使用增强的修复函数
+    fixed = ensure_utf8_string(text)
+    if fixed != text:
+        return True, fixed
+
+    return False, text
+
+
+def _detect_row(row):
+    """
+    检测单行的所有字段
+
+    Args:
+        row: (id, 字段值1, 字段值2, ...)
+
+    Returns:
+        (id, [修复后的值或 None, ...])，没有需要修复的字段时返回 None
+    """
+    row_id, values = row[0], row[1:]
+    fixed_values = []
+    changed = False
+    for value in values:
+        is_garbled, fixed = detect_garbled_text(value)
+        if is_garbled and fixed != value:
+            fixed_values.append(fixed)
+            changed = True
+        else:
+            fixed_values.append(None)
+    return (row_id, fixed_values) if changed else None
+
+
+def ensure_checkpoint_table(conn):
+    """创建检查点表（已存在时跳过）"""
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS encoding_repair_checkpoint (
+            job_name TEXT NOT NULL,
+            table_name TEXT NOT NULL,
+            last_id BIGINT NOT NULL DEFAULT 0,
+            scanned_rows BIGINT NOT NULL DEFAULT 0,
+            fixed_rows BIGINT NOT NULL DEFAULT 0,
+            finished BOOLEAN NOT NULL DEFAULT FALSE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_name, table_name)
+        )
+    """)
+    conn.commit()
+    cur.close()
+
+
+def load_checkpoint(conn, job_name, table):
+    """读取检查点，返回 (last_id, scanned_rows, fixed_rows, finished)"""
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT last_id, scanned_rows, fixed_rows, finished
+        FROM encoding_repair_checkpoint
+        WHERE job_name = %s AND table_name = %s
+    """, (job_name, table))
+    row = cur.fetchone()
+    cur.close()
+    return row or (0, 0, 0, False)
+
+
+def reset_checkpoint(conn, job_name, table=None):
+    """清除检查点，下次从头开始"""
+    cur = conn.cursor()
+    if table:
+        cur.execute("DELETE FROM encoding_repair_checkpoint WHERE job_name = %s AND table_name = %s", (job_name, table))
+    else:
+        cur.execute("DELETE FROM encoding_repair_checkpoint WHERE job_name = %s", (job_name,))
+    conn.commit()
+    cur.close()
+
+
+def _save_checkpoint(cur, job_name, table, last_id, scanned_rows, fixed_rows, finished=False):
+    cur.execute("""
+        INSERT INTO encoding_repair_checkpoint (job_name, table_name, last_id, scanned_rows, fixed_rows, finished, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (job_name, table_name) DO UPDATE SET
+            last_id = EXCLUDED.last_id,
+            scanned_rows = EXCLUDED.scanned_rows,
+            fixed_rows = EXCLUDED.fixed_rows,
+            finished = EXCLUDED.finished,
+            updated_at = CURRENT_TIMESTAMP
+    """, (job_name, table, last_id, scanned_rows, fixed_rows, finished))
+
+
+def _fetch_batch(cur, table, columns, last_id, batch_size, unmarked_only=False):
+    """
+    keyset 分页取出一批候选行，返回 (行列表, 本批最大 id)
+
+    默认只取出命中乱码特征的行；unmarked_only 时取出所有未打标记的行（需要全部打标记），
+    但只有命中乱码特征的字段才传回文本，其余字段返回 NULL，避免把 full_answer 等大字段全部拉到客户端
+    """
+    params = []
+    if unmarked_only:
+        column_list = ", ".join(f"CASE WHEN {col} ~ %s THEN {col} END" for col in columns)
+        params.extend([GARBLED_PATTERN] * len(columns))
+        conditions = ["id > %s", "text_normalized IS NULL"]
+        params.append(last_id)
+    else:
+        column_list = ", ".join(columns)
+        conditions = ["id > %s", "(" + " OR ".join(f"{col} ~ %s" for col in columns) + ")"]
+        params.append(last_id)
+        params.extend([GARBLED_PATTERN] * len(columns))
+    params.append(batch_size)
+
+    cur.execute(f"""
+        SELECT id, {column_list}
+        FROM {table}
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id
+        LIMIT %s
+    """, params)
+    rows = cur.fetchall()
+    return rows, (rows[-1][0] if rows else last_id)
+
+
+def _write_batch(cur, table, columns, fixes):
+    """UPDATE ... FROM (VALUES ...) 批量写回，值为 NULL 的字段保持不变"""
+    set_clause = ", ".join(f"{col} = COALESCE(v.{col}, t.{col})" for col in columns)
+    template = "(%s::bigint" + ", %s::text" * len(columns) + ")"
+    execute_values(cur, f"""
+        UPDATE {table} AS t
+        SET {set_clause}
+        FROM (VALUES %s) AS v(id, {', '.join(columns)})
+        WHERE t.id = v.id
+    """, [(row_id, *fixed_values) for row_id, fixed_values in fixes], template=template, page_size=len(fixes))
+
+
+def _mark_batch(cur, table, first_id, last_id, mark_version):
+    """给 (first_id, last_id] 范围内未打标记的行打上规范化标记"""
+    cur.execute(f"""
+        UPDATE {table}
+        SET text_normalized = %s
+        WHERE id > %s AND id <= %s AND text_normalized IS NULL
+    """, (mark_version, first_id, last_id))
+
+
+def repair_table(conn, table, job_name="fix_encoding", batch_size=None, workers=None, dry_run=False, on_fix=None, mark_version=None):
+    """
+    分批修复单个表
+
+    Args:
+        conn: 数据库连接
+        table: 表名（REPAIR_TABLES 中的键）
+        job_name: 任务名，用于区分检查点
+        batch_size: 每批行数，默认使用 REPAIR_TABLES 中的配置
+        workers: 检测进程数，默认读取 REPAIR_WORKERS 环境变量或 CPU 核数
+        dry_run: 只检测不写回，也不更新检查点
+        on_fix: 可选回调 on_fix(table, row_id, column, old_value, new_value)，用于输出修复明细
+        mark_version: 回填模式，扫描所有未打标记的行，修复后写入 text_normalized = mark_version
+
+    Returns:
+        (扫描行数, 修复行数)
+    """
+    spec = REPAIR_TABLES[table]
+    columns = spec["columns"]
+    batch_size = batch_size or spec["batch_size"]
+    workers = workers or int(os.getenv("REPAIR_WORKERS", "0")) or os.cpu_count() or 1
+
+    # finished 只表示上次运行扫描到了表尾；重新运行时同样从 last_id 继续，扫描之后新写入的行
+    last_id, scanned_rows, fixed_rows, finished = (0, 0, 0, False) if dry_run else load_checkpoint(conn, job_name, table)
+    if finished:
+        logger.info(f"{table}: 上次已扫描到表尾（last_id={last_id}），继续检查之后写入的行")
+    elif last_id:
+        logger.info(f"{table}: 从检查点继续，last_id={last_id}，已扫描 {scanned_rows}，已修复 {fixed_rows}")
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    cur = conn.cursor()
+    try:
+        while True:
+            rows, batch_last_id = _fetch_batch(cur, table, columns, last_id, batch_size, unmarked_only=bool(mark_version))
+            if not rows:
+                break
+
+            if pool and len(rows) >= POOL_THRESHOLD:
+                chunksize = max(1, len(rows) // (workers * 4))
+                results = pool.map(_detect_row, rows, chunksize=chunksize)
+            else:
+                results = map(_detect_row, rows)
+            fixes = [result for result in results if result]
+
+            if on_fix:
+                originals = {row[0]: row[1:] for row in rows}
+                for row_id, fixed_values in fixes:
+                    for col, old_value, new_value in zip(columns, originals[row_id], fixed_values):
+                        if new_value is not None:
+                            on_fix(table, row_id, col, old_value, new_value)
+
+            scanned_rows += len(rows)
+            fixed_rows += len(fixes)
+            first_id, last_id = last_id, batch_last_id
+
+            if not dry_run:
+                if fixes and table == "urls":
+                    # urls 的内容决定 url_hash：改写后重新计算哈希，与已有行相同时合并
+                    merged = rewrite_urls(cur, {
+                        row_id: {col: value for col, value in zip(columns, fixed_values) if value is not None}
+                        for row_id, fixed_values in fixes
+                    })
+                    if merged:
+                        logger.info(f"{table}: 修复后与已有网页相同，合并 {merged} 行")
+                elif fixes:
+                    _write_batch(cur, table, columns, fixes)
+                if fixes:
+                    # 修复可能改写已完成任务的数据，快照全部作废（修复是低频的维护操作，之后按需重新渲染）
+                    delete_snapshots(cur)
+                if mark_version:
+                    _mark_batch(cur, table, first_id, last_id, mark_version)
+                _save_checkpoint(cur, job_name, table, last_id, scanned_rows, fixed_rows)
+                conn.commit()
+
+            logger.info(f"{table}: 已扫描 {scanned_rows} 行（last_id={last_id}），{'待修复' if dry_run else '已修复'} {fixed_rows} 行")
+
+        if not dry_run:
+            _save_checkpoint(cur, job_name, table, last_id, scanned_rows, fixed_rows, finished=True)
+            conn.commit()
+    finally:
+        cur.close()
+        if pool:
+            pool.shutdown()
+
+    return scanned_rows, fixed_rows
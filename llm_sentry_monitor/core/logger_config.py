@@ -9,7 +9,6 @@ from logging.handlers import RotatingFileHandler
 
 # 日志目录
 LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 
 # 日志文件路径
 LOG_FILE = os.path.join(LOG_DIR, f"monitor_{datetime.now().strftime('%Y%m%d')}.log")
@@ -33,6 +32,9 @@ def setup_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     if logger.handlers:
         return logger
     
+    # 日志目录在第一次创建 logger 时才建（导入本模块不产生文件系统操作）
+    os.makedirs(LOG_DIR, exist_ok=True)
+    
     # 文件处理器（按日期滚动，最大10MB，保留5个备份）
     file_handler = RotatingFileHandler(
         LOG_FILE,
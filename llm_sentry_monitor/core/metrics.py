@@ -0,0 +1,238 @@
+"""
+core/metrics.py - 进程内指标注册表（Prometheus 文本格式）
+Counter / Gauge / Histogram 只在内存中累加，GET /metrics 时按 Prometheus 0.0.4 文本格式输出，
+不依赖 prometheus_client，每次记录只有一次加锁的累加
+
+指标：
+- http_request_duration_seconds{method, route, status}：API 请求耗时（route 为路由模板，如 /status）
+- db_queries_total / db_query_duration_seconds{endpoint}：数据库查询次数和耗时（见 core/db.py 的计时游标）
+- executor_active_jobs / executor_pending_searches：正在执行的任务数、尚未执行的 (关键词, 平台) 搜索数
+- provider_searches_total{platform, status} / provider_search_duration_seconds{platform}：各平台搜索次数、失败数和耗时
+- provider_retries_total{platform}：平台内部重试次数（DeepSeek 刷新按钮重试）
+- citations_per_answer{platform}：每条回答的引用数
+- db_save_duration_seconds{platform}：save_to_db 写入一次搜索结果的耗时（含提交）
+
+endpoint 标签取自 current_endpoint：API 中间件按请求设置，后台执行器线程中为 background
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+
+# 当前请求的路由模板，计时游标用它给数据库查询打标签
+current_endpoint = ContextVar("current_endpoint", default="background")
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC):
+    """指标基类，子类实现 _new_child（单个标签组合的取值）和 samples（输出的样本行）"""
+
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # 无标签指标从 0 开始输出
+            self.labels()
+        registry.register(self)
+
+    def labels(self, *values):
+        """按标签值取子指标（标签值个数必须与 labelnames 一致）"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，收到 {values}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """创建一个标签组合的取值对象"""
+
+    def _default(self):
+        # 无标签指标直接调用 inc / observe 等方法
+        return self.labels()
+
+    @abstractmethod
+    def samples(self):
+        """返回 Prometheus 文本格式的样本行"""
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in list(self._children.items())
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    self.counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def samples(self):
+        lines = []
+        for key, child in list(self._children.items()):
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(upper))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "API 请求耗时（秒）", ["method", "route", "status"]
+)
+DB_QUERIES = Counter("db_queries_total", "数据库查询次数", ["endpoint"])
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "数据库查询耗时（秒）", ["endpoint"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+EXECUTOR_ACTIVE_JOBS = Gauge("executor_active_jobs", "正在执行的任务数")
+EXECUTOR_PENDING_SEARCHES = Gauge("executor_pending_searches", "执行中的任务里尚未执行的 (关键词, 平台) 搜索数")
+PROVIDER_SEARCHES = Counter("provider_searches_total", "平台搜索次数（status: completed / failed）", ["platform", "status"])
+PROVIDER_SEARCH_SECONDS = Histogram(
+    "provider_search_duration_seconds", "平台搜索耗时（秒，含浏览器启动和等待生成）", ["platform"],
+    buckets=(1, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+)
+DB_SAVE_SECONDS = Histogram(
+    "db_save_duration_seconds", "save_to_db 写入一次搜索结果的耗时（秒，含提交）", ["platform"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+PROVIDER_RETRIES = Counter("provider_retries_total", "平台内部重试次数", ["platform"])
+CITATIONS_PER_ANSWER = Histogram(
+    "citations_per_answer", "每条回答的引用数", ["platform"],
+    buckets=(0, 1, 2, 5, 10, 15, 20, 30, 50, 80, 120)
+)
+
+
+def observe_db_query(seconds):
+    """计时游标每次执行后调用"""
+    endpoint = current_endpoint.get()
+    DB_QUERIES.labels(endpoint).inc()
+    DB_QUERY_SECONDS.labels(endpoint).observe(seconds)
+
+
+def render_metrics():
+    """/metrics 响应体"""
+    return REGISTRY.render()
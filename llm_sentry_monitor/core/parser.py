@@ -1,8 +1,18 @@
-import tldextract
 import logging
 
 logger = logging.getLogger(__name__)
 
+# tldextract 导入和后缀表加载较慢，第一次提取域名时才初始化（API 启动不需要）
+_extract = None
+
+
+def _get_extractor():
+    global _extract
+    if _extract is None:
+        import tldextract
+        _extract = tldextract.extract
+    return _extract
+
 def extract_domain(url):
     """
     从 URL 中提取主域名，例如 https://www.zhihu.com/question/123 -> zhihu.com
@@ -11,7 +21,7 @@ def extract_domain(url):
         return "unknown"
     
     try:
-        ext = tldextract.extract(url)
+        ext = _get_extractor()(url)
         if ext.suffix:
             return f"{ext.domain}.{ext.suffix}".lower()
         return ext.domain.lower()
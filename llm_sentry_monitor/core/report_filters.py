@@ -0,0 +1,148 @@
+"""
+core/report_filters.py - 统计报告过滤条件构建
+把日期范围、平台、关键词、prompt_type 转成带绑定参数的 WHERE 片段：
+- 日期条件直接作用在原始 created_at 列上（不套函数），可以走
+  idx_citations_domain_created / idx_search_records_created_at 索引
+- 最近 N 天是滚动窗口（created_at >= NOW() - N 天，不按零点对齐）；
+  过滤条件中只保存天数，相同请求得到相同的缓存键
+- 平台、关键词等条件属于 search_records，引用表查询时按需 JOIN
+"""
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ReportFilters:
+    """统计报告的过滤条件，所有字段均为可选"""
+    start: Optional[datetime] = None            # 起始时间（包含）
+    end: Optional[datetime] = None              # 结束时间（不包含）
+    days: Optional[int] = None                  # 最近 N 天（滚动窗口，start 为空时生效）
+    platforms: Tuple[str, ...] = field(default_factory=tuple)
+    keywords: Tuple[str, ...] = field(default_factory=tuple)
+    prompt_type: Optional[str] = None
+
+    @classmethod
+    def build(cls, days=None, start=None, end=None, platforms=None, keywords=None, prompt_type=None):
+        """从 CLI / API 参数构建过滤条件，days 与 start 同时提供时以 start 为准"""
+        return cls(
+            start=start,
+            end=end,
+            days=days if days and not start else None,
+            platforms=tuple(p.strip().lower() for p in (platforms or []) if p and p.strip()),
+            keywords=tuple(k.strip() for k in (keywords or []) if k and k.strip()),
+            prompt_type=prompt_type or None
+        )
+
+    @property
+    def has_date_range(self):
+        return self.start is not None or self.end is not None or self.days is not None
+
+    @property
+    def needs_record_join(self):
+        """是否包含 search_records 上的条件"""
+        return bool(self.platforms or self.keywords or self.prompt_type)
+
+    def with_default_days(self, days):
+        """未指定日期范围时，使用最近 N 天作为默认窗口"""
+        if self.has_date_range:
+            return self
+        return replace(self, days=days)
+
+    def describe(self):
+        """过滤条件的简短描述，用于报告标题"""
+        parts = []
+        if self.start and self.end:
+            parts.append(f"{self.start:%Y-%m-%d} ~ {self.end:%Y-%m-%d}")
+        elif self.start:
+            parts.append(f"{self.start:%Y-%m-%d} 至今")
+        elif self.end:
+            parts.append(f"截至 {self.end:%Y-%m-%d}")
+        if self.days and not self.start:
+            parts.append(f"最近 {self.days} 天")
+        if self.platforms:
+            parts.append(f"平台: {', '.join(self.platforms)}")
+        if self.keywords:
+            parts.append(f"关键词: {', '.join(self.keywords)}")
+        if self.prompt_type:
+            parts.append(f"类型: {self.prompt_type}")
+        return " | ".join(parts) if parts else "全部数据"
+
+    def conditions(self, date_column: Optional[str], record_alias: Optional[str] = "r") -> Tuple[List[str], list]:
+        """
+        生成条件列表和绑定参数
+
+        Args:
+            date_column: 日期条件作用的列（如 c.created_at），None 表示不加日期条件
+            record_alias: search_records 的别名，None 表示查询中没有 search_records
+        """
+        clauses = []
+        params = []
+        if date_column and self.start:
+            clauses.append(f"{date_column} >= %s")
+            params.append(self.start)
+        elif date_column and self.days:
+            # NOW() 在一条语句内是常量，条件仍直接作用在原始列上
+            clauses.append(f"{date_column} >= NOW() - %s * INTERVAL '1 day'")
+            params.append(self.days)
+        if date_column and self.end:
+            clauses.append(f"{date_column} < %s")
+            params.append(self.end)
+        if record_alias:
+            if self.platforms:
+                clauses.append(f"{record_alias}.platform = ANY(%s)")
+                params.append(list(self.platforms))
+            if self.keywords:
+                clauses.append(f"{record_alias}.keyword = ANY(%s)")
+                params.append(list(self.keywords))
+            if self.prompt_type:
+                clauses.append(f"{record_alias}.prompt_type = %s")
+                params.append(self.prompt_type)
+        return clauses, params
+
+    def where(self, date_column: Optional[str], record_alias: Optional[str] = "r", extra: Optional[List[str]] = None, keyword: str = "WHERE") -> Tuple[str, list]:
+        """
+        生成完整的 WHERE 片段
+
+        Args:
+            extra: 额外的固定条件（不带参数）
+            keyword: 片段前缀，子句已有 WHERE 时可传 "AND"
+        """
+        clauses, params = self.conditions(date_column, record_alias)
+        clauses = list(extra or []) + clauses
+        if not clauses:
+            return "", params
+        return f"{keyword} " + " AND ".join(clauses), params
+
+    def record_join(self, fact_alias="c", record_alias="r"):
+        """事实表（citations / search_queries）需要 search_records 条件时的 JOIN 片段"""
+        if not self.needs_record_join:
+            return ""
+        return f"JOIN search_records {record_alias} ON {record_alias}.id = {fact_alias}.record_id"
+
+
+def _parse_date(value):
+    return datetime.fromisoformat(value)
+
+
+def add_filter_arguments(parser):
+    """为统计脚本的 argparse 添加通用过滤参数"""
+    parser.add_argument("--days", type=int, help="最近 N 天")
+    parser.add_argument("--start", type=_parse_date, help="起始日期（含），如 2025-01-01")
+    parser.add_argument("--end", type=_parse_date, help="结束日期（不含），如 2025-02-01")
+    parser.add_argument("--platform", action="append", dest="platforms", help="平台，可重复指定")
+    parser.add_argument("--keyword", action="append", dest="keywords", help="关键词，可重复指定")
+    parser.add_argument("--prompt-type", dest="prompt_type", help="prompt 类型")
+    return parser
+
+
+def filters_from_args(args):
+    """从 argparse 结果构建 ReportFilters"""
+    return ReportFilters.build(
+        days=args.days,
+        start=args.start,
+        end=args.end,
+        platforms=args.platforms,
+        keywords=args.keywords,
+        prompt_type=args.prompt_type
+    )
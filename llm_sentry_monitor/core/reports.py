@@ -0,0 +1,582 @@
+"""
+core/reports.py - 统计报告数据层
+所有分析函数只负责查询和计算，返回可 JSON 序列化的结构：
+- stats.py / stats_full.py 负责把结果渲染成 tabulate 表格
+- api.py 的 /stats/* 接口直接返回结果，并通过 ReportCache 按过滤条件缓存
+"""
+import time
+import threading
+from collections import Counter, OrderedDict
+from itertools import combinations
+from core.segmenter import count_query_terms
+from core.parser import classify_domain_type
+from core.report_filters import ReportFilters
+from core.timing import STAGES
+
+# 自定义词典（行业术语）
+CUSTOM_WORDS = [
+    "土巴兔", "装修公司", "家装", "软装", "硬装", "全包", "半包",
+    "DeepSeek", "豆包", "Kimi", "文心一言", "通义千问"
+]
+
+# 停用词
+STOP_WORDS = {
+    '什么', '怎么', '如何', '哪些', '为什么', '是否', '可以', '能否',
+    '2024', '2025', '的', '了', '在', '是', '和', '与', '或', '等',
+    '一个', '这个', '那个', '进行', '问题', '相关', '关于', '有关'
+}
+
+# 域名类型的展示顺序
+DOMAIN_TYPES = ['官网', '知乎', '自媒体', '新闻站', '论坛', '其他']
+
+# 引用位置
+POSITIONS = ['开头', '中间', '结尾']
+
+
+def _round(value, digits=2):
+    return round(float(value), digits) if value is not None else None
+
+
+def trust_sources(conn, filters):
+    """1. 核心信任源分析（含 SoV 百分比）"""
+    cur = conn.cursor()
+    where_clause, params = filters.where("c.created_at")
+
+    cur.execute(f"""
+        WITH citation_stats AS (
+            SELECT
+                c.domain,
+                COUNT(DISTINCT c.record_id) as keyword_coverage,
+                COUNT(*) as total_citations,
+                STRING_AGG(DISTINCT COALESCE(u.site_name, c.site_name), ' | ') as site_names
+            FROM citations c
+            LEFT JOIN urls u ON u.id = c.url_id
+            {filters.record_join("c")}
+            {where_clause}
+            GROUP BY c.domain
+        ),
+        total AS (
+            SELECT SUM(total_citations) as grand_total FROM citation_stats
+        )
+        SELECT
+            cs.domain,
+            cs.keyword_coverage,
+            cs.total_citations,
+            ROUND(cs.total_citations * 100.0 / t.grand_total, 2) as sov,
+            cs.site_names
+        FROM citation_stats cs, total t
+        ORDER BY cs.keyword_coverage DESC, cs.total_citations DESC
+        LIMIT 15
+    """, params)
+
+    rows = [
+        {
+            "domain": domain,
+            "keyword_coverage": keyword_coverage,
+            "total_citations": total_citations,
+            "sov": _round(sov),
+            "site_names": site_names
+        }
+        for domain, keyword_coverage, total_citations, sov, site_names in cur.fetchall()
+    ]
+    cur.close()
+    return rows
+
+
+def search_intent(conn, filters, write_cache=False):
+    """
+    2. AI 搜索意图洞察（jieba 分词，Top 20 核心概念）
+
+    write_cache: 是否把新分词结果写回 search_query_tokens 并提交。
+        /stats 接口使用默认的 False（GET 请求只读），缓存由命令行 stats.py / stats_full.py 预热
+    """
+    where_clause, params = filters.where("sq.created_at")
+    filter_sql = f"{filters.record_join('sq')} {where_clause}"
+
+    # 去重计数 + 并行分词 + 分词结果缓存（见 core/segmenter.py）
+    word_counts = count_query_terms(conn, CUSTOM_WORDS, STOP_WORDS, filter_sql, params, write_cache=write_cache).most_common(20)
+    return [{"term": term, "count": count} for term, count in word_counts]
+
+
+def brand_exposure(conn, filters):
+    """3. 品牌曝光矩阵（每个关键词下排名前 3 的域名）"""
+    cur = conn.cursor()
+    keyword_where, keyword_params = filters.where("r.created_at")
+    citation_where, citation_params = filters.where("c.created_at")
+
+    # 单次查询：按 (关键词, 域名) 聚合后用窗口函数取每个关键词的前 3 名，
+    # LEFT JOIN 保留没有引用的关键词（与逐词查询时的输出一致）
+    cur.execute(f"""
+        WITH keywords AS (
+            SELECT DISTINCT r.keyword FROM search_records r
+            {keyword_where}
+        ),
+        domain_counts AS (
+            SELECT
+                r.keyword,
+                c.domain,
+                COUNT(*) as count,
+                MIN(NULLIF(COALESCE(u.site_name, c.site_name), '')) as name
+            FROM citations c
+            JOIN search_records r ON c.record_id = r.id
+            LEFT JOIN urls u ON u.id = c.url_id
+            {citation_where}
+            GROUP BY r.keyword, c.domain
+        ),
+        ranked AS (
+            SELECT
+                keyword, domain, count, name,
+                ROW_NUMBER() OVER (PARTITION BY keyword ORDER BY count DESC, domain) as rn
+            FROM domain_counts
+        )
+        SELECT k.keyword, t.domain, t.count, t.name
+        FROM keywords k
+        LEFT JOIN ranked t ON t.keyword = k.keyword AND t.rn <= 3
+        ORDER BY k.keyword, t.rn
+    """, keyword_params + citation_params)
+
+    top_sites_by_keyword = {}
+    for kw, domain, count, name in cur.fetchall():
+        top_sites = top_sites_by_keyword.setdefault(kw, [])
+        if domain is not None:
+            top_sites.append({"domain": domain, "name": name, "count": count})
+    cur.close()
+
+    return [{"keyword": kw, "top_sites": top_sites} for kw, top_sites in top_sites_by_keyword.items()]
+
+
+def time_trends(conn, filters):
+    """4. 时间趋势分析（Top 5 域名按天的引用数，未指定日期时默认近 7 天）"""
+    filters = filters.with_default_days(7)
+    cur = conn.cursor()
+    where_clause, params = filters.where("c.created_at")
+
+    # 获取 Top 5 域名
+    cur.execute(f"""
+        SELECT c.domain
+        FROM citations c
+        {filters.record_join("c")}
+        {where_clause}
+        GROUP BY c.domain
+        ORDER BY COUNT(*) DESC
+        LIMIT 5
+    """, params)
+
+    top_domains = [r[0] for r in cur.fetchall()]
+    if not top_domains:
+        cur.close()
+        return []
+
+    # 按天统计（domain = ANY + created_at 范围，走 idx_citations_domain_created）
+    where_clause, params = filters.where("c.created_at", extra=["c.domain = ANY(%s)"])
+    cur.execute(f"""
+        SELECT
+            DATE(c.created_at) as date,
+            c.domain,
+            COUNT(*) as citation_count
+        FROM citations c
+        {filters.record_join("c")}
+        {where_clause}
+        GROUP BY DATE(c.created_at), c.domain
+        ORDER BY date DESC, citation_count DESC
+    """, [top_domains] + params)
+
+    rows = [
+        {"date": date, "domain": domain, "citation_count": citation_count}
+        for date, domain, citation_count in cur.fetchall()
+    ]
+    cur.close()
+    return rows
+
+
+def platform_comparison(conn, filters):
+    """5. 平台对比分析"""
+    cur = conn.cursor()
+    where_clause, params = filters.where("r.created_at")
+
+    cur.execute(f"""
+        SELECT
+            r.platform,
+            COUNT(DISTINCT r.keyword) as keyword_count,
+            COUNT(*) as search_count,
+            ROUND(AVG(r.response_time_ms)/1000.0, 2) as avg_response_seconds,
+            SUM(CASE WHEN r.search_status = 'completed' THEN 1 ELSE 0 END) as completed_count,
+            SUM(CASE WHEN r.search_status = 'failed' THEN 1 ELSE 0 END) as failed_count
+        FROM search_records r
+        {where_clause}
+        GROUP BY r.platform
+    """, params)
+
+    rows = [
+        {
+            "platform": platform,
+            "keyword_count": keyword_count,
+            "search_count": search_count,
+            "avg_response_seconds": _round(avg_response_seconds),
+            "completed_count": completed_count,
+            "failed_count": failed_count
+        }
+        for platform, keyword_count, search_count, avg_response_seconds, completed_count, failed_count in cur.fetchall()
+    ]
+    cur.close()
+    return rows
+
+
+def response_performance(conn, filters):
+    """6. 响应性能分析（最近 10 次成功搜索）"""
+    cur = conn.cursor()
+    where_clause, params = filters.where(
+        "r.created_at",
+        extra=["r.search_status = 'completed'", "r.response_time_ms IS NOT NULL"]
+    )
+
+    cur.execute(f"""
+        SELECT
+            r.keyword,
+            r.platform,
+            ROUND(r.response_time_ms/1000.0, 2) as response_seconds,
+            (SELECT COUNT(*) FROM citations WHERE record_id = r.id) as citation_count,
+            (SELECT COUNT(*) FROM search_queries WHERE record_id = r.id) as query_count,
+            r.created_at
+        FROM search_records r
+        {where_clause}
+        ORDER BY r.created_at DESC
+        LIMIT 10
+    """, params)
+
+    rows = [
+        {
+            "keyword": keyword,
+            "platform": platform,
+            "response_seconds": _round(response_seconds),
+            "citation_count": citation_count,
+            "query_count": query_count,
+            "created_at": created_at
+        }
+        for keyword, platform, response_seconds, citation_count, query_count, created_at in cur.fetchall()
+    ]
+    cur.close()
+    return rows
+
+
+def domain_types(conn, filters):
+    """7. 域名类型分布分析"""
+    cur = conn.cursor()
+    where_clause, params = filters.where("c.created_at")
+
+    cur.execute(f"""
+        SELECT c.url, COUNT(*) as citation_count
+        FROM citations c
+        {filters.record_join("c")}
+        {where_clause}
+        GROUP BY c.url
+    """, params)
+    citations_data = cur.fetchall()
+    cur.close()
+
+    # 分类统计
+    type_stats = Counter()
+    type_citation_counts = Counter()
+    for url, count in citations_data:
+        domain_type = classify_domain_type(url)
+        type_stats[domain_type] += 1
+        type_citation_counts[domain_type] += count
+
+    total_types = sum(type_stats.values())
+    total_citations = sum(type_citation_counts.values())
+    if total_types == 0:
+        return []
+
+    rows = []
+    for domain_type in DOMAIN_TYPES:
+        if domain_type in type_stats:
+            type_count = type_stats[domain_type]
+            citation_count = type_citation_counts[domain_type]
+            rows.append({
+                "type": domain_type,
+                "domain_count": type_count,
+                "domain_percentage": round(type_count * 100.0 / total_types, 2),
+                "citation_count": citation_count,
+                "citation_percentage": round(citation_count * 100.0 / total_citations, 2) if total_citations > 0 else 0
+            })
+    return rows
+
+
+def citation_positions(conn, filters):
+    """8. 引用位置分析（每个位置的 Top 10 域名 + 位置汇总）"""
+    cur = conn.cursor()
+    where_clause, params = filters.where("c.created_at")
+
+    # 位置分桶在 SQL 中完成，只返回每个位置的 Top 10 域名和位置汇总：
+    # - 单条回答引用总数 <= 6：全部算作中间
+    # - cite_index <= 3：开头；cite_index > 总数 - 3：结尾；其余为中间
+    cur.execute(f"""
+        WITH positioned AS (
+            SELECT
+                c.domain,
+                CASE
+                    WHEN COUNT(*) OVER (PARTITION BY c.record_id) <= 6 THEN '中间'
+                    WHEN c.cite_index <= 3 THEN '开头'
+                    WHEN c.cite_index > COUNT(*) OVER (PARTITION BY c.record_id) - 3 THEN '结尾'
+                    ELSE '中间'
+                END as position
+            FROM citations c
+            {filters.record_join("c")}
+            {where_clause}
+        ),
+        bucket_counts AS (
+            SELECT position, domain, COUNT(*) as citation_count
+            FROM positioned
+            GROUP BY position, domain
+        ),
+        ranked AS (
+            SELECT
+                position, domain, citation_count,
+                SUM(citation_count) OVER (PARTITION BY position) as position_total,
+                ROW_NUMBER() OVER (PARTITION BY position ORDER BY citation_count DESC, domain) as rn
+            FROM bucket_counts
+        )
+        SELECT position, domain, citation_count, position_total
+        FROM ranked
+        WHERE rn <= 10
+        ORDER BY position, rn
+    """, params)
+
+    top_domains = {position: [] for position in POSITIONS}
+    position_totals = {position: 0 for position in POSITIONS}
+    for position, domain, citation_count, position_total in cur.fetchall():
+        top_domains[position].append({"domain": domain, "count": citation_count})
+        position_totals[position] = int(position_total)
+    cur.close()
+
+    total_positions = sum(position_totals.values())
+    summary = [
+        {
+            "position": position,
+            "count": total,
+            "percentage": round(total * 100.0 / total_positions, 2) if total_positions > 0 else 0
+        }
+        for position, total in position_totals.items()
+    ]
+    return {"top_domains": top_domains, "summary": summary}
+
+
+def pairwise_platform_overlap(platform_domains):
+    """
+    计算 N 个平台之间两两的域名重叠情况（Jaccard）
+
+    Args:
+        platform_domains: {平台: 域名集合}
+
+    Returns:
+        每一对平台的对比结果列表
+    """
+    pairs = []
+    for platform1, platform2 in combinations(sorted(platform_domains), 2):
+        domains1 = platform_domains[platform1]
+        domains2 = platform_domains[platform2]
+        common_domains = domains1 & domains2
+        all_domains = domains1 | domains2
+
+        overlap_count = len(common_domains)
+        total_unique = len(all_domains)
+        overlap_rate = round(overlap_count * 100.0 / total_unique, 2) if total_unique > 0 else 0
+
+        pairs.append({
+            'platform1': platform1,
+            'platform2': platform2,
+            'platform1_domains': len(domains1),
+            'platform2_domains': len(domains2),
+            'common_domains': overlap_count,
+            'overlap_rate': overlap_rate,
+            'platform1_unique': len(domains1 - domains2),
+            'platform2_unique': len(domains2 - domains1)
+        })
+    return pairs
+
+
+def cross_platform_consistency(conn, filters):
+    """9. 跨平台一致性分析（同一关键词在不同平台的引用重叠率）"""
+    cur = conn.cursor()
+    where_clause, params = filters.where("r.created_at")
+
+    # 单次查询取出 (关键词, 平台, 域名) 去重组合，集合运算在内存中完成
+    cur.execute(f"""
+        SELECT
+            r.keyword,
+            r.platform,
+            c.domain
+        FROM search_records r
+        JOIN citations c ON r.id = c.record_id
+        {where_clause}
+        GROUP BY r.keyword, r.platform, c.domain
+        ORDER BY r.keyword
+    """, params)
+
+    keyword_platform_domains = {}
+    for keyword, platform, domain in cur.fetchall():
+        platform_domains = keyword_platform_domains.setdefault(keyword, {})
+        platform_domains.setdefault(platform, set()).add(domain)
+    cur.close()
+
+    # 对每个关键词计算所有平台两两之间的重叠率（只有一个平台的关键词跳过）
+    comparisons = []
+    for keyword, platform_domains in keyword_platform_domains.items():
+        if len(platform_domains) < 2:
+            continue
+        for pair in pairwise_platform_overlap(platform_domains):
+            comparisons.append({'keyword': keyword, **pair})
+
+    # 按平台组合汇总平均重叠率
+    pair_rates = {}
+    for comp in comparisons:
+        pair_rates.setdefault((comp['platform1'], comp['platform2']), []).append(comp['overlap_rate'])
+    pair_averages = [
+        {
+            "platform1": p1,
+            "platform2": p2,
+            "keyword_count": len(rates),
+            "avg_overlap_rate": round(sum(rates) / len(rates), 2)
+        }
+        for (p1, p2), rates in sorted(pair_rates.items())
+    ]
+
+    avg_overlap = round(sum(c['overlap_rate'] for c in comparisons) / len(comparisons), 2) if comparisons else None
+    return {
+        "has_data": bool(keyword_platform_domains),
+        "comparisons": comparisons,
+        "pair_averages": pair_averages,
+        "avg_overlap_rate": avg_overlap
+    }
+
+
+def stage_timings(conn, filters):
+    """10. 搜索分阶段耗时（按平台、阶段聚合 search_records.stage_timings）"""
+    cur = conn.cursor()
+    where_clause, params = filters.where("r.created_at", extra=["r.stage_timings IS NOT NULL"])
+
+    cur.execute(f"""
+        SELECT
+            r.platform,
+            t.key as stage,
+            COUNT(*) as samples,
+            AVG(t.value::numeric) as avg_ms,
+            percentile_cont(0.5) WITHIN GROUP (ORDER BY t.value::numeric) as p50_ms,
+            percentile_cont(0.95) WITHIN GROUP (ORDER BY t.value::numeric) as p95_ms,
+            SUM(t.value::numeric) as total_ms
+        FROM search_records r
+        CROSS JOIN LATERAL jsonb_each_text(r.stage_timings) t
+        {where_clause}
+        GROUP BY r.platform, t.key
+    """, params)
+    rows = cur.fetchall()
+    cur.close()
+
+    platform_totals = Counter()
+    for platform, _, _, _, _, _, total_ms in rows:
+        platform_totals[platform] += float(total_ms)
+
+    stage_rank = {stage: index for index, stage in enumerate(STAGES)}
+    rows.sort(key=lambda row: (row[0], stage_rank.get(row[1], len(STAGES)), row[1]))
+    return [
+        {
+            "platform": platform,
+            "stage": stage,
+            "samples": samples,
+            "avg_ms": _round(avg_ms, 0),
+            "p50_ms": _round(p50_ms, 0),
+            "p95_ms": _round(p95_ms, 0),
+            # 该阶段占平台全部耗时的比例
+            "share": _round(float(total_ms) / platform_totals[platform] * 100 if platform_totals[platform] else 0)
+        }
+        for platform, stage, samples, avg_ms, p50_ms, p95_ms, total_ms in rows
+    ]
+
+
+# 报告名 -> 分析函数（/stats/{name} 接口使用）
+REPORTS = {
+    "trust-sources": trust_sources,
+    "search-intent": search_intent,
+    "brand-exposure": brand_exposure,
+    "time-trends": time_trends,
+    "platform-comparison": platform_comparison,
+    "response-performance": response_performance,
+    "domain-types": domain_types,
+    "citation-positions": citation_positions,
+    "cross-platform-consistency": cross_platform_consistency,
+    "stage-timings": stage_timings,
+}
+
+
+_data_version_exists = False
+
+
+def get_data_watermark(conn):
+    """
+    数据版本：search_records / citations / search_queries / urls 的每条写入语句都会递增序列
+    data_version_seq（v4.1 迁移），覆盖乱序提交和 UPDATE；序列不加锁，写入之间互不阻塞。
+    未执行迁移时返回 None（不缓存）
+    """
+    global _data_version_exists
+    cur = conn.cursor()
+    if not _data_version_exists:
+        cur.execute("SELECT to_regclass('data_version_seq') IS NOT NULL")
+        _data_version_exists = bool(cur.fetchone()[0])
+        if not _data_version_exists:
+            cur.close()
+            return None
+    cur.execute("SELECT last_value, is_called FROM data_version_seq")
+    row = cur.fetchone()
+    cur.close()
+    return row[0] if row and row[1] else 0
+
+
+class ReportCache:
+    """
+    报告结果缓存（进程内 LRU）
+
+    键为 (报告名, 过滤条件)，值带上计算时的数据版本和计算时间；
+    每次读取先查一次版本（读序列当前值，代价很小），版本变化即视为失效并重新计算。
+    版本在计算之前读取：计算期间有新数据提交时，下次读取会因版本变化而重新计算。
+    序列在写入语句执行时递增、早于事务提交，提交前读到新版本的计算结果可能不含该事务的数据，
+    因此条目最多保留 max_age 秒（之后或下一次写入时重新计算）
+    """
+
+    def __init__(self, max_entries=256, max_age=60):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, conn, name, filters):
+        """
+        返回 (结果, 是否命中缓存)
+
+        Raises:
+            KeyError: 报告名不存在
+        """
+        report = REPORTS[name]
+        key = (name, filters)
+        watermark = get_data_watermark(conn)
+        if watermark is None:
+            return report(conn, filters), False
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == watermark and now - entry[1] < self.max_age:
+                self._entries.move_to_end(key)
+                return entry[2], True
+
+        data = report(conn, filters)
+
+        with self._lock:
+            self._entries[key] = (watermark, now, data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,151 @@
+"""
+core/responses.py - API 响应的快速序列化与压缩（均为可选，默认关闭）
+
+- FastJSONResponse：用 orjson 序列化（未安装时退化为标准库 json），
+  接口直接返回已构建好的 dict，跳过 response_model 对 Dict[str, Any] 的逐层校验和转换
+- CompressionMiddleware：响应体超过阈值且客户端支持时压缩，优先 brotli（需安装 brotli 包），否则 gzip；
+  流式响应（分多段发送的 body）原样透传
+
+环境变量：
+- API_FAST_JSON=1：/status、/stats/{report} 等大响应走 FastJSONResponse
+- API_COMPRESSION=1：启用压缩中间件
+- API_COMPRESSION_MIN_SIZE：压缩阈值（字节，默认 1024）
+- API_GZIP_LEVEL / API_BROTLI_QUALITY：压缩级别（默认 6 / 5，偏向速度）
+"""
+import os
+import gzip
+import json
+from decimal import Decimal
+from fastapi.encoders import jsonable_encoder
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FAST_JSON_ENABLED = os.getenv("API_FAST_JSON", "0") == "1"
+COMPRESSION_ENABLED = os.getenv("API_COMPRESSION", "0") == "1"
+COMPRESSION_MIN_SIZE = int(os.getenv("API_COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("API_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("API_BROTLI_QUALITY", "5"))
+
+
+def _default(value):
+    """orjson / json 不支持的类型（Decimal 与 Pydantic 一样输出为字符串）"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    """序列化为 UTF-8 JSON（中文不转义）"""
+    if orjson:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def json_response(content, model=None):
+    """
+    API_FAST_JSON=1 时直接返回 FastJSONResponse，否则交给 model（response_model）按原方式序列化
+    model 为 None 时返回 content 本身
+    """
+    if FAST_JSON_ENABLED:
+        return FastJSONResponse(content)
+    if model is not None:
+        return model(**content)
+    return content
+
+
+def render_json(content, model=None) -> bytes:
+    """
+    渲染出与 json_response 返回给客户端相同的响应体：
+    API_FAST_JSON=1 时为 dumps，否则按 FastAPI response_model 的流程（model 校验 → jsonable_encoder → JSONResponse）
+    """
+    if FAST_JSON_ENABLED:
+        return dumps(content)
+    if model is not None:
+        content = model(**content)
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def _choose_encoding(accept_encoding: str):
+    accepted = {item.split(";")[0].strip().lower() for item in accept_encoding.split(",") if item.strip()}
+    if brotli and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """ASGI 压缩中间件（gzip / brotli）"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                # 等拿到 body 再决定是否压缩
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if message.get("more_body") or len(body) < self.minimum_size or "content-encoding" in headers:
+                # 流式响应、小响应和已编码的响应不处理
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
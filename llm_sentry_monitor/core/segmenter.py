@@ -0,0 +1,136 @@
+"""
+core/segmenter.py - 拓展词分词流水线
+流程：SQL 去重计数 -> 命中缓存的直接复用 -> 新查询词在进程池中分词（每个 worker 预加载 jieba）
+-> 分词结果写回 search_query_tokens 表，后续运行只需处理新出现的查询词
+"""
+import os
+import hashlib
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from psycopg2.extras import Json, execute_values
+
+logger = logging.getLogger(__name__)
+
+# 分词逻辑或词典变化时递增，旧缓存会被自动重新分词
+TOKENIZER_VERSION = 1
+
+# 待分词数量低于该值时直接在当前进程处理，避免进程池启动开销
+POOL_THRESHOLD = 200
+
+
+def _init_worker(custom_words):
+    """进程池 worker 初始化：预加载 jieba 词典和自定义词"""
+    import jieba
+    import jieba.analyse
+    for word in custom_words:
+        jieba.add_word(word)
+    jieba.initialize()
+
+
+def _segment(query_text):
+    """对单个查询词分词：TF-IDF 关键词 + 普通分词"""
+    import jieba
+    import jieba.analyse
+    keywords = jieba.analyse.extract_tags(query_text, topK=5, withWeight=False)
+    words = jieba.lcut(query_text)
+    return words + keywords
+
+
+def tokenizer_signature(custom_words):
+    """缓存版本标识：分词版本 + 自定义词典摘要"""
+    digest = hashlib.md5("\n".join(sorted(custom_words)).encode("utf-8")).hexdigest()[:12]
+    return f"v{TOKENIZER_VERSION}-{digest}"
+
+
+def segment_queries(queries, custom_words, workers=None):
+    """
+    批量分词
+
+    Args:
+        queries: 去重后的查询词列表
+        custom_words: 自定义词典
+        workers: 进程数，默认读取 SEGMENT_WORKERS 环境变量或 CPU 核数
+
+    Returns:
+        {查询词: 分词结果列表}
+    """
+    if not queries:
+        return {}
+
+    workers = workers or int(os.getenv("SEGMENT_WORKERS", "0")) or os.cpu_count() or 1
+
+    if workers <= 1 or len(queries) < POOL_THRESHOLD:
+        _init_worker(custom_words)
+        return {q: _segment(q) for q in queries}
+
+    chunksize = max(1, len(queries) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(list(custom_words),)) as pool:
+        return dict(zip(queries, pool.map(_segment, queries, chunksize=chunksize)))
+
+
+def count_query_terms(conn, custom_words, stop_words, filter_sql="", params=None, workers=None, write_cache=True):
+    """
+    统计拓展词中的核心概念频次
+
+    Args:
+        conn: 数据库连接
+        custom_words: 自定义词典
+        stop_words: 停用词（只在统计时过滤，不影响缓存）
+        filter_sql: 可选的过滤片段（JOIN / WHERE），search_queries 别名为 sq
+        params: filter_sql 的绑定参数
+        workers: 分词进程数
+        write_cache: 是否把新分词结果写回 search_query_tokens 并提交（为 False 时只读）
+
+    Returns:
+        Counter({词: 频次})
+    """
+    signature = tokenizer_signature(custom_words)
+    cur = conn.cursor()
+
+    # 1. 去重计数，并带出已缓存的分词结果
+    cur.execute(f"""
+        SELECT q.query, q.occurrences, t.tokens
+        FROM (
+            SELECT sq.query, COUNT(*) as occurrences
+            FROM search_queries sq
+            {filter_sql}
+            GROUP BY sq.query
+        ) q
+        LEFT JOIN search_query_tokens t
+            ON t.query_hash = md5(q.query) AND t.tokenizer_version = %s
+        WHERE q.query IS NOT NULL AND q.query <> ''
+    """, list(params or []) + [signature])
+    rows = cur.fetchall()
+
+    # 2. 只对未缓存的查询词分词
+    missing = [query for query, _, tokens in rows if tokens is None]
+    segmented = segment_queries(missing, custom_words, workers)
+    logger.info(f"分词: {len(rows)} 个不同查询词，缓存命中 {len(rows) - len(missing)} 个，新分词 {len(missing)} 个")
+
+    # 3. 写回缓存
+    if segmented and write_cache:
+        execute_values(cur, """
+            INSERT INTO search_query_tokens (query_hash, query, tokens, tokenizer_version)
+            VALUES %s
+            ON CONFLICT (query_hash) DO UPDATE SET
+                tokens = EXCLUDED.tokens,
+                tokenizer_version = EXCLUDED.tokenizer_version,
+                created_at = CURRENT_TIMESTAMP
+        """, [
+            (hashlib.md5(query.encode("utf-8")).hexdigest(), query, Json(tokens), signature)
+            for query, tokens in segmented.items()
+        ], page_size=1000)
+        conn.commit()
+
+    # 4. 按出现次数加权汇总
+    word_counts = Counter()
+    for query, occurrences, tokens in rows:
+        if tokens is None:
+            tokens = segmented.get(query, [])
+        for word in tokens:
+            if len(word) > 1 and word not in stop_words:
+                word_counts[word] += occurrences
+
+    cur.close()
+    return word_counts
@@ -0,0 +1,201 @@
+"""
+core/session.py - 浏览器平台登录状态
+按 (平台, 账号) 记录最近一次确认的登录状态，供 provider 和任务执行器判断：
+- valid：TTL 内 provider 打开首页后不再等待 2 秒探测"登录"文本
+- expired：TTL 内无头模式的搜索直接失败（不启动浏览器，不等待 2 分钟登录），执行器跳过任务间延迟
+- 未记录或超过 TTL：provider 照常探测，并把探测结果写回
+
+状态来源：
+- provider 页面探测（最可靠）
+- 后台线程定期读取 browser_data 中 Chromium 的 Cookies 库（只读打开，浏览器运行时也能读）：
+  登录 cookie 全部缺失或过期时标记 expired，有未过期的登录 cookie 时标记 valid；
+  平台没有可判断的登录 cookie（DeepSeek 的登录 token 在 localStorage）时只在完全没有该站 cookie 时标记 expired
+
+环境变量：SESSION_TTL_SECONDS（默认 1800）、SESSION_CHECK_INTERVAL（后台检查间隔秒数，默认 300，0 为关闭）
+"""
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+VALID = "valid"
+EXPIRED = "expired"
+
+# Chromium cookie 的 expires_utc 为 1601-01-01 起的微秒数
+CHROME_EPOCH_OFFSET = 11644473600
+
+# 平台 → 站点域名和登录 cookie 名（names 为空表示无法通过 cookie 判断是否登录）
+PLATFORM_COOKIES = {
+    "deepseek": {"domains": ("deepseek.com",), "names": ()},
+    "doubao": {"domains": ("doubao.com",), "names": ("sessionid", "sessionid_ss", "sid_tt")},
+}
+
+
+class SessionExpiredError(Exception):
+    """平台登录已失效（无头模式下无法扫码登录）"""
+    pass
+
+
+def browser_data_dir(platform: str, account: str = "default") -> str:
+    """账号的浏览器数据目录：default 为 BROWSER_DATA_DIR/<platform>，其他为 BROWSER_DATA_DIR/<platform>_<account>"""
+    base_dir = os.getenv("BROWSER_DATA_DIR", "./browser_data")
+    name = platform if account == "default" else f"{platform}_{account}"
+    return os.path.join(base_dir, name)
+
+
+def read_cookies(user_data_dir: str, domains) -> Optional[List[Dict]]:
+    """
+    读取数据目录中指定域名的 cookie：[{"name", "host", "expires"}]（expires 为 Unix 时间，会话 cookie 为 None）
+    Cookies 库不存在时返回 None
+    """
+    import sqlite3
+    for relative in (os.path.join("Default", "Network", "Cookies"), os.path.join("Default", "Cookies")):
+        path = os.path.join(user_data_dir, relative)
+        if os.path.exists(path):
+            break
+    else:
+        return None
+
+    # immutable=1：不加锁读取，浏览器正在使用时也能打开（可能读到稍旧的数据）
+    conn = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+    try:
+        conditions = " OR ".join(["host_key LIKE ?"] * len(domains))
+        rows = conn.execute(
+            f"SELECT name, host_key, expires_utc FROM cookies WHERE {conditions}",
+            [f"%{domain}" for domain in domains]
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"name": name, "host": host, "expires": expires / 1000000 - CHROME_EPOCH_OFFSET if expires else None}
+        for name, host, expires in rows
+    ]
+
+
+class SessionManager:
+    """平台登录状态（线程安全）"""
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+        self._states = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def get(self, platform: str, account: str = "default") -> Optional[Dict]:
+        with self._lock:
+            state = self._states.get((platform, account))
+            return dict(state) if state else None
+
+    def mark(self, platform: str, account: str, status: str, reason: str = ""):
+        with self._lock:
+            previous = self._states.get((platform, account))
+            self._states[(platform, account)] = {"status": status, "reason": reason, "checked_at": time.time()}
+        if not previous or previous["status"] != status:
+            log = logger.warning if status == EXPIRED else logger.info
+            log(f"平台会话状态: {platform}/{account} → {status}（{reason}）")
+
+    def mark_valid(self, platform: str, account: str = "default", reason: str = "页面探测"):
+        self.mark(platform, account, VALID, reason)
+
+    def mark_expired(self, platform: str, account: str = "default", reason: str = "页面需要登录"):
+        self.mark(platform, account, EXPIRED, reason)
+
+    def _current(self, platform, account, status):
+        state = self.get(platform, account)
+        return bool(state) and state["status"] == status and time.time() - state["checked_at"] < self.ttl
+
+    def is_fresh(self, platform: str, account: str = "default") -> bool:
+        """TTL 内确认过登录有效（可以跳过页面探测）"""
+        return self._current(platform, account, VALID)
+
+    def is_available(self, platform: str, account: str = "default") -> bool:
+        """TTL 内没有被标记为失效（未记录的平台视为可用）"""
+        return not self._current(platform, account, EXPIRED)
+
+    def check_cookies(self, platform: str, account: str = "default") -> Optional[str]:
+        """
+        读取浏览器数据目录中的 cookie 判断登录状态并记录，返回 valid / expired，无法判断时返回 None
+        """
+        spec = PLATFORM_COOKIES.get(platform)
+        if not spec:
+            return None
+        # sqlite3 只在后台检查时用到，不放在模块顶部（API 启动会导入本模块）
+        import sqlite3
+        try:
+            cookies = read_cookies(browser_data_dir(platform, account), spec["domains"])
+        except sqlite3.Error as e:
+            logger.debug(f"读取 {platform}/{account} cookie 失败: {e}")
+            return None
+        if cookies is None:
+            return None
+
+        now = time.time()
+        alive = [c for c in cookies if c["expires"] is None or c["expires"] > now]
+        if spec["names"]:
+            status = VALID if any(c["name"] in spec["names"] for c in alive) else EXPIRED
+        elif not alive:
+            status = EXPIRED
+        else:
+            return None
+        # 页面探测比 cookie 更可靠：TTL 内已有同样的结论时不覆盖
+        if not self._current(platform, account, status):
+            self.mark(platform, account, status, "cookie 检查")
+        return status
+
+    def discover_accounts(self) -> List[tuple]:
+        """browser_data 下已有的 (平台, 账号)"""
+        base_dir = os.getenv("BROWSER_DATA_DIR", "./browser_data")
+        if not os.path.isdir(base_dir):
+            return []
+        found = []
+        for name in sorted(os.listdir(base_dir)):
+            for platform in PLATFORM_COOKIES:
+                if name == platform:
+                    found.append((platform, "default"))
+                elif name.startswith(f"{platform}_"):
+                    found.append((platform, name[len(platform) + 1:]))
+        return found
+
+    def check_all(self):
+        for platform, account in self.discover_accounts():
+            self.check_cookies(platform, account)
+
+    def start_background_checks(self, interval: Optional[int] = None):
+        """启动后台 cookie 检查线程（重复调用不会启动多个）"""
+        interval = interval if interval is not None else int(os.getenv("SESSION_CHECK_INTERVAL", "300"))
+        if interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+
+        def run():
+            while True:
+                try:
+                    self.check_all()
+                except Exception as e:
+                    logger.debug(f"后台会话检查失败: {e}")
+                time.sleep(interval)
+
+        self._thread = threading.Thread(target=run, name="session-checker", daemon=True)
+        self._thread.start()
+
+    def snapshot(self) -> List[Dict]:
+        """当前记录的所有会话状态（/health 展示）"""
+        now = time.time()
+        with self._lock:
+            items = list(self._states.items())
+        return [
+            {
+                "platform": platform,
+                "account": account,
+                "status": state["status"],
+                "reason": state["reason"],
+                "age_seconds": int(now - state["checked_at"]),
+                "stale": now - state["checked_at"] >= self.ttl
+            }
+            for (platform, account), state in sorted(items)
+        ]
+
+
+SESSIONS = SessionManager()
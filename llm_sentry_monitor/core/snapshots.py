@@ -0,0 +1,128 @@
+"""
+core/snapshots.py - 已完成任务的 /status 响应快照（task_snapshots 表，v3.9 迁移）
+task_jobs.status = 'done' 之后任务数据不再变化：
+1. 第一次完整查询（不带 limit / exclude / summary_only）时把响应 JSON gzip 压缩后存入 task_snapshots
+2. 之后的查询按主键读一行直接返回：客户端接受 gzip 时原样输出压缩内容，否则解压后输出
+3. 响应带 ETag 和缓存头（max-age 默认一天），If-None-Match 命中时返回 304
+
+已完成任务的数据仍可能被维护操作改写，这些写入路径会删除受影响的快照（Python 中调用 delete_snapshots），
+下次查询时重新渲染：
+- 乱码修复（core/encoding_repair.py，含 urls 的合并）
+- 分区分离 / 归档（geo_db/partition_maintenance.sh）
+因此不使用 immutable，客户端缓存过期后用 ETag 重新验证
+
+快照与实时响应用同一个序列化器渲染（core/responses.py 的 render_json），切换 API_FAST_JSON 后
+应清空 task_snapshots，否则快照仍是切换前的格式
+
+环境变量 STATUS_SNAPSHOTS=0 关闭，STATUS_SNAPSHOT_MAX_AGE 设置缓存秒数；未执行 v3.9 迁移（表不存在）时自动跳过
+"""
+import os
+import gzip
+import hashlib
+from typing import Optional, Tuple
+from starlette.responses import Response
+from core.responses import render_json
+
+SNAPSHOTS_ENABLED = os.getenv("STATUS_SNAPSHOTS", "1") == "1"
+
+# 每个任务只压缩一次，用最高压缩级别
+SNAPSHOT_GZIP_LEVEL = 9
+
+CACHE_CONTROL = f"public, max-age={int(os.getenv('STATUS_SNAPSHOT_MAX_AGE', '86400'))}"
+
+_table_exists = False
+
+
+def snapshots_available(cur) -> bool:
+    """快照是否可用（表存在的结果会缓存，不存在时每次重新检查，迁移后无需重启）"""
+    global _table_exists
+    if not SNAPSHOTS_ENABLED:
+        return False
+    if not _table_exists:
+        cur.execute("SELECT to_regclass('task_snapshots') IS NOT NULL")
+        _table_exists = bool(cur.fetchone()[0])
+    return _table_exists
+
+
+def fetch_snapshot(cur, task_id: int) -> Optional[Tuple[bytes, str]]:
+    """读取快照，返回 (gzip 内容, etag)，没有快照时返回 None"""
+    cur.execute("SELECT body, etag FROM task_snapshots WHERE task_id = %s", (task_id,))
+    row = cur.fetchone()
+    return (bytes(row[0]), row[1]) if row else None
+
+
+def store_snapshot(cur, task_id: int, content, model=None) -> Tuple[bytes, str]:
+    """
+    渲染并保存快照（已存在时保留原快照，内容相同）
+
+    Args:
+        cur: 数据库游标（由调用方提交事务）
+        content: 完整的 /status 响应 {"status", "data"}
+        model: 实时响应使用的 response_model，按同样的方式渲染
+
+    Returns:
+        (gzip 内容, etag)
+    """
+    raw = render_json(content, model)
+    # mtime=0：相同内容的压缩结果完全一致
+    body = gzip.compress(raw, compresslevel=SNAPSHOT_GZIP_LEVEL, mtime=0)
+    etag = hashlib.sha256(raw).hexdigest()[:32]
+    cur.execute("""
+        INSERT INTO task_snapshots (task_id, codec, raw_length, body, etag)
+        VALUES (%s, 'gzip', %s, %s, %s)
+        ON CONFLICT (task_id) DO NOTHING
+    """, (task_id, len(raw), body, etag))
+    return body, etag
+
+
+def delete_snapshots(cur, task_ids=None, created_before=None) -> int:
+    """
+    删除快照（任务数据被改写后调用，由调用方提交事务），表不存在时跳过
+
+    Args:
+        cur: 数据库游标
+        task_ids: 只删除这些任务的快照
+        created_before: 只删除该时间之前创建的任务的快照
+        两者都为 None 时删除全部快照
+
+    Returns:
+        删除的快照数
+    """
+    cur.execute("SELECT to_regclass('task_snapshots') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return 0
+    conditions, params = [], []
+    if task_ids is not None:
+        conditions.append("ts.task_id = ANY(%s)")
+        params.append(list(task_ids))
+    if created_before is not None:
+        conditions.append("ts.task_id IN (SELECT id FROM task_jobs WHERE created_at < %s)")
+        params.append(created_before)
+    cur.execute(
+        "DELETE FROM task_snapshots ts" + (f" WHERE {' AND '.join(conditions)}" if conditions else ""),
+        params
+    )
+    return cur.rowcount
+
+
+def _accepts_gzip(accept_encoding: str) -> bool:
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def snapshot_response(body: bytes, etag: str, request=None) -> Response:
+    """
+    把快照包装成响应（request 为 None 时按不支持 gzip、无条件请求处理）
+    """
+    headers = {"Cache-Control": CACHE_CONTROL, "ETag": f'"{etag}"', "Vary": "Accept-Encoding"}
+    if request is not None:
+        if_none_match = request.headers.get("if-none-match", "")
+        if if_none_match.strip() == "*" or headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        if _accepts_gzip(request.headers.get("accept-encoding", "")):
+            headers["Content-Encoding"] = "gzip"
+            return Response(body, media_type="application/json", headers=headers)
+    return Response(gzip.decompress(body), media_type="application/json", headers=headers)
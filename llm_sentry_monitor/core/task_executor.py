@@ -3,20 +3,29 @@ core/task_executor.py - 任务执行器
 封装任务执行逻辑，支持多关键词、多平台的异步执行
 """
 import os
+import json
 import time
+import asyncio
 import logging
 import threading
 from typing import List, Dict, Any, Optional
 from core.db import get_db_connection, update_domain_stats
 from core.parser import extract_domain
-from providers.deepseek_web import DeepSeekWebProvider
-from providers.doubao_web import DoubaoWebProvider
-from providers.bocha_api import BochaApiProvider
+from core.encoding import TEXT_NORMALIZATION_VERSION, normalize_result, normalize_text
+from core.answers import store_answer
+from core.urls import upsert_urls, url_hash
+from core.timing import StageTimer
+from core.session import SessionExpiredError
+from core.metrics import (
+    EXECUTOR_ACTIVE_JOBS, EXECUTOR_PENDING_SEARCHES, PROVIDER_SEARCHES, PROVIDER_SEARCH_SECONDS, CITATIONS_PER_ANSWER,
+    DB_SAVE_SECONDS
+)
+from providers.registry import get_provider, resolve_platform, available_platforms, create_async_provider, has_async_provider
 
 logger = logging.getLogger(__name__)
 
 
-def save_to_db(keyword, platform, prompt, result, prompt_type="default", response_time_ms=None, error_message=None, task_id=None, task_query_id=None):
+def save_to_db(keyword, platform, prompt, result, prompt_type="default", response_time_ms=None, error_message=None, task_id=None, task_query_id=None, stage_timings=None):
     """
     保存搜索结果到数据库（从 main.py 复用）
     
@@ -30,9 +39,16 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
         error_message: 错误信息
         task_id: task_jobs 表的 ID（可选，用于关联任务）
         task_query_id: task_query 表的 ID（可选，用于关联 executor_sub_query_log）
+        stage_timings: provider 各阶段耗时（毫秒，provider.timer.as_dict()），随 INSERT 写入 stage_timings 列
+    
+    所有文本字段在入库前统一规范化一次，写入的行带 text_normalized 标记，读取时无需再逐字段修复
+    入库耗时（含提交）只计入 /metrics 的 db_save_duration_seconds，不再回写记录
     """
+    start = time.perf_counter()
     try:
-        from providers.doubao_web import ensure_utf8_string
+        keyword = normalize_text(keyword)
+        prompt = normalize_text(prompt)
+        result = normalize_result(result)
         
         with get_db_connection() as conn:
             cur = conn.cursor()
@@ -42,23 +58,26 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
             if error_message:
                 search_status = 'failed'
             
-            # 1. 插入搜索记录（包含任务关联字段）
+            # 1. 插入搜索记录（包含任务关联字段），完整回答压缩后存入 answer_blobs，记录中只保存哈希
+            answer_hash = store_answer(cur, result.get("full_text", "") if result else "")
             cur.execute("""
                 INSERT INTO search_records 
-                (keyword, platform, prompt_type, prompt, full_answer, response_time_ms, search_status, error_message, task_id, task_query_id) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
+                (keyword, platform, prompt_type, prompt, answer_hash, response_time_ms, search_status, error_message, task_id, task_query_id, text_normalized, stage_timings) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) 
                 RETURNING id
             """, (
                 keyword, 
                 platform, 
                 prompt_type, 
                 prompt,
-                result.get("full_text", "") if result else "",
+                answer_hash,
                 response_time_ms,
                 search_status,
                 error_message,
                 task_id,
-                task_query_id
+                task_query_id,
+                TEXT_NORMALIZATION_VERSION,
+                json.dumps(stage_timings) if stage_timings else None
             ))
             record_id = cur.fetchone()[0]
             
@@ -69,11 +88,14 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
             # 2. 插入拓展词 (带顺序)
             for idx, query in enumerate(result.get("queries", []), 1):
                 cur.execute(
-                    "INSERT INTO search_queries (record_id, query, query_order) VALUES (%s, %s, %s)",
-                    (record_id, query, idx)
+                    "INSERT INTO search_queries (record_id, query, query_order, text_normalized) VALUES (%s, %s, %s, %s)",
+                    (record_id, query, idx, TEXT_NORMALIZATION_VERSION)
                 )
             
-            # 3. 插入引用 (利用唯一约束自动去重)，并保存 citation_id 用于关联
+            # 3. 引用网页批量写入 urls 维度表，citations / executor_sub_query_log 只保存 url_id
+            url_ids = upsert_urls(cur, result.get("citations", []), TEXT_NORMALIZATION_VERSION)
+            
+            # 插入引用 (利用唯一约束自动去重)，并保存 citation_id 用于关联
             citations_count = 0
             citation_ids = {}  # url -> citation_id 映射，用于后续关联 executor_sub_query_log
             for cite in result.get("citations", []):
@@ -84,20 +106,20 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
                 domain = extract_domain(url)
                 try:
                     # 先尝试插入，如果冲突则查询现有记录
+                    # 不指定冲突目标：分区表的唯一约束是 (record_id, url, created_at)，分区前是 (record_id, url)
                     cur.execute("""
                         INSERT INTO citations 
-                        (record_id, cite_index, url, domain, title, snippet, site_name) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (record_id, url) DO NOTHING
+                        (record_id, cite_index, url, domain, url_id, text_normalized) 
+                        VALUES (%s, %s, %s, %s, %s, %s)
+                        ON CONFLICT DO NOTHING
                         RETURNING id
                     """, (
                         record_id, 
                         cite.get("cite_index", 0), 
                         url, 
                         domain, 
-                        cite.get("title", ""), 
-                        cite.get("snippet", ""), 
-                        cite.get("site_name", "")
+                        url_ids.get(url_hash(url, cite.get("title", ""), cite.get("snippet", ""), cite.get("site_name", ""))),
+                        TEXT_NORMALIZATION_VERSION
                     ))
                     
                     row = cur.fetchone()
@@ -140,11 +162,9 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
                     # 获取对应的 citation_id
                     citation_id = citation_ids.get(url)
                     
-                    url = ensure_utf8_string(url) if isinstance(url, str) else url
+                    # 文本字段已在入口处规范化，title / snippet / site_name 保存在 urls 维度表
                     domain = extract_domain(url)
-                    title = ensure_utf8_string(cite.get("title", "")) if isinstance(cite.get("title", ""), str) else cite.get("title", "")
-                    snippet = ensure_utf8_string(cite.get("snippet", "")) if isinstance(cite.get("snippet", ""), str) else cite.get("snippet", "")
-                    site_name = ensure_utf8_string(cite.get("site_name", "")) if isinstance(cite.get("site_name", ""), str) else cite.get("site_name", "")
+                    url_id = url_ids.get(url_hash(url, cite.get("title", ""), cite.get("snippet", ""), cite.get("site_name", "")))
                     cite_index = cite.get("cite_index", 0)
                     
                     # 根据 query_indexes 获取对应的 query
@@ -159,13 +179,13 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
                         if isinstance(query_idx, int) and 0 <= query_idx < len(queries):
                             query = queries[query_idx]
                             if query:
-                                sub_query = ensure_utf8_string(query) if isinstance(query, str) else query
+                                sub_query = query
                     elif queries and len(queries) == 1:
                         # 没有 query_indexes，但只有一个 query（豆包等情况）
                         # 认为所有链接都参考此 query
                         query = queries[0]
                         if query:
-                            sub_query = ensure_utf8_string(query) if isinstance(query, str) else query
+                            sub_query = query
                     # 其他情况（没有 query_indexes 且 queries 不为 1 个）：保持现状，sub_query 为 NULL
                     
                     # 记录已保存的 sub_query
@@ -176,9 +196,9 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
                     try:
                         cur.execute("""
                             INSERT INTO executor_sub_query_log 
-                            (task_query_id, sub_query, record_id, url, domain, title, snippet, site_name, cite_index, citation_id)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        """, (task_query_id, sub_query, record_id, url, domain, title, snippet, site_name, cite_index, citation_id))
+                            (task_query_id, sub_query, record_id, url, domain, url_id, cite_index, citation_id, text_normalized)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        """, (task_query_id, sub_query, record_id, url, domain, url_id, cite_index, citation_id, TEXT_NORMALIZATION_VERSION))
                     except Exception as e:
                         logger.debug(f"插入网址信息失败: {e}")
                 
@@ -188,7 +208,7 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
                     for query in queries:
                         if not query:
                             continue
-                        sub_query = ensure_utf8_string(query) if isinstance(query, str) else query
+                        sub_query = query
                         # 如果这个 sub_query 已经通过 URL 记录保存过了，跳过
                         if sub_query in saved_sub_queries:
                             continue
@@ -196,9 +216,9 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
                         try:
                             cur.execute("""
                                 INSERT INTO executor_sub_query_log 
-                                (task_query_id, sub_query, record_id, url, domain, title, snippet, site_name, cite_index, citation_id)
-                                VALUES (%s, %s, %s, NULL, NULL, NULL, NULL, NULL, NULL, NULL)
-                            """, (task_query_id, sub_query, record_id))
+                                (task_query_id, sub_query, record_id, url, domain, title, snippet, site_name, cite_index, citation_id, text_normalized)
+                                VALUES (%s, %s, %s, NULL, NULL, NULL, NULL, NULL, NULL, NULL, %s)
+                            """, (task_query_id, sub_query, record_id, TEXT_NORMALIZATION_VERSION))
                         except Exception as e:
                             logger.debug(f"插入无URL的sub_query失败: {e}")
             
@@ -207,14 +227,23 @@ def save_to_db(keyword, platform, prompt, result, prompt_type="default", respons
             logger.info(f"  - 参考网页: {citations_count} 个")
             if response_time_ms:
                 logger.info(f"  - 响应时间: {response_time_ms/1000:.2f} 秒")
-            
-            return record_id, citations_count
+        
+        DB_SAVE_SECONDS.labels(platform).observe(time.perf_counter() - start)
+        return record_id, citations_count
                 
     except Exception as e:
         logger.error(f"❌ 保存到数据库失败: {e}", exc_info=True)
         return None, 0
 
 
+def _record_search_metrics(platform, status, response_time_ms, citations_count=0):
+    """平台搜索的次数、耗时和引用数计入 /metrics"""
+    PROVIDER_SEARCHES.labels(platform, status).inc()
+    PROVIDER_SEARCH_SECONDS.labels(platform).observe(response_time_ms / 1000)
+    if status == "completed":
+        CITATIONS_PER_ANSWER.labels(platform).observe(citations_count)
+
+
 def execute_single_task(keyword: str, platform: str, prompt: str, settings: Dict[str, Any], task_id: Optional[int] = None, task_query_id: Optional[int] = None) -> Dict[str, Any]:
     """
     执行单个关键词-平台组合的搜索任务
@@ -232,32 +261,22 @@ def execute_single_task(keyword: str, platform: str, prompt: str, settings: Dict
     """
     headless = settings.get("headless", False)
     timeout = settings.get("timeout", 60000)
+    # 拦截图片、字体、统计上报等请求；未设置时只在无头模式下启用
+    block_resources = settings.get("block_resources")
     
-    providers = {
-        "deepseek": DeepSeekWebProvider(headless=headless, timeout=timeout),
-        "doubao": DoubaoWebProvider(headless=headless, timeout=timeout),
-        "bocha": BochaApiProvider(headless=headless, timeout=timeout)
-    }
-    
-    # 平台名称规范化
-    platform_lower = platform.lower().strip()
-    matched_platform = None
-    for key in providers.keys():
-        if key.lower() == platform_lower:
-            matched_platform = key
-            break
-    
+    # 平台名规范化（含别名），provider 按 (平台, headless, timeout, block_resources) 缓存
+    matched_platform = resolve_platform(platform)
     if not matched_platform:
         return {
             "keyword": keyword,
             "platform": platform,
             "status": "failed",
-            "error_message": f"未找到平台 [{platform}] 的 Provider",
+            "error_message": f"未找到平台 [{platform}] 的 Provider，可用平台: {', '.join(available_platforms())}",
             "record_id": None,
             "citations_count": 0
         }
     
-    provider = providers[matched_platform]
+    provider = get_provider(matched_platform, headless=headless, timeout=timeout, block_resources=block_resources)
     logger.info(f"\n{'='*60}")
     logger.info(f"🚀 开始执行任务: [{keyword}] 在平台 [{matched_platform}]")
     logger.info(f"{'='*60}")
@@ -276,9 +295,11 @@ def execute_single_task(keyword: str, platform: str, prompt: str, settings: Dict
                 prompt_type="api_task", 
                 response_time_ms=response_time_ms,
                 task_id=task_id,
-                task_query_id=task_query_id
+                task_query_id=task_query_id,
+                stage_timings=provider.timer.as_dict()
             )
             logger.info(f"✅ {matched_platform} 任务完成")
+            _record_search_metrics(matched_platform, "completed", response_time_ms, citations_count)
             return {
                 "keyword": keyword,
                 "platform": matched_platform,
@@ -295,8 +316,10 @@ def execute_single_task(keyword: str, platform: str, prompt: str, settings: Dict
                 prompt_type="api_task", 
                 error_message=error_message,
                 task_id=task_id,
-                task_query_id=task_query_id
+                task_query_id=task_query_id,
+                stage_timings=provider.timer.as_dict()
             )
+            _record_search_metrics(matched_platform, "failed", response_time_ms)
             return {
                 "keyword": keyword,
                 "platform": matched_platform,
@@ -309,16 +332,23 @@ def execute_single_task(keyword: str, platform: str, prompt: str, settings: Dict
     except Exception as e:
         response_time_ms = int((time.time() - start_time) * 1000)
         error_message = str(e)
-        logger.error(f"❌ 执行任务失败: {e}", exc_info=True)
+        # 会话失效（core/session.py）时 provider 未启动浏览器就返回，不需要堆栈
+        session_expired = isinstance(e, SessionExpiredError)
+        if session_expired:
+            logger.warning(f"⚠️ {matched_platform} {error_message}")
+        else:
+            logger.error(f"❌ 执行任务失败: {e}", exc_info=True)
         record_id, _ = save_to_db(
             keyword, matched_platform, prompt, None, 
             prompt_type="api_task", 
             response_time_ms=response_time_ms, 
             error_message=error_message,
             task_id=task_id,
-            task_query_id=task_query_id
+            task_query_id=task_query_id,
+            stage_timings=provider.timer.as_dict()
         )
-        return {
+        _record_search_metrics(matched_platform, "failed", response_time_ms)
+        outcome = {
             "keyword": keyword,
             "platform": matched_platform,
             "status": "failed",
@@ -327,9 +357,121 @@ def execute_single_task(keyword: str, platform: str, prompt: str, settings: Dict
             "citations_count": 0,
             "response_time_ms": response_time_ms
         }
+        if session_expired:
+            outcome["session_expired"] = True
+        return outcome
+
+
+async def execute_single_task_async(provider, keyword: str, platform: str, prompt: str, task_id: Optional[int] = None, task_query_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    execute_single_task 的异步版本：在 provider 的持久化上下文中新开标签页搜索，入库放到线程中执行
+    返回格式与 execute_single_task 相同
+    """
+    logger.info(f"🚀 开始执行任务: [{keyword}] 在平台 [{platform}]（标签页）")
+    timer = StageTimer()
+    start_time = time.time()
+    result = None
+    error_message = None
+    session_expired = False
+    try:
+        result = await provider.search(keyword, prompt, timer=timer)
+        if not (result and result.get("full_text")):
+            result = None
+            error_message = "未返回有效结果"
+    except SessionExpiredError as e:
+        error_message = str(e)
+        session_expired = True
+        logger.warning(f"⚠️ {platform} {error_message}")
+    except Exception as e:
+        error_message = str(e)
+        logger.error(f"❌ 执行任务失败: {e}", exc_info=True)
+    response_time_ms = int((time.time() - start_time) * 1000)
+    
+    record_id, citations_count = await asyncio.to_thread(
+        save_to_db, keyword, platform, prompt, result,
+        prompt_type="api_task",
+        response_time_ms=response_time_ms,
+        error_message=error_message,
+        task_id=task_id,
+        task_query_id=task_query_id,
+        stage_timings=timer.as_dict()
+    )
+    status = "completed" if result else "failed"
+    _record_search_metrics(platform, status, response_time_ms, citations_count)
+    outcome = {
+        "keyword": keyword,
+        "platform": platform,
+        "status": status,
+        "record_id": record_id,
+        "citations_count": citations_count if result else 0,
+        "response_time_ms": response_time_ms
+    }
+    if error_message:
+        outcome["error_message"] = error_message
+    if session_expired:
+        outcome["session_expired"] = True
+    return outcome
+
+
+async def run_task_rounds_async(keywords: List[str], platforms: List[str], query_count: int, settings: Dict[str, Any],
+                                task_id: Optional[int] = None, task_query_map: Optional[Dict[str, int]] = None,
+                                on_search_done=None) -> List[Dict[str, Any]]:
+    """
+    按轮执行任务：同一轮内所有 (关键词, 平台) 搜索并发执行
+    - 有异步版本的平台（deepseek / doubao）每个平台一个异步 provider（一个浏览器上下文），标签页数量受 max_tabs 限制
+    - 其他平台（bocha）在线程中调用 execute_single_task
+    - delay_between_tasks 作为轮与轮之间的间隔
+    
+    settings.max_tabs 可以是整数（所有平台）或 {平台: 上限}，未设置时见 providers/async_base.py 的 resolve_max_tabs
+    返回结果顺序与同步执行相同（轮 → 关键词 → 平台）
+    """
+    task_query_map = task_query_map or {}
+    headless = settings.get("headless", False)
+    timeout = settings.get("timeout", 60000)
+    block_resources = settings.get("block_resources")
+    max_tabs = settings.get("max_tabs")
+    delay = settings.get("delay_between_tasks", 5)
+    
+    providers = {}
+    for platform in platforms:
+        key = resolve_platform(platform)
+        if key and key not in providers and has_async_provider(key):
+            limit = max_tabs.get(key) if isinstance(max_tabs, dict) else max_tabs
+            providers[key] = create_async_provider(
+                key, headless=headless, timeout=timeout, block_resources=block_resources, max_tabs=limit
+            )
+    
+    async def run_one(keyword, platform):
+        task_query_id = task_query_map.get(keyword)
+        key = resolve_platform(platform)
+        if key in providers:
+            result = await execute_single_task_async(providers[key], keyword, key, keyword, task_id, task_query_id)
+        else:
+            result = await asyncio.to_thread(execute_single_task, keyword, platform, keyword, settings, task_id, task_query_id)
+        if on_search_done:
+            on_search_done()
+        return result
+    
+    results = []
+    try:
+        for round_num in range(1, query_count + 1):
+            logger.info(f"🔄 开始第 {round_num}/{query_count} 轮执行（并发）")
+            results.extend(await asyncio.gather(*[
+                run_one(keyword, platform) for keyword in keywords for platform in platforms
+            ]))
+            if delay > 0 and round_num < query_count:
+                await asyncio.sleep(delay)
+    finally:
+        for provider in providers.values():
+            try:
+                await provider.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器上下文失败: {e}")
+    return results
 
 
-def execute_task_job(task_id: int, keywords: List[str], platforms: List[str], query_count: int, settings: Dict[str, Any]):
+def execute_task_job(task_id: int, keywords: List[str], platforms: List[str], query_count: int, settings: Dict[str, Any],
+                     task_query_map: Optional[Dict[str, int]] = None, background: bool = True):
     """
     在后台线程中执行任务作业
     
@@ -339,8 +481,15 @@ def execute_task_job(task_id: int, keywords: List[str], platforms: List[str], qu
         platforms: 平台列表
         query_count: 查询次数（执行轮数）
         settings: 设置字典
+        task_query_map: 关键词 → task_query_id（创建任务时 RETURNING 得到），未提供时从 task_query 查询
+        background: 为 False 时在当前线程中执行（execute_task_jobs 依次执行多个任务）
     """
     def run():
+        nonlocal task_query_map
+        # 执行器指标：正在执行的任务数、尚未执行的搜索数
+        remaining = query_count * len(keywords) * len(platforms)
+        EXECUTOR_ACTIVE_JOBS.inc()
+        EXECUTOR_PENDING_SEARCHES.inc(remaining)
         try:
             # 更新任务状态为 pending
             with get_db_connection() as conn:
@@ -351,39 +500,51 @@ def execute_task_job(task_id: int, keywords: List[str], platforms: List[str], qu
                 )
                 conn.commit()
             
-            # 获取 task_query_id 映射（keyword -> task_query_id）
-            task_query_map = {}
-            with get_db_connection() as conn:
-                cur = conn.cursor()
-                for keyword in keywords:
+            # 获取 task_query_id 映射（keyword -> task_query_id），创建任务时已传入则不再查询
+            if task_query_map is None:
+                task_query_map = {}
+                with get_db_connection() as conn:
+                    cur = conn.cursor()
                     cur.execute("""
-                        SELECT id FROM task_query 
-                        WHERE task_id = %s AND query = %s
-                        LIMIT 1
-                    """, (task_id, keyword))
-                    row = cur.fetchone()
-                    if row:
-                        task_query_map[keyword] = row[0]
+                        SELECT id, query FROM task_query
+                        WHERE task_id = %s
+                        ORDER BY id
+                    """, (task_id,))
+                    for task_query_id, query in cur.fetchall():
+                        task_query_map.setdefault(query, task_query_id)
             
             results = []
             delay = settings.get("delay_between_tasks", 5)
             
-            # 按执行次数循环：外层循环执行次数，中层循环查询条件，内层循环平台
-            for round_num in range(1, query_count + 1):
-                logger.info(f"🔄 开始第 {round_num}/{query_count} 轮执行")
+            # 多标签页并发执行（见 run_task_rounds_async）；所有平台都没有异步版本时按同步方式执行
+            if settings.get("async_tabs") and any(has_async_provider(platform) for platform in platforms):
+                def on_search_done():
+                    nonlocal remaining
+                    remaining -= 1
+                    EXECUTOR_PENDING_SEARCHES.dec()
                 
-                for keyword in keywords:
-                    prompt = keyword  # 使用关键词作为提示词
-                    task_query_id = task_query_map.get(keyword)
+                results = asyncio.run(run_task_rounds_async(
+                    keywords, platforms, query_count, settings, task_id, task_query_map, on_search_done
+                ))
+            else:
+                # 按执行次数循环：外层循环执行次数，中层循环查询条件，内层循环平台
+                for round_num in range(1, query_count + 1):
+                    logger.info(f"🔄 开始第 {round_num}/{query_count} 轮执行")
                     
-                    for platform in platforms:
-                        result = execute_single_task(keyword, platform, prompt, settings, task_id, task_query_id)
-                        results.append(result)
+                    for keyword in keywords:
+                        prompt = keyword  # 使用关键词作为提示词
+                        task_query_id = task_query_map.get(keyword)
                         
-                        # 任务间延迟
-                        if delay > 0:
-                            time.sleep(delay)
-            
+                        for platform in platforms:
+                            result = execute_single_task(keyword, platform, prompt, settings, task_id, task_query_id)
+                            results.append(result)
+                            remaining -= 1
+                            EXECUTOR_PENDING_SEARCHES.dec()
+                            
+                            # 任务间延迟（会话失效的平台没有打开浏览器，不需要等待）
+                            if delay > 0 and not result.get("session_expired"):
+                                time.sleep(delay)
+                
             # 更新任务结果
             import json
             with get_db_connection() as conn:
@@ -413,8 +574,33 @@ def execute_task_job(task_id: int, keywords: List[str], platforms: List[str], qu
                     conn.commit()
             except:
                 pass
+        finally:
+            EXECUTOR_ACTIVE_JOBS.dec()
+            EXECUTOR_PENDING_SEARCHES.dec(remaining)
+    
+    if not background:
+        run()
+        return
     
     # 在后台线程中执行
     thread = threading.Thread(target=run, daemon=True)
     thread.start()
 
+
+def execute_task_jobs(jobs: List[Dict[str, Any]]):
+    """
+    在一个后台线程中依次执行多个任务（POST /mock/batch），避免同时启动大量浏览器
+    
+    Args:
+        jobs: [{"task_id", "keywords", "platforms", "query_count", "settings", "task_query_map"}]
+    """
+    def run():
+        for job in jobs:
+            execute_task_job(
+                job["task_id"], job["keywords"], job["platforms"], job["query_count"], job["settings"],
+                task_query_map=job.get("task_query_map"), background=False
+            )
+    
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+
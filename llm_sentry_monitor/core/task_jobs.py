@@ -0,0 +1,63 @@
+"""
+core/task_jobs.py - 任务作业的创建（POST /mock、POST /mock/batch）
+一批任务只用两条多行 INSERT：task_jobs 一条，所有任务的 task_query 一条，
+都用 RETURNING 取回 id，关键词 → task_query_id 的映射直接交给执行器，不再逐个关键词回查
+"""
+import json
+from typing import Any, Dict, List, Tuple
+from psycopg2.extras import execute_values
+
+# 任务默认设置（请求中的 settings 覆盖同名项）
+DEFAULT_TASK_SETTINGS = {
+    "headless": False,
+    "timeout": 60000,
+    "delay_between_tasks": 5
+}
+
+# 每条语句最多写入的行数（5000 个关键词约 5 条语句）
+INSERT_PAGE_SIZE = 1000
+
+
+def merge_settings(settings=None) -> Dict[str, Any]:
+    return {**DEFAULT_TASK_SETTINGS, **(settings or {})}
+
+
+def create_task_jobs(cur, jobs: List[Dict[str, Any]]) -> List[Tuple[int, Dict[str, int]]]:
+    """
+    批量创建任务及其查询条件（由调用方提交事务）
+
+    Args:
+        cur: 数据库游标
+        jobs: [{"keywords", "platforms", "query_count", "settings"}]，settings 应已合并默认值
+
+    Returns:
+        与 jobs 顺序一致的 [(task_id, {keyword: task_query_id})]，重复的关键词对应第一条 task_query
+    """
+    if not jobs:
+        return []
+
+    job_rows = execute_values(cur, """
+        INSERT INTO task_jobs (keywords, platforms, query_count, status, settings)
+        VALUES %s
+        RETURNING id
+    """, [
+        (json.dumps(job["keywords"]), json.dumps(job["platforms"]), job["query_count"], "pending", json.dumps(job["settings"]))
+        for job in jobs
+    ], page_size=INSERT_PAGE_SIZE, fetch=True)
+    # RETURNING 的行序没有保证；id 由 nextval 按写入顺序分配（分页语句也按顺序执行），排序后与 jobs 一一对应
+    task_ids = sorted(row[0] for row in job_rows)
+
+    query_rows = execute_values(cur, """
+        INSERT INTO task_query (task_id, query)
+        VALUES %s
+        RETURNING id, task_id, query
+    """, [
+        (task_id, keyword)
+        for task_id, job in zip(task_ids, jobs)
+        for keyword in job["keywords"]
+    ], page_size=INSERT_PAGE_SIZE, fetch=True)
+
+    task_query_maps = {task_id: {} for task_id in task_ids}
+    for task_query_id, task_id, query in sorted(query_rows):
+        task_query_maps[task_id].setdefault(query, task_query_id)
+    return [(task_id, task_query_maps[task_id]) for task_id in task_ids]
@@ -0,0 +1,167 @@
+"""
+core/task_status.py - /status 接口的查询参数与公共查询
+大任务的 executor_sub_query_log 有上万行，完整响应会把每一行以 sub_query_logs 和 detail_logs 各输出一次，
+这里提供按需裁剪响应的三种方式：
+- 分页（limit + after_id）：按 executor_sub_query_log.id 做 keyset 分页，只返回当前页的 sub_query_logs / detail_logs，
+  响应中的 page.next_after_id 作为下一页的 after_id，为 None 时已是最后一页
+- exclude：不返回的字段（title / snippet / site_name，查询时即不读取）或整段数据（sub_query_logs、detail_logs 等）
+- summary_only：只统计 platform_progress，不读取任何日志和引用，适合轮询进度
+"""
+import os
+from typing import Dict, List, Optional, Tuple
+
+# 可排除的日志 / 引用字段（url、domain 参与汇总和去重，不能排除）
+EXCLUDABLE_FIELDS = ("title", "snippet", "site_name")
+
+# 可排除的整段数据
+EXCLUDABLE_SECTIONS = (
+    "task_queries", "sub_query_logs", "detail_logs", "summary_table",
+    "results_by_platform", "query_tokens", "results",
+)
+
+# 分页时不返回的段：汇总表需要全部日志，results_by_platform / query_tokens 与日志分页无关且较大
+PAGED_OMITTED_SECTIONS = ("summary_table", "results_by_platform", "query_tokens")
+
+MAX_PAGE_SIZE = int(os.getenv("STATUS_MAX_PAGE_SIZE", "1000"))
+
+
+def parse_exclude(exclude: Optional[str]) -> Tuple[set, set]:
+    """
+    解析 exclude 参数（逗号分隔）
+
+    Returns:
+        (排除的字段, 排除的段)
+
+    Raises:
+        ValueError: 包含不支持的名称
+    """
+    names = {name.strip() for name in (exclude or "").split(",") if name.strip()}
+    unknown = names - set(EXCLUDABLE_FIELDS) - set(EXCLUDABLE_SECTIONS)
+    if unknown:
+        raise ValueError(
+            f"exclude 不支持: {', '.join(sorted(unknown))}，"
+            f"可选字段 {', '.join(EXCLUDABLE_FIELDS)}，可选数据段 {', '.join(EXCLUDABLE_SECTIONS)}"
+        )
+    return names & set(EXCLUDABLE_FIELDS), names & set(EXCLUDABLE_SECTIONS)
+
+
+def _text_columns(alias: str, excluded_fields) -> str:
+    """title / snippet / site_name 列（优先取 urls 维度表），被排除的字段直接查 NULL，不读取大字段"""
+    columns = []
+    for field in EXCLUDABLE_FIELDS:
+        if field in excluded_fields:
+            columns.append("NULL")
+        else:
+            columns.append(f"COALESCE(u.{field}, {alias}.{field})")
+    return ", ".join(columns)
+
+
+def fetch_sub_query_logs(cur, task_query_ids: List[int], task_created_at, excluded_fields=(),
+                         after_id: Optional[int] = None, limit: Optional[int] = None) -> Tuple[List[tuple], Optional[int]]:
+    """
+    读取任务的 executor_sub_query_log
+
+    列顺序固定为 (id, task_query_id, sub_query, url, domain, title, snippet, site_name,
+    cite_index, created_at, record_id, citation_id, text_normalized)
+
+    Args:
+        limit: 为 None 时读取全部（按 task_query_id, created_at 排序）；
+            否则按 id 升序读取 id > after_id 的 limit 行
+        after_id: 上一页最后一行的 id
+
+    Returns:
+        (行列表, 下一页的 after_id，没有下一页时为 None)
+    """
+    if not task_query_ids:
+        return [], None
+
+    placeholders = ','.join(['%s'] * len(task_query_ids))
+    sql = f"""
+        SELECT esql.id, esql.task_query_id, esql.sub_query, esql.url, esql.domain,
+               {_text_columns("esql", excluded_fields)},
+               esql.cite_index, esql.created_at, esql.record_id, esql.citation_id, esql.text_normalized
+        FROM executor_sub_query_log esql
+        LEFT JOIN urls u ON u.id = esql.url_id
+        WHERE esql.task_query_id IN ({placeholders})
+          AND esql.created_at >= %s
+    """
+    params = list(task_query_ids) + [task_created_at]
+    if limit is None:
+        cur.execute(sql + " ORDER BY esql.task_query_id, esql.created_at", params)
+        return cur.fetchall(), None
+
+    if after_id is not None:
+        sql += " AND esql.id > %s"
+        params.append(after_id)
+    # 多取一行判断是否还有下一页
+    cur.execute(sql + " ORDER BY esql.id LIMIT %s", params + [limit + 1])
+    rows = cur.fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+
+def fetch_citations(cur, record_id: int, task_created_at, excluded_fields=()) -> List[tuple]:
+    """
+    读取单条记录的引用
+
+    列顺序固定为 (url, title, snippet, site_name, cite_index, domain, text_normalized)
+    """
+    cur.execute(f"""
+        SELECT c.url, {_text_columns("c", excluded_fields)},
+               c.cite_index, c.domain, c.text_normalized
+        FROM citations c
+        LEFT JOIN urls u ON u.id = c.url_id
+        WHERE c.record_id = %s
+          AND c.created_at >= %s
+        ORDER BY c.cite_index, c.id
+    """, (record_id, task_created_at))
+    return cur.fetchall()
+
+
+def fetch_platform_progress(cur, task_id: int, task_query_ids: List[int], keywords, platforms,
+                            query_count: int, task_created_at) -> Dict[str, int]:
+    """
+    统计任务的轮次进度：总轮次 = 关键词数 × 平台数 × 查询次数，完成 / 失败数来自 search_records
+
+    Returns:
+        {"completed", "failed", "pending", "total"}
+    """
+    num_keywords = len(task_query_ids) if task_query_ids else len(keywords) if keywords else 0
+    total_rounds = num_keywords * len(platforms) * query_count if num_keywords > 0 and platforms and query_count else 0
+
+    completed_rounds = 0
+    failed_rounds = 0
+    if task_query_ids and platforms:
+        placeholders = ','.join(['%s'] * len(task_query_ids))
+        cur.execute(f"""
+            SELECT search_status, COUNT(*) as count
+            FROM search_records
+            WHERE task_id = %s
+              AND task_query_id IN ({placeholders})
+              AND platform IN ({','.join(['%s'] * len(platforms))})
+              AND prompt_type = 'api_task'
+              AND created_at >= %s
+            GROUP BY search_status
+        """, [task_id] + list(task_query_ids) + [p.lower() for p in platforms] + [task_created_at])
+
+        for search_status, count in cur.fetchall():
+            if search_status == 'completed':
+                completed_rounds = count
+            elif search_status == 'failed':
+                failed_rounds = count
+
+    return {
+        "completed": completed_rounds,
+        "failed": failed_rounds,
+        "pending": max(0, total_rounds - completed_rounds - failed_rounds),
+        "total": total_rounds
+    }
+
+
+def drop_fields(item: Dict, excluded_fields) -> Dict:
+    """从日志 / 引用条目中去掉被排除的字段"""
+    for field in excluded_fields:
+        item.pop(field, None)
+    return item
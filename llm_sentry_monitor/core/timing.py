@@ -0,0 +1,52 @@
+"""
+core/timing.py - 搜索各阶段耗时
+provider 在 search 中按顺序打点（lap），save_to_db 在 INSERT 时写入 search_records.stage_timings：
+    {"browser_launch": 1830, "page_load": 2410, ..., "browser_close": 120}
+
+阶段名约定（毫秒，同名阶段累加）：
+- browser_launch / page_load / login_check / input / search_toggle / send：浏览器准备与提问
+- tab_wait：异步 provider 等待空闲标签页（账号并发上限已满时）
+- generation：等待回答生成（含 DeepSeek 刷新重试）
+- dom_extract：接口未抓到引用时的 DOM 兜底提取
+- postprocess / browser_close：整理结果、关闭浏览器
+- api_request：API 类 provider 的请求耗时
+- db_save：旧数据中的 save_to_db 写入耗时（之后只计入 /metrics 的 db_save_duration_seconds）
+"""
+import time
+from contextlib import contextmanager
+
+# 报告中阶段的展示顺序（未列出的阶段排在最后）
+STAGES = [
+    "browser_launch", "tab_wait", "page_load", "login_check", "input", "search_toggle", "send",
+    "generation", "dom_extract", "api_request", "postprocess", "browser_close", "db_save"
+]
+
+
+class StageTimer:
+    """分阶段计时器（非线程安全，每次搜索新建一个）"""
+
+    def __init__(self):
+        self.stages = {}
+        self._last = time.perf_counter()
+
+    def _add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def lap(self, name):
+        """把上一次打点到现在的耗时记为阶段 name"""
+        now = time.perf_counter()
+        self._add(name, now - self._last)
+        self._last = now
+
+    @contextmanager
+    def stage(self, name):
+        """单独计时一段代码（不移动 lap 的打点位置）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - start)
+
+    def as_dict(self):
+        """{阶段名: 毫秒}"""
+        return {name: int(round(seconds * 1000)) for name, seconds in self.stages.items()}
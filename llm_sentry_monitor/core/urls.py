@@ -0,0 +1,130 @@
+"""
+core/urls.py - 引用网页维度表（urls）
+同一网页（url、title、snippet、site_name 完全相同）只保存一份，citations 和
+executor_sub_query_log 通过 url_id 引用。哈希算法与迁移脚本中的 geo_url_hash() 一致
+
+读取时 LEFT JOIN urls u ON u.id = <事实表>.url_id，用 COALESCE(u.title, <事实表>.title) 兼容未回填的旧行
+"""
+import hashlib
+from psycopg2.extras import execute_values
+from core.parser import extract_domain
+
+
+def url_hash(url, title, snippet, site_name):
+    """网页内容哈希（NULL 视为空串，字段以 0x1F 分隔）"""
+    content = "\x1f".join([url or "", title or "", snippet or "", site_name or ""])
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def upsert_urls(cur, citations, text_normalized=None):
+    """
+    批量写入引用网页，已存在的跳过
+
+    Args:
+        cur: 数据库游标（由调用方提交事务）
+        citations: 引用列表（dict，含 url / title / snippet / site_name），没有 url 的忽略
+        text_normalized: 写入的规范化标记
+
+    Returns:
+        {url_hash: url_id}
+    """
+    rows = {}
+    for cite in citations:
+        url = cite.get("url", "")
+        if not url:
+            continue
+        title, snippet, site_name = cite.get("title", ""), cite.get("snippet", ""), cite.get("site_name", "")
+        key = url_hash(url, title, snippet, site_name)
+        if key not in rows:
+            rows[key] = (key, url, extract_domain(url), title, snippet, site_name, text_normalized)
+    if not rows:
+        return {}
+
+    inserted = execute_values(cur, """
+        INSERT INTO urls (url_hash, url, domain, title, snippet, site_name, text_normalized)
+        VALUES %s
+        ON CONFLICT (url_hash) DO NOTHING
+        RETURNING url_hash, id
+    """, list(rows.values()), fetch=True)
+    url_ids = dict(inserted)
+
+    # ON CONFLICT DO NOTHING 不返回已存在的行，补查一次
+    missing = [key for key in rows if key not in url_ids]
+    if missing:
+        cur.execute("SELECT url_hash, id FROM urls WHERE url_hash = ANY(%s)", (missing,))
+        url_ids.update(cur.fetchall())
+    return url_ids
+
+
+def rewrite_urls(cur, rows):
+    """
+    改写 urls 行的内容（乱码修复），同时重新计算 url_hash
+
+    改写后与其他行内容相同（哈希相同）时，把 citations / executor_sub_query_log 的 url_id
+    指向保留的行（已有行，或同批中 id 最小的行）并删除重复行，保持每个网页只有一行
+
+    Args:
+        cur: 数据库游标（由调用方提交事务）
+        rows: {url_id: {字段: 新值}}，字段为 url / domain / title / snippet / site_name，只需包含要改写的字段
+
+    Returns:
+        合并删除的行数
+    """
+    if not rows:
+        return 0
+    ids = list(rows)
+    cur.execute("""
+        SELECT id, url, domain, title, snippet, site_name
+        FROM urls
+        WHERE id = ANY(%s)
+        ORDER BY id
+        FOR UPDATE
+    """, (ids,))
+    current = {}
+    for row_id, url, domain, title, snippet, site_name in cur.fetchall():
+        values = {"url": url, "domain": domain, "title": title, "snippet": snippet, "site_name": site_name}
+        values.update(rows[row_id])
+        current[row_id] = values
+    hashes = {
+        row_id: url_hash(values["url"], values["title"], values["snippet"], values["site_name"])
+        for row_id, values in current.items()
+    }
+
+    # 新哈希已被批外的行占用时合并到该行，否则同批中 id 最小的行保留
+    cur.execute(
+        "SELECT url_hash, id FROM urls WHERE url_hash = ANY(%s) AND NOT (id = ANY(%s))",
+        (list(set(hashes.values())), ids)
+    )
+    keep = dict(cur.fetchall())
+    merges = []
+    for row_id in sorted(current):
+        key = hashes[row_id]
+        if key in keep:
+            merges.append((row_id, keep[key]))
+        else:
+            keep[key] = row_id
+
+    if merges:
+        for table in ("citations", "executor_sub_query_log"):
+            execute_values(cur, f"""
+                UPDATE {table} AS t
+                SET url_id = v.keep_id
+                FROM (VALUES %s) AS v(old_id, keep_id)
+                WHERE t.url_id = v.old_id
+            """, merges, template="(%s::integer, %s::integer)", page_size=len(merges))
+        cur.execute("DELETE FROM urls WHERE id = ANY(%s)", ([old_id for old_id, _ in merges],))
+
+    updates = [
+        (row_id, hashes[row_id], values["url"], values["domain"], values["title"], values["snippet"], values["site_name"])
+        for row_id, values in current.items()
+        if keep[hashes[row_id]] == row_id
+    ]
+    if updates:
+        execute_values(cur, """
+            UPDATE urls AS u
+            SET url_hash = v.url_hash, url = v.url, domain = v.domain,
+                title = v.title, snippet = v.snippet, site_name = v.site_name
+            FROM (VALUES %s) AS v(id, url_hash, url, domain, title, snippet, site_name)
+            WHERE u.id = v.id
+        """, updates, template="(%s::integer, %s, %s, %s, %s, %s, %s)", page_size=len(updates))
+    return len(merges)
@@ -0,0 +1,370 @@
+"""
+providers/async_base.py - 异步浏览器 provider（playwright.async_api）
+
+同步 provider 每次 search 都启动一个浏览器、只开一个页面，串行执行时大部分时间花在启动浏览器和等待生成上。
+AsyncBaseProvider 对每个账号只启动一个持久化上下文（launch_persistent_context），
+每次搜索在其中新开一个标签页，多个对话并发生成，标签页数量由每个账号的信号量限制。
+
+账号与浏览器数据目录（core/session.py 的 browser_data_dir）：
+- account 为 default 时使用 BROWSER_DATA_DIR/<platform>，与同步 provider 共用登录状态
+- 其他账号使用 BROWSER_DATA_DIR/<platform>_<account>，需要先以有界面模式登录一次
+- 同一数据目录同一时间只能被一个浏览器打开：同一账号只创建一个实例，且不要与同步 provider 同时运行
+
+并发上限（max_tabs）优先级：构造参数 > 环境变量 ASYNC_MAX_TABS_<PLATFORM>_<ACCOUNT> > ASYNC_MAX_TABS_<PLATFORM> > ASYNC_MAX_TABS > 2
+
+子类只需声明平台差异：首页地址、输入框和搜索开关、响应解析函数、DOM 兜底选择器，
+以及可选的流结束标记（STREAM_END_MARKERS）和生成失败时的重试（retry_failed_answer，如 DeepSeek 的刷新按钮）
+"""
+import os
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional
+from core.logger_config import setup_logger
+from core.timing import StageTimer
+from core.metrics import PROVIDER_RETRIES
+from providers.base import BrowserProviderMixin, DOM_CITATIONS_JS
+
+DEFAULT_MAX_TABS = 2
+
+# 开启"联网搜索"开关：一次 evaluate 完成查找、判断状态和点击，返回 active / clicked / missing
+SEARCH_TOGGLE_JS = r"""
+({labels, activeColors}) => {
+    const candidates = [];
+    for (const el of document.querySelectorAll('button, [role="button"], div, span')) {
+        if (!labels.includes((el.innerText || '').trim())) continue;
+        const rect = el.getBoundingClientRect();
+        if (rect.width > 0 && rect.height > 0) candidates.push(el);
+    }
+    if (!candidates.length) return 'missing';
+    // 文档顺序中最后一个是最内层元素，点击它所在的按钮容器
+    const el = candidates[candidates.length - 1];
+    const holder = el.closest('[class*="toggle"], [class*="switch"], [class*="button"], [role="button"], button') || el;
+    const classes = [el, el.parentElement, holder]
+        .map(node => (node && typeof node.className === 'string') ? node.className : '')
+        .join(' ');
+    if (/checked|active|enabled|selected/i.test(classes)) return 'active';
+    for (const node of [el, holder]) {
+        const style = window.getComputedStyle(node);
+        if (activeColors.some(color => style.color.includes(color) || style.backgroundColor.includes(color))) {
+            return 'active';
+        }
+    }
+    holder.click();
+    return 'clicked';
+}
+"""
+
+# 接口没有返回正文时从页面读取最后一条回答
+ANSWER_TEXT_JS = r"""
+(selectors) => {
+    for (const selector of selectors) {
+        const nodes = document.querySelectorAll(selector);
+        if (nodes.length) return nodes[nodes.length - 1].innerText || '';
+    }
+    return '';
+}
+"""
+
+
+def resolve_max_tabs(platform: str, account: str, max_tabs: Optional[int] = None) -> int:
+    """按构造参数和环境变量确定账号的标签页并发上限"""
+    if max_tabs:
+        return max(1, int(max_tabs))
+    for name in (f"ASYNC_MAX_TABS_{platform}_{account}", f"ASYNC_MAX_TABS_{platform}", "ASYNC_MAX_TABS"):
+        value = os.getenv(name.upper())
+        if value:
+            return max(1, int(value))
+    return DEFAULT_MAX_TABS
+
+
+class AsyncBaseProvider(BrowserProviderMixin, ABC):
+    HOME_URL = ""
+    # 输入框候选选择器（按优先级）
+    INPUT_SELECTORS = ("textarea",)
+    # 出现即认为未登录的元素
+    LOGIN_SELECTORS = ("text=登录",)
+    # 搜索开关文本和激活时的颜色
+    SEARCH_TOGGLE_LABELS = ("联网搜索",)
+    SEARCH_ACTIVE_COLORS = ()
+    # 按 URL 片段判断 SSE 响应（Content-Type 为 text/event-stream 的也算）
+    STREAM_URL_PATTERNS = ("stream",)
+    # DOM 兜底：回答容器、引用链接、引用列表容器、平台自身域名、链接内引用序号元素
+    ANSWER_SELECTORS = ()
+    DOM_LINK_SELECTORS = ("a[href^='http']",)
+    DOM_CONTAINER_SELECTORS = ()
+    EXCLUDE_DOMAINS = ()
+    CITE_SELECTOR = None
+    # 等待回答生成的上限（毫秒）
+    GENERATION_TIMEOUT = 180000
+    # SSE 响应体包含其中之一才算生成结束（为空时任意流响应都算），失败 / 中断的流不结束等待
+    STREAM_END_MARKERS = ()
+    # 等待生成期间检查失败状态的间隔（秒）和最大重试次数
+    RETRY_CHECK_INTERVAL = 2
+    MAX_RETRY_ATTEMPTS = 3
+
+    def __init__(self, headless: bool = False, timeout: int = 30000, block_resources: bool = None,
+                 account: str = "default", max_tabs: Optional[int] = None):
+        self.headless = headless
+        self.timeout = timeout
+        self.block_resources = headless if block_resources is None else block_resources
+        self.account = account or "default"
+        self.max_tabs = resolve_max_tabs(self.PLATFORM, self.account, max_tabs)
+        self.logger = setup_logger(self.__class__.__name__)
+        self._playwright = None
+        self._context = None
+        self._slots = None
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """启动持久化上下文（重复调用直接返回已启动的上下文）"""
+        async with self._start_lock:
+            if self._context is None:
+                from playwright.async_api import async_playwright
+                self._playwright = await async_playwright().start()
+                self._context = await self._playwright.chromium.launch_persistent_context(
+                    user_data_dir=self.user_data_dir,
+                    headless=self.headless,
+                    args=["--disable-blink-features=AutomationControlled"]
+                )
+                self._context.set_default_timeout(self.timeout)
+                self._slots = asyncio.Semaphore(self.max_tabs)
+                if self.block_resources:
+                    # 路由注册在上下文上，对之后打开的所有标签页生效
+                    await self._context.route("**/*", self._handle_route)
+                self.logger.info(f"已启动 {self.PLATFORM} 浏览器上下文（账号: {self.account}，最多 {self.max_tabs} 个标签页）")
+            return self._context
+
+    async def close(self):
+        """关闭上下文和 Playwright"""
+        async with self._start_lock:
+            if self._context is not None:
+                await self._context.close()
+                self._context = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _handle_route(self, route):
+        request = route.request
+        if self.should_block(request.resource_type, request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def search(self, keyword: str, prompt: str, timer: Optional[StageTimer] = None) -> Dict[str, Any]:
+        """
+        在新标签页中执行一次搜索，返回格式与同步 provider 相同：
+        {"full_text": str, "queries": List[str], "citations": List[Dict]}
+
+        并发搜索共用一个 provider，计时器由调用方按搜索传入（tab_wait 为等待空闲标签页的耗时）
+        """
+        timer = timer or StageTimer()
+        self.ensure_session()
+        context = await self.start()
+        timer.lap("browser_launch")
+        async with self._slots:
+            timer.lap("tab_wait")
+            page = await context.new_page()
+            try:
+                return await self._search_in_page(page, prompt, timer)
+            finally:
+                await page.close()
+                timer.lap("browser_close")
+
+    async def _search_in_page(self, page, prompt: str, timer: StageTimer) -> Dict[str, Any]:
+        captured_queries = []
+        captured_search_results = []
+        stream_text = []
+        stream_done = asyncio.Event()
+
+        async def handle_response(response):
+            """拦截对话接口响应；SSE 流结束后 response.text() 才返回，包含结束事件时表示生成完成"""
+            if not self.is_api_response(response):
+                return
+            try:
+                content_type = response.headers.get("content-type", "")
+                if self.is_stream_response(response.url.lower(), content_type):
+                    body = await response.text()
+                    self.record_response(self.PLATFORM, body)
+                    stream_text.append(self.parse_stream(body, captured_queries, captured_search_results))
+                    if self.is_stream_finished(body):
+                        stream_done.set()
+                elif "application/json" in content_type:
+                    self.parse_json(await response.json(), captured_queries, captured_search_results)
+            except Exception as e:
+                self.logger.debug(f"解析响应失败: {e}")
+
+        page.on("response", handle_response)
+        await page.goto(self.HOME_URL)
+        timer.lap("page_load")
+
+        await self.check_login(page)
+        timer.lap("login_check")
+
+        input_selector = await self.fill_prompt(page, prompt)
+        timer.lap("input")
+
+        await self.enable_search(page)
+        timer.lap("search_toggle")
+
+        await page.press(input_selector, "Enter")
+        self.logger.info(f"已发送提问: {prompt[:50]}...")
+        timer.lap("send")
+
+        await self.wait_for_answer(page, stream_done, stream_text)
+        timer.lap("generation")
+
+        full_text = "".join(stream_text)
+        if not full_text and self.ANSWER_SELECTORS:
+            full_text = await page.evaluate(ANSWER_TEXT_JS, list(self.ANSWER_SELECTORS))
+        if not captured_search_results:
+            try:
+                items = await page.evaluate(DOM_CITATIONS_JS, {
+                    "linkSelectors": list(self.DOM_LINK_SELECTORS),
+                    "containerSelectors": list(self.DOM_CONTAINER_SELECTORS),
+                    "excludeDomains": list(self.EXCLUDE_DOMAINS),
+                    "citeSelector": self.CITE_SELECTOR
+                })
+                captured_search_results.extend(self.dom_items_to_citations(items))
+            except Exception as e:
+                self.logger.warning(f"从 DOM 提取引用失败: {e}")
+        timer.lap("dom_extract")
+
+        result = self.build_result(full_text, captured_queries, captured_search_results)
+        self.logger.info(f"{self.PLATFORM} 搜索完成: {len(result['queries'])} 个拓展词, {len(result['citations'])} 个引用")
+        timer.lap("postprocess")
+        return result
+
+    async def wait_for_answer(self, page, stream_done: asyncio.Event, stream_text: List[str]):
+        """
+        等待流结束事件；等待期间每隔 RETRY_CHECK_INTERVAL 秒、以及流结束时检查一次生成失败状态，
+        失败时调用 retry_failed_answer 重新生成（丢弃失败回答的正文、重新等待结束事件），
+        超过 MAX_RETRY_ATTEMPTS 次时抛出异常。超时后不抛出，由调用方从页面读取
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.GENERATION_TIMEOUT / 1000
+        retry_count = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self.logger.warning(f"等待回答超时（{self.GENERATION_TIMEOUT // 1000} 秒），改从页面读取")
+                return
+            if not stream_done.is_set():
+                try:
+                    await asyncio.wait_for(stream_done.wait(), timeout=min(self.RETRY_CHECK_INTERVAL, remaining))
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                retried = await self.retry_failed_answer(page)
+            except Exception as e:
+                self.logger.debug(f"检查生成失败状态时出错: {e}")
+                retried = False
+            if not retried:
+                if stream_done.is_set():
+                    break
+                continue
+            retry_count += 1
+            PROVIDER_RETRIES.labels(self.PLATFORM).inc()
+            if retry_count > self.MAX_RETRY_ATTEMPTS:
+                self.logger.error(f"❌ 重试次数已达上限 ({self.MAX_RETRY_ATTEMPTS} 次)，停止重试")
+                raise Exception(f"{self.PLATFORM} 回答生成失败，已重试 {self.MAX_RETRY_ATTEMPTS} 次")
+            self.logger.warning(f"⚠️ 检测到生成失败，已触发第 {retry_count}/{self.MAX_RETRY_ATTEMPTS} 次重试")
+            stream_done.clear()
+            stream_text.clear()
+        if retry_count:
+            self.logger.info(f"✅ 回答生成已完成（经过 {retry_count} 次重试）")
+
+    def is_stream_finished(self, body: str) -> bool:
+        """SSE 响应体是否包含结束事件（未声明 STREAM_END_MARKERS 时任意流响应都视为结束）"""
+        return not self.STREAM_END_MARKERS or any(marker in body for marker in self.STREAM_END_MARKERS)
+
+    async def retry_failed_answer(self, page) -> bool:
+        """检测回答生成失败并触发重新生成，返回是否已触发（默认不处理）"""
+        return False
+
+    def is_stream_response(self, url_lower: str, content_type: str) -> bool:
+        return "text/event-stream" in content_type or any(pattern in url_lower for pattern in self.STREAM_URL_PATTERNS)
+
+    async def check_login(self, page):
+        """
+        检查登录状态（会话在 TTL 内确认有效时跳过）：无头模式下未登录直接失败，有界面时最多等待 2 分钟手动登录
+        """
+        if not self.needs_login_probe():
+            return
+        await asyncio.sleep(2)
+        needs_login = "login" in page.url.lower()
+        for selector in self.LOGIN_SELECTORS:
+            if needs_login:
+                break
+            needs_login = await page.query_selector(selector) is not None
+        self.on_login_detected(not needs_login)
+        if not needs_login:
+            return
+        self.logger.warning(f"检测到可能需要登录，请在浏览器窗口中完成登录（账号: {self.account}）...")
+        try:
+            for selector in self.LOGIN_SELECTORS:
+                await page.wait_for_selector(selector, state="detached", timeout=120000)
+        except Exception:
+            self.logger.error("登录超时，请确保已手动登录并保存状态。")
+
+    async def fill_prompt(self, page, prompt: str) -> str:
+        """按 INPUT_SELECTORS 找到输入框并填入提问，返回命中的选择器"""
+        for selector in self.INPUT_SELECTORS:
+            try:
+                await page.wait_for_selector(selector, timeout=5000)
+                await page.fill(selector, prompt)
+                return selector
+            except Exception:
+                continue
+        raise Exception("未找到输入框")
+
+    async def enable_search(self, page):
+        """开启联网搜索（找不到开关时只记录警告，可能已默认开启）"""
+        try:
+            state = await page.evaluate(SEARCH_TOGGLE_JS, {
+                "labels": list(self.SEARCH_TOGGLE_LABELS),
+                "activeColors": list(self.SEARCH_ACTIVE_COLORS)
+            })
+        except Exception as e:
+            self.logger.warning(f"处理联网搜索开关失败: {e}")
+            return
+        if state == "missing":
+            self.logger.warning("⚠️ 未找到'联网搜索'按钮，可能页面结构已变更或按钮已默认开启")
+        elif state == "clicked":
+            self.logger.info("已手动开启'联网搜索'")
+            await asyncio.sleep(0.5)
+
+    def build_result(self, full_text: str, queries: List[str], search_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """按 URL 去重、按 cite_index 排序，得到与同步 provider 相同的返回格式"""
+        seen_urls = set()
+        citations = []
+        for result in search_results:
+            url = result.get("url", "")
+            if url and url not in seen_urls:
+                seen_urls.add(url)
+                citations.append({
+                    "url": url,
+                    "title": result.get("title", ""),
+                    "snippet": result.get("snippet", ""),
+                    "site_name": result.get("site_name", ""),
+                    "cite_index": result.get("cite_index", 0),
+                    "query_indexes": result.get("query_indexes", [])
+                })
+        citations.sort(key=lambda x: x.get("cite_index", 999))
+        return {"full_text": full_text, "queries": queries, "citations": citations}
+
+    @abstractmethod
+    def parse_stream(self, body: str, captured_queries: List[str], captured_search_results: List[Dict[str, Any]]) -> str:
+        """解析 SSE 响应体，追加拓展词和引用，返回回答正文"""
+        pass
+
+    def parse_json(self, data, captured_queries: List[str], captured_search_results: List[Dict[str, Any]]):
+        """解析普通 JSON 响应（默认忽略）"""
+        pass
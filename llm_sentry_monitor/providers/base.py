@@ -1,13 +1,202 @@
+import os
+import time
 import logging
+import threading
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any
 from core.logger_config import setup_logger
+from core.parser import extract_domain
+from core.timing import StageTimer
+from core.session import SESSIONS, SessionExpiredError, browser_data_dir
 
-class BaseProvider(ABC):
-    def __init__(self, headless: bool = False, timeout: int = 30000):
+# DOM 兜底提取引用：在页面内一次遍历所有候选链接，返回 [{url, title, cite_index, context}]
+# 逐个元素调用 evaluate / get_attribute 每次都是一次 CDP 往返，40 个链接要 200 次左右
+DOM_CITATIONS_JS = r"""
+({linkSelectors, containerSelectors, excludeDomains, citeSelector}) => {
+    const results = [];
+    const seen = new Set();
+
+    // 引用序号：先看链接内的引用标记元素，再看链接和父元素文本中的 [n]
+    const citeNumber = (a) => {
+        const cite = citeSelector ? a.querySelector(citeSelector) : null;
+        if (cite) {
+            const match = (cite.innerText || cite.textContent || '').match(/\d+/);
+            if (match) return parseInt(match[0]);
+            for (const span of cite.querySelectorAll('span')) {
+                const num = parseInt(span.textContent.trim());
+                if (!isNaN(num) && num > 0) return num;
+            }
+        }
+        for (const el of [a, a.parentElement]) {
+            const match = el && (el.textContent || '').match(/\[(\d+)\]/);
+            if (match) return parseInt(match[1]);
+        }
+        return 0;
+    };
+
+    // 上下文：链接或父元素的下一个兄弟元素的文本
+    const context = (a) => {
+        for (const el of [a, a.parentElement]) {
+            const next = el && el.nextElementSibling;
+            if (next && next.textContent) return next.textContent.trim().substring(0, 200);
+        }
+        return '';
+    };
+
+    const add = (a, detailed) => {
+        const href = a.getAttribute('href');
+        if (!href || seen.has(href)) return;
+        const lower = href.toLowerCase();
+        if (excludeDomains.some(domain => lower.includes(domain))) return;
+        seen.add(href);
+        let title = (a.innerText || '').replace(/\[\d+\]/g, '').trim();
+        if (!title && a.parentElement) {
+            title = (a.parentElement.textContent || '').replace(/\[\d+\]/g, '').trim().substring(0, 100);
+        }
+        results.push({
+            url: href,
+            title: title,
+            cite_index: detailed ? citeNumber(a) : 0,
+            context: detailed ? context(a) : ''
+        });
+    };
+
+    for (const selector of linkSelectors) {
+        let nodes;
+        try { nodes = document.querySelectorAll(selector); } catch (e) { continue; }
+        for (const node of nodes) {
+            // 选择器可能命中链接内的引用标记，取所在的 a 标签
+            const a = node.tagName === 'A' ? node : node.closest('a');
+            if (a) add(a, true);
+        }
+    }
+    for (const selector of containerSelectors) {
+        let containers;
+        try { containers = document.querySelectorAll(selector); } catch (e) { continue; }
+        for (const container of containers) {
+            for (const a of container.querySelectorAll("a[href^='http']")) add(a, false);
+        }
+    }
+    return results;
+}
+"""
+
+class BrowserProviderMixin:
+    """
+    浏览器类 provider 的公共部分（同步 BaseProvider 与 providers/async_base.py 的 AsyncBaseProvider 共用）：
+    请求过滤规则、对话接口判断、DOM 兜底结果整理、响应录制、登录状态（core/session.py）
+    """
+    # 平台名（会话状态和浏览器数据目录按平台 + 账号区分）
+    PLATFORM = ""
+    account = "default"
+
+    # 请求过滤（install_request_filter）：直接中止的资源类型和 URL 片段，子类按平台覆盖或追加
+    BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+    BLOCKED_URL_PATTERNS = (
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+        "hm.baidu.com", "cnzz.com", "sentry.io", "/collect?", "/beacon"
+    )
+    # 交给解析器的响应：只看 xhr / fetch / eventsource 请求中 URL 含这些片段的
+    API_RESOURCE_TYPES = ("xhr", "fetch", "eventsource")
+    RESPONSE_URL_PATTERNS = ()
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """请求是否直接中止（图片、媒体、字体和统计上报）"""
+        if resource_type in self.BLOCKED_RESOURCE_TYPES:
+            return True
+        url_lower = url.lower()
+        return any(pattern in url_lower for pattern in self.BLOCKED_URL_PATTERNS)
+
+    def is_api_response(self, response) -> bool:
+        """响应是否是需要解析的对话接口（其他响应在 handle_response 开头直接返回）"""
+        if response.request.resource_type not in self.API_RESOURCE_TYPES:
+            return False
+        url_lower = response.url.lower()
+        return any(pattern in url_lower for pattern in self.RESPONSE_URL_PATTERNS)
+
+    @property
+    def user_data_dir(self) -> str:
+        return browser_data_dir(self.PLATFORM, self.account)
+
+    def ensure_session(self):
+        """
+        search 开始时调用：无头模式下会话已被标记为失效时直接失败，不启动浏览器
+        （有界面时仍然打开页面，等待手动登录）
+        """
+        if self.headless and not SESSIONS.is_available(self.PLATFORM, self.account):
+            raise SessionExpiredError(f"{self.PLATFORM} 账号 [{self.account}] 登录已失效，请先以有界面模式登录")
+
+    def needs_login_probe(self) -> bool:
+        """会话在 TTL 内确认过有效时跳过打开首页后的登录探测"""
+        return not SESSIONS.is_fresh(self.PLATFORM, self.account)
+
+    def on_login_detected(self, logged_in: bool):
+        """
+        记录登录探测结果；无头模式下需要登录时直接失败（没有窗口可以扫码，不再等待 2 分钟）
+        """
+        if logged_in:
+            SESSIONS.mark_valid(self.PLATFORM, self.account)
+            return
+        SESSIONS.mark_expired(self.PLATFORM, self.account)
+        if self.headless:
+            raise SessionExpiredError(f"{self.PLATFORM} 账号 [{self.account}] 未登录，请先以有界面模式登录并保存状态")
+
+    def dom_items_to_citations(self, items, seen_urls=(), start_index=0) -> List[Dict[str, Any]]:
+        """
+        把 DOM_CITATIONS_JS 的返回（[{url, title, cite_index, context}]）整理成引用列表
+        跳过 seen_urls 中已有的 URL，页面上没有序号时从 start_index + 1 开始顺序编号
+        """
+        seen = set(seen_urls)
+        citations = []
+        for item in items:
+            url = item.get("url")
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            citations.append({
+                "url": url,
+                "title": item.get("title") or extract_domain(url),
+                "snippet": item.get("context") or "",
+                "site_name": extract_domain(url),
+                "cite_index": item.get("cite_index") or start_index + len(citations) + 1
+            })
+        return citations
+
+    def record_response(self, platform: str, body: str):
+        """
+        设置 SSE_RECORD_DIR 时把拦截到的响应体原样保存，作为 benchmarks 的回放素材
+        文件名：<platform>_<毫秒时间戳>.sse
+        """
+        record_dir = os.getenv("SSE_RECORD_DIR")
+        if not record_dir or not body:
+            return
+        try:
+            os.makedirs(record_dir, exist_ok=True)
+            path = os.path.join(record_dir, f"{platform}_{int(time.time() * 1000)}.sse")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(body)
+            self.logger.info(f"已录制响应: {path}")
+        except OSError as e:
+            self.logger.debug(f"录制响应失败: {e}")
+
+
+class BaseProvider(BrowserProviderMixin, ABC):
+    def __init__(self, headless: bool = False, timeout: int = 30000, block_resources: bool = None):
         self.headless = headless
         self.timeout = timeout
+        # 默认只在无头模式下拦截资源：有界面时需要手动扫码登录，登录页的二维码是图片
+        self.block_resources = headless if block_resources is None else block_resources
         self.logger = setup_logger(self.__class__.__name__)
+        # provider 由 providers/registry.py 缓存并被多个任务线程共用，计时器按线程保存
+        self._local = threading.local()
+
+    @property
+    def timer(self) -> StageTimer:
+        """当前线程最近一次 search 的计时器"""
+        timer = getattr(self._local, "timer", None)
+        if timer is None:
+            timer = self._local.timer = StageTimer()
+        return timer
 
     @abstractmethod
     def search(self, keyword: str, prompt: str) -> Dict[str, Any]:
@@ -19,3 +208,53 @@ class BaseProvider(ABC):
         }
         """
         pass
+
+    def start_timer(self) -> StageTimer:
+        """
+        search 开始时调用，重新计时并返回计时器
+        调用方在 search 返回或抛出异常后读取 self.timer.as_dict()，失败的搜索也能看到卡在哪个阶段
+        """
+        self._local.timer = StageTimer()
+        return self._local.timer
+
+    def install_request_filter(self, page):
+        """
+        在打开页面前注册路由，中止不需要的请求，减少页面加载时间和 CDP 事件
+        block_resources 为 False 时不注册（路由本身会让每个请求多一次往返）
+        """
+        if not self.block_resources:
+            return
+
+        def handle_route(route):
+            request = route.request
+            if self.should_block(request.resource_type, request.url):
+                route.abort()
+            else:
+                route.continue_()
+
+        page.route("**/*", handle_route)
+        self.logger.debug(f"已启用请求过滤: {', '.join(self.BLOCKED_RESOURCE_TYPES)}")
+
+    def extract_dom_citations(self, page, link_selectors, container_selectors=(), exclude_domains=(),
+                              cite_selector=None, seen_urls=(), start_index=0) -> List[Dict[str, Any]]:
+        """
+        接口未抓到引用时从页面 DOM 提取（一次 page.evaluate 完成遍历）
+
+        Args:
+            link_selectors: 候选链接选择器（按优先级，可命中链接内的引用标记元素）
+            container_selectors: 引用列表容器选择器，容器内的外链也收集（不取序号和上下文）
+            exclude_domains: 平台自身域名，URL 包含时跳过
+            cite_selector: 链接内引用序号元素的选择器
+            seen_urls: 已通过接口捕获的 URL
+            start_index: 页面上没有序号时，从 start_index + 1 开始顺序编号
+
+        Returns:
+            [{"url", "title", "snippet", "site_name", "cite_index"}]
+        """
+        items = page.evaluate(DOM_CITATIONS_JS, {
+            "linkSelectors": list(link_selectors),
+            "containerSelectors": list(container_selectors),
+            "excludeDomains": list(exclude_domains),
+            "citeSelector": cite_selector
+        })
+        return self.dom_items_to_citations(items, seen_urls, start_index)
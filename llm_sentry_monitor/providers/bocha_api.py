@@ -15,8 +15,9 @@ class BochaApiProvider(BaseProvider):
     API 端点: https://api.bocha.cn/v1/web-search
     """
     
-    def __init__(self, headless: bool = False, timeout: int = 30000):
-        super().__init__(headless=headless, timeout=timeout)
+    def __init__(self, headless: bool = False, timeout: int = 30000, block_resources: bool = None):
+        # block_resources 只对浏览器类 provider 有意义，接收它是为了和其他平台用同一种方式构造（providers/registry.py）
+        super().__init__(headless=headless, timeout=timeout, block_resources=block_resources)
         self.api_key = os.getenv("BOCHA_API_KEY")
         self.api_base_url = os.getenv("BOCHA_API_BASE_URL", "https://api.bocha.cn")
         
@@ -38,6 +39,7 @@ class BochaApiProvider(BaseProvider):
             raise ValueError("BOCHA_API_KEY 环境变量未设置，无法使用博查 API")
         
         self.logger.info(f"🔍 开始使用博查 API 搜索: {keyword}")
+        timer = self.start_timer()
         
         try:
             # 构建 API 请求
@@ -70,6 +72,7 @@ class BochaApiProvider(BaseProvider):
             
             response.raise_for_status()
             data = response.json()
+            timer.lap("api_request")
             
             self.logger.info(f"✅ 收到博查 API 响应")
             self.logger.debug(f"响应数据结构: {list(data.keys()) if isinstance(data, dict) else '非字典类型'}")
@@ -194,6 +197,7 @@ class BochaApiProvider(BaseProvider):
                 self.logger.info(f"   文本预览: {full_text[:100]}...")
             
             self.logger.info(f"{'='*60}\n")
+            timer.lap("postprocess")
             
             return {
                 "full_text": full_text,
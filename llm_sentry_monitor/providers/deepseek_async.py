@@ -0,0 +1,55 @@
+"""
+providers/deepseek_async.py - DeepSeek 异步 provider（多标签页并发，见 providers/async_base.py）
+解析逻辑与同步版 DeepSeekWebProvider 共用 parse_deepseek_sse / parse_deepseek_json，
+生成失败时与同步版一样点击刷新按钮重试（REFRESH_BUTTON_JS）
+"""
+from providers.async_base import AsyncBaseProvider
+from providers.deepseek_web import DeepSeekWebProvider, REFRESH_BUTTON_JS, parse_deepseek_sse, parse_deepseek_json
+
+
+class AsyncDeepSeekWebProvider(AsyncBaseProvider):
+    PLATFORM = "deepseek"
+    HOME_URL = "https://chat.deepseek.com/"
+    RESPONSE_URL_PATTERNS = DeepSeekWebProvider.RESPONSE_URL_PATTERNS
+    INPUT_SELECTORS = ("textarea",)
+    LOGIN_SELECTORS = ("text=登录",)
+    SEARCH_TOGGLE_LABELS = ("联网搜索",)
+    # DeepSeek 激活时为蓝色 #247fff
+    SEARCH_ACTIVE_COLORS = ("rgb(36, 127, 255)",)
+    ANSWER_SELECTORS = (".ds-markdown",)
+    DOM_LINK_SELECTORS = (
+        ".ds-markdown a[href^='http'] .ds-markdown-cite",
+        ".ds-markdown a[href^='http']",
+        "a[href^='http'] .ds-markdown-cite",
+        "a[href^='http']",
+        "[class*='citation'] a",
+        "[class*='reference'] a",
+        "[class*='source'] a",
+    )
+    DOM_CONTAINER_SELECTORS = (
+        "[class*='citation']",
+        "[class*='reference']",
+        "[class*='source']",
+        "[class*='link-list']",
+        "[class*='reference-list']"
+    )
+    EXCLUDE_DOMAINS = ("deepseek.com", "deepseek.ai")
+    CITE_SELECTOR = ".ds-markdown-cite"
+    # 正常结束的流以 finish / close 事件收尾，中断的流没有，继续等待（期间检查刷新按钮）
+    STREAM_END_MARKERS = ("event: finish", "event: close")
+
+    def parse_stream(self, body, captured_queries, captured_search_results):
+        return parse_deepseek_sse(body, captured_queries, captured_search_results, self.logger)
+
+    def parse_json(self, data, captured_queries, captured_search_results):
+        parse_deepseek_json(data, captured_queries, captured_search_results, self.logger)
+
+    async def retry_failed_answer(self, page):
+        """出现刷新按钮（生成失败）时点击重新生成"""
+        handle = await page.evaluate_handle(REFRESH_BUTTON_JS)
+        button = handle.as_element()
+        if button is None or not await button.is_visible():
+            return False
+        await button.click()
+        self.logger.info("🔄 已点击刷新按钮，等待重新生成...")
+        return True
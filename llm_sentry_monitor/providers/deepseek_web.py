@@ -2,14 +2,275 @@ import time
 import os
 import json
 import re
-from playwright.sync_api import sync_playwright
 from providers.base import BaseProvider
+from core.metrics import PROVIDER_RETRIES
 from core.parser import extract_domain
 from core.logger_config import setup_logger
 
+
+# DeepSeek 回答生成失败时消息中会出现刷新按钮：查找可见的刷新按钮，没有时返回 null（同步 / 异步 provider 共用）
+REFRESH_BUTTON_JS = r"""
+() => {
+    // 查找所有可能的刷新按钮
+    const buttons = document.querySelectorAll('div.ds-icon-button, div[role="button"].ds-icon-button');
+
+    for (const btn of buttons) {
+        // 检查是否在消息元素中
+        const inMessage = btn.closest('div.ds-message');
+        if (!inMessage) continue;
+
+        // 检查是否包含 SVG
+        const svg = btn.querySelector('svg');
+        if (!svg) continue;
+
+        // 检查 SVG 路径是否包含刷新图标的特征
+        const path = svg.querySelector('path');
+        if (!path) continue;
+
+        const pathData = path.getAttribute('d') || '';
+
+        // 检查路径是否包含刷新图标的特征（M1.27206 或类似的路径）
+        // 刷新图标的路径通常很长且包含特定的数值
+        if (pathData && (pathData.includes('M1.27206') || pathData.includes('1.27206') || pathData.length > 200)) {
+            // 进一步验证：检查是否可见
+            const style = window.getComputedStyle(btn);
+            if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
+                return btn;
+            }
+        }
+    }
+    return null;
+}
+"""
+
+
+def parse_deepseek_sse(body, captured_queries, captured_search_results, logger):
+    """
+    解析 DeepSeek 的 SSE 响应体（不依赖浏览器，可离线回放录制的响应）
+
+    拓展词和搜索结果追加到 captured_queries / captured_search_results，返回本次响应中的回答文本
+    """
+    full_response_text = ""
+    
+    # 正确解析 SSE 数据流
+    # SSE 格式：事件之间用空行分隔，一个事件可以有多行 data:
+    events = []
+    current_event_data = []
+    
+    for line in body.split('\n'):
+        line = line.rstrip('\r')  # 移除可能的 \r
+        
+        if line.startswith('data: '):
+            # 收集多行 data: 字段
+            data_content = line[6:]  # 去掉 "data: " 前缀
+            current_event_data.append(data_content)
+        elif line == '':
+            # 空行表示事件结束，合并所有 data: 行
+            if current_event_data:
+                # 多行 data: 应该用换行符连接
+                combined_data = '\n'.join(current_event_data)
+                events.append(combined_data)
+                current_event_data = []
+        elif line.startswith('event:') or line.startswith('id:') or line.startswith('retry:'):
+            # 忽略其他 SSE 字段（event, id, retry）
+            continue
+    
+    # 处理最后一个事件（如果没有以空行结尾）
+    if current_event_data:
+        combined_data = '\n'.join(current_event_data)
+        events.append(combined_data)
+    
+    logger.debug(f"[SSE解析] 共解析到 {len(events)} 个 SSE 事件")
+    
+    # 处理每个事件的数据
+    for event_data in events:
+        try:
+            json_str = event_data.strip()
+            if json_str and json_str != '[DONE]' and json_str != 'null':
+                data = json.loads(json_str)
+                
+                # 提取搜索结果和拓展词
+                if 'v' in data:
+                    # 情况1: 完整的 fragments 数据
+                    if isinstance(data['v'], dict):
+                        response_data = data['v'].get('response', {})
+                        fragments = response_data.get('fragments', [])
+                        for frag in fragments:
+                            if frag.get('type') == 'SEARCH':
+                                # 提取拓展词 (queries)
+                                queries = frag.get('queries', [])
+                                queries_before = len(captured_queries)
+                                for q in queries:
+                                    if isinstance(q, dict):
+                                        query_text = q.get('query', q.get('text', ''))
+                                    else:
+                                        query_text = str(q)
+                                    if query_text and query_text not in captured_queries:
+                                        captured_queries.append(query_text)
+                                        logger.info(f"[数据抓取] 查询词: {query_text}")
+                                
+                                if len(captured_queries) > queries_before:
+                                    logger.info(f"[数据抓取] 进度: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+                                
+                                # 提取搜索结果 (results)
+                                results = frag.get('results', [])
+                                results_before = len(captured_search_results)
+                                for r in results:
+                                    if isinstance(r, dict) and r.get('url'):
+                                        url = r.get('url', '')
+                                        domain = extract_domain(url)
+                                        captured_search_results.append({
+                                            "url": url,
+                                            "title": r.get('title', r.get('name', '')),
+                                            "snippet": r.get('snippet', r.get('description', '')),
+                                            "site_name": r.get('site_name', r.get('source', '')),
+                                            "cite_index": r.get('cite_index', r.get('index', 0)),
+                                            "query_indexes": r.get('query_indexes', [])
+                                        })
+                                        logger.info(f"[数据抓取] 网站: {url[:60]}... (域名: {domain})")
+                                
+                                if len(captured_search_results) > results_before:
+                                    logger.info(f"[数据抓取] 进度: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+                    
+                    # 情况2: 增量更新的 results 数组（关键修复）
+                    elif isinstance(data['v'], list):
+                        # 检查路径参数，确认是否是 results 更新
+                        path = data.get('p', '')
+                        
+                        # 处理增量更新的 results: {"p":"response/fragments/-1/results","v":[...]}
+                        if 'results' in path.lower() or (len(data['v']) > 0 and isinstance(data['v'][0], dict) and 'url' in data['v'][0]):
+                            results_before = len(captured_search_results)
+                            for r in data['v']:
+                                if isinstance(r, dict) and r.get('url'):
+                                    url = r.get('url', '')
+                                    domain = extract_domain(url)
+                                    captured_search_results.append({
+                                        "url": url,
+                                        "title": r.get('title', r.get('name', '')),
+                                        "snippet": r.get('snippet', r.get('description', '')),
+                                        "site_name": r.get('site_name', r.get('source', '')),
+                                        "cite_index": r.get('cite_index', r.get('index', 0)),
+                                        "query_indexes": r.get('query_indexes', [])
+                                    })
+                                    logger.info(f"从 API 增量更新捕获网站: {url[:60]}... (域名: {domain}, cite_index: {r.get('cite_index', 0)})")
+                            
+                            if len(captured_search_results) > results_before:
+                                logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+                        
+                        # 处理增量更新的 queries: {"p":"response/fragments/-1/queries","v":[...]}
+                        elif 'queries' in path.lower() or (len(data['v']) > 0 and not isinstance(data['v'][0], dict)):
+                            queries_before = len(captured_queries)
+                            for q in data['v']:
+                                if isinstance(q, dict):
+                                    query_text = q.get('query', q.get('text', ''))
+                                else:
+                                    query_text = str(q)
+                                if query_text and query_text not in captured_queries:
+                                    captured_queries.append(query_text)
+                                    logger.info(f"从 API 增量更新捕获查询: \"{query_text}\"")
+                            
+                            if len(captured_queries) > queries_before:
+                                logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+                
+                # 尝试其他可能的数据结构
+                # 直接包含 results 或 queries
+                if 'results' in data and isinstance(data['results'], list):
+                    results_before = len(captured_search_results)
+                    for r in data['results']:
+                        if isinstance(r, dict) and r.get('url'):
+                            url = r.get('url', '')
+                            domain = extract_domain(url)
+                            captured_search_results.append({
+                                "url": url,
+                                "title": r.get('title', r.get('name', '')),
+                                "snippet": r.get('snippet', r.get('description', '')),
+                                "site_name": r.get('site_name', r.get('source', '')),
+                                "cite_index": r.get('cite_index', r.get('index', 0)),
+                                "query_indexes": r.get('query_indexes', [])
+                            })
+                            logger.info(f"从 SSE (results字段) 提取到网站: {url[:60]}... (域名: {domain})")
+                    
+                    if len(captured_search_results) > results_before:
+                        logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+                
+                if 'queries' in data and isinstance(data['queries'], list):
+                    queries_before = len(captured_queries)
+                    for q in data['queries']:
+                        if isinstance(q, dict):
+                            query_text = q.get('query', q.get('text', ''))
+                        else:
+                            query_text = str(q)
+                        if query_text and query_text not in captured_queries:
+                            captured_queries.append(query_text)
+                            logger.info(f"从 SSE (queries字段) 提取到查询: \"{query_text}\"")
+                    
+                    if len(captured_queries) > queries_before:
+                        logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+                
+                # 提取回答内容
+                if 'content' in data:
+                    content = data.get('content', '')
+                    if isinstance(content, str) and content:
+                        full_response_text += content
+                elif 'delta' in data and 'content' in data.get('delta', {}):
+                    content = data['delta'].get('content', '')
+                    if isinstance(content, str) and content:
+                        full_response_text += content
+                        
+        except json.JSONDecodeError as e:
+            logger.debug(f"JSON 解析失败: {e}")
+            continue
+    
+    return full_response_text
+
+
+def parse_deepseek_json(data, captured_queries, captured_search_results, logger):
+    """解析 DeepSeek 的普通 JSON 响应，拓展词和搜索结果追加到传入的列表"""
+    # 提取搜索相关信息
+    if 'search' in data:
+        search_data = data['search']
+        if 'queries' in search_data:
+            queries = search_data['queries']
+            queries_before = len(captured_queries)
+            if isinstance(queries, list):
+                for q in queries:
+                    query_text = q if isinstance(q, str) else q.get('query', '')
+                    if query_text and query_text not in captured_queries:
+                        captured_queries.append(query_text)
+                        logger.info(f"从 JSON 响应提取到查询: \"{query_text}\"")
+            
+            if len(captured_queries) > queries_before:
+                logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+        
+        if 'results' in search_data:
+            results_before = len(captured_search_results)
+            for r in search_data['results']:
+                if isinstance(r, dict) and r.get('url'):
+                    url = r.get('url', '')
+                    domain = extract_domain(url)
+                    captured_search_results.append({
+                        "url": url,
+                        "title": r.get('title', ''),
+                        "snippet": r.get('snippet', ''),
+                        "site_name": r.get('site_name', r.get('source', '')),
+                        "cite_index": r.get('cite_index', r.get('index', 0)),
+                        "query_indexes": r.get('query_indexes', [])
+                    })
+                    logger.info(f"从 JSON 响应提取到网站: {url[:60]}... (域名: {domain})")
+            
+            if len(captured_search_results) > results_before:
+                logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
+
+
 class DeepSeekWebProvider(BaseProvider):
+    PLATFORM = "deepseek"
+    RESPONSE_URL_PATTERNS = ("api/v0/chat/completion", "api/v1/chat/completion")
+
     def search(self, keyword: str, prompt: str):
-        user_data_dir = os.path.join(os.getenv("BROWSER_DATA_DIR", "./browser_data"), "deepseek")
+        user_data_dir = self.user_data_dir
+        timer = self.start_timer()
+        # 无头模式下会话已失效时直接失败，不启动浏览器
+        self.ensure_session()
         
         # 用于存储拦截到的搜索结果
         captured_search_results = []
@@ -20,242 +281,40 @@ class DeepSeekWebProvider(BaseProvider):
             """拦截 API 响应，提取搜索结果和拓展词"""
             nonlocal captured_search_results, captured_queries, full_response_text
             
+            # 图片、脚本、统计上报等响应直接跳过，只解析对话接口
+            if not self.is_api_response(response):
+                return
             url_lower = response.url.lower()
-            # 扩展API端点匹配模式
-            api_patterns = [
-                "api/v0/chat/completion",
-                "api/v1/chat/completion"
-            ]
-            self.logger.info(f"[网络拦截] 响应URL: {response.url}")
-            if any(pattern in url_lower for pattern in api_patterns):
-                matched_pattern = next((p for p in api_patterns if p in url_lower), "unknown")
-                self.logger.info(f"[网络拦截] API端点匹配: {matched_pattern}")
-                try:
-                    content_type = response.headers.get("content-type", "")
-                    
-                    # 处理 SSE 流
-                    if "text/event-stream" in content_type or "stream" in url_lower:
-                        try:
-                            body = response.text()
-                            self.logger.info(f"[网络拦截] SSE流式响应，开始解析数据")
-                            
-                            # 正确解析 SSE 数据流
-                            # SSE 格式：事件之间用空行分隔，一个事件可以有多行 data:
-                            events = []
-                            current_event_data = []
-                            
-                            for line in body.split('\n'):
-                                line = line.rstrip('\r')  # 移除可能的 \r
-                                
-                                if line.startswith('data: '):
-                                    # 收集多行 data: 字段
-                                    data_content = line[6:]  # 去掉 "data: " 前缀
-                                    current_event_data.append(data_content)
-                                elif line == '':
-                                    # 空行表示事件结束，合并所有 data: 行
-                                    if current_event_data:
-                                        # 多行 data: 应该用换行符连接
-                                        combined_data = '\n'.join(current_event_data)
-                                        events.append(combined_data)
-                                        current_event_data = []
-                                elif line.startswith('event:') or line.startswith('id:') or line.startswith('retry:'):
-                                    # 忽略其他 SSE 字段（event, id, retry）
-                                    continue
-                            
-                            # 处理最后一个事件（如果没有以空行结尾）
-                            if current_event_data:
-                                combined_data = '\n'.join(current_event_data)
-                                events.append(combined_data)
-                            
-                            self.logger.debug(f"[SSE解析] 共解析到 {len(events)} 个 SSE 事件")
-                            
-                            # 处理每个事件的数据
-                            for event_data in events:
-                                try:
-                                    json_str = event_data.strip()
-                                    if json_str and json_str != '[DONE]' and json_str != 'null':
-                                        data = json.loads(json_str)
-                                        
-                                        # 提取搜索结果和拓展词
-                                        if 'v' in data:
-                                            # 情况1: 完整的 fragments 数据
-                                            if isinstance(data['v'], dict):
-                                                response_data = data['v'].get('response', {})
-                                                fragments = response_data.get('fragments', [])
-                                                for frag in fragments:
-                                                    if frag.get('type') == 'SEARCH':
-                                                        # 提取拓展词 (queries)
-                                                        queries = frag.get('queries', [])
-                                                        queries_before = len(captured_queries)
-                                                        for q in queries:
-                                                            if isinstance(q, dict):
-                                                                query_text = q.get('query', q.get('text', ''))
-                                                            else:
-                                                                query_text = str(q)
-                                                            if query_text and query_text not in captured_queries:
-                                                                captured_queries.append(query_text)
-                                                                self.logger.info(f"[数据抓取] 查询词: {query_text}")
-                                                        
-                                                        if len(captured_queries) > queries_before:
-                                                            self.logger.info(f"[数据抓取] 进度: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                                        
-                                                        # 提取搜索结果 (results)
-                                                        results = frag.get('results', [])
-                                                        results_before = len(captured_search_results)
-                                                        for r in results:
-                                                            if isinstance(r, dict) and r.get('url'):
-                                                                url = r.get('url', '')
-                                                                domain = extract_domain(url)
-                                                                captured_search_results.append({
-                                                                    "url": url,
-                                                                    "title": r.get('title', r.get('name', '')),
-                                                                    "snippet": r.get('snippet', r.get('description', '')),
-                                                                    "site_name": r.get('site_name', r.get('source', '')),
-                                                                    "cite_index": r.get('cite_index', r.get('index', 0)),
-                                                                    "query_indexes": r.get('query_indexes', [])
-                                                                })
-                                                                self.logger.info(f"[数据抓取] 网站: {url[:60]}... (域名: {domain})")
-                                                        
-                                                        if len(captured_search_results) > results_before:
-                                                            self.logger.info(f"[数据抓取] 进度: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                            
-                                            # 情况2: 增量更新的 results 数组（关键修复）
-                                            elif isinstance(data['v'], list):
-                                                # 检查路径参数，确认是否是 results 更新
-                                                path = data.get('p', '')
-                                                
-                                                # 处理增量更新的 results: {"p":"response/fragments/-1/results","v":[...]}
-                                                if 'results' in path.lower() or (len(data['v']) > 0 and isinstance(data['v'][0], dict) and 'url' in data['v'][0]):
-                                                    results_before = len(captured_search_results)
-                                                    for r in data['v']:
-                                                        if isinstance(r, dict) and r.get('url'):
-                                                            url = r.get('url', '')
-                                                            domain = extract_domain(url)
-                                                            captured_search_results.append({
-                                                                "url": url,
-                                                                "title": r.get('title', r.get('name', '')),
-                                                                "snippet": r.get('snippet', r.get('description', '')),
-                                                                "site_name": r.get('site_name', r.get('source', '')),
-                                                                "cite_index": r.get('cite_index', r.get('index', 0)),
-                                                                "query_indexes": r.get('query_indexes', [])
-                                                            })
-                                                            self.logger.info(f"从 API 增量更新捕获网站: {url[:60]}... (域名: {domain}, cite_index: {r.get('cite_index', 0)})")
-                                                    
-                                                    if len(captured_search_results) > results_before:
-                                                        self.logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                                
-                                                # 处理增量更新的 queries: {"p":"response/fragments/-1/queries","v":[...]}
-                                                elif 'queries' in path.lower() or (len(data['v']) > 0 and not isinstance(data['v'][0], dict)):
-                                                    queries_before = len(captured_queries)
-                                                    for q in data['v']:
-                                                        if isinstance(q, dict):
-                                                            query_text = q.get('query', q.get('text', ''))
-                                                        else:
-                                                            query_text = str(q)
-                                                        if query_text and query_text not in captured_queries:
-                                                            captured_queries.append(query_text)
-                                                            self.logger.info(f"从 API 增量更新捕获查询: \"{query_text}\"")
-                                                    
-                                                    if len(captured_queries) > queries_before:
-                                                        self.logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                        
-                                        # 尝试其他可能的数据结构
-                                        # 直接包含 results 或 queries
-                                        if 'results' in data and isinstance(data['results'], list):
-                                            results_before = len(captured_search_results)
-                                            for r in data['results']:
-                                                if isinstance(r, dict) and r.get('url'):
-                                                    url = r.get('url', '')
-                                                    domain = extract_domain(url)
-                                                    captured_search_results.append({
-                                                        "url": url,
-                                                        "title": r.get('title', r.get('name', '')),
-                                                        "snippet": r.get('snippet', r.get('description', '')),
-                                                        "site_name": r.get('site_name', r.get('source', '')),
-                                                        "cite_index": r.get('cite_index', r.get('index', 0)),
-                                                        "query_indexes": r.get('query_indexes', [])
-                                                    })
-                                                    self.logger.info(f"从 SSE (results字段) 提取到网站: {url[:60]}... (域名: {domain})")
-                                            
-                                            if len(captured_search_results) > results_before:
-                                                self.logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                        
-                                        if 'queries' in data and isinstance(data['queries'], list):
-                                            queries_before = len(captured_queries)
-                                            for q in data['queries']:
-                                                if isinstance(q, dict):
-                                                    query_text = q.get('query', q.get('text', ''))
-                                                else:
-                                                    query_text = str(q)
-                                                if query_text and query_text not in captured_queries:
-                                                    captured_queries.append(query_text)
-                                                    self.logger.info(f"从 SSE (queries字段) 提取到查询: \"{query_text}\"")
-                                            
-                                            if len(captured_queries) > queries_before:
-                                                self.logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                        
-                                        # 提取回答内容
-                                        if 'content' in data:
-                                            content = data.get('content', '')
-                                            if isinstance(content, str) and content:
-                                                full_response_text += content
-                                        elif 'delta' in data and 'content' in data.get('delta', {}):
-                                            content = data['delta'].get('content', '')
-                                            if isinstance(content, str) and content:
-                                                full_response_text += content
-                                                
-                                except json.JSONDecodeError as e:
-                                    self.logger.debug(f"JSON 解析失败: {e}")
-                                    continue
-                        except Exception as e:
-                            self.logger.debug(f"解析 SSE 响应失败: {e}")
-                    
-                    # 处理普通 JSON 响应
-                    elif "application/json" in content_type:
-                        try:
-                            data = response.json()
-                            self.logger.debug(f"拦截到 JSON 响应: {response.url[:100]}")
-                            
-                            # 提取搜索相关信息
-                            if 'search' in data:
-                                search_data = data['search']
-                                if 'queries' in search_data:
-                                    queries = search_data['queries']
-                                    queries_before = len(captured_queries)
-                                    if isinstance(queries, list):
-                                        for q in queries:
-                                            query_text = q if isinstance(q, str) else q.get('query', '')
-                                            if query_text and query_text not in captured_queries:
-                                                captured_queries.append(query_text)
-                                                self.logger.info(f"从 JSON 响应提取到查询: \"{query_text}\"")
-                                    
-                                    if len(captured_queries) > queries_before:
-                                        self.logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                                
-                                if 'results' in search_data:
-                                    results_before = len(captured_search_results)
-                                    for r in search_data['results']:
-                                        if isinstance(r, dict) and r.get('url'):
-                                            url = r.get('url', '')
-                                            domain = extract_domain(url)
-                                            captured_search_results.append({
-                                                "url": url,
-                                                "title": r.get('title', ''),
-                                                "snippet": r.get('snippet', ''),
-                                                "site_name": r.get('site_name', r.get('source', '')),
-                                                "cite_index": r.get('cite_index', r.get('index', 0)),
-                                                "query_indexes": r.get('query_indexes', [])
-                                            })
-                                            self.logger.info(f"从 JSON 响应提取到网站: {url[:60]}... (域名: {domain})")
-                                    
-                                    if len(captured_search_results) > results_before:
-                                        self.logger.info(f"当前已捕获: {len(captured_queries)} 个查询, {len(captured_search_results)} 个网站")
-                        except Exception as e:
-                            self.logger.debug(f"解析 JSON 响应失败: {e}")
-                            
-                except Exception as e:
-                    self.logger.debug(f"拦截响应失败: {e}")
+            self.logger.info(f"[网络拦截] API端点匹配: {response.url}")
+            try:
+                content_type = response.headers.get("content-type", "")
+                
+                # 处理 SSE 流
+                if "text/event-stream" in content_type or "stream" in url_lower:
+                    try:
+                        body = response.text()
+                        self.logger.info(f"[网络拦截] SSE流式响应，开始解析数据")
+                        
+                        self.record_response("deepseek", body)
+                        full_response_text += parse_deepseek_sse(body, captured_queries, captured_search_results, self.logger)
+                    except Exception as e:
+                        self.logger.debug(f"解析 SSE 响应失败: {e}")
+                
+                # 处理普通 JSON 响应
+                elif "application/json" in content_type:
+                    try:
+                        data = response.json()
+                        self.logger.debug(f"拦截到 JSON 响应: {response.url[:100]}")
+                        
+                        parse_deepseek_json(data, captured_queries, captured_search_results, self.logger)
+                    except Exception as e:
+                        self.logger.debug(f"解析 JSON 响应失败: {e}")
+                        
+            except Exception as e:
+                self.logger.debug(f"拦截响应失败: {e}")
         
+        # 解析函数（parse_*_sse）不依赖浏览器，playwright 在真正搜索时才导入
+        from playwright.sync_api import sync_playwright
         with sync_playwright() as p:
             browser = p.chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -264,23 +323,30 @@ class DeepSeekWebProvider(BaseProvider):
             )
             
             try:
+                timer.lap("browser_launch")
                 page = browser.pages[0] if browser.pages else browser.new_page()
                 page.set_default_timeout(self.timeout)
                 
-                # 注册响应拦截器
+                # 注册请求过滤和响应拦截器
+                self.install_request_filter(page)
                 page.on("response", handle_response)
                 
                 self.logger.info("正在打开 DeepSeek 首页...")
                 page.goto("https://chat.deepseek.com/")
+                timer.lap("page_load")
                 
-                # 检查是否需要登录
-                time.sleep(2)
-                if "login" in page.url or page.query_selector("text=登录"):
-                    self.logger.warning("检测到可能需要登录，请在浏览器窗口中完成登录...")
-                    try:
-                        page.wait_for_url("**/chat.deepseek.com/**", timeout=120000)
-                    except:
-                        self.logger.error("登录超时，请确保已手动登录并保存状态。")
+                # 检查是否需要登录（会话在 TTL 内确认有效时跳过，无头模式下未登录直接失败）
+                if self.needs_login_probe():
+                    time.sleep(2)
+                    needs_login = "login" in page.url or page.query_selector("text=登录")
+                    self.on_login_detected(not needs_login)
+                    if needs_login:
+                        self.logger.warning("检测到可能需要登录，请在浏览器窗口中完成登录...")
+                        try:
+                            page.wait_for_url("**/chat.deepseek.com/**", timeout=120000)
+                        except:
+                            self.logger.error("登录超时，请确保已手动登录并保存状态。")
+                timer.lap("login_check")
                 
                 # 1. 等待输入框加载并输入
                 page.wait_for_selector("textarea", timeout=self.timeout)
@@ -289,6 +355,7 @@ class DeepSeekWebProvider(BaseProvider):
                 page.fill("textarea", prompt)
                 self.logger.info(f"已输入提问: {prompt[:50]}...")
                 time.sleep(1)
+                timer.lap("input")
                 
                 # 2. 开启"联网搜索" - 智能判断状态
                 try:
@@ -389,6 +456,7 @@ class DeepSeekWebProvider(BaseProvider):
                         self.logger.warning("⚠️ 未找到'联网搜索'按钮，可能页面结构已变更或按钮已默认开启")
                 except Exception as e:
                     self.logger.warning(f"处理联网搜索开关失败: {e}，继续执行（可能按钮已默认开启）")
+                timer.lap("search_toggle")
                 
                 # 3. 点击发送按钮
                 try:
@@ -418,6 +486,7 @@ class DeepSeekWebProvider(BaseProvider):
                 except Exception as e:
                     self.logger.warning(f"点击发送按钮失败: {e}")
                     page.keyboard.press("Control+Enter")
+                timer.lap("send")
                 
                 self.logger.info("已发送提问，等待 AI 回答...")
                 
@@ -444,39 +513,7 @@ class DeepSeekWebProvider(BaseProvider):
                         refresh_button = None
                         # 使用 JavaScript 查找刷新按钮，更可靠
                         try:
-                            refresh_button = page.evaluate_handle("""
-                                () => {
-                                    // 查找所有可能的刷新按钮
-                                    const buttons = document.querySelectorAll('div.ds-icon-button, div[role="button"].ds-icon-button');
-                                    
-                                    for (const btn of buttons) {
-                                        // 检查是否在消息元素中
-                                        const inMessage = btn.closest('div.ds-message');
-                                        if (!inMessage) continue;
-                                        
-                                        // 检查是否包含 SVG
-                                        const svg = btn.querySelector('svg');
-                                        if (!svg) continue;
-                                        
-                                        // 检查 SVG 路径是否包含刷新图标的特征
-                                        const path = svg.querySelector('path');
-                                        if (!path) continue;
-                                        
-                                        const pathData = path.getAttribute('d') || '';
-                                        
-                                        // 检查路径是否包含刷新图标的特征（M1.27206 或类似的路径）
-                                        // 刷新图标的路径通常很长且包含特定的数值
-                                        if (pathData && (pathData.includes('M1.27206') || pathData.includes('1.27206') || pathData.length > 200)) {
-                                            // 进一步验证：检查是否可见
-                                            const style = window.getComputedStyle(btn);
-                                            if (style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0') {
-                                                return btn;
-                                            }
-                                        }
-                                    }
-                                    return null;
-                                }
-                            """)
+                            refresh_button = page.evaluate_handle(REFRESH_BUTTON_JS)
                             
                             # 如果找到了按钮，检查是否真的存在
                             if refresh_button and refresh_button.as_element():
@@ -498,6 +535,7 @@ class DeepSeekWebProvider(BaseProvider):
                         # 如果检测到刷新按钮，说明失败了，需要重试
                         if refresh_button:
                             retry_count += 1
+                            PROVIDER_RETRIES.labels("deepseek").inc()
                             self.logger.warning(f"⚠️ 检测到失败状态（刷新按钮出现），开始第 {retry_count}/{max_retry_attempts} 次重试...")
                             
                             if retry_count > max_retry_attempts:
@@ -552,6 +590,7 @@ class DeepSeekWebProvider(BaseProvider):
                         if "重试次数已达上限" in str(e) or "无法点击刷新按钮" in str(e):
                             raise
                         continue
+                timer.lap("generation")
                 
                 # 5. 数据已从网络接口抓取完成，优先使用接口数据
                 if len(captured_search_results) == 0:
@@ -561,229 +600,41 @@ class DeepSeekWebProvider(BaseProvider):
                     self.logger.info(f"已通过 API 接口抓取到 {len(captured_search_results)} 个引用")
                     api_captured_urls = {r.get('url', '') for r in captured_search_results if r.get('url')}
                 
-                # 如果接口没有抓取到数据，尝试从 DOM 提取作为最后手段
+                # 如果接口没有抓取到数据，尝试从 DOM 提取作为最后手段（一次 page.evaluate 在页面内完成遍历）
                 if len(captured_search_results) == 0:
                     try:
-                        # 尝试多种方式提取引用链接
-                        # DeepSeek 使用 ds-markdown-cite 类标记引用
-                        # 优先提取带引用标记的链接
+                        # DeepSeek 使用 ds-markdown-cite 类标记引用，优先提取带引用标记的链接
                         link_selectors = [
                             ".ds-markdown a[href^='http'] .ds-markdown-cite",  # 优先：带引用标记的链接
-                            ".ds-markdown a[href^='https'] .ds-markdown-cite",
                             ".ds-markdown a[href^='http']",  # markdown 内容中的所有链接
-                            ".ds-markdown a[href^='https']",
                             "a[href^='http'] .ds-markdown-cite",  # 所有带引用标记的链接
-                            "a[href^='https'] .ds-markdown-cite",
                             "a[href^='http']",  # 所有外部链接
-                            "a[href^='https']",
                             "[class*='citation'] a",  # 引用相关的链接
                             "[class*='reference'] a",
                             "[class*='source'] a",  # 来源相关的链接
                         ]
+                        # DeepSeek 可能在底部或侧边显示引用列表
+                        citation_containers = [
+                            "[class*='citation']",
+                            "[class*='reference']",
+                            "[class*='source']",
+                            "[class*='link-list']",
+                            "[class*='reference-list']"
+                        ]
                         
-                        seen_dom_urls = set(api_captured_urls)  # 从 API 已捕获的 URL 开始
-                        dom_extracted_count = 0
-                        
-                        for selector in link_selectors:
-                            try:
-                                links = page.query_selector_all(selector)
-                                self.logger.debug(f"选择器 '{selector}' 找到 {len(links)} 个链接")
-                                
-                                for link in links:
-                                    try:
-                                        # 如果选择器匹配的是 .ds-markdown-cite，需要找到父链接
-                                        link_tag = link.evaluate("el => el.tagName.toLowerCase()")
-                                        link_class = link.get_attribute("class") or ""
-                                        
-                                        if link_tag == 'span' or 'ds-markdown-cite' in link_class:
-                                            # 找到父级 a 标签
-                                            try:
-                                                parent_a = link.evaluate_handle("el => el.closest('a')")
-                                                if parent_a:
-                                                    link = parent_a
-                                                else:
-                                                    # 如果找不到父 a，跳过这个元素
-                                                    continue
-                                            except:
-                                                continue
-                                        
-                                        href = link.get_attribute("href")
-                                        if not href:
-                                            continue
-                                        
-                                        # 过滤掉 DeepSeek 自己的域名
-                                        if any(d in href.lower() for d in ["deepseek.com", "deepseek.ai"]):
-                                            continue
-                                        
-                                        # 去重
-                                        if href in seen_dom_urls:
-                                            continue
-                                        seen_dom_urls.add(href)
-                                        
-                                        # 提取引用序号（关键修复：从 ds-markdown-cite 中提取）
-                                        cite_index = 0
-                                        try:
-                                            # 查找链接内的 ds-markdown-cite 元素
-                                            cite_element = link.query_selector(".ds-markdown-cite")
-                                            if cite_element:
-                                                # 从 cite 元素中提取序号
-                                                cite_text = cite_element.inner_text().strip()
-                                                # 尝试从文本中提取数字（如 "1", "2"）
-                                                import re
-                                                match = re.search(r'\d+', cite_text)
-                                                if match:
-                                                    cite_index = int(match.group())
-                                                else:
-                                                    # 尝试从 span 的绝对定位元素中提取
-                                                    cite_number = cite_element.evaluate("""
-                                                        el => {
-                                                            let spans = el.querySelectorAll('span');
-                                                            for (let span of spans) {
-                                                                let text = span.textContent.trim();
-                                                                let num = parseInt(text);
-                                                                if (!isNaN(num) && num > 0) {
-                                                                    return num;
-                                                                }
-                                                            }
-                                                            return 0;
-                                                        }
-                                                    """)
-                                                    cite_index = cite_number or 0
-                                        except Exception as e:
-                                            self.logger.debug(f"提取引用序号失败: {e}")
-                                        
-                                        # 如果没有找到序号，尝试从链接周围的文本中提取
-                                        if cite_index == 0:
-                                            try:
-                                                # 查找链接前的引用标记
-                                                prev_text = link.evaluate("""
-                                                    el => {
-                                                        let text = el.textContent || '';
-                                                        let match = text.match(/\\[(\\d+)\\]/);
-                                                        if (match) return parseInt(match[1]);
-                                                        
-                                                        // 查找父元素中的引用标记
-                                                        let parent = el.parentElement;
-                                                        if (parent) {
-                                                            let parentText = parent.textContent || '';
-                                                            let parentMatch = parentText.match(/\\[(\\d+)\\]/);
-                                                            if (parentMatch) return parseInt(parentMatch[1]);
-                                                        }
-                                                        return 0;
-                                                    }
-                                                """)
-                                                cite_index = prev_text or 0
-                                            except:
-                                                pass
-                                        
-                                        # 如果还是没有找到序号，使用当前计数
-                                        if cite_index == 0:
-                                            cite_index = len(captured_search_results) + 1
-                                        
-                                        # 提取标题
-                                        title = link.inner_text().strip()
-                                        # 移除引用标记（如 [1]）从标题中
-                                        import re
-                                        title = re.sub(r'\[\d+\]', '', title).strip()
-                                        
-                                        if not title:
-                                            # 尝试从父元素或附近元素获取
-                                            try:
-                                                parent_text = link.evaluate("""
-                                                    el => {
-                                                        let parent = el.parentElement;
-                                                        if (parent) {
-                                                            let text = parent.textContent || '';
-                                                            // 移除引用标记
-                                                            text = text.replace(/\\[\\d+\\]/g, '').trim();
-                                                            return text.substring(0, 100);
-                                                        }
-                                                        return '';
-                                                    }
-                                                """)
-                                                title = parent_text
-                                            except:
-                                                pass
-                                        
-                                        # 提取摘要（尝试从附近元素）
-                                        snippet = ""
-                                        try:
-                                            sibling_text = link.evaluate("""
-                                                el => {
-                                                    let next = el.nextElementSibling;
-                                                    if (next && next.textContent) {
-                                                        return next.textContent.trim().substring(0, 200);
-                                                    }
-                                                    let parent = el.parentElement;
-                                                    if (parent && parent.nextElementSibling) {
-                                                        return parent.nextElementSibling.textContent.trim().substring(0, 200);
-                                                    }
-                                                    return '';
-                                                }
-                                            """)
-                                            snippet = sibling_text
-                                        except:
-                                            pass
-                                        
-                                        captured_search_results.append({
-                                            "url": href,
-                                            "title": title or extract_domain(href),
-                                            "snippet": snippet,
-                                            "site_name": extract_domain(href),
-                                            "cite_index": cite_index
-                                        })
-                                        dom_extracted_count += 1
-                                        self.logger.debug(f"从 DOM 捕获引用: {href[:50]}... (cite_index: {cite_index})")
-                                    except Exception as e:
-                                        self.logger.debug(f"提取链接失败: {e}")
-                                        continue
-                            except Exception as e:
-                                self.logger.debug(f"选择器 '{selector}' 执行失败: {e}")
-                                continue
-                    
-                        self.logger.info(f"从 DOM 提取到 {dom_extracted_count} 个新引用链接（API 已捕获 {len(api_captured_urls)} 个）")
-                        
-                        # 尝试查找引用列表区域（DeepSeek 可能在底部或侧边显示引用列表）
-                        try:
-                            # 查找可能的引用列表容器
-                            citation_containers = [
-                                "[class*='citation']",
-                                "[class*='reference']",
-                                "[class*='source']",
-                                "[class*='link-list']",
-                                "[class*='reference-list']"
-                            ]
-                            
-                            for container_selector in citation_containers:
-                                try:
-                                    containers = page.query_selector_all(container_selector)
-                                    if containers:
-                                        self.logger.debug(f"找到 {len(containers)} 个可能的引用容器: {container_selector}")
-                                        for container in containers:
-                                            # 在容器内查找链接
-                                            container_links = container.query_selector_all("a[href^='http']")
-                                            for link in container_links:
-                                                try:
-                                                    href = link.get_attribute("href")
-                                                    if href and href not in seen_dom_urls:
-                                                        seen_dom_urls.add(href)
-                                                        title = link.inner_text().strip() or extract_domain(href)
-                                                        captured_search_results.append({
-                                                            "url": href,
-                                                            "title": title,
-                                                            "snippet": "",
-                                                            "site_name": extract_domain(href),
-                                                            "cite_index": len(captured_search_results) + 1
-                                                        })
-                                                        dom_extracted_count += 1
-                                                except:
-                                                    continue
-                                except:
-                                    continue
-                        except Exception as e:
-                            self.logger.debug(f"查找引用列表容器失败: {e}")
+                        dom_citations = self.extract_dom_citations(
+                            page,
+                            link_selectors,
+                            container_selectors=citation_containers,
+                            exclude_domains=["deepseek.com", "deepseek.ai"],  # 过滤掉 DeepSeek 自己的域名
+                            cite_selector=".ds-markdown-cite",
+                            seen_urls=api_captured_urls
+                        )
+                        captured_search_results.extend(dom_citations)
+                        self.logger.info(f"从 DOM 提取到 {len(dom_citations)} 个新引用链接（API 已捕获 {len(api_captured_urls)} 个）")
                     except Exception as e:
                         self.logger.warning(f"从 DOM 提取引用失败: {e}")
+                timer.lap("dom_extract")
                 
                 # 6. 整理搜索结果（去重）
                 seen_urls = set()
@@ -872,6 +723,7 @@ class DeepSeekWebProvider(BaseProvider):
                     self.logger.info("   1. 检查页面中是否确实显示了引用链接")
                     self.logger.info("   2. 查看浏览器开发者工具的 Network 标签，找到 API 响应")
                     self.logger.info("   3. 检查页面 HTML 中引用链接的实际结构")
+                timer.lap("postprocess")
                 
                 return {
                     "full_text": full_response_text or last_content,
@@ -880,3 +732,4 @@ class DeepSeekWebProvider(BaseProvider):
                 }
             finally:
                 browser.close()
+                timer.lap("browser_close")
@@ -0,0 +1,55 @@
+"""
+providers/doubao_async.py - 豆包异步 provider（多标签页并发，见 providers/async_base.py）
+解析逻辑与同步版 DoubaoWebProvider 共用 parse_doubao_sse / parse_doubao_json
+"""
+from providers.async_base import AsyncBaseProvider
+from providers.doubao_web import DoubaoWebProvider, parse_doubao_sse, parse_doubao_json
+from core.encoding import ensure_utf8_string
+
+
+class AsyncDoubaoWebProvider(AsyncBaseProvider):
+    PLATFORM = "doubao"
+    HOME_URL = "https://www.doubao.com/"
+    RESPONSE_URL_PATTERNS = DoubaoWebProvider.RESPONSE_URL_PATTERNS
+    BLOCKED_URL_PATTERNS = DoubaoWebProvider.BLOCKED_URL_PATTERNS
+    STREAM_URL_PATTERNS = ("stream", "/chat/completion")
+    INPUT_SELECTORS = (
+        "textarea",
+        "textarea[placeholder*='输入']",
+        "textarea[placeholder*='提问']",
+        "[contenteditable='true']",
+        ".input-area textarea"
+    )
+    LOGIN_SELECTORS = ("text=登录", "text=立即登录")
+    SEARCH_TOGGLE_LABELS = ("联网搜索", "深度搜索")
+    ANSWER_SELECTORS = (
+        "article",
+        ".message-content",
+        "[class*='answer']",
+        "[class*='response']",
+        ".chat-message"
+    )
+    DOM_LINK_SELECTORS = (
+        "a[href^='http']",
+        "[class*='citation'] a",
+        "[class*='reference'] a",
+        "[class*='link'] a"
+    )
+    EXCLUDE_DOMAINS = ("doubao.com", "bytecheck.com", "volcengine.com", "bytedance.com")
+
+    def parse_stream(self, body, captured_queries, captured_search_results):
+        return parse_doubao_sse(body, captured_queries, captured_search_results, self.logger)
+
+    def parse_json(self, data, captured_queries, captured_search_results):
+        parse_doubao_json(data, captured_queries, captured_search_results, self.logger)
+
+    def build_result(self, full_text, queries, search_results):
+        """与同步版一样确保所有文本字段都是正确的 UTF-8 编码"""
+        result = super().build_result(full_text, queries, search_results)
+        for cite in result["citations"]:
+            for field in ("url", "title", "snippet", "site_name"):
+                cite[field] = ensure_utf8_string(cite[field], self.logger)
+            cite.pop("query_indexes", None)
+        result["full_text"] = ensure_utf8_string(result["full_text"], self.logger)
+        result["queries"] = [ensure_utf8_string(q, self.logger) for q in result["queries"]]
+        return result
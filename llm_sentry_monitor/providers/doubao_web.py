@@ -2,128 +2,279 @@ import time
 import os
 import json
 import re
-from playwright.sync_api import sync_playwright
 from providers.base import BaseProvider
 from core.parser import extract_domain
+from core.encoding import ensure_utf8_string
 
 
-def ensure_utf8_string(text, logger=None):
+def parse_doubao_sse(body, captured_queries, captured_search_results, logger):
     """
-    确保文本是 UTF-8 编码的字符串
-    处理可能的编码问题，防止乱码
-    特别处理 UTF-8 被当作 Latin-1 读取的情况（如：ä¸"ä¸š 应该是中文）
-    
-    Args:
-        text: 要处理的文本
-        logger: 可选的日志记录器，用于记录编码修复过程
+    解析豆包的 SSE 响应体（不依赖浏览器，可离线回放录制的响应）
+
+    拓展词和搜索结果追加到 captured_queries / captured_search_results，返回本次响应中的回答文本
     """
-    if text is None:
-        return ""
-    
-    original_text = text
+    full_response_text = ""
     
-    if isinstance(text, bytes):
-        try:
-            return text.decode('utf-8')
-        except UnicodeDecodeError:
-            # 尝试其他常见编码
-            for encoding in ['utf-8', 'gbk', 'gb2312', 'latin-1']:
-                try:
-                    decoded = text.decode(encoding)
-                    # 如果解码成功，尝试重新编码为 UTF-8 以确保一致性
-                    result = decoded.encode('utf-8').decode('utf-8')
-                    if logger and encoding != 'utf-8':
-                        logger.debug(f"编码修复: 从 {encoding} 解码字节数据 (长度: {len(text)})")
-                    return result
-                except (UnicodeDecodeError, UnicodeEncodeError):
-                    continue
-            # 如果所有编码都失败，使用 replace 模式
-            if logger:
-                logger.warning(f"编码修复失败: 无法解码字节数据 (长度: {len(text)})，使用 replace 模式")
-            return text.decode('utf-8', errors='replace')
-    elif not isinstance(text, str):
-        # 如果不是字符串也不是字节，转换为字符串
-        return str(text)
-    else:
-        # 已经是字符串，需要检测并修复编码问题
-        # 情况1: UTF-8 被当作 Latin-1 读取（常见乱码情况）
-        # 检测特征：包含 Latin-1 范围内的字节值（128-255），但实际应该是 UTF-8 多字节字符
-        if any(ord(c) > 127 for c in text):
-            try:
-                # 尝试将字符串重新编码为 Latin-1（无损），再解码为 UTF-8
-                # 这可以修复 UTF-8 被当作 Latin-1 读取的情况
-                fixed = text.encode('latin-1').decode('utf-8')
-                # 验证修复后的字符串是否包含有效的中文字符
-                # 如果修复成功，应该包含中文字符或至少不是乱码模式
-                if fixed and len(fixed) > 0:
-                    # 检查是否包含常见的中文字符范围
-                    has_chinese = any('\u4e00' <= c <= '\u9fff' for c in fixed)
-                    # 或者检查是否不再包含明显的乱码模式（连续的 Latin-1 高字节字符）
-                    has_garbled_pattern = any(
-                        ord(c) > 127 and ord(c) < 160 
-                        for c in text[:min(100, len(text))]
-                    )
-                    if has_chinese or not has_garbled_pattern:
-                        if logger:
-                            logger.info(f"编码修复: 修复 UTF-8 被当作 Latin-1 读取的乱码")
-                            logger.debug(f"  原始: {text[:100]}...")
-                            logger.debug(f"  修复: {fixed[:100]}...")
-                        return fixed
-            except (UnicodeEncodeError, UnicodeDecodeError) as e:
-                if logger:
-                    logger.debug(f"编码修复尝试失败: {e}")
-                pass
-        
-        # 情况2: 双重编码问题（UTF-8 被编码了两次）
-        try:
-            # 尝试检测双重编码：如果字符串可以编码为 Latin-1 再解码为 UTF-8，可能是双重编码
-            double_encoded = text.encode('latin-1', errors='ignore').decode('utf-8', errors='ignore')
-            if double_encoded and double_encoded != text:
-                # 检查修复后的结果是否更合理
-                if any('\u4e00' <= c <= '\u9fff' for c in double_encoded):
-                    if logger:
-                        logger.info(f"编码修复: 修复双重编码问题")
-                        logger.debug(f"  原始: {text[:100]}...")
-                        logger.debug(f"  修复: {double_encoded[:100]}...")
-                    return double_encoded
-        except Exception as e:
-            if logger:
-                logger.debug(f"双重编码检测失败: {e}")
-            pass
-        
-        # 情况3: 正常的 UTF-8 字符串，验证有效性
-        try:
-            # 尝试编码再解码，确保是有效的 UTF-8
-            text.encode('utf-8').decode('utf-8')
-            return text
-        except UnicodeEncodeError:
-            # 如果编码失败，说明字符串可能包含无效字符
-            fixed = text.encode('utf-8', errors='replace').decode('utf-8')
-            if logger and fixed != text:
-                logger.warning(f"编码修复: 使用 replace 模式处理无效字符")
-            return fixed
-        except UnicodeDecodeError:
-            # 如果解码失败，说明字符串可能已经是错误的编码
-            # 尝试其他修复方法
+    # 解析 SSE 数据流
+    line_count = 0
+    data_count = 0
+    for line in body.split('\n'):
+        line_count += 1
+        if line.startswith('data: '):
             try:
-                fixed = text.encode('latin-1').decode('utf-8')
-                if logger:
-                    logger.info(f"编码修复: 通过 Latin-1 重新编码修复")
-                return fixed
-            except:
-                # 最后尝试：使用 replace 模式
-                try:
-                    fixed = text.encode('latin-1', errors='replace').decode('utf-8', errors='replace')
-                    if logger:
-                        logger.warning(f"编码修复: 使用 replace 模式作为最后手段")
-                    return fixed
-                except:
-                    return text
+                json_str = line[6:].strip()  # 去掉 "data: " 前缀
+                if json_str and json_str != '[DONE]' and json_str != 'null':
+                    data = json.loads(json_str)
+                    data_count += 1
+                    
+                    # 记录数据结构信息（用于调试）
+                    if data_count <= 3:  # 只记录前3个数据包，避免日志过多
+                        logger.info(f"📦 数据包 #{data_count} 结构: {list(data.keys())}")
+                    
+                    # 豆包的数据结构：patch_op 数组
+                    if 'patch_op' in data and isinstance(data['patch_op'], list):
+                        logger.info(f"   ✅ 发现 patch_op 数组，包含 {len(data['patch_op'])} 个 patch")
+                        
+                        for patch_idx, patch in enumerate(data['patch_op']):
+                            patch_object = patch.get('patch_object')
+                            patch_type = patch.get('patch_type')
+                            
+                            logger.info(f"   🔹 Patch #{patch_idx}: object={patch_object}, type={patch_type}")
+                            
+                            # patch_object: 1 表示消息内容
+                            if patch_object == 1 and patch_type == 1:
+                                patch_value = patch.get('patch_value', {})
+                                
+                                # 查找 content_block
+                                if 'content_block' in patch_value:
+                                    blocks = patch_value['content_block']
+                                    logger.info(f"      📚 发现 {len(blocks)} 个 content_block")
+                                    
+                                    for block_idx, block in enumerate(blocks):
+                                        block_type = block.get('block_type')
+                                        logger.info(f"      🔸 Block #{block_idx}: type={block_type}")
+                                        
+                                        # block_type: 10000 表示文本块
+                                        if block_type == 10000:
+                                            logger.info(f"         ✅ 文本块 (block_type=10000)")
+                                            content = block.get('content', {})
+                                            text_block = content.get('text_block', {})
+                                            
+                                            # 提取文本内容
+                                            if 'text' in text_block:
+                                                text_content = text_block.get('text', '')
+                                                if text_content:
+                                                    text_content_encoded = ensure_utf8_string(text_content, logger)
+                                                    full_response_text += text_content_encoded
+                                                    logger.debug(f"         📝 提取文本: {text_content_encoded[:50]}...")
+                                        
+                                        # block_type: 10025 表示搜索查询结果块
+                                        elif block_type == 10025:
+                                            logger.info(f"         ✅ 搜索查询结果块 (block_type=10025)")
+                                            content = block.get('content', {})
+                                            search_block = content.get('search_query_result_block', {})
+                                            
+                                            # 提取查询词
+                                            if 'queries' in search_block:
+                                                queries = search_block.get('queries', [])
+                                                logger.info(f"         🔍 发现 {len(queries)} 个查询词")
+                                                for q in queries:
+                                                    if isinstance(q, str):
+                                                        q_encoded = ensure_utf8_string(q, logger)
+                                                        if q_encoded not in captured_queries:
+                                                            captured_queries.append(q_encoded)
+                                                            logger.info(f"         📝 捕获查询: {q_encoded}")
+                                                    elif isinstance(q, dict):
+                                                        query_text = q.get('query', q.get('text', ''))
+                                                        if query_text:
+                                                            query_text_encoded = ensure_utf8_string(query_text, logger)
+                                                            if query_text_encoded not in captured_queries:
+                                                                captured_queries.append(query_text_encoded)
+                                                                logger.info(f"         📝 捕获查询: {query_text_encoded}")
+                                            
+                                            # 提取搜索结果
+                                            if 'results' in search_block:
+                                                results = search_block.get('results', [])
+                                                logger.info(f"         📄 发现 {len(results)} 个搜索结果")
+                                                
+                                                for r_idx, r in enumerate(results):
+                                                    if isinstance(r, dict):
+                                                        # 检查是否有 text_card（网页链接）
+                                                        text_card = r.get('text_card', {})
+                                                        # 检查是否有 video_card（视频链接，如抖音）
+                                                        video_card = r.get('video_card', {})
+                                                        # 检查其他可能的卡片类型
+                                                        other_cards = {k: v for k, v in r.items() if k.endswith('_card') and k not in ['text_card', 'video_card']}
+                                                        
+                                                        if text_card:
+                                                            url = text_card.get('url', '')
+                                                            if url:
+                                                                captured_search_results.append({
+                                                                    "url": ensure_utf8_string(url, logger),
+                                                                    "title": ensure_utf8_string(text_card.get('title', ''), logger),
+                                                                    "snippet": ensure_utf8_string(text_card.get('summary', ''), logger),
+                                                                    "site_name": ensure_utf8_string(text_card.get('sitename', ''), logger),
+                                                                    "cite_index": text_card.get('index', r.get('index', 0)),
+                                                                    "query_indexes": r.get('query_indexes', text_card.get('query_indexes', []))
+                                                                })
+                                                                logger.info(f"         🔗 捕获网页引用 #{r_idx+1}: {url[:80]}... (cite_index: {text_card.get('index', 0)})")
+                                                                logger.info(f"            标题: {text_card.get('title', '')[:50]}...")
+                                                                logger.info(f"            站点: {text_card.get('sitename', '')}")
+                                                        
+                                                        elif video_card:
+                                                            # 处理视频卡片（如抖音视频）
+                                                            video_url = video_card.get('url', '') or video_card.get('video_url', '')
+                                                            if video_url:
+                                                                captured_search_results.append({
+                                                                    "url": ensure_utf8_string(video_url, logger),
+                                                                    "title": ensure_utf8_string(video_card.get('title', video_card.get('description', '')), logger),
+                                                                    "snippet": ensure_utf8_string(video_card.get('description', video_card.get('summary', '')), logger),
+                                                                    "site_name": ensure_utf8_string(video_card.get('platform', 'video'), logger),
+                                                                    "cite_index": video_card.get('index', r.get('index', 0)),
+                                                                    "query_indexes": r.get('query_indexes', video_card.get('query_indexes', []))
+                                                                })
+                                                                logger.info(f"         🎬 捕获视频引用 #{r_idx+1}: {video_url[:80]}... (cite_index: {video_card.get('index', 0)})")
+                                                                logger.info(f"            平台: {video_card.get('platform', 'unknown')}")
+                                                                logger.info(f"            标题: {video_card.get('title', '')[:50]}...")
+                                                        
+                                                        elif other_cards:
+                                                            # 记录其他类型的卡片（用于后续分析）
+                                                            logger.info(f"         ⚠️  发现未处理的卡片类型: {list(other_cards.keys())}")
+                                                            for card_type, card_data in other_cards.items():
+                                                                logger.info(f"            {card_type}: {str(card_data)[:200]}...")
+                                                        
+                                                        else:
+                                                            # 记录未识别的结果结构
+                                                            logger.info(f"         ⚠️  结果 #{r_idx+1} 结构未识别: {list(r.keys())}")
+                                                            logger.debug(f"            完整数据: {str(r)[:300]}...")
+                                            
+                                            # 记录 summary 信息
+                                            if 'summary' in search_block:
+                                                logger.info(f"         📊 搜索摘要: {search_block.get('summary', '')}")
+                                        
+                                        else:
+                                            # 记录其他类型的 block
+                                            logger.info(f"         ⚠️  未处理的 block_type: {block_type}")
+                                            if block_idx < 2:  # 只记录前2个未处理的 block
+                                                logger.debug(f"            Block 数据: {str(block)[:300]}...")
+                            
+                            else:
+                                # 记录其他类型的 patch
+                                if patch_idx < 3:  # 只记录前3个未处理的 patch
+                                    logger.info(f"      ⚠️  未处理的 patch: object={patch_object}, type={patch_type}")
+                    
+                    else:
+                        # 记录未识别的数据结构
+                        if data_count <= 3:
+                            logger.info(f"   ⚠️  未识别 patch_op 结构，数据键: {list(data.keys())}")
+                            # 检查是否有其他可能包含搜索结果的字段
+                            for key in ['search', 'results', 'citations', 'references', 'videos', 'video']:
+                                if key in data:
+                                    logger.info(f"      🔍 发现可能的搜索字段: {key}")
+                    
+                    # 兼容其他可能的数据结构（向后兼容）
+                    # 提取搜索查询词（多种可能的字段名）
+                    for query_field in ['search_queries', 'queries', 'search_query', 'query']:
+                        if query_field in data:
+                            queries = data.get(query_field, [])
+                            if isinstance(queries, list):
+                                for q in queries:
+                                    if isinstance(q, dict):
+                                        query_text = q.get('query', q.get('text', ''))
+                                    else:
+                                        query_text = str(q)
+                                    if query_text:
+                                        query_text_encoded = ensure_utf8_string(query_text, logger)
+                                        if query_text_encoded not in captured_queries:
+                                            captured_queries.append(query_text_encoded)
+                            elif isinstance(queries, str):
+                                queries_encoded = ensure_utf8_string(queries, logger)
+                                if queries_encoded not in captured_queries:
+                                    captured_queries.append(queries_encoded)
+                    
+                    # 提取搜索结果（多种可能的字段名）
+                    for result_field in ['search_results', 'results', 'citations', 'references']:
+                        if result_field in data:
+                            results = data.get(result_field, [])
+                            if isinstance(results, list):
+                                for r in results:
+                                    if isinstance(r, dict) and 'url' in r:
+                                        captured_search_results.append({
+                                            "url": ensure_utf8_string(r.get('url', ''), logger),
+                                            "title": ensure_utf8_string(r.get('title', r.get('name', '')), logger),
+                                            "snippet": ensure_utf8_string(r.get('snippet', r.get('content', r.get('description', ''))), logger),
+                                            "site_name": ensure_utf8_string(r.get('site_name', r.get('source', r.get('domain', ''))), logger),
+                                            "cite_index": r.get('cite_index', r.get('index', r.get('order', 0))),
+                                            "query_indexes": r.get('query_indexes', [])
+                                        })
+                    
+                    # 提取回答内容（多种可能的字段名）
+                    for content_field in ['content', 'text', 'message', 'answer']:
+                        if content_field in data:
+                            content = data.get(content_field, '')
+                            if content:
+                                content_encoded = ensure_utf8_string(content, logger)
+                                full_response_text += content_encoded
+                        elif 'delta' in data and content_field in data.get('delta', {}):
+                            content = data['delta'].get(content_field, '')
+                            if content:
+                                content_encoded = ensure_utf8_string(content, logger)
+                                full_response_text += content_encoded
+                    
+                    # 处理嵌套结构（如 data.message.content）
+                    if 'message' in data and isinstance(data['message'], dict):
+                        msg = data['message']
+                        if 'content' in msg:
+                            content = msg['content']
+                            if content:
+                                content_encoded = ensure_utf8_string(content, logger)
+                                full_response_text += content_encoded
+                    
+            except json.JSONDecodeError as e:
+                logger.debug(f"JSON 解析失败: {e}")
+                continue
+    
+    return full_response_text
+
+
+def parse_doubao_json(data, captured_queries, captured_search_results, logger):
+    """解析豆包的普通 JSON 响应，拓展词和搜索结果追加到传入的列表"""
+    # 提取搜索相关信息
+    if 'search' in data:
+        search_data = data['search']
+        if 'queries' in search_data:
+            queries = search_data['queries']
+            if isinstance(queries, list):
+                encoded_queries = [ensure_utf8_string(q if isinstance(q, str) else q.get('query', ''), logger) for q in queries]
+                for q_encoded in encoded_queries:
+                    if q_encoded and q_encoded not in captured_queries:
+                        captured_queries.append(q_encoded)
+        if 'results' in search_data:
+            for r in search_data['results']:
+                if isinstance(r, dict) and 'url' in r:
+                    captured_search_results.append({
+                        "url": ensure_utf8_string(r.get('url', ''), logger),
+                        "title": ensure_utf8_string(r.get('title', ''), logger),
+                        "snippet": ensure_utf8_string(r.get('snippet', ''), logger),
+                        "site_name": ensure_utf8_string(r.get('source', ''), logger),
+                        "cite_index": r.get('index', 0),
+                        "query_indexes": r.get('query_indexes', [])
+                    })
 
 
 class DoubaoWebProvider(BaseProvider):
+    PLATFORM = "doubao"
+    RESPONSE_URL_PATTERNS = ("/chat/completion", "/api/chat", "/api/v1/chat", "/api/bot/chat", "/stream")
+    # 字节系页面的监控和统计上报
+    BLOCKED_URL_PATTERNS = BaseProvider.BLOCKED_URL_PATTERNS + (
+        "mcs.snssdk.com", "mon.zijieapi.com", "/monitor_browser/collect", "/slardar/"
+    )
+
     def search(self, keyword: str, prompt: str):
-        user_data_dir = os.path.join(os.getenv("BROWSER_DATA_DIR", "./browser_data"), "doubao")
+        user_data_dir = self.user_data_dir
+        timer = self.start_timer()
+        # 无头模式下会话已失效时直接失败，不启动浏览器
+        self.ensure_session()
         
         # 用于存储拦截到的数据
         captured_queries = []
@@ -134,278 +285,46 @@ class DoubaoWebProvider(BaseProvider):
             """拦截豆包的 API 响应，提取搜索结果和拓展词"""
             nonlocal captured_search_results, captured_queries, full_response_text
             
-            # 豆包的 API 端点：
+            # 豆包的 API 端点（RESPONSE_URL_PATTERNS）：
             # - /chat/completion (主要端点)
             # - /api/chat/stream
             # - /api/v1/chat/completions
             # - /api/bot/chat
             # - /api/chat
+            # 图片、脚本、统计上报等响应直接跳过
+            if not self.is_api_response(response):
+                return
             url_lower = response.url.lower()
-            if any(endpoint in url_lower for endpoint in ["/chat/completion", "/api/chat", "/api/v1/chat", "/api/bot/chat", "/stream"]):
-                try:
-                    content_type = response.headers.get("content-type", "")
-                    self.logger.info(f"🔍 拦截到豆包 API 响应: {response.url[:150]}")
-                    self.logger.info(f"   Content-Type: {content_type}")
-                    
-                    # 处理 SSE 流
-                    if "text/event-stream" in content_type or "stream" in url_lower or "/chat/completion" in url_lower:
-                        try:
-                            body = response.text()
-                            self.logger.info(f"📡 处理豆包 SSE 流响应")
-                            
-                            # 解析 SSE 数据流
-                            line_count = 0
-                            data_count = 0
-                            for line in body.split('\n'):
-                                line_count += 1
-                                if line.startswith('data: '):
-                                    try:
-                                        json_str = line[6:].strip()  # 去掉 "data: " 前缀
-                                        if json_str and json_str != '[DONE]' and json_str != 'null':
-                                            data = json.loads(json_str)
-                                            data_count += 1
-                                            
-                                            # 记录数据结构信息（用于调试）
-                                            if data_count <= 3:  # 只记录前3个数据包，避免日志过多
-                                                self.logger.info(f"📦 数据包 #{data_count} 结构: {list(data.keys())}")
-                                            
-                                            # 豆包的数据结构：patch_op 数组
-                                            if 'patch_op' in data and isinstance(data['patch_op'], list):
-                                                self.logger.info(f"   ✅ 发现 patch_op 数组，包含 {len(data['patch_op'])} 个 patch")
-                                                
-                                                for patch_idx, patch in enumerate(data['patch_op']):
-                                                    patch_object = patch.get('patch_object')
-                                                    patch_type = patch.get('patch_type')
-                                                    
-                                                    self.logger.info(f"   🔹 Patch #{patch_idx}: object={patch_object}, type={patch_type}")
-                                                    
-                                                    # patch_object: 1 表示消息内容
-                                                    if patch_object == 1 and patch_type == 1:
-                                                        patch_value = patch.get('patch_value', {})
-                                                        
-                                                        # 查找 content_block
-                                                        if 'content_block' in patch_value:
-                                                            blocks = patch_value['content_block']
-                                                            self.logger.info(f"      📚 发现 {len(blocks)} 个 content_block")
-                                                            
-                                                            for block_idx, block in enumerate(blocks):
-                                                                block_type = block.get('block_type')
-                                                                self.logger.info(f"      🔸 Block #{block_idx}: type={block_type}")
-                                                                
-                                                                # block_type: 10000 表示文本块
-                                                                if block_type == 10000:
-                                                                    self.logger.info(f"         ✅ 文本块 (block_type=10000)")
-                                                                    content = block.get('content', {})
-                                                                    text_block = content.get('text_block', {})
-                                                                    
-                                                                    # 提取文本内容
-                                                                    if 'text' in text_block:
-                                                                        text_content = text_block.get('text', '')
-                                                                        if text_content:
-                                                                            text_content_encoded = ensure_utf8_string(text_content, self.logger)
-                                                                            full_response_text += text_content_encoded
-                                                                            self.logger.debug(f"         📝 提取文本: {text_content_encoded[:50]}...")
-                                                                
-                                                                # block_type: 10025 表示搜索查询结果块
-                                                                elif block_type == 10025:
-                                                                    self.logger.info(f"         ✅ 搜索查询结果块 (block_type=10025)")
-                                                                    content = block.get('content', {})
-                                                                    search_block = content.get('search_query_result_block', {})
-                                                                    
-                                                                    # 提取查询词
-                                                                    if 'queries' in search_block:
-                                                                        queries = search_block.get('queries', [])
-                                                                        self.logger.info(f"         🔍 发现 {len(queries)} 个查询词")
-                                                                        for q in queries:
-                                                                            if isinstance(q, str):
-                                                                                q_encoded = ensure_utf8_string(q, self.logger)
-                                                                                if q_encoded not in captured_queries:
-                                                                                    captured_queries.append(q_encoded)
-                                                                                    self.logger.info(f"         📝 捕获查询: {q_encoded}")
-                                                                            elif isinstance(q, dict):
-                                                                                query_text = q.get('query', q.get('text', ''))
-                                                                                if query_text:
-                                                                                    query_text_encoded = ensure_utf8_string(query_text, self.logger)
-                                                                                    if query_text_encoded not in captured_queries:
-                                                                                        captured_queries.append(query_text_encoded)
-                                                                                        self.logger.info(f"         📝 捕获查询: {query_text_encoded}")
-                                                                    
-                                                                    # 提取搜索结果
-                                                                    if 'results' in search_block:
-                                                                        results = search_block.get('results', [])
-                                                                        self.logger.info(f"         📄 发现 {len(results)} 个搜索结果")
-                                                                        
-                                                                        for r_idx, r in enumerate(results):
-                                                                            if isinstance(r, dict):
-                                                                                # 检查是否有 text_card（网页链接）
-                                                                                text_card = r.get('text_card', {})
-                                                                                # 检查是否有 video_card（视频链接，如抖音）
-                                                                                video_card = r.get('video_card', {})
-                                                                                # 检查其他可能的卡片类型
-                                                                                other_cards = {k: v for k, v in r.items() if k.endswith('_card') and k not in ['text_card', 'video_card']}
-                                                                                
-                                                                                if text_card:
-                                                                                    url = text_card.get('url', '')
-                                                                                    if url:
-                                                                                        captured_search_results.append({
-                                                                                            "url": ensure_utf8_string(url, self.logger),
-                                                                                            "title": ensure_utf8_string(text_card.get('title', ''), self.logger),
-                                                                                            "snippet": ensure_utf8_string(text_card.get('summary', ''), self.logger),
-                                                                                            "site_name": ensure_utf8_string(text_card.get('sitename', ''), self.logger),
-                                                                                            "cite_index": text_card.get('index', r.get('index', 0)),
-                                                                                            "query_indexes": r.get('query_indexes', text_card.get('query_indexes', []))
-                                                                                        })
-                                                                                        self.logger.info(f"         🔗 捕获网页引用 #{r_idx+1}: {url[:80]}... (cite_index: {text_card.get('index', 0)})")
-                                                                                        self.logger.info(f"            标题: {text_card.get('title', '')[:50]}...")
-                                                                                        self.logger.info(f"            站点: {text_card.get('sitename', '')}")
-                                                                                
-                                                                                elif video_card:
-                                                                                    # 处理视频卡片（如抖音视频）
-                                                                                    video_url = video_card.get('url', '') or video_card.get('video_url', '')
-                                                                                    if video_url:
-                                                                                        captured_search_results.append({
-                                                                                            "url": ensure_utf8_string(video_url, self.logger),
-                                                                                            "title": ensure_utf8_string(video_card.get('title', video_card.get('description', '')), self.logger),
-                                                                                            "snippet": ensure_utf8_string(video_card.get('description', video_card.get('summary', '')), self.logger),
-                                                                                            "site_name": ensure_utf8_string(video_card.get('platform', 'video'), self.logger),
-                                                                                            "cite_index": video_card.get('index', r.get('index', 0)),
-                                                                                            "query_indexes": r.get('query_indexes', video_card.get('query_indexes', []))
-                                                                                        })
-                                                                                        self.logger.info(f"         🎬 捕获视频引用 #{r_idx+1}: {video_url[:80]}... (cite_index: {video_card.get('index', 0)})")
-                                                                                        self.logger.info(f"            平台: {video_card.get('platform', 'unknown')}")
-                                                                                        self.logger.info(f"            标题: {video_card.get('title', '')[:50]}...")
-                                                                                
-                                                                                elif other_cards:
-                                                                                    # 记录其他类型的卡片（用于后续分析）
-                                                                                    self.logger.info(f"         ⚠️  发现未处理的卡片类型: {list(other_cards.keys())}")
-                                                                                    for card_type, card_data in other_cards.items():
-                                                                                        self.logger.info(f"            {card_type}: {str(card_data)[:200]}...")
-                                                                                
-                                                                                else:
-                                                                                    # 记录未识别的结果结构
-                                                                                    self.logger.info(f"         ⚠️  结果 #{r_idx+1} 结构未识别: {list(r.keys())}")
-                                                                                    self.logger.debug(f"            完整数据: {str(r)[:300]}...")
-                                                                    
-                                                                    # 记录 summary 信息
-                                                                    if 'summary' in search_block:
-                                                                        self.logger.info(f"         📊 搜索摘要: {search_block.get('summary', '')}")
-                                                                
-                                                                else:
-                                                                    # 记录其他类型的 block
-                                                                    self.logger.info(f"         ⚠️  未处理的 block_type: {block_type}")
-                                                                    if block_idx < 2:  # 只记录前2个未处理的 block
-                                                                        self.logger.debug(f"            Block 数据: {str(block)[:300]}...")
-                                                    
-                                                    else:
-                                                        # 记录其他类型的 patch
-                                                        if patch_idx < 3:  # 只记录前3个未处理的 patch
-                                                            self.logger.info(f"      ⚠️  未处理的 patch: object={patch_object}, type={patch_type}")
-                                            
-                                            else:
-                                                # 记录未识别的数据结构
-                                                if data_count <= 3:
-                                                    self.logger.info(f"   ⚠️  未识别 patch_op 结构，数据键: {list(data.keys())}")
-                                                    # 检查是否有其他可能包含搜索结果的字段
-                                                    for key in ['search', 'results', 'citations', 'references', 'videos', 'video']:
-                                                        if key in data:
-                                                            self.logger.info(f"      🔍 发现可能的搜索字段: {key}")
-                                            
-                                            # 兼容其他可能的数据结构（向后兼容）
-                                            # 提取搜索查询词（多种可能的字段名）
-                                            for query_field in ['search_queries', 'queries', 'search_query', 'query']:
-                                                if query_field in data:
-                                                    queries = data.get(query_field, [])
-                                                    if isinstance(queries, list):
-                                                        for q in queries:
-                                                            if isinstance(q, dict):
-                                                                query_text = q.get('query', q.get('text', ''))
-                                                            else:
-                                                                query_text = str(q)
-                                                            if query_text:
-                                                                query_text_encoded = ensure_utf8_string(query_text, self.logger)
-                                                                if query_text_encoded not in captured_queries:
-                                                                    captured_queries.append(query_text_encoded)
-                                                    elif isinstance(queries, str):
-                                                        queries_encoded = ensure_utf8_string(queries, self.logger)
-                                                        if queries_encoded not in captured_queries:
-                                                            captured_queries.append(queries_encoded)
-                                            
-                                            # 提取搜索结果（多种可能的字段名）
-                                            for result_field in ['search_results', 'results', 'citations', 'references']:
-                                                if result_field in data:
-                                                    results = data.get(result_field, [])
-                                                    if isinstance(results, list):
-                                                        for r in results:
-                                                            if isinstance(r, dict) and 'url' in r:
-                                                                captured_search_results.append({
-                                                                    "url": ensure_utf8_string(r.get('url', ''), self.logger),
-                                                                    "title": ensure_utf8_string(r.get('title', r.get('name', '')), self.logger),
-                                                                    "snippet": ensure_utf8_string(r.get('snippet', r.get('content', r.get('description', ''))), self.logger),
-                                                                    "site_name": ensure_utf8_string(r.get('site_name', r.get('source', r.get('domain', ''))), self.logger),
-                                                                    "cite_index": r.get('cite_index', r.get('index', r.get('order', 0))),
-                                                                    "query_indexes": r.get('query_indexes', [])
-                                                                })
-                                            
-                                            # 提取回答内容（多种可能的字段名）
-                                            for content_field in ['content', 'text', 'message', 'answer']:
-                                                if content_field in data:
-                                                    content = data.get(content_field, '')
-                                                    if content:
-                                                        content_encoded = ensure_utf8_string(content, self.logger)
-                                                        full_response_text += content_encoded
-                                                elif 'delta' in data and content_field in data.get('delta', {}):
-                                                    content = data['delta'].get(content_field, '')
-                                                    if content:
-                                                        content_encoded = ensure_utf8_string(content, self.logger)
-                                                        full_response_text += content_encoded
-                                            
-                                            # 处理嵌套结构（如 data.message.content）
-                                            if 'message' in data and isinstance(data['message'], dict):
-                                                msg = data['message']
-                                                if 'content' in msg:
-                                                    content = msg['content']
-                                                    if content:
-                                                        content_encoded = ensure_utf8_string(content, self.logger)
-                                                        full_response_text += content_encoded
-                                            
-                                    except json.JSONDecodeError as e:
-                                        self.logger.debug(f"JSON 解析失败: {e}")
-                                        continue
-                        except Exception as e:
-                            self.logger.debug(f"解析 SSE 响应失败: {e}")
-                    
-                    # 处理普通 JSON 响应
-                    elif "application/json" in content_type:
-                        try:
-                            data = response.json()
-                            
-                            # 提取搜索相关信息
-                            if 'search' in data:
-                                search_data = data['search']
-                                if 'queries' in search_data:
-                                    queries = search_data['queries']
-                                    if isinstance(queries, list):
-                                        encoded_queries = [ensure_utf8_string(q if isinstance(q, str) else q.get('query', ''), self.logger) for q in queries]
-                                        for q_encoded in encoded_queries:
-                                            if q_encoded and q_encoded not in captured_queries:
-                                                captured_queries.append(q_encoded)
-                                if 'results' in search_data:
-                                    for r in search_data['results']:
-                                        if isinstance(r, dict) and 'url' in r:
-                                            captured_search_results.append({
-                                                "url": ensure_utf8_string(r.get('url', ''), self.logger),
-                                                "title": ensure_utf8_string(r.get('title', ''), self.logger),
-                                                "snippet": ensure_utf8_string(r.get('snippet', ''), self.logger),
-                                                "site_name": ensure_utf8_string(r.get('source', ''), self.logger),
-                                                "cite_index": r.get('index', 0),
-                                                "query_indexes": r.get('query_indexes', [])
-                                            })
-                        except Exception as e:
-                            self.logger.debug(f"解析 JSON 响应失败: {e}")
-                            
-                except Exception as e:
-                    self.logger.debug(f"拦截响应失败: {e}")
+            try:
+                content_type = response.headers.get("content-type", "")
+                self.logger.info(f"🔍 拦截到豆包 API 响应: {response.url[:150]}")
+                self.logger.info(f"   Content-Type: {content_type}")
+                
+                # 处理 SSE 流
+                if "text/event-stream" in content_type or "stream" in url_lower or "/chat/completion" in url_lower:
+                    try:
+                        body = response.text()
+                        self.logger.info(f"📡 处理豆包 SSE 流响应")
+                        
+                        self.record_response("doubao", body)
+                        full_response_text += parse_doubao_sse(body, captured_queries, captured_search_results, self.logger)
+                    except Exception as e:
+                        self.logger.debug(f"解析 SSE 响应失败: {e}")
+                
+                # 处理普通 JSON 响应
+                elif "application/json" in content_type:
+                    try:
+                        data = response.json()
+                        
+                        parse_doubao_json(data, captured_queries, captured_search_results, self.logger)
+                    except Exception as e:
+                        self.logger.debug(f"解析 JSON 响应失败: {e}")
+                        
+            except Exception as e:
+                self.logger.debug(f"拦截响应失败: {e}")
         
+        # 解析函数（parse_*_sse）不依赖浏览器，playwright 在真正搜索时才导入
+        from playwright.sync_api import sync_playwright
         with sync_playwright() as p:
             browser = p.chromium.launch_persistent_context(
                 user_data_dir=user_data_dir,
@@ -414,31 +333,38 @@ class DoubaoWebProvider(BaseProvider):
             )
             
             try:
+                timer.lap("browser_launch")
                 page = browser.pages[0] if browser.pages else browser.new_page()
                 page.set_default_timeout(self.timeout)
                 
-                # 注册响应拦截器
+                # 注册请求过滤和响应拦截器
+                self.install_request_filter(page)
                 page.on("response", handle_response)
                 
                 self.logger.info("正在打开豆包首页...")
                 page.goto("https://www.doubao.com/")
+                timer.lap("page_load")
                 
-                # 检查是否需要登录
-                time.sleep(2)
-                if "login" in page.url.lower() or page.query_selector("text=登录") or page.query_selector("text=立即登录"):
-                    self.logger.warning("检测到可能需要登录，请在浏览器窗口中完成登录...")
-                    try:
-                        # 等待登录完成，URL 变化或登录按钮消失
-                        page.wait_for_function("""
-                            () => {
-                                return !document.querySelector('text=登录') && 
-                                       !document.querySelector('text=立即登录') &&
-                                       window.location.href.includes('doubao.com');
-                            }
-                        """, timeout=120000)
-                        self.logger.info("登录检测完成")
-                    except:
-                        self.logger.warning("登录检测超时，继续执行...")
+                # 检查是否需要登录（会话在 TTL 内确认有效时跳过，无头模式下未登录直接失败）
+                if self.needs_login_probe():
+                    time.sleep(2)
+                    needs_login = "login" in page.url.lower() or page.query_selector("text=登录") or page.query_selector("text=立即登录")
+                    self.on_login_detected(not needs_login)
+                    if needs_login:
+                        self.logger.warning("检测到可能需要登录，请在浏览器窗口中完成登录...")
+                        try:
+                            # 等待登录完成，URL 变化或登录按钮消失
+                            page.wait_for_function("""
+                                () => {
+                                    return !document.querySelector('text=登录') && 
+                                           !document.querySelector('text=立即登录') &&
+                                           window.location.href.includes('doubao.com');
+                                }
+                            """, timeout=120000)
+                            self.logger.info("登录检测完成")
+                        except:
+                            self.logger.warning("登录检测超时，继续执行...")
+                timer.lap("login_check")
                 
                 # 1. 等待输入框加载并输入
                 # 尝试多种可能的选择器
@@ -467,6 +393,7 @@ class DoubaoWebProvider(BaseProvider):
                     raise Exception("未找到输入框")
                 
                 time.sleep(1)
+                timer.lap("input")
                 
                 # 2. 开启"联网搜索"或"深度搜索" - 智能判断状态
                 try:
@@ -527,6 +454,7 @@ class DoubaoWebProvider(BaseProvider):
                             self.logger.debug(f"判断搜索开关状态失败: {e}")
                 except Exception as e:
                     self.logger.debug(f"未找到搜索开关: {e}")
+                timer.lap("search_toggle")
                 
                 # 3. 点击发送按钮
                 try:
@@ -561,6 +489,7 @@ class DoubaoWebProvider(BaseProvider):
                 except Exception as e:
                     self.logger.warning(f"点击发送按钮失败: {e}")
                     page.keyboard.press("Enter")
+                timer.lap("send")
                 
                 self.logger.info("已发送提问，等待豆包回答...")
                 
@@ -628,76 +557,39 @@ class DoubaoWebProvider(BaseProvider):
                     except Exception as e:
                         self.logger.debug(f"检查生成状态失败: {e}")
                         continue
+                timer.lap("generation")
                 
                 # 5. 如果没有通过 API 拦截到引用，则从 DOM 提取
                 if not captured_search_results:
                     self.logger.info("未通过 API 拦截到引用，尝试从页面提取...")
                     
-                    # 尝试多种方式提取链接
+                    # 尝试多种方式提取链接（一次 page.evaluate 在页面内完成遍历）
                     link_selectors = [
                         "a[href^='http']",
-                        "a[href^='https']",
                         "[class*='citation'] a",
                         "[class*='reference'] a",
                         "[class*='link'] a"
                     ]
                     
-                    seen_dom_urls = set()
-                    for selector in link_selectors:
-                        try:
-                            links = page.query_selector_all(selector)
-                            for link in links:
-                                try:
-                                    href = link.get_attribute("href")
-                                    if not href:
-                                        continue
-                                    
-                                    # 过滤掉豆包自己的域名
-                                    if any(d in href.lower() for d in ["doubao.com", "bytecheck.com", "volcengine.com", "bytedance.com"]):
-                                        continue
-                                    
-                                    # 去重
-                                    if href in seen_dom_urls:
-                                        continue
-                                    seen_dom_urls.add(href)
-                                    
-                                    # 提取标题
-                                    title = link.inner_text().strip()
-                                    if not title:
-                                        # 尝试从父元素获取
-                                        try:
-                                            parent = link.evaluate("el => el.parentElement?.textContent || ''")
-                                            title = parent.strip()[:100]
-                                        except:
-                                            pass
-                                    
-                                    # 提取摘要（尝试从附近元素）
-                                    snippet = ""
-                                    try:
-                                        sibling = link.evaluate("""
-                                            el => {
-                                                let next = el.nextElementSibling;
-                                                if (next && next.textContent) {
-                                                    return next.textContent.trim().substring(0, 200);
-                                                }
-                                                return '';
-                                            }
-                                        """)
-                                        snippet = sibling
-                                    except:
-                                        pass
-                                    
-                                    captured_search_results.append({
-                                        "url": ensure_utf8_string(href, self.logger),
-                                        "title": ensure_utf8_string(title or extract_domain(href), self.logger),
-                                        "snippet": ensure_utf8_string(snippet, self.logger),
-                                        "site_name": ensure_utf8_string(extract_domain(href), self.logger)
-                                    })
-                                except Exception as e:
-                                    self.logger.debug(f"提取链接失败: {e}")
-                                    continue
-                        except:
-                            continue
+                    try:
+                        dom_citations = self.extract_dom_citations(
+                            page,
+                            link_selectors,
+                            # 过滤掉豆包自己的域名
+                            exclude_domains=["doubao.com", "bytecheck.com", "volcengine.com", "bytedance.com"]
+                        )
+                        for cite in dom_citations:
+                            captured_search_results.append({
+                                "url": ensure_utf8_string(cite["url"], self.logger),
+                                "title": ensure_utf8_string(cite["title"], self.logger),
+                                "snippet": ensure_utf8_string(cite["snippet"], self.logger),
+                                "site_name": ensure_utf8_string(cite["site_name"], self.logger),
+                                "cite_index": cite["cite_index"]
+                            })
+                        self.logger.info(f"从页面提取到 {len(dom_citations)} 个引用链接")
+                    except Exception as e:
+                        self.logger.debug(f"从页面提取引用失败: {e}")
+                timer.lap("dom_extract")
                 
                 # 6. 整理搜索结果（去重）并确保编码正确
                 seen_urls = set()
@@ -802,7 +694,9 @@ class DoubaoWebProvider(BaseProvider):
                     self.logger.info(f"   文本预览: {full_text[:100]}...")
                 
                 self.logger.info(f"{'='*60}\n")
+                timer.lap("postprocess")
                 
                 return result_data
             finally:
                 browser.close()
+                timer.lap("browser_close")
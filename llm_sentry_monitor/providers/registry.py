@@ -0,0 +1,160 @@
+"""
+providers/registry.py - Provider 注册表
+平台名 → provider 类的映射、平台别名表，以及按 (平台, headless, timeout, block_resources) 缓存的 provider 单例。
+main.run_tasks、任务执行器和 API 都通过这里取 provider，不再各自构造和匹配平台名。
+
+注册方式（入口点风格，目标写成 "模块:类名"，第一次使用时才导入）：
+- 内置平台见 BUILTIN_PROVIDERS
+- 代码中调用 register_provider("kimi", "my_pkg.kimi:KimiWebProvider", aliases=["月之暗面"])
+- 已安装的包在 entry point 组 llm_sentry.providers 中声明（名称即平台名）：
+    [project.entry-points."llm_sentry.providers"]
+    kimi = "my_pkg.kimi:KimiWebProvider"
+
+provider 单例会被多个任务线程共用：search 中的状态都放在局部变量里，计时器按线程保存（见 BaseProvider.timer）
+"""
+import logging
+import threading
+from importlib import import_module
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "llm_sentry.providers"
+
+# 平台名 → (同步 provider, 异步 provider)
+BUILTIN_PROVIDERS = {
+    "deepseek": ("providers.deepseek_web:DeepSeekWebProvider", "providers.deepseek_async:AsyncDeepSeekWebProvider"),
+    "doubao": ("providers.doubao_web:DoubaoWebProvider", "providers.doubao_async:AsyncDoubaoWebProvider"),
+    "bocha": ("providers.bocha_api:BochaApiProvider", None),
+}
+
+# 平台别名（小写）→ 平台名
+PLATFORM_ALIASES = {
+    "ds": "deepseek",
+    "deepseek_web": "deepseek",
+    "deepseek-web": "deepseek",
+    "豆包": "doubao",
+    "doubao_web": "doubao",
+    "doubao-web": "doubao",
+    "博查": "bocha",
+    "bocha_api": "bocha",
+    "bocha-api": "bocha",
+}
+
+_targets: Dict[str, Tuple[Optional[str], Optional[str]]] = dict(BUILTIN_PROVIDERS)
+_classes: Dict[str, type] = {}
+_instances: Dict[tuple, object] = {}
+_lock = threading.Lock()
+_entry_points_loaded = False
+
+
+def register_provider(name: str, target, async_target=None, aliases=()):
+    """
+    注册平台（同名覆盖内置平台）
+
+    Args:
+        name: 平台名（入库的 platform 字段）
+        target: 同步 provider，"模块:类名" 或类本身
+        async_target: 异步 provider（可选，settings.async_tabs 时使用）
+        aliases: 平台别名
+    """
+    name = name.lower().strip()
+    with _lock:
+        _targets[name] = (target, async_target)
+        for key in [key for key in _classes if key[0] == name]:
+            del _classes[key]
+        for key in [key for key in _instances if key[0] == name]:
+            del _instances[key]
+    for alias in aliases:
+        PLATFORM_ALIASES[alias.lower().strip()] = name
+
+
+def _load_entry_points():
+    """读取已安装包声明的 provider（只读取一次）"""
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    # importlib.metadata 导入约 80ms，只在第一次解析平台名时加载
+    from importlib.metadata import entry_points
+    try:
+        eps = entry_points(group=ENTRY_POINT_GROUP)
+    except Exception as e:
+        logger.debug(f"读取 provider 入口点失败: {e}")
+        return
+    for ep in eps:
+        if ep.name.lower() not in _targets:
+            register_provider(ep.name, ep.value)
+            logger.info(f"已注册插件平台: {ep.name} ({ep.value})")
+
+
+def available_platforms() -> List[str]:
+    _load_entry_points()
+    return sorted(_targets)
+
+
+def resolve_platform(name: str) -> Optional[str]:
+    """平台名或别名（大小写不敏感）→ 平台名，未注册时返回 None"""
+    _load_entry_points()
+    if not name:
+        return None
+    key = name.lower().strip()
+    key = PLATFORM_ALIASES.get(key, key)
+    return key if key in _targets else None
+
+
+def _load_class(platform: str, is_async: bool = False):
+    cache_key = (platform, is_async)
+    cls = _classes.get(cache_key)
+    if cls is not None:
+        return cls
+    target = _targets[platform][1 if is_async else 0]
+    if target is None:
+        return None
+    if isinstance(target, str):
+        module_name, _, class_name = target.partition(":")
+        cls = getattr(import_module(module_name), class_name)
+    else:
+        cls = target
+    _classes[cache_key] = cls
+    return cls
+
+
+def get_provider(platform: str, headless: bool = False, timeout: int = 30000, block_resources: bool = None):
+    """
+    取同步 provider 单例（第一次调用时导入模块并构造）
+
+    Raises:
+        KeyError: 平台未注册
+    """
+    name = resolve_platform(platform)
+    if name is None:
+        raise KeyError(f"未找到平台 [{platform}] 的 Provider，可用平台: {', '.join(available_platforms())}")
+    key = (name, bool(headless), int(timeout), block_resources)
+    provider = _instances.get(key)
+    if provider is None:
+        with _lock:
+            provider = _instances.get(key)
+            if provider is None:
+                cls = _load_class(name)
+                provider = cls(headless=headless, timeout=timeout, block_resources=block_resources)
+                _instances[key] = provider
+    return provider
+
+
+def has_async_provider(platform: str) -> bool:
+    """平台是否注册了异步版本（不导入模块，执行器据此选择同步 / 异步执行）"""
+    name = resolve_platform(platform)
+    return name is not None and _targets[name][1] is not None
+
+
+def create_async_provider(platform: str, **kwargs):
+    """
+    新建异步 provider（不缓存：浏览器上下文绑定事件循环，由调用方在任务结束时 close）
+    平台没有异步版本时返回 None
+    """
+    name = resolve_platform(platform)
+    if name is None:
+        return None
+    cls = _load_class(name, is_async=True)
+    return cls(**kwargs) if cls else None
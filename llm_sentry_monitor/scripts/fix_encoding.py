@@ -2,277 +2,128 @@
 """
 fix_encoding.py - 修复数据库中已存在的乱码数据
 
+分批（keyset 分页）、并行检测、批量写回，并在 encoding_repair_checkpoint 表中记录进度，
+中断后重新运行会从上次提交的位置继续；已完成的表重新运行时只检查之后新写入的行（可定时执行）。
+修复逻辑见 core/encoding_repair.py。
+
 使用方法:
-    python scripts/fix_encoding.py [--dry-run] [--table TABLE_NAME]
+    python scripts/fix_encoding.py [--dry-run] [--table TABLE_NAME] [--batch-size N] [--workers N] [--reset] [--yes]
+    python scripts/fix_encoding.py --backfill --yes
 
 选项:
     --dry-run: 只检测不修复，显示将要修复的数据
-    --table: 指定要修复的表 (citations, search_queries, search_records)
+    --table: 指定要修复的表 (citations, search_queries, search_records, executor_sub_query_log, urls)
+    --batch-size: 每批处理的行数（默认按表配置）
+    --workers: 检测进程数（默认 CPU 核数，或 REPAIR_WORKERS 环境变量）
+    --job: 任务名，不同任务名的检查点互不影响（默认 fix_encoding）
+    --reset: 清除检查点，从头开始
+    --backfill: 回填 text_normalized 标记（扫描所有未打标记的行，修复后打标记）
+    --yes: 跳过确认提示（用于定时任务）
 """
 import sys
 import os
 import argparse
+import logging
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.db import get_db_connection
-from providers.doubao_web import ensure_utf8_string
-
-
-def detect_garbled_text(text):
-    """
-    检测文本是否是乱码（UTF-8 被当作 Latin-1 读取）
-    
-    返回: (is_garbled, fixed_text)
-    """
-    if not text or not isinstance(text, str):
-        return False, text
-    
-    # 检测乱码特征：包含 Latin-1 高字节字符（128-255），但实际应该是 UTF-8
-    has_high_bytes = any(ord(c) > 127 for c in text)
-    if not has_high_bytes:
-        return False, text
-    
-    # 尝试修复
-    try:
-        fixed = text.encode('latin-1').decode('utf-8')
-        # 如果修复后的文本包含中文字符，说明修复成功
-        has_chinese = any('\u4e00' <= c <= '\u9fff' for c in fixed)
-        if has_chinese or len(fixed) > 0:
-            return True, fixed
-    except (UnicodeEncodeError, UnicodeDecodeError):
-        pass
-    
-    # 使用增强的修复函数
-    fixed = ensure_utf8_string(text)
-    if fixed != text:
-        return True, fixed
-    
-    return False, text
+from core.encoding import TEXT_NORMALIZATION_VERSION
+from core.encoding_repair import REPAIR_TABLES, ensure_checkpoint_table, repair_table, reset_checkpoint
 
 
-def fix_citations_table(conn, dry_run=False):
-    """修复 citations 表中的乱码数据"""
-    cur = conn.cursor()
-    
-    # 查询所有需要检查的字段
-    cur.execute("""
-        SELECT id, title, snippet, site_name, url
-        FROM citations
-        WHERE title IS NOT NULL OR snippet IS NOT NULL OR site_name IS NOT NULL
-    """)
-    
-    rows = cur.fetchall()
-    fixed_count = 0
-    
-    print(f"\n检查 citations 表: {len(rows)} 条记录")
-    
-    for row in rows:
-        record_id, title, snippet, site_name, url = row
-        updates = {}
-        
-        # 检查并修复 title
-        if title:
-            is_garbled, fixed = detect_garbled_text(title)
-            if is_garbled:
-                updates['title'] = fixed
-                if not dry_run:
-                    print(f"  [ID {record_id}] 修复 title: {title[:50]}... -> {fixed[:50]}...")
-                else:
-                    print(f"  [ID {record_id}] 将修复 title: {title[:50]}...")
-        
-        # 检查并修复 snippet
-        if snippet:
-            is_garbled, fixed = detect_garbled_text(snippet)
-            if is_garbled:
-                updates['snippet'] = fixed
-                if not dry_run:
-                    print(f"  [ID {record_id}] 修复 snippet: {snippet[:50]}... -> {fixed[:50]}...")
-                else:
-                    print(f"  [ID {record_id}] 将修复 snippet: {snippet[:50]}...")
-        
-        # 检查并修复 site_name
-        if site_name:
-            is_garbled, fixed = detect_garbled_text(site_name)
-            if is_garbled:
-                updates['site_name'] = fixed
-                if not dry_run:
-                    print(f"  [ID {record_id}] 修复 site_name: {site_name} -> {fixed}")
-                else:
-                    print(f"  [ID {record_id}] 将修复 site_name: {site_name} -> {fixed}")
-        
-        # 更新数据库
-        if updates and not dry_run:
-            set_clauses = []
-            params = []
-            for field, value in updates.items():
-                set_clauses.append(f"{field} = %s")
-                params.append(value)
-            params.append(record_id)
-            
-            cur.execute(f"""
-                UPDATE citations
-                SET {', '.join(set_clauses)}
-                WHERE id = %s
-            """, params)
-            fixed_count += 1
-    
-    if not dry_run:
-        conn.commit()
-        print(f"\n✅ 已修复 citations 表: {fixed_count} 条记录")
-    else:
-        print(f"\n📊 检测到 citations 表需要修复: {fixed_count} 条记录")
-    
-    return fixed_count
-
-
-def fix_search_queries_table(conn, dry_run=False):
-    """修复 search_queries 表中的乱码数据"""
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id, query
-        FROM search_queries
-        WHERE query IS NOT NULL
-    """)
-    
-    rows = cur.fetchall()
-    fixed_count = 0
-    
-    print(f"\n检查 search_queries 表: {len(rows)} 条记录")
-    
-    for row in rows:
-        record_id, query = row
-        if query:
-            is_garbled, fixed = detect_garbled_text(query)
-            if is_garbled:
-                if not dry_run:
-                    cur.execute("""
-                        UPDATE search_queries
-                        SET query = %s
-                        WHERE id = %s
-                    """, (fixed, record_id))
-                    print(f"  [ID {record_id}] 修复 query: {query[:50]}... -> {fixed[:50]}...")
-                else:
-                    print(f"  [ID {record_id}] 将修复 query: {query[:50]}...")
-                fixed_count += 1
-    
-    if not dry_run:
-        conn.commit()
-        print(f"\n✅ 已修复 search_queries 表: {fixed_count} 条记录")
-    else:
-        print(f"\n📊 检测到 search_queries 表需要修复: {fixed_count} 条记录")
-    
-    return fixed_count
-
-
-def fix_search_records_table(conn, dry_run=False):
-    """修复 search_records 表中的乱码数据"""
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id, keyword, full_answer
-        FROM search_records
-        WHERE keyword IS NOT NULL OR full_answer IS NOT NULL
-    """)
-    
-    rows = cur.fetchall()
-    fixed_count = 0
-    
-    print(f"\n检查 search_records 表: {len(rows)} 条记录")
-    
-    for row in rows:
-        record_id, keyword, full_answer = row
-        updates = {}
-        
-        # 检查并修复 keyword
-        if keyword:
-            is_garbled, fixed = detect_garbled_text(keyword)
-            if is_garbled:
-                updates['keyword'] = fixed
-                if not dry_run:
-                    print(f"  [ID {record_id}] 修复 keyword: {keyword[:50]}... -> {fixed[:50]}...")
-                else:
-                    print(f"  [ID {record_id}] 将修复 keyword: {keyword[:50]}...")
-        
-        # 检查并修复 full_answer
-        if full_answer:
-            is_garbled, fixed = detect_garbled_text(full_answer)
-            if is_garbled:
-                updates['full_answer'] = fixed
-                if not dry_run:
-                    print(f"  [ID {record_id}] 修复 full_answer (长度: {len(full_answer)} -> {len(fixed)})")
-                else:
-                    print(f"  [ID {record_id}] 将修复 full_answer (长度: {len(full_answer)})")
-        
-        # 更新数据库
-        if updates and not dry_run:
-            set_clauses = []
-            params = []
-            for field, value in updates.items():
-                set_clauses.append(f"{field} = %s")
-                params.append(value)
-            params.append(record_id)
-            
-            cur.execute(f"""
-                UPDATE search_records
-                SET {', '.join(set_clauses)}
-                WHERE id = %s
-            """, params)
-            fixed_count += 1
-    
-    if not dry_run:
-        conn.commit()
-        print(f"\n✅ 已修复 search_records 表: {fixed_count} 条记录")
-    else:
-        print(f"\n📊 检测到 search_records 表需要修复: {fixed_count} 条记录")
-    
-    return fixed_count
+def print_fix(dry_run):
+    """生成修复明细的输出回调"""
+    def on_fix(table, row_id, column, old_value, new_value):
+        if column == 'full_answer':
+            detail = f"(长度: {len(old_value)} -> {len(new_value)})"
+        else:
+            detail = f"{old_value[:50]}... -> {new_value[:50]}..."
+        action = "将修复" if dry_run else "修复"
+        print(f"  [{table} ID {row_id}] {action} {column}: {detail}")
+    return on_fix
 
 
 def main():
     parser = argparse.ArgumentParser(description='修复数据库中已存在的乱码数据')
     parser.add_argument('--dry-run', action='store_true', help='只检测不修复，显示将要修复的数据')
-    parser.add_argument('--table', choices=['citations', 'search_queries', 'search_records', 'all'],
+    parser.add_argument('--table', choices=list(REPAIR_TABLES) + ['all'],
                        default='all', help='指定要修复的表')
-    
+    parser.add_argument('--batch-size', type=int, default=None, help='每批处理的行数')
+    parser.add_argument('--workers', type=int, default=None, help='检测进程数')
+    parser.add_argument('--job', default='fix_encoding', help='任务名（检查点按任务名区分）')
+    parser.add_argument('--reset', action='store_true', help='清除检查点，从头开始')
+    parser.add_argument('--backfill', action='store_true', help='回填 text_normalized 标记')
+    parser.add_argument('--quiet', action='store_true', help='不输出逐条修复明细')
+    parser.add_argument('--yes', action='store_true', help='跳过确认提示')
+
     args = parser.parse_args()
-    
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
     if args.dry_run:
         print("🔍 运行模式: 只检测不修复 (dry-run)")
     else:
         print("🔧 运行模式: 检测并修复")
-        response = input("⚠️  警告: 这将修改数据库中的数据。是否继续? (yes/no): ")
-        if response.lower() != 'yes':
-            print("已取消操作")
-            return
-    
+        if not args.yes:
+            response = input("⚠️  警告: 这将修改数据库中的数据。是否继续? (yes/no): ")
+            if response.lower() != 'yes':
+                print("已取消操作")
+                return
+
     print("\n" + "="*60)
     print("开始修复数据库编码问题")
     print("="*60)
-    
+
+    tables = list(REPAIR_TABLES) if args.table == 'all' else [args.table]
+    mark_version = TEXT_NORMALIZATION_VERSION if args.backfill else None
+    # 回填与普通修复的扫描范围不同，检查点分开记录
+    job_name = f"{args.job}_backfill_v{mark_version}" if args.backfill else args.job
+    on_fix = None if args.quiet else print_fix(args.dry_run)
+
     try:
         with get_db_connection() as conn:
+            if not args.dry_run:
+                ensure_checkpoint_table(conn)
+                if args.reset:
+                    for table in tables:
+                        reset_checkpoint(conn, job_name, table)
+
+            total_scanned = 0
             total_fixed = 0
-            
-            if args.table in ['citations', 'all']:
-                total_fixed += fix_citations_table(conn, args.dry_run)
-            
-            if args.table in ['search_queries', 'all']:
-                total_fixed += fix_search_queries_table(conn, args.dry_run)
-            
-            if args.table in ['search_records', 'all']:
-                total_fixed += fix_search_records_table(conn, args.dry_run)
-            
+
+            for table in tables:
+                print(f"\n检查 {table} 表（字段: {', '.join(REPAIR_TABLES[table]['columns'])}）")
+                scanned, fixed = repair_table(
+                    conn,
+                    table,
+                    job_name=job_name,
+                    batch_size=args.batch_size,
+                    workers=args.workers,
+                    dry_run=args.dry_run,
+                    on_fix=on_fix,
+                    mark_version=mark_version
+                )
+                total_scanned += scanned
+                total_fixed += fixed
+                if args.dry_run:
+                    print(f"\n📊 检测到 {table} 表需要修复: {fixed} 条记录（候选 {scanned} 条）")
+                else:
+                    print(f"\n✅ 已修复 {table} 表: {fixed} 条记录（候选 {scanned} 条）")
+
             print("\n" + "="*60)
             if args.dry_run:
                 print(f"📊 检测完成: 共发现 {total_fixed} 条需要修复的记录")
                 print("💡 提示: 运行时不加 --dry-run 参数将执行实际修复")
             else:
                 print(f"✅ 修复完成: 共修复 {total_fixed} 条记录")
+                print("💡 提示: 重新运行只检查上次之后新写入的行，使用 --reset 从头开始")
             print("="*60)
-    
+
+    except KeyboardInterrupt:
+        print("\n⏸️  已中断，已提交的批次已记录在检查点中，重新运行即可继续")
+        sys.exit(130)
     except Exception as e:
         print(f"\n❌ 错误: {e}", file=sys.stderr)
         import traceback
@@ -282,4 +133,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+generate_synthetic_data.py - 生成合成数据，用于 geo_db 的规模测试
+
+按 save_to_db 的写入结构生成任务、记录、拓展词、引用和子查询日志，用 COPY 批量写入
+task_jobs、task_query、search_records、search_queries、citations、executor_sub_query_log，
+同时写入 answer_blobs（压缩回答）、urls（引用网页维度表）并累加 domain_stats。
+
+数据分布尽量贴近线上：
+1. 域名按 Zipf 分布抽取（少数头部站点占大部分引用），同一域名下的网页也按 Zipf 重复出现
+2. 关键词来自有限的关键词池，不同任务会重复查询同一关键词
+3. 每个任务的关键词数、执行轮数、平台组合、每条回答的引用数和回答长度都带随机波动
+4. 任务创建时间分布在最近 --days 天内，数据会落到各个月分区
+
+规模：--scale 1 约 100 个任务、1200 条记录、1.8 万条引用，行数随 --scale 线性增长。
+同一 --seed 生成的内容相同（ID 和 URL 中的批次号除外）。
+
+使用方法:
+    python scripts/generate_synthetic_data.py --scale 10 --yes
+    DB_NAME=geo_monitor_bench python scripts/generate_synthetic_data.py --scale 100 --days 365 --yes
+
+选项:
+    --scale: 规模系数（默认 1）
+    --seed: 随机种子（默认 42）
+    --days: 任务创建时间分布的天数（默认 90）
+    --domains: 域名池大小（默认 5000）
+    --keywords: 关键词池大小（默认 500 × scale）
+    --chunk-tasks: 每个事务写入的任务数（默认 200）
+    --allow-main-db: 允许写入主库 geo_monitor（默认拒绝）
+    --yes: 跳过确认提示
+"""
+import io
+import sys
+import os
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values
+from core.db import DB_CONFIG, get_db_connection
+from core.encoding import TEXT_NORMALIZATION_VERSION
+from core.answers import compress_answer, hash_answer
+from core.urls import url_hash
+
+# 头部站点（其余域名按排名合成）
+HEAD_SITES = [
+    ("zhihu.com", "知乎"), ("sohu.com", "搜狐"), ("163.com", "网易"), ("baidu.com", "百度"),
+    ("toutiao.com", "今日头条"), ("jd.com", "京东"), ("douban.com", "豆瓣"), ("qq.com", "腾讯网"),
+    ("smzdm.com", "什么值得买"), ("bilibili.com", "哔哩哔哩"), ("sina.com.cn", "新浪"),
+    ("csdn.net", "CSDN"), ("xiaohongshu.com", "小红书"), ("ifeng.com", "凤凰网"), ("tmall.com", "天猫")
+]
+
+CATEGORIES = ["瓷砖", "地板", "涂料", "卫浴", "橱柜", "门窗", "吊顶", "壁纸", "灯具", "净水器",
+              "空调", "热水器", "马桶", "沙发", "床垫", "衣柜", "窗帘", "智能锁", "集成灶", "全屋定制"]
+MODIFIERS = ["品牌推荐", "十大品牌", "哪个牌子好", "价格", "排行榜", "怎么选", "口碑", "性价比",
+             "质量怎么样", "选购攻略", "优缺点", "环保等级", "安装注意事项", "2024 推荐"]
+WORDS = ["装修", "品牌", "推荐", "价格", "环保", "质量", "选购", "攻略", "家居", "用户", "评价",
+         "耐用", "设计", "工艺", "材料", "售后", "服务", "安装", "性能", "优势", "市场", "产品",
+         "消费者", "口碑", "认证", "标准", "检测", "适合", "空间", "风格", "预算", "对比", "建议"]
+PUNCTUATION = ["，", "，", "，", "。", "、", "；"]
+
+# (平台组合, 权重)
+PLATFORM_SETS = [(["deepseek", "doubao"], 6), (["deepseek"], 2), (["doubao"], 2)]
+# (执行轮数, 权重)
+ROUNDS = [(1, 50), (2, 25), (3, 12), (5, 8), (10, 5)]
+# 每条回答引用数的对数正态参数 (mu, sigma)，DeepSeek 引用明显多于豆包
+CITATIONS_LOGNORMAL = {"deepseek": (math.log(20), 0.5), "doubao": (math.log(9), 0.5)}
+# 回答字符数的对数正态参数
+ANSWER_LOGNORMAL = (math.log(1200), 0.5)
+FAILURE_RATE = 0.05
+ZIPF_S = 1.1
+PAGES_PER_DOMAIN = 400
+TASKS_PER_SCALE = 100
+
+
+class ZipfSampler:
+    """按排名的 Zipf 分布抽样（rank 从 0 开始）"""
+
+    def __init__(self, rng, n, s=ZIPF_S):
+        self.rng = rng
+        self.population = range(n)
+        self.cum_weights = list(accumulate(1.0 / (k ** s) for k in range(1, n + 1)))
+
+    def sample(self, k=1):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+
+class IdAllocator:
+    """按块从表的 SERIAL 序列预留 ID，COPY 时自行填写 id 以便在内存中建立关联"""
+
+    def __init__(self, cur, table, block=10000):
+        cur.execute("SELECT pg_get_serial_sequence(%s, 'id')", (table,))
+        self.sequence = cur.fetchone()[0]
+        self.block = block
+        self.next_id = self.end_id = 0
+
+    def take(self, cur):
+        if self.next_id >= self.end_id:
+            # nextval 取块起点，setval 把序列推到块末尾，并发写入的其他会话不会拿到块内的 ID
+            cur.execute("SELECT nextval(%s)", (self.sequence,))
+            self.next_id = cur.fetchone()[0]
+            self.end_id = self.next_id + self.block
+            cur.execute("SELECT setval(%s, %s)", (self.sequence, self.end_id - 1))
+        value = self.next_id
+        self.next_id += 1
+        return value
+
+
+def _copy_value(value):
+    """COPY text 格式的字段转义"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def copy_rows(cur, table, columns, rows):
+    """用 COPY FROM STDIN 批量写入一张表"""
+    if not rows:
+        return
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(_copy_value(value) for value in row))
+        buffer.write("\n")
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+class SyntheticGenerator:
+    """在内存中生成一批任务的全部行，再按表 COPY 写入"""
+
+    def __init__(self, cur, args):
+        self.rng = random.Random(args.seed)
+        self.args = args
+        # URL 中带批次号，重复运行不会与已有的 urls 行冲突
+        self.batch = uuid.uuid4().hex[:8]
+        self.now = datetime.now().replace(microsecond=0)
+
+        self.domains = list(HEAD_SITES) + [
+            (f"site{rank}.{'cn' if rank % 3 == 0 else 'com'}", f"站点{rank}")
+            for rank in range(len(HEAD_SITES), max(args.domains, len(HEAD_SITES)))
+        ]
+        self.domain_sampler = ZipfSampler(self.rng, len(self.domains))
+        self.page_sampler = ZipfSampler(self.rng, PAGES_PER_DOMAIN)
+        keyword_pool = args.keywords or int(500 * args.scale) or 1
+        self.keywords = [self._keyword() for _ in range(keyword_pool)]
+        self.keyword_sampler = ZipfSampler(self.rng, len(self.keywords), s=0.8)
+
+        self.ids = {table: IdAllocator(cur, table) for table in (
+            "task_jobs", "task_query", "search_records", "search_queries",
+            "citations", "executor_sub_query_log", "urls"
+        )}
+        # (域名序号, 页面序号) -> url 信息，同一网页的标题和摘要固定
+        self.url_cache = {}
+        self.answer_hashes = set()
+        self.domain_citations = Counter()
+        self.domain_platforms = defaultdict(Counter)
+        self.domain_last_seen = {}
+        self.totals = Counter()
+
+    def _keyword(self):
+        return self.rng.choice(CATEGORIES) + self.rng.choice(MODIFIERS)
+
+    def _text(self, chars):
+        """生成约 chars 个字符的中文文本"""
+        parts = []
+        length = 0
+        while length < chars:
+            word = self.rng.choice(WORDS)
+            parts.append(word)
+            length += len(word)
+            if self.rng.random() < 0.2:
+                parts.append(self.rng.choice(PUNCTUATION))
+                length += 1
+        return "".join(parts)
+
+    def _answer(self):
+        chars = int(self.rng.lognormvariate(*ANSWER_LOGNORMAL))
+        paragraphs = []
+        while chars > 0:
+            size = min(chars, self.rng.randint(80, 300))
+            paragraphs.append(self._text(size) + "。")
+            chars -= size
+        return "\n\n".join(paragraphs)
+
+    def _url(self, cur, rows):
+        """抽取一个网页，首次出现时分配 url_id 并加入 urls 待写入行"""
+        key = (self.domain_sampler.sample()[0], self.page_sampler.sample()[0])
+        cached = self.url_cache.get(key)
+        if cached:
+            return cached
+        domain, site_name = self.domains[key[0]]
+        url = f"https://www.{domain}/article/{self.batch}-{key[1]}"
+        title = self._text(self.rng.randint(8, 30))
+        snippet = self._text(self.rng.randint(60, 200))
+        url_id = self.ids["urls"].take(cur)
+        rows["urls"].append((
+            url_id, url_hash(url, title, snippet, site_name), url, domain, title, snippet, site_name,
+            TEXT_NORMALIZATION_VERSION, self.now
+        ))
+        cached = self.url_cache[key] = (url_id, url, domain)
+        return cached
+
+    def _record(self, cur, rows, task_id, task_query_id, keyword, platform, created_at):
+        """生成一条搜索记录及其拓展词、引用、子查询日志，返回 result_data 条目"""
+        record_id = self.ids["search_records"].take(cur)
+        response_time_ms = int(self.rng.lognormvariate(math.log(30000), 0.4))
+        if self.rng.random() < FAILURE_RATE:
+            rows["search_records"].append((
+                record_id, keyword, platform, "api_task", keyword, None, response_time_ms, "failed",
+                "未返回有效结果", task_id, task_query_id, TEXT_NORMALIZATION_VERSION, created_at, created_at
+            ))
+            return {"keyword": keyword, "platform": platform, "status": "failed",
+                    "error_message": "未返回有效结果", "record_id": record_id, "citations_count": 0}
+
+        answer = self._answer()
+        answer_hash = hash_answer(answer)
+        if answer_hash not in self.answer_hashes:
+            self.answer_hashes.add(answer_hash)
+            codec, body = compress_answer(answer)
+            rows["answer_blobs"].append((answer_hash, codec, len(answer), "\\x" + body.hex(), created_at))
+        rows["search_records"].append((
+            record_id, keyword, platform, "api_task", keyword, answer_hash, response_time_ms, "completed",
+            None, task_id, task_query_id, TEXT_NORMALIZATION_VERSION, created_at, created_at
+        ))
+
+        queries = [keyword + self._text(self.rng.randint(2, 8)) for _ in range(self.rng.randint(1, 5))]
+        for order, query in enumerate(queries, 1):
+            rows["search_queries"].append((
+                self.ids["search_queries"].take(cur), record_id, query, order, TEXT_NORMALIZATION_VERSION, created_at
+            ))
+
+        n_citations = max(1, min(80, int(self.rng.lognormvariate(*CITATIONS_LOGNORMAL[platform]))))
+        cited_queries = set()
+        seen_urls = set()
+        cite_index = 0
+        for _ in range(n_citations):
+            url_id, url, domain = self._url(cur, rows)
+            # citations 的唯一约束是 (record_id, url, created_at)，同一记录内去重
+            if url in seen_urls:
+                continue
+            seen_urls.add(url)
+            cite_index += 1
+            citation_id = self.ids["citations"].take(cur)
+            rows["citations"].append((
+                citation_id, record_id, cite_index, url, domain, url_id, TEXT_NORMALIZATION_VERSION, created_at
+            ))
+            sub_query = self.rng.choice(queries)
+            cited_queries.add(sub_query)
+            rows["executor_sub_query_log"].append((
+                self.ids["executor_sub_query_log"].take(cur), task_query_id, sub_query, record_id, url, domain,
+                url_id, cite_index, citation_id, TEXT_NORMALIZATION_VERSION, created_at
+            ))
+            self.domain_citations[domain] += 1
+            self.domain_platforms[domain][platform] += 1
+            self.domain_last_seen[domain] = max(self.domain_last_seen.get(domain, created_at), created_at)
+
+        # 与 save_to_db 一致：没有关联到任何网页的拓展词单独记一行
+        for query in queries:
+            if query not in cited_queries:
+                rows["executor_sub_query_log"].append((
+                    self.ids["executor_sub_query_log"].take(cur), task_query_id, query, record_id, None, None,
+                    None, None, None, TEXT_NORMALIZATION_VERSION, created_at
+                ))
+
+        return {"keyword": keyword, "platform": platform, "status": "completed", "record_id": record_id,
+                "citations_count": cite_index, "response_time_ms": response_time_ms}
+
+    def _task(self, cur, rows):
+        task_id = self.ids["task_jobs"].take(cur)
+        platforms = self.rng.choices([p for p, _ in PLATFORM_SETS], weights=[w for _, w in PLATFORM_SETS])[0]
+        rounds = self.rng.choices([r for r, _ in ROUNDS], weights=[w for _, w in ROUNDS])[0]
+        n_keywords = max(1, min(20, int(self.rng.lognormvariate(math.log(3), 0.6))))
+        keywords = list(dict.fromkeys(self.keywords[i] for i in self.keyword_sampler.sample(n_keywords)))
+
+        # 每轮间隔约 6 小时，整个任务不晚于当前时间
+        span = timedelta(hours=6 * rounds)
+        created_at = self.now - span - timedelta(seconds=self.rng.randint(0, self.args.days * 86400))
+
+        task_query_ids = {}
+        for keyword in keywords:
+            task_query_ids[keyword] = self.ids["task_query"].take(cur)
+            rows["task_query"].append((task_query_ids[keyword], task_id, keyword, created_at))
+
+        result_data = []
+        for round_index in range(rounds):
+            record_at = created_at + timedelta(hours=6 * round_index)
+            for keyword in keywords:
+                for platform in platforms:
+                    record_at += timedelta(seconds=self.rng.randint(10, 90))
+                    result_data.append(self._record(
+                        cur, rows, task_id, task_query_ids[keyword], keyword, platform, record_at
+                    ))
+
+        rows["task_jobs"].append((
+            task_id,
+            json.dumps(keywords, ensure_ascii=False),
+            json.dumps(platforms),
+            rounds,
+            "done",
+            json.dumps(result_data, ensure_ascii=False),
+            json.dumps({"synthetic": True, "seed": self.args.seed, "batch": self.batch}),
+            created_at,
+            record_at
+        ))
+
+    def write_chunk(self, cur, n_tasks):
+        """生成 n_tasks 个任务并写入（调用方提交事务）"""
+        rows = defaultdict(list)
+        for _ in range(n_tasks):
+            self._task(cur, rows)
+
+        # answer_blobs 以内容哈希为主键，先 COPY 到临时表再跳过已存在的行
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS synthetic_answer_blobs (LIKE answer_blobs) ON COMMIT DELETE ROWS")
+        copy_rows(cur, "synthetic_answer_blobs", ["content_hash", "codec", "raw_length", "body", "created_at"], rows["answer_blobs"])
+        cur.execute("INSERT INTO answer_blobs SELECT * FROM synthetic_answer_blobs ON CONFLICT (content_hash) DO NOTHING")
+
+        copy_rows(cur, "urls", [
+            "id", "url_hash", "url", "domain", "title", "snippet", "site_name", "text_normalized", "created_at"
+        ], rows["urls"])
+        copy_rows(cur, "task_jobs", [
+            "id", "keywords", "platforms", "query_count", "status", "result_data", "settings", "created_at", "updated_at"
+        ], rows["task_jobs"])
+        copy_rows(cur, "task_query", ["id", "task_id", "query", "created_at"], rows["task_query"])
+        copy_rows(cur, "search_records", [
+            "id", "keyword", "platform", "prompt_type", "prompt", "answer_hash", "response_time_ms", "search_status",
+            "error_message", "task_id", "task_query_id", "text_normalized", "created_at", "updated_at"
+        ], rows["search_records"])
+        copy_rows(cur, "search_queries", [
+            "id", "record_id", "query", "query_order", "text_normalized", "created_at"
+        ], rows["search_queries"])
+        copy_rows(cur, "citations", [
+            "id", "record_id", "cite_index", "url", "domain", "url_id", "text_normalized", "created_at"
+        ], rows["citations"])
+        copy_rows(cur, "executor_sub_query_log", [
+            "id", "task_query_id", "sub_query", "record_id", "url", "domain", "url_id", "cite_index",
+            "citation_id", "text_normalized", "created_at"
+        ], rows["executor_sub_query_log"])
+
+        for table, table_rows in rows.items():
+            self.totals[table] += len(table_rows)
+
+    def write_domain_stats(self, cur):
+        """把本次生成的引用累加到 domain_stats"""
+        if not self.domain_citations:
+            return
+        execute_values(cur, """
+            INSERT INTO domain_stats (domain, total_citations, keyword_coverage, platforms, last_seen)
+            VALUES %s
+            ON CONFLICT (domain) DO UPDATE SET
+                total_citations = domain_stats.total_citations + EXCLUDED.total_citations,
+                platforms = domain_stats.platforms || EXCLUDED.platforms,
+                last_seen = GREATEST(domain_stats.last_seen, EXCLUDED.last_seen)
+        """, [
+            (domain, count, 1, json.dumps(self.domain_platforms[domain]), self.domain_last_seen[domain])
+            for domain, count in self.domain_citations.items()
+        ])
+
+
+def ensure_partitions(cur, days):
+    """为生成数据覆盖的月份建好分区，避免数据落入默认分区（未执行 008 迁移时跳过）"""
+    cur.execute("SELECT to_regproc('geo_ensure_partitions') IS NOT NULL")
+    if not cur.fetchone()[0]:
+        return
+    from_month = (datetime.now() - timedelta(days=days + 3)).date().replace(day=1)
+    cur.execute("SELECT geo_ensure_partitions(3, %s)", (from_month,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成数据，用于 geo_db 的规模测试')
+    parser.add_argument('--scale', type=float, default=1.0, help='规模系数（1 约 100 个任务、1.8 万条引用）')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--days', type=int, default=90, help='任务创建时间分布的天数')
+    parser.add_argument('--domains', type=int, default=5000, help='域名池大小')
+    parser.add_argument('--keywords', type=int, default=None, help='关键词池大小（默认 500 × scale）')
+    parser.add_argument('--chunk-tasks', type=int, default=200, help='每个事务写入的任务数')
+    parser.add_argument('--allow-main-db', action='store_true', help='允许写入主库 geo_monitor')
+    parser.add_argument('--yes', action='store_true', help='跳过确认提示')
+
+    args = parser.parse_args()
+
+    database = DB_CONFIG["database"]
+    if database == "geo_monitor" and not args.allow_main_db:
+        print("❌ 合成数据不应写入主库 geo_monitor，请设置 DB_NAME 指向测试库，或加 --allow-main-db", file=sys.stderr)
+        sys.exit(1)
+
+    total_tasks = max(1, int(TASKS_PER_SCALE * args.scale))
+    print(f"🧪 将向 {DB_CONFIG['host']}/{database} 写入约 {total_tasks} 个合成任务（scale={args.scale}, seed={args.seed}）")
+    if not args.yes:
+        response = input("⚠️  警告: 这将向数据库写入大量数据。是否继续? (yes/no): ")
+        if response.lower() != 'yes':
+            print("已取消操作")
+            return
+
+    start = time.perf_counter()
+    try:
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            ensure_partitions(cur, args.days)
+            conn.commit()
+
+            generator = SyntheticGenerator(cur, args)
+            written = 0
+            while written < total_tasks:
+                n_tasks = min(args.chunk_tasks, total_tasks - written)
+                generator.write_chunk(cur, n_tasks)
+                conn.commit()
+                written += n_tasks
+                elapsed = time.perf_counter() - start
+                print(f"  已写入 {written}/{total_tasks} 个任务，"
+                      f"{generator.totals['citations']} 条引用（{elapsed:.1f} 秒）")
+
+            generator.write_domain_stats(cur)
+            conn.commit()
+
+            # 大批量写入后刷新统计信息，否则查询计划仍按空表估算
+            conn.autocommit = True
+            for table in ("task_jobs", "task_query", "search_records", "search_queries", "citations",
+                          "executor_sub_query_log", "urls", "answer_blobs", "domain_stats"):
+                cur.execute(f"ANALYZE {table}")
+
+        print("\n" + "="*60)
+        print(f"✅ 生成完成（{time.perf_counter() - start:.1f} 秒，批次号 {generator.batch}）")
+        for table in ("task_jobs", "task_query", "search_records", "search_queries", "citations",
+                      "executor_sub_query_log", "urls", "answer_blobs"):
+            print(f"  - {table}: {generator.totals[table]} 行")
+        print("="*60)
+
+    except KeyboardInterrupt:
+        print("\n⏸️  已中断，已提交的批次会保留在库中")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n❌ 错误: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
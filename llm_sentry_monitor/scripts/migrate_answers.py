@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+migrate_answers.py - 把 search_records.full_answer 迁移到 answer_blobs（v3.6）
+
+按 id 分批读取仍保存在 full_answer 列中的回答，压缩并按内容哈希写入 answer_blobs，
+回写 answer_hash 并清空 full_answer。每批一个事务，中断后重新运行会跳过已迁移的行。
+未打规范化标记的旧回答在迁移时顺带修复乱码。
+
+使用方法:
+    python scripts/migrate_answers.py [--batch-size N] [--dry-run]
+    python scripts/migrate_answers.py --gc
+
+选项:
+    --batch-size: 每批处理的行数（默认 200）
+    --dry-run: 只统计待迁移行数和压缩效果，不写入
+    --gc: 删除没有任何记录引用的 answer_blobs（归档删除分区后执行）
+"""
+import sys
+import os
+import argparse
+import logging
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2.extras import execute_values
+from core.db import get_db_connection
+from core.encoding import repair_text
+from core.answers import compress_answer, default_codec, store_answers
+
+logger = logging.getLogger(__name__)
+
+
+def _fetch_batch(cur, last_id, batch_size):
+    cur.execute("""
+        SELECT id, full_answer, text_normalized
+        FROM search_records
+        WHERE id > %s AND full_answer IS NOT NULL
+        ORDER BY id
+        LIMIT %s
+    """, (last_id, batch_size))
+    return cur.fetchall()
+
+
+def migrate(conn, batch_size, dry_run=False):
+    """
+    分批迁移
+
+    Returns:
+        (迁移行数, 原文字节数, 压缩后字节数)
+    """
+    cur = conn.cursor()
+    last_id = 0
+    migrated = raw_bytes = stored_bytes = 0
+    seen_hashes = set()
+    try:
+        while True:
+            rows = _fetch_batch(cur, last_id, batch_size)
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            texts = [repair_text(full_answer, normalized) or "" for _, full_answer, normalized in rows]
+            for text in texts:
+                if not text:
+                    continue
+                raw_bytes += len(text.encode("utf-8"))
+                # 统计去重后的实际存储量
+                text_hash = hash(text)
+                if text_hash not in seen_hashes:
+                    seen_hashes.add(text_hash)
+                    stored_bytes += len(compress_answer(text)[1])
+
+            migrated += len(rows)
+            if not dry_run:
+                hashes = store_answers(cur, texts)
+                execute_values(cur, """
+                    UPDATE search_records AS t
+                    SET answer_hash = v.answer_hash, full_answer = NULL
+                    FROM (VALUES %s) AS v(id, answer_hash)
+                    WHERE t.id = v.id
+                """, [(row[0], answer_hash) for row, answer_hash in zip(rows, hashes)],
+                    template="(%s::integer, %s::text)", page_size=len(rows))
+                conn.commit()
+
+            logger.info(f"已处理 {migrated} 行（last_id={last_id}）")
+    finally:
+        cur.close()
+    return migrated, raw_bytes, stored_bytes
+
+
+def collect_garbage(conn):
+    """删除没有记录引用的 answer_blobs，返回删除行数"""
+    cur = conn.cursor()
+    cur.execute("""
+        DELETE FROM answer_blobs b
+        WHERE NOT EXISTS (
+            SELECT 1 FROM search_records sr WHERE sr.answer_hash = b.content_hash
+        )
+    """)
+    deleted = cur.rowcount
+    conn.commit()
+    cur.close()
+    return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把 search_records.full_answer 迁移到 answer_blobs')
+    parser.add_argument('--batch-size', type=int, default=200, help='每批处理的行数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不写入')
+    parser.add_argument('--gc', action='store_true', help='删除无引用的 answer_blobs')
+
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    try:
+        with get_db_connection() as conn:
+            if args.gc:
+                deleted = collect_garbage(conn)
+                print(f"✅ 已删除 {deleted} 条无引用的回答")
+                return
+
+            print(f"🔧 压缩算法: {default_codec()}{'（dry-run）' if args.dry_run else ''}")
+            migrated, raw_bytes, stored_bytes = migrate(conn, args.batch_size, dry_run=args.dry_run)
+
+            print("\n" + "="*60)
+            ratio = f"{stored_bytes / raw_bytes * 100:.1f}%" if raw_bytes else "-"
+            action = "待迁移" if args.dry_run else "已迁移"
+            print(f"✅ {action} {migrated} 条记录，原文 {raw_bytes / 1024 / 1024:.1f} MB，去重压缩后 {stored_bytes / 1024 / 1024:.1f} MB（{ratio}）")
+            if not args.dry_run and migrated:
+                print("💡 提示: 执行 VACUUM ANALYZE search_records; 回收 full_answer 占用的空间")
+            print("="*60)
+
+    except KeyboardInterrupt:
+        print("\n⏸️  已中断，已提交的批次不会重复迁移，重新运行即可继续")
+        sys.exit(130)
+    except Exception as e:
+        print(f"\n❌ 错误: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,259 +1,148 @@
 """
 stats.py - GEO 深度洞察报告（增强版）
 功能：jieba 分词、SoV 百分比、时间趋势分析
+数据查询与计算见 core/reports.py，本脚本只负责渲染表格
 """
 import os
-import jieba
-import jieba.analyse
-from datetime import datetime, timedelta
+import argparse
 from dotenv import load_dotenv
 import os
 from tabulate import tabulate
-from collections import Counter
 from core.db import get_db_cursor
+from core import reports
+from core.report_filters import ReportFilters, add_filter_arguments, filters_from_args
 
 # 根据 ENV_FILE 环境变量加载不同的 .env 文件
 env_file = os.getenv("ENV_FILE", ".env")
 load_dotenv(env_file)
 
-# 自定义词典（行业术语）
-CUSTOM_WORDS = [
-    "土巴兔", "装修公司", "家装", "软装", "硬装", "全包", "半包",
-    "DeepSeek", "豆包", "Kimi", "文心一言", "通义千问"
-]
-
-for word in CUSTOM_WORDS:
-    jieba.add_word(word)
-
-# 停用词
-STOP_WORDS = {
-    '什么', '怎么', '如何', '哪些', '为什么', '是否', '可以', '能否',
-    '2024', '2025', '的', '了', '在', '是', '和', '与', '或', '等',
-    '一个', '这个', '那个', '进行', '问题', '相关', '关于', '有关'
-}
-
 def print_header(title):
     """打印漂亮的标题"""
     print("\n" + "="*80)
     print(f"📊 {title}")
     print("="*80 + "\n")
 
-def get_date_range_filter(days=None):
-    """生成日期过滤条件"""
-    if days:
-        cutoff = datetime.now() - timedelta(days=days)
-        return f"WHERE created_at >= '{cutoff.strftime('%Y-%m-%d')}'"
-    return ""
-
-def analyze_trust_sources(days=None):
+def analyze_trust_sources(filters=None):
     """1. 核心信任源分析（含 SoV 百分比）"""
-    print_header("核心信任源分析 - 哪些网站在多个关键词下都被 AI 信任？")
+    filters = filters or ReportFilters()
+    print_header(f"核心信任源分析 - 哪些网站在多个关键词下都被 AI 信任？（{filters.describe()}）")
     
     conn, cur = get_db_cursor()
+    rows = reports.trust_sources(conn, filters)
     
-    date_filter = get_date_range_filter(days)
-    
-    cur.execute(f"""
-        WITH citation_stats AS (
-            SELECT 
-                domain,
-                COUNT(DISTINCT record_id) as keyword_coverage,
-                COUNT(*) as total_citations,
-                STRING_AGG(DISTINCT site_name, ' | ') as site_names
-            FROM citations
-            {date_filter}
-            GROUP BY domain
-        ),
-        total AS (
-            SELECT SUM(total_citations) as grand_total FROM citation_stats
-        )
-        SELECT 
-            cs.domain,
-            cs.keyword_coverage as "覆盖关键词数",
-            cs.total_citations as "总引用次数",
-            ROUND(cs.total_citations * 100.0 / t.grand_total, 2) as "SoV(%)",
-            cs.site_names as "站点名称"
-        FROM citation_stats cs, total t
-        ORDER BY cs.keyword_coverage DESC, cs.total_citations DESC
-        LIMIT 15
-    """)
-    
-    rows = cur.fetchall()
-    print(tabulate(rows, headers=["域名", "覆盖词数", "总引用数", "SoV(%)", "站点名称"], tablefmt="grid"))
+    table_data = [[r["domain"], r["keyword_coverage"], r["total_citations"], r["sov"], r["site_names"]] for r in rows]
+    print(tabulate(table_data, headers=["域名", "覆盖词数", "总引用数", "SoV(%)", "站点名称"], tablefmt="grid"))
     
     conn.close()
 
-def analyze_search_intent():
+def analyze_search_intent(filters=None):
     """2. AI 搜索意图洞察（jieba 分词版）"""
-    print_header("AI 搜索意图洞察 - AI 最关注哪些核心概念？")
+    filters = filters or ReportFilters()
+    print_header(f"AI 搜索意图洞察 - AI 最关注哪些核心概念？（{filters.describe()}）")
     
     conn, cur = get_db_cursor()
-    cur.execute("SELECT query FROM search_queries")
-    queries = cur.fetchall()
-    
-    # 使用 jieba 分词
-    all_words = []
-    for (query_text,) in queries:
-        if not query_text:
-            continue
-        # 使用 TF-IDF 提取关键词（更智能）
-        keywords = jieba.analyse.extract_tags(query_text, topK=5, withWeight=False)
-        # 或使用普通分词
-        words = jieba.lcut(query_text)
-        
-        # 合并两种方式的结果
-        all_words.extend([w for w in words + keywords if len(w) > 1 and w not in STOP_WORDS])
-    
-    word_counts = Counter(all_words).most_common(20)
+    rows = reports.search_intent(conn, filters, write_cache=True)
     
-    print(tabulate(word_counts, headers=["核心概念 (jieba分词)", "出现频次"], tablefmt="grid"))
+    table_data = [[r["term"], r["count"]] for r in rows]
+    print(tabulate(table_data, headers=["核心概念 (jieba分词)", "出现频次"], tablefmt="grid"))
     
     conn.close()
 
-def analyze_brand_exposure():
+def analyze_brand_exposure(filters=None):
     """3. 品牌曝光矩阵"""
-    print_header("品牌曝光矩阵 - 每个关键词下排名前 3 的竞争对手")
+    filters = filters or ReportFilters()
+    print_header(f"品牌曝光矩阵 - 每个关键词下排名前 3 的竞争对手（{filters.describe()}）")
     
     conn, cur = get_db_cursor()
-    cur.execute("SELECT DISTINCT keyword FROM search_records ORDER BY keyword")
-    keywords = [r[0] for r in cur.fetchall()]
-    
-    matrix_data = []
-    for kw in keywords:
-        cur.execute("""
-            SELECT domain, COUNT(*) as count, STRING_AGG(DISTINCT site_name, ',') as names
-            FROM citations c
-            JOIN search_records r ON c.record_id = r.id
-            WHERE r.keyword = %s
-            GROUP BY domain
-            ORDER BY count DESC
-            LIMIT 3
-        """, (kw,))
-        
-        top_sites = []
-        for domain, count, names in cur.fetchall():
-            name_display = names.split(',')[0] if names else domain
-            top_sites.append(f"{name_display}({count})")
-        
-        matrix_data.append([kw, " | ".join(top_sites)])
+    rows = reports.brand_exposure(conn, filters)
     
+    matrix_data = [
+        [r["keyword"], " | ".join(f"{site['name'] or site['domain']}({site['count']})" for site in r["top_sites"])]
+        for r in rows
+    ]
     print(tabulate(matrix_data, headers=["监控关键词", "头部竞争域名 (引用次数)"], tablefmt="grid"))
     
     conn.close()
 
-def analyze_time_trends(days=7):
+def analyze_time_trends(filters=None):
     """4. 时间趋势分析（新增）"""
-    print_header(f"时间趋势分析 - 最近 {days} 天的域名引用变化")
+    filters = (filters or ReportFilters()).with_default_days(7)
+    print_header(f"时间趋势分析 - 域名引用变化（{filters.describe()}）")
     
     conn, cur = get_db_cursor()
+    rows = reports.time_trends(conn, filters)
     
-    # 获取 Top 5 域名
-    cur.execute("""
-        SELECT domain 
-        FROM citations 
-        WHERE created_at >= CURRENT_DATE - INTERVAL '%s days'
-        GROUP BY domain 
-        ORDER BY COUNT(*) DESC 
-        LIMIT 5
-    """ % days)
-    
-    top_domains = [r[0] for r in cur.fetchall()]
-    
-    if not top_domains:
+    if not rows:
         print("⚠️ 暂无数据")
         conn.close()
         return
     
-    # 按天统计
-    cur.execute("""
-        SELECT 
-            DATE(created_at) as date,
-            domain,
-            COUNT(*) as citation_count
-        FROM citations
-        WHERE domain = ANY(%s) AND created_at >= CURRENT_DATE - INTERVAL '%s days'
-        GROUP BY DATE(created_at), domain
-        ORDER BY date DESC, citation_count DESC
-    """ % ("%s", days), (top_domains,))
-    
-    rows = cur.fetchall()
-    print(tabulate(rows, headers=["日期", "域名", "引用次数"], tablefmt="grid"))
+    table_data = [[r["date"], r["domain"], r["citation_count"]] for r in rows]
+    print(tabulate(table_data, headers=["日期", "域名", "引用次数"], tablefmt="grid"))
     
     conn.close()
 
-def analyze_platform_comparison():
+def analyze_platform_comparison(filters=None):
     """5. 平台对比分析（新增）"""
-    print_header("平台对比分析 - DeepSeek vs 豆包")
+    filters = filters or ReportFilters()
+    print_header(f"平台对比分析 - DeepSeek vs 豆包（{filters.describe()}）")
     
     conn, cur = get_db_cursor()
+    rows = reports.platform_comparison(conn, filters)
     
-    cur.execute("""
-        SELECT 
-            platform as "平台",
-            COUNT(DISTINCT keyword) as "监控关键词数",
-            COUNT(*) as "总搜索次数",
-            ROUND(AVG(response_time_ms)/1000.0, 2) as "平均响应时间(秒)",
-            SUM(CASE WHEN search_status = 'completed' THEN 1 ELSE 0 END) as "成功次数",
-            SUM(CASE WHEN search_status = 'failed' THEN 1 ELSE 0 END) as "失败次数"
-        FROM search_records
-        GROUP BY platform
-    """)
-    
-    rows = cur.fetchall()
-    print(tabulate(rows, headers=["平台", "关键词数", "搜索次数", "平均响应(秒)", "成功", "失败"], tablefmt="grid"))
+    table_data = [
+        [r["platform"], r["keyword_count"], r["search_count"], r["avg_response_seconds"], r["completed_count"], r["failed_count"]]
+        for r in rows
+    ]
+    print(tabulate(table_data, headers=["平台", "关键词数", "搜索次数", "平均响应(秒)", "成功", "失败"], tablefmt="grid"))
     
     conn.close()
 
-def analyze_response_performance():
+def analyze_response_performance(filters=None):
     """6. 响应性能分析（新增）"""
-    print_header("响应性能分析 - 搜索速度统计")
+    filters = filters or ReportFilters()
+    print_header(f"响应性能分析 - 搜索速度统计（{filters.describe()}）")
     
     conn, cur = get_db_cursor()
+    rows = reports.response_performance(conn, filters)
     
-    cur.execute("""
-        SELECT 
-            keyword as "关键词",
-            platform as "平台",
-            ROUND(response_time_ms/1000.0, 2) as "响应时间(秒)",
-            (SELECT COUNT(*) FROM citations WHERE record_id = search_records.id) as "引用数",
-            (SELECT COUNT(*) FROM search_queries WHERE record_id = search_records.id) as "拓展词数",
-            created_at as "执行时间"
-        FROM search_records
-        WHERE search_status = 'completed' AND response_time_ms IS NOT NULL
-        ORDER BY created_at DESC
-        LIMIT 10
-    """)
-    
-    rows = cur.fetchall()
-    print(tabulate(rows, headers=["关键词", "平台", "响应时间(秒)", "引用数", "拓展词数", "执行时间"], tablefmt="grid"))
+    table_data = [
+        [r["keyword"], r["platform"], r["response_seconds"], r["citation_count"], r["query_count"], r["created_at"]]
+        for r in rows
+    ]
+    print(tabulate(table_data, headers=["关键词", "平台", "响应时间(秒)", "引用数", "拓展词数", "执行时间"], tablefmt="grid"))
     
     conn.close()
 
 def main():
     """主函数"""
+    parser = add_filter_arguments(argparse.ArgumentParser(description="GEO 深度洞察报告（增强版）"))
+    filters = filters_from_args(parser.parse_args())
+    
     print("\n" + "🚀 "*20)
     print("    GEO 深度洞察报告 (增强版 v2.0)")
     print("    集成：jieba分词 | SoV分析 | 时间趋势 | 平台对比")
+    print(f"    过滤条件：{filters.describe()}")
     print("🚀 "*20)
     
     try:
-        # 1. 核心信任源（近 7 天）
-        analyze_trust_sources(days=7)
+        # 1. 核心信任源（未指定日期时默认近 7 天）
+        analyze_trust_sources(filters.with_default_days(7))
         
         # 2. AI 搜索意图（jieba 分词）
-        analyze_search_intent()
+        analyze_search_intent(filters)
         
         # 3. 品牌曝光矩阵
-        analyze_brand_exposure()
+        analyze_brand_exposure(filters)
         
-        # 4. 时间趋势分析
-        analyze_time_trends(days=7)
+        # 4. 时间趋势分析（未指定日期时默认近 7 天）
+        analyze_time_trends(filters)
         
         # 5. 平台对比分析
-        analyze_platform_comparison()
+        analyze_platform_comparison(filters)
         
         # 6. 响应性能分析
-        analyze_response_performance()
+        analyze_response_performance(filters)
         
         print("\n" + "="*80)
         print("✅ 报告生成完成！")
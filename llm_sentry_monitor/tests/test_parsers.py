@@ -0,0 +1,21 @@
+"""
+SSE 解析回放：合成素材和 benchmarks/recordings/ 下的录制素材
+（基准只测耗时，解析器认不出事件时结果为空也不会失败）
+"""
+import pytest
+
+pytest.importorskip("tldextract")
+
+from benchmarks.fixtures import synthetic_fixtures, recorded_fixtures
+from benchmarks.bench_parsers import SSE_TEXT_PLATFORMS, parse_fixture
+
+FIXTURES = synthetic_fixtures(["small"]) + recorded_fixtures()
+
+
+@pytest.mark.parametrize("name,platform,body", FIXTURES, ids=[fixture[0] for fixture in FIXTURES])
+def test_fixture_parsed(name, platform, body):
+    queries, citations, text = parse_fixture(platform, body)
+    if platform in SSE_TEXT_PLATFORMS:
+        assert text, f"{name}: 没有解析出回答文本"
+    if not name.startswith("recorded_"):
+        assert queries and citations
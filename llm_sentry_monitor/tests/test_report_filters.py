@@ -0,0 +1,36 @@
+"""
+ReportFilters 的最近 N 天是滚动窗口（NOW() - N 天），不按零点对齐；
+同样的参数必须得到相等的过滤条件，报告缓存以它为键
+
+运行：cd llm_sentry_monitor && python -m pytest tests
+"""
+from datetime import datetime
+
+from core.report_filters import ReportFilters
+
+
+def test_days_is_rolling_window():
+    clauses, params = ReportFilters.build(days=30).conditions("c.created_at")
+    assert clauses == ["c.created_at >= NOW() - %s * INTERVAL '1 day'"]
+    assert params == [30]
+
+
+def test_start_overrides_days():
+    start = datetime(2025, 1, 1)
+    filters = ReportFilters.build(days=30, start=start)
+    clauses, params = filters.conditions("c.created_at")
+    assert clauses == ["c.created_at >= %s"]
+    assert params == [start]
+
+
+def test_default_days_only_without_date_range():
+    assert ReportFilters().with_default_days(7).days == 7
+    ranged = ReportFilters.build(end=datetime(2025, 2, 1))
+    assert ranged.with_default_days(7) == ranged
+
+
+def test_same_arguments_same_cache_key():
+    first = ReportFilters.build(days=7, platforms=["DeepSeek"])
+    second = ReportFilters.build(days=7, platforms=[" deepseek "])
+    assert first == second
+    assert hash(first) == hash(second)
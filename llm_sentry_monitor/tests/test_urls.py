@@ -0,0 +1,54 @@
+"""
+url_hash（core/urls.py）与迁移脚本中的 geo_url_hash()（geo_db/migrations/011）必须逐字节一致：
+否则 Python 写入的行与 SQL 回填 / 修复的行对不上，同一网页会出现两行
+
+运行：cd llm_sentry_monitor && python -m pytest tests
+SQL 对照需要可连接的数据库（DB_* 环境变量），函数定义直接取自迁移脚本、建在 pg_temp 中，不需要执行过迁移
+"""
+import re
+from pathlib import Path
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("tldextract")
+
+from core.urls import url_hash
+
+MIGRATION = Path(__file__).resolve().parents[2] / "geo_db" / "migrations" / "011_add_urls_dimension.sql"
+
+CASES = [
+    ("https://example.com/a", "标题", "摘要 snippet", "站点"),
+    ("https://example.com/a", None, "", None),
+    ("https://example.com/a", "", None, ""),
+    ("https://example.com/路径?q=中文&x=1", "Ünïcödé — “quotes”", "多行\n摘要\t制表符", "😀 emoji"),
+    ("https://example.com/b", "title with \x1f separator", "", "site"),
+]
+
+
+def test_url_hash_golden():
+    assert url_hash("https://example.com/a", "标题", "摘要 snippet", "站点") == \
+        "8def48dfed59d24eb0009c6ac8c42010f54ecff444552be640565172ae25d64e"
+    # NULL 与空串等价
+    assert url_hash("https://example.com/a", None, "", None) == url_hash("https://example.com/a", "", None, "")
+
+
+def test_url_hash_matches_sql():
+    import psycopg2
+    from core.db import DB_CONFIG
+
+    match = re.search(r"CREATE OR REPLACE FUNCTION geo_url_hash\(.*?\$\$ LANGUAGE sql IMMUTABLE;", MIGRATION.read_text(encoding="utf-8"), re.S)
+    assert match, f"{MIGRATION.name} 中找不到 geo_url_hash 的定义"
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"数据库不可用：{e}")
+    try:
+        conn.set_client_encoding("UTF8")
+        cur = conn.cursor()
+        cur.execute(match.group(0).replace("FUNCTION geo_url_hash(", "FUNCTION pg_temp.geo_url_hash(", 1))
+        for case in CASES:
+            cur.execute("SELECT pg_temp.geo_url_hash(%s, %s, %s, %s)", case)
+            assert cur.fetchone()[0] == url_hash(*case), case
+    finally:
+        conn.rollback()
+        conn.close()